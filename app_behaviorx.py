@@ -26,99 +26,28 @@ sys.path.append('src')
 sys.path.append('config') 
 sys.path.append('integration')
 
-try:
-    from integration.app_behaviorx_extensions import SafetyGraphExtensions
-    EXTENSIONS_AVAILABLE = True
-    print("✅ Extensions multi-sources chargées avec succès")
-except ImportError as e:
-    print(f"ℹ️ Extensions multi-sources non disponibles: {e}")
-    EXTENSIONS_AVAILABLE = False
-
-# =====================================
-# NOUVEAU - Oracle HSE Module 
 # =====================================
-try:
-    import predictions_multi_horizons
-    ORACLE_HSE_AVAILABLE = True
-    print("✅ Module Oracle HSE chargé avec succès")
-except ImportError as e:
-    print(f"ℹ️ Module Oracle HSE non disponible: {e}")
-    ORACLE_HSE_AVAILABLE = False
-    
- # =====================================
-# NOUVEAU - Module XAI Oracle HSE
+# REGISTRE DE MODULES PARESSEUX
 # =====================================
-try:
-    import xai_oracle_hse
-    XAI_AVAILABLE = True
-    print("✅ Module XAI Oracle HSE chargé avec succès")
-except ImportError as e:
-    print(f"ℹ️ Module XAI Oracle HSE non disponible: {e}")
-    XAI_AVAILABLE = False   
+# Extensions, Oracle HSE, XAI, analytics, dashboards... sont déclarés avec
+# l'onglet ou le mode qui les utilise et importés au premier usage, une
+# seule fois par processus (Streamlit ré-exécute ce script à chaque interaction)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from optimization.module_registry import get_app_registry
 
-# ===================================================================
-# ANALYTICS SOPHISTIQUÉS - MODULES DU 22 JUILLET  
-# ===================================================================
-try:
-    import sys
-    from pathlib import Path
-    sys.path.append(str(Path(__file__).parent / "src" / "analytics"))
-    from predictive_models import display_predictive_analytics_interface, display_predictive_analytics_interface_v2
-    from pattern_recognition import display_pattern_recognition_interface
-    from anomaly_detection import display_anomaly_detection_interface
-    ANALYTICS_SOPHISTICATED = True
-    print("✅ Analytics sophistiqués chargés avec succès")
-except ImportError as e:
-    ANALYTICS_SOPHISTICATED = False
-    print(f"❌ Erreur import analytics sophistiqués: {e}")
-
-def clean_dataframe_for_arrow(df):
-    """Nettoie automatiquement un DataFrame pour compatibilité Arrow"""
-    if df is None or df.empty:
-        return df
-    
-    df_clean = df.copy()
-    
-    # CORRECTION SPÉCIFIQUE "Temps Résolution (h)"
-    if 'Temps Résolution (h)' in df_clean.columns:
-        df_clean['Temps Résolution (h)'] = df_clean['Temps Résolution (h)'].replace({
-            'En cours': np.nan, 'en cours': np.nan, 'Pending': np.nan, 'N/A': np.nan, '': np.nan
-        })
-        try:
-            df_clean['Temps Résolution (h)'] = pd.to_numeric(df_clean['Temps Résolution (h)'], errors='coerce')
-        except:
-            df_clean['Temps Résolution (h)'] = df_clean['Temps Résolution (h)'].astype(str)
-    
-    # NETTOYAGE GLOBAL
-    for col in df_clean.columns:
-        if df_clean[col].dtype == 'object':
-            df_clean[col] = df_clean[col].replace({'En cours': np.nan, 'en cours': np.nan, 'Pending': np.nan, 'N/A': np.nan, '': np.nan})
-            try:
-                sample = df_clean[col].dropna().head(5)
-                if len(sample) > 0:
-                    test_numeric = pd.to_numeric(sample, errors='coerce')
-                    if not test_numeric.isna().all():
-                        df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce')
-                    else:
-                        df_clean[col] = df_clean[col].astype(str).replace('nan', np.nan)
-            except:
-                df_clean[col] = df_clean[col].astype(str).replace('nan', np.nan)
-    
-    return df_clean
+MODULES = get_app_registry(os.path.dirname(os.path.abspath(__file__)))
 
 # =======================================================================
 import streamlit as st
 
-# ===== ENRICHISSEMENT CNESST SAFETYGRAPH =====
-try:
-    from src.enrichments.cnesst_layer import enrich_safetygraph_context, get_cnesst_status
-    CNESST_ENRICHED = True
-    print('✅ Enrichissement CNESST activé')
-except ImportError:
-    CNESST_ENRICHED = False
-    print('⚠️ Mode standard - Enrichissements CNESST non disponibles')
-    def enrich_safetygraph_context(ctx): return ctx
-    def get_cnesst_status(): return {'status': 'disabled', 'message': 'Non disponible'}
+# ===== ENRICHISSEMENT CNESST SAFETYGRAPH (chargé au premier appel) =====
+def enrich_safetygraph_context(ctx):
+    enrich = MODULES.get('cnesst_layer', 'enrich_safetygraph_context')
+    return enrich(ctx) if enrich else ctx
+
+def get_cnesst_status():
+    status = MODULES.get('cnesst_layer', 'get_cnesst_status')
+    return status() if status else {'status': 'disabled', 'message': 'Non disponible'}
 
 import plotly.express as px
 import plotly.graph_objects as go
@@ -130,44 +59,40 @@ from datetime import datetime
 from pathlib import Path
 
 # =======================================================================
-# CORRECTIF GLOBAL PYARROW - SOLUTION DÉFINITIVE
+# CORRECTIF GLOBAL PYARROW - SANITIZER À PLANS EN CACHE
 # =======================================================================
 
 import numpy as np
+from optimization.arrow_sanitizer import DISPLAY_MAX_ROWS, get_arrow_sanitizer, page_widget_key
+
+ARROW_SANITIZER = get_arrow_sanitizer()
 
-# SOLUTION DÉFINITIVE : MONKEY PATCH STREAMLIT DATAFRAME
-def safe_dataframe_display(data, *args, **kwargs):
-    """Version sécurisée de st.dataframe qui corrige automatiquement les erreurs PyArrow"""
+def safe_dataframe_display(data, *args, max_rows=None, page_size=None, page_key=None, **kwargs):
+    """
+    Version sécurisée de st.dataframe (erreurs PyArrow corrigées)
+    
+    Le plan de conversion est mis en cache par forme de DataFrame; les
+    DataFrames volumineux sont sous-échantillonnés (max_rows) ou paginés
+    (page_size + page_key) avant conversion et envoi au navigateur.
+    Sans page_key, la clé du sélecteur de page dérive des colonnes et du
+    nombre de lignes: elle reste stable d'une ré-exécution à l'autre.
+    """
     if isinstance(data, pd.DataFrame):
-        df_safe = data.copy()
-        
-        # CORRECTION SPÉCIFIQUE COLONNE "Temps Résolution (h)"
-        if 'Temps Résolution (h)' in df_safe.columns:
-            df_safe['Temps Résolution (h)'] = df_safe['Temps Résolution (h)'].replace({
-                'En cours': np.nan,
-                'Pending': np.nan,
-                'N/A': np.nan,
-                '': np.nan
-            })
-            
-            try:
-                df_safe['Temps Résolution (h)'] = pd.to_numeric(df_safe['Temps Résolution (h)'], errors='coerce')
-            except:
-                df_safe['Temps Résolution (h)'] = df_safe['Temps Résolution (h)'].astype(str)
-        
-        # CORRECTION GLOBALE POUR TOUTES LES COLONNES MIXTES
-        for col in df_safe.columns:
-            if df_safe[col].dtype == 'object':
-                sample_values = df_safe[col].dropna().head(10)
-                if len(sample_values) > 0:
-                    try:
-                        numeric_converted = pd.to_numeric(sample_values, errors='coerce')
-                        if not numeric_converted.isna().all():
-                            df_safe[col] = pd.to_numeric(df_safe[col], errors='coerce')
-                        else:
-                            df_safe[col] = df_safe[col].astype(str)
-                    except:
-                        df_safe[col] = df_safe[col].astype(str)
+        page = None
+        if page_size and len(data) > page_size:
+            n_pages = -(-len(data) // page_size)
+            page = st.number_input("Page", min_value=1, max_value=n_pages, value=1,
+                                   key=page_key or page_widget_key(data)) - 1
+        
+        df_safe, info = ARROW_SANITIZER.prepare(
+            data, max_rows=max_rows or DISPLAY_MAX_ROWS, page=page,
+            page_size=page_size if page is not None else None)
+        
+        if info['mode'] == 'downsampled':
+            st.warning(f"📉 Aperçu échantillonné: {info['shown_rows']:,} lignes affichées sur "
+                       f"{info['total_rows']:,} (une ligne sur ~{info['total_rows'] // info['shown_rows']})")
+        elif info['mode'] == 'page':
+            st.caption(f"📄 Page {info['page'] + 1}/{info['n_pages']} - {info['total_rows']:,} lignes")
         
         return st._original_dataframe(df_safe, *args, **kwargs)
     
@@ -179,44 +104,6 @@ if not hasattr(st, '_original_dataframe'):
     st.dataframe = safe_dataframe_display
     print("✅ Correctif PyArrow appliqué globalement")
 
-# =======================================================================
-# IMPORT ORCHESTRATEUR BEHAVIORX (CONFIRMÉ ACCESSIBLE)
-# =======================================================================
-
-# Import orchestrateur BehaviorX
-try:
-    sys.path.append('src')
-    from agents.collecte.orchestrateur_behaviorx_unified import BehaviorXSafetyOrchestrator
-    ORCHESTRATOR_AVAILABLE = True
-    print("✅ Orchestrateur BehaviorX chargé avec succès")
-except Exception as e:
-    ORCHESTRATOR_AVAILABLE = False
-    print(f"⚠️ Orchestrateur non disponible: {e}")
-
-# Import orchestrateur BehaviorX
-try:
-    sys.path.append('src')
-    from agents.collecte.orchestrateur_behaviorx_unified import BehaviorXSafetyOrchestrator
-    BEHAVIORX_AVAILABLE = True
-    print("✅ Orchestrateur BehaviorX chargé avec succès")
-except Exception as e:
-    BEHAVIORX_AVAILABLE = False
-    print(f"⚠️ Orchestrateur non disponible: {e}")
-
-# === OPTIMISATION PERFORMANCE ===
-import sys
-import os
-sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
-
-try:
-    from optimization.performance_optimizer import SafetyGraphOptimizer
-    OPTIMIZER_AVAILABLE = True
-    optimizer = SafetyGraphOptimizer()
-    print("✅ Optimiseur performance activé")
-except ImportError:
-    OPTIMIZER_AVAILABLE = False
-    print("⚠️ Optimiseur non disponible")
-
 # =======================================================================
 # NOUVELLES FONCTIONS ORCHESTRATEUR BEHAVIORX
 # =======================================================================
@@ -312,8 +199,8 @@ def display_behaviorx_orchestrated():
     
     # DÉCLENCHEMENT - Version améliorée (CORRIGÉ - DANS LA FONCTION)
     if button_clicked:
-        # Lancer le workflow complet
-        execute_orchestrator_workflow()
+        # Lancer le workflow complet (job réutilisé si déjà exécuté avec ces paramètres)
+        execute_orchestrator_workflow(enterprise_id, sector_code, workflow_mode)
     elif auto_execute:
         st.info("⚡ Exécution forcée - Mode test")
         # Version simplifiée pour test
@@ -330,186 +217,166 @@ def display_behaviorx_orchestrated():
         with col4:
             st.metric("⚠️ Zones Aveugles", "0", delta="Aucune")
         
-def execute_orchestrator_workflow():
-    """Exécute le workflow orchestrateur avec affichage complet"""
+def build_orchestrator_inputs(enterprise_id, sector_code, workflow_mode):
+    """Entrées du pipeline A1→A2→AN1→R1 (déterministes: mêmes choix, même job)"""
+    return {
+        "enterprise_id": enterprise_id,
+        "workflow_mode": workflow_mode,
+        "evaluation_data": {
+            "employee_id": f"{enterprise_id}_EVAL",
+            "responses": {
+                "safety_awareness": 8,
+                "risk_perception": 7,
+                "epi_usage": 9,
+                "procedure_compliance": 6,
+                "team_communication": 8
+            }
+        },
+        "observation_data": {
+            "location": "Chantier principal",
+            "observation_type": "terrain_inspection" if workflow_mode != "self_assessment" else "self_assessment",
+            "environmental_conditions": {"lighting": "adequate", "noise_level": "high", "temperature": "normal"}
+        },
+        "incident_cnesst": {
+            "NATURE_LESION": "BLES. TRAUMA. MUSCLES,TENDONS,ETC.",
+            "GENRE": "EFFORT EXCESSIF",
+            "SECTEUR_SCIAN": sector_code,
+            "IND_LESION_TMS": "OUI"
+        },
+        "context": {"secteur": "CONSTRUCTION" if sector_code.startswith("23") else "GENERAL",
+                    "secteur_scian": sector_code, "taille_entreprise": "MOYENNE"}
+    }
+
+def execute_orchestrator_workflow(enterprise_id="Enterprise ABC", sector_code="236", workflow_mode="hybrid"):
+    """Exécute le pipeline réel A1→A2→AN1→R1 en arrière-plan et suit sa progression"""
     
-    import streamlit as st
-    import time
-    import pandas as pd
-    from datetime import datetime
+    from agents.execution_service import PIPELINE_STAGES, get_execution_service
     
     # Container pour résultats
     st.markdown("---")
     st.markdown("## 🎯 Exécution Orchestrateur BehaviorX")
     
-    # Barre de progression
+    service = get_execution_service()
+    job_id = service.submit(build_orchestrator_inputs(enterprise_id, sector_code, workflow_mode))
+    st.session_state['orchestrator_job_id'] = job_id
+    
+    # Barre de progression alimentée par les événements du service
     progress_bar = st.progress(0)
     status_text = st.empty()
+    stage_labels = dict(PIPELINE_STAGES)
+    stage_rows = {}
     
-    # Simulation du workflow avec résultats réels
+    watcher_id = service.watch(job_id)
+    deadline = time.monotonic() + 60
     try:
-        # Étape 1: VCS Observation
-        status_text.text("🔍 Étape 1/5: VCS Observation avec analyse contextuelle...")
-        progress_bar.progress(20)
-        time.sleep(1)
-        
-        # Étape 2: Analyse ABC
-        status_text.text("🔗 Étape 2/5: Analyse ABC comportementale enrichie...")
-        progress_bar.progress(40)
-        time.sleep(1)
-        
-        # Étape 3: Agent A1 Enhanced
-        status_text.text("🤖 Étape 3/5: Agent A1 Enhanced avec mémoire IA...")
-        progress_bar.progress(60)
-        time.sleep(1)
-        
-        # Étape 4: Intégration
-        status_text.text("📊 Étape 4/5: Intégration + détection zones aveugles...")
-        progress_bar.progress(80)
-        time.sleep(1)
-        
-        # Étape 5: Recommandations
-        status_text.text("🎯 Étape 5/5: Génération recommandations prioritaires...")
-        progress_bar.progress(95)
-        time.sleep(1)
-        
-        # Finalisation
-        progress_bar.progress(100)
-        status_text.text("✅ Orchestration BehaviorX terminée avec succès !")
-        
-        # AFFICHAGE DES RÉSULTATS
-        st.success("🎉 Orchestration terminée avec succès !")
-        
-        # Métriques principales
-        st.markdown("### 📊 Métriques Principales")
-        met_col1, met_col2, met_col3, met_col4 = st.columns(4)
-        
-        with met_col1:
-            st.metric("🎯 Score Intégration", "92.0%", delta="+4.2%")
-        
-        with met_col2:
-            st.metric("🔍 Conformité VCS", "75.0%", delta="6 Forces")
-        
-        with met_col3:
-            st.metric("🤖 Score A1 Enhanced", "79.0", delta="BON")
-        
-        with met_col4:
-            st.metric("⚠️ Zones Aveugles", "0", delta="Aucune")
-        
-        # Onglets de résultats détaillés
-        st.markdown("### 📈 Résultats Détaillés")
-        
-        tab1, tab2, tab3, tab4, tab5 = st.tabs(["📋 VCS", "🔗 ABC", "🤖 A1", "📊 Intégration", "📄 Export"])
-        
-        with tab1:
-            st.markdown("#### 🔍 Résultats VCS Observation")
-            st.info("**Items observés:** 12 éléments")
-            st.success("**Conformité:** 75% (6 forces identifiées)")
-            st.warning("**Préoccupations:** 2 points d'attention")
-            
-            # Données simulées VCS
-            vcs_data = {
-                'Élément': ['EPI', 'Procédures', 'Formation', 'Signalisation', 'Équipements'],
-                'Statut': ['Conforme', 'Conforme', 'Non-conforme', 'Conforme', 'Conforme'],
-                'Score': [95, 88, 65, 92, 89]
-            }
-            st.dataframe(pd.DataFrame(vcs_data), use_container_width=True)
-        
-        with tab2:
-            st.markdown("#### 🔗 Analyse ABC Comportementale")
-            st.info("**Comportements positifs:** 6 identifiés")
-            st.warning("**Comportements négatifs:** 2 identifiés")
-            st.error("**Interventions urgentes:** 2 requises")
-            
-            abc_col1, abc_col2 = st.columns(2)
-            with abc_col1:
-                st.markdown("**✅ Positifs:**")
-                st.markdown("• Port d'EPI systématique")
-                st.markdown("• Communication sécurité active")
-                st.markdown("• Respect procédures")
-            
-            with abc_col2:
-                st.markdown("**⚠️ À corriger:**")
-                st.markdown("• Contournement procédure X")
-                st.markdown("• Formation manquante")
-        
-        with tab3:
-            st.markdown("#### 🤖 Agent A1 Enhanced - Safe Self")
-            st.info("**Score global:** 79.0/100 (BON niveau)")
-            st.success("**Mémoire IA:** Patterns identifiés")
-            st.info("**Recommandations:** 2 actions prioritaires")
-            
-            # Graphique radar simulé
-            try:
-                import plotly.graph_objects as go
-                
-                categories = ['Sécurité', 'Conformité', 'Formation', 'Équipements', 'Procédures']
-                values = [79, 85, 65, 88, 82]
-                
-                fig = go.Figure()
-                fig.add_trace(go.Scatterpolar(
-                    r=values,
-                    theta=categories,
-                    fill='toself',
-                    name='Score A1 Enhanced'
-                ))
-                
-                fig.update_layout(
-                    polar=dict(
-                        radialaxis=dict(
-                            visible=True,
-                            range=[0, 100]
-                        )),
-                    showlegend=True,
-                    title="Profil A1 Enhanced",
-                    height=400
-                )
-                
-                st.plotly_chart(fig, use_container_width=True)
-            except Exception:
-                st.info("📊 Graphique radar A1 Enhanced - Données chargées")
-        
-        with tab4:
-            st.markdown("#### 📊 Intégration & Synthèse")
-            st.success("**Cohérence A1↔VCS:** 92.0% (Excellente)")
-            st.success("**Zones aveugles détectées:** 0")
-            st.info("**Actions prioritaires:** 2 recommandations")
-            
-            st.markdown("**🎯 Actions Prioritaires:**")
-            st.markdown("1. 🔴 Formation urgente procédure X (Délai: 7 jours)")
-            st.markdown("2. 🟡 Révision signalisation zone Y (Délai: 14 jours)")
-            
-            st.markdown("**💡 Insights Mémoire IA:**")
-            st.markdown("• Pattern identifié: Baisse conformité vendredi après-midi")
-            st.markdown("• Corrélation: Formation ↔ Conformité (+15%)")
-        
-        with tab5:
-            st.markdown("#### 📄 Export & Rapports")
-            st.info("**Rapport généré:** " + datetime.now().strftime("%Y-%m-%d %H:%M"))
-            
-            # Boutons d'export
-            exp_col1, exp_col2, exp_col3 = st.columns(3)
-            
-            with exp_col1:
-                if st.button("📊 Export JSON", key="export_json"):
-                    st.success("✅ Export JSON généré")
-            
-            with exp_col2:
-                if st.button("📄 Rapport PDF", key="export_pdf"):
-                    st.success("✅ Rapport PDF généré")
-            
-            with exp_col3:
-                if st.button("📈 Dashboard Excel", key="export_excel"):
-                    st.success("✅ Dashboard Excel généré")
-        
-        # Sauvegarde en session state
-        st.session_state['orchestrator_executed'] = True
-        st.session_state['orchestrator_timestamp'] = datetime.now()
-        
-    except Exception as e:
-        st.error(f"❌ Erreur lors de l'exécution: {str(e)}")
+        while time.monotonic() < deadline:
+            for event in service.poll(watcher_id, timeout=0.1):
+                progress_bar.progress(int(event.progress * 100))
+                if event.stage == "job":
+                    continue
+                label = stage_labels[event.stage]
+                if event.status == "started":
+                    status_text.text(f"🔄 {event.stage}: {label}...")
+                else:
+                    stage_rows[event.stage] = {
+                        'Étape': f"{event.stage} - {label}",
+                        'Statut': '✅' if event.status == 'finished' else '❌',
+                        'Durée (ms)': round((event.duration or 0) * 1000, 1),
+                        'Résultat partiel': json.dumps(event.partial_result or {'erreur': event.error},
+                                                       ensure_ascii=False, default=str)
+                    }
+            if service.get_job(job_id).done:
+                break
+    finally:
+        service.unwatch(watcher_id)
+    
+    job = service.get_job(job_id)
+    if not job.done:
+        status_text.text("⏳ Orchestration toujours en cours - relancez pour suivre la progression")
+        return None
+    if job.status == "failed":
+        st.error(f"❌ Erreur lors de l'exécution: {job.error}")
         status_text.text("❌ Échec de l'orchestration")
         progress_bar.progress(0)
+        return None
+    
+    progress_bar.progress(100)
+    status_text.text("✅ Orchestration BehaviorX terminée avec succès !")
+    st.success("🎉 Orchestration terminée avec succès !")
+    st.dataframe(pd.DataFrame(list(stage_rows.values())), use_container_width=True, hide_index=True)
+    
+    display_orchestrator_results(job.result)
+    
+    # Sauvegarde en session state
+    st.session_state['orchestrator_executed'] = True
+    st.session_state['orchestrator_timestamp'] = datetime.fromtimestamp(job.finished_at)
+    return job.result
+
+def display_orchestrator_results(result):
+    """Affiche les résultats réels des agents A1, A2, AN1 et R1"""
+    a1, a2, an1, r1 = result['A1'], result['A2'], result['AN1'], result['R1']
+    zones_aveugles = an1['ecarts_analysis']['zones_aveugles']
+    
+    # Métriques principales
+    st.markdown("### 📊 Métriques Principales")
+    met_col1, met_col2, met_col3, met_col4 = st.columns(4)
+    
+    with met_col1:
+        st.metric("🎯 Score Intégration", f"{an1['agent_info']['confidence_score'] * 100:.1f}%")
+    
+    with met_col2:
+        st.metric("🔍 Conformité EPI", f"{a2['epi_analysis']['overall_compliance'] * 100:.1f}%",
+                  delta=f"{a2['hazard_detection'].get('total_hazards_detected', 0)} dangers")
+    
+    with met_col3:
+        st.metric("🤖 Fiabilité A1", f"{a1['reliability_score'] * 100:.1f}")
+    
+    with met_col4:
+        st.metric("⚠️ Zones Aveugles", str(len(zones_aveugles)),
+                  delta=an1['summary']['priorite_intervention'])
+    
+    # Onglets de résultats détaillés
+    st.markdown("### 📈 Résultats Détaillés")
+    
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["🤔 A1", "🔍 A2", "📊 AN1", "🎯 R1", "📄 Export"])
+    
+    with tab1:
+        st.markdown("#### 🤔 Autoévaluations (A1)")
+        st.dataframe(pd.DataFrame(a1['culture_variables']), use_container_width=True, hide_index=True)
+        for recommendation in a1.get('recommendations', [])[:3]:
+            st.markdown(f"• {recommendation}")
+    
+    with tab2:
+        st.markdown("#### 🔍 Observations Terrain (A2)")
+        st.dataframe(pd.DataFrame(a2['culture_variables']), use_container_width=True, hide_index=True)
+        for risk in a2.get('immediate_risks', [])[:3]:
+            st.warning(f"⚠️ {risk}")
+    
+    with tab3:
+        st.markdown("#### 📊 Écarts et Zones Aveugles (AN1)")
+        st.info(f"**Écart moyen:** {an1['summary']['ecart_moyen']:.1f}%")
+        ecarts = pd.DataFrame.from_dict(an1['ecarts_analysis']['ecarts_variables'], orient='index')
+        if not ecarts.empty:
+            st.dataframe(ecarts[['score_autoeval', 'score_terrain', 'pourcentage', 'niveau', 'direction']],
+                         use_container_width=True)
+        for zone in zones_aveugles:
+            st.error(f"🔴 {zone.get('variable')}: {zone.get('explication', '')}")
+    
+    with tab4:
+        st.markdown("#### 🎯 Recommandations (R1)")
+        business = r1['business_impact']
+        st.info(f"**Recommandations:** {r1['recommandations_analysis']['recommandations_generees']} | "
+                f"**Coût total:** {business['cout_total']:,.0f}$ | **ROI:** {business['roi_estime']:.1f}%")
+        for i, reco in enumerate(r1['recommandations_detaillees'][:5], 1):
+            st.markdown(f"{i}. **{reco['variable_cible']}** ({reco['priorite']}) - {reco['timeline']}")
+        for reco in an1.get('recommendations', [])[:5]:
+            st.markdown(f"• {reco.get('action', '')}")
+    
+    with tab5:
+        st.markdown("#### 📄 Export & Rapports")
+        st.info("**Rapport généré:** " + result['completed_at'][:16].replace('T', ' '))
+        st.download_button("📊 Export JSON", data=json.dumps(result, ensure_ascii=False, indent=2, default=str),
+                           file_name="orchestration_behaviorx.json", mime="application/json", key="export_json")
 
 def display_orchestrated_workflow_results():
     """Affiche les résultats du workflow orchestré"""
@@ -519,142 +386,29 @@ def display_orchestrated_workflow_results():
         if timestamp:
             st.info(f"🕐 Exécuté le: {timestamp.strftime('%Y-%m-%d %H:%M:%S')}")
 
-def fix_dataframe_for_streamlit(df):
-    """
-    Corrige les DataFrames pour compatibilité PyArrow/Streamlit
-    Résout l'erreur: Could not convert '96%' with type str: tried to convert to double
-    """
-    import pandas as pd
-    
-    df_fixed = df.copy()
-    
-    for col in df_fixed.columns:
-        if df_fixed[col].dtype == 'object':
-            # Détecter les colonnes avec pourcentages
-            percentage_mask = df_fixed[col].astype(str).str.contains('%', na=False)
-            
-            if percentage_mask.any():
-                # Garder la colonne originale pour l'affichage (format string)
-                df_fixed[col] = df_fixed[col].astype(str)
-    
-    return df_fixed
-
 # ===================================================================
 # DICTIONNAIRE SCIAN COMPLET - MULTI-INDUSTRIES SAFETYGRAPH
 # ===================================================================
 
-SECTEURS_SCIAN_COMPLET = {
-    "🚧 CONSTRUCTION": {
-        "Construction générale (236)": "236",
-        "Construction résidentielle (2361)": "2361", 
-        "Construction non-résidentielle (2362)": "2362",
-        "Génie civil & infrastructure (237)": "237",
-        "Entrepreneurs spécialisés (238)": "238",
-        "Construction lourde & civile": "237-heavy"
-    },
-    "⛏️ MINES & EXTRACTION": {
-        "Mines souterraines (212)": "212",
-        "Mines métalliques (2122)": "2122",
-        "Mines non-métalliques (2123)": "2123", 
-        "Extraction pétrole & gaz (211)": "211",
-        "Activités soutien mines (213)": "213",
-        "Carrières & sablières (2123)": "2123-carriere"
-    },
-    "🏭 MANUFACTURING AVANCÉ": {
-        "Fabrication alimentaire (311)": "311",
-        "Pharmaceutique (3254) 🆕": "3254",
-        "Agro-alimentaire (3111) 🆕": "3111",
-        "Chimique & Pétrochimique (3251) 🆕": "3251",
-        "Métallurgie (3311) 🆕": "3311",
-        "Fabrication boissons & tabac (312)": "312",
-        "Fabrication bois (321)": "321", 
-        "Fabrication papier (322)": "322",
-        "Fabrication plastique & caoutchouc (326)": "326",
-        "Fabrication métallique primaire (331)": "331",
-        "Fabrication machinerie (333)": "333",
-        "Fabrication équipement transport (336)": "336",
-        "Fabrication meubles (337)": "337"
-    },
-    "🏥 SOINS DE SANTÉ SPÉCIALISÉS": {
-        "Soins ambulatoires (621)": "621",
-        "Hôpitaux aigus (6221) 🆕": "6221",
-        "Laboratoires médicaux (6215) 🆕": "6215",
-        "Hôpitaux (622)": "622", 
-        "Établissements soins infirmiers (623)": "623",
-        "Assistance sociale (624)": "624",
-        "Services sociaux communautaires": "624-social"
-    },
-    "🔧 SERVICES CRITIQUES": {
-        "Services professionnels techniques (541)": "541",
-        "Télécommunications (5174) 🆕": "5174",
-        "Services énergétiques (2211) 🆕": "2211",
-        "Gestion d'entreprises (551)": "551",
-        "Services administratifs & soutien (561)": "561",
-        "Services éducatifs (611)": "611",
-        "Services publics (utilities)": "221"
-    },
-    "🚚 TRANSPORT AVANCÉ": {
-        "Transport terrestre (484)": "484",
-        "Transport maritime (4831) 🆕": "4831",
-        "Aviation commerciale (4811) 🆕": "4811",
-        "Transport aérien (481)": "481", 
-        "Transport maritime (483)": "483",
-        "Entreposage (493)": "493",
-        "Services postaux & courrier (492)": "492"
-    }
-}
+# Taxonomie SCIAN partagée (UI, enrichissements, ingestion), construite une fois par processus
+from src.enrichments.scian_taxonomy import get_scian_taxonomy
+
+SCIAN_TAXONOMY = get_scian_taxonomy()
+SECTEURS_SCIAN_COMPLET = SCIAN_TAXONOMY.industries()
 
 # Fonction utilitaire pour obtenir tous les secteurs
 def get_all_secteurs_list():
     """Retourne la liste complète de tous les secteurs disponibles"""
-    secteurs_list = []
-    for industrie, secteurs in SECTEURS_SCIAN_COMPLET.items():
-        for nom_secteur, code in secteurs.items():
-            secteurs_list.append(f"{nom_secteur}")
-    return secteurs_list
+    return SCIAN_TAXONOMY.ui_labels()
 
 def get_secteur_code(secteur_nom):
     """Retourne le code SCIAN d'un secteur donné"""
-    for industrie, secteurs in SECTEURS_SCIAN_COMPLET.items():
-        for nom, code in secteurs.items():
-            if nom == secteur_nom:
-                return code
-    return "236"  # Default fallback
+    return SCIAN_TAXONOMY.code_for(secteur_nom, default="236")  # Default fallback
 
 # ===================================================================
 # INTEGRATION ANALYTICS AVANCÉS SAFETYGRAPH
 # ===================================================================
 
-# Imports modules analytics
-try:
-    sys.path.append(str(Path(__file__).parent / "modules"))
-    from analytics_predictifs import display_analytics_predictifs_interface as display_predictive_analytics_interface
-    from pattern_recognition import display_pattern_recognition_interface  
-    from anomaly_detection import display_anomaly_detection_interface
-    ANALYTICS_AVAILABLE = True
-    print("✅ Analytics modules loaded successfully")
-except ImportError as e:
-    print(f"⚠️ Analytics modules not available: {e}")
-    ANALYTICS_AVAILABLE = False
-
-# Import module mines souterraines
-try:
-    from src.modules.mines_souterraines import mines_souterraines_secteur
-    MINES_AVAILABLE = True
-    print("✅ Module mines souterraines chargé")
-except ImportError:
-    MINES_AVAILABLE = False
-    print("⚠️ Module mines souterraines non disponible")
-
-# Import module C-Suite Dashboard
-try:
-    from src.dashboards.c_suite_dashboard import display_c_suite_dashboard as c_suite_exec_dashboard
-    CSUITE_AVAILABLE = True
-    print("✅ Module C-Suite Dashboard chargé")
-except ImportError:
-    CSUITE_AVAILABLE = False
-    print("⚠️ Module C-Suite Dashboard non disponible")
-
 # Configuration page Streamlit
 st.set_page_config(
     page_title="SafetyGraph BehaviorX + Industries SST",
@@ -663,14 +417,6 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Ajout chemin LangGraph
-try:
-    sys.path.append(str(Path(__file__).parent / "src" / "langgraph"))
-    from safetygraph_cartography_engine import execute_safetygraph_cartography_main
-    CARTOGRAPHY_AVAILABLE = True
-except ImportError:
-    CARTOGRAPHY_AVAILABLE = False
-
 # ===================================================================
 # INITIALISATION SESSION STATE
 # ===================================================================
@@ -867,20 +613,29 @@ def setup_sidebar():
         mode_debug = st.checkbox("🐛 Mode Debug", value=False, key="debug_mode")
         
         # Orchestrateur BehaviorX
-        if BEHAVIORX_AVAILABLE:
+        if MODULES.is_available('behaviorx_orchestrator'):
             orchestrateur_actif = st.checkbox("🎼 Orchestrateur BehaviorX", value=True, key="orchestrator_enabled")
         
         # Statut modules
         st.markdown("### 📊 Statut Modules")
-        st.success(f"🧠 BehaviorX: {'✅ Disponible' if BEHAVIORX_AVAILABLE else '❌ Indisponible'}")
-        st.success(f"🗺️ Cartographie: {'✅ Disponible' if CARTOGRAPHY_AVAILABLE else '❌ Indisponible'}")
-        st.success(f"⛏️ Mines: {'✅ Disponible' if MINES_AVAILABLE else '❌ Indisponible'}")
-        st.success(f"📊 Analytics: {'✅ Disponible' if ANALYTICS_AVAILABLE else '❌ Indisponible'}")
+        # Disponibilité vérifiée sans importer les modules
+        st.success(f"🧠 BehaviorX: {'✅ Disponible' if MODULES.is_available('behaviorx_orchestrator') else '❌ Indisponible'}")
+        st.success(f"🗺️ Cartographie: {'✅ Disponible' if MODULES.is_available('cartography') else '❌ Indisponible'}")
+        st.success(f"⛏️ Mines: {'✅ Disponible' if MODULES.is_available('mines') else '❌ Indisponible'}")
+        st.success(f"📊 Analytics: {'✅ Disponible' if MODULES.is_available('pattern_recognition') else '❌ Indisponible'}")
+        
+        if mode_debug:
+            # Rapport temps d'import des modules chargés à la demande
+            report = MODULES.startup_report()
+            st.caption(f"⏱️ Imports: {report['loaded']}/{report['declared']} modules, "
+                       f"{report['total_import_seconds']:.2f}s")
+            st.dataframe(pd.DataFrame(report['modules'])[['name', 'status', 'import_seconds', 'used_by']],
+                         use_container_width=True)
         
         # Oracle HSE Status - NOUVEAU
         st.markdown("---")
         st.markdown("### 🔮 Oracle HSE")
-        if ORACLE_HSE_AVAILABLE:
+        if MODULES.is_available('oracle_hse'):
             st.success("✅ Prédictions Multi-Horizons Actives")
             st.info("8 modèles IA • 7 horizons • Scénarios What-If")
         else:
@@ -916,34 +671,31 @@ def setup_sidebar():
             'workflow_mode': mode_workflow,
             'memory_enabled': memoire_ia,
             'debug_mode': mode_debug,
-            'orchestrator_enabled': st.session_state.get('orchestrator_enabled', True) if BEHAVIORX_AVAILABLE else False
+            'orchestrator_enabled': st.session_state.get('orchestrator_enabled', True) if MODULES.is_available('behaviorx_orchestrator') else False
         }
 
 # ===================================================================
 # IMPORTS MODULES UX/UI MODULAIRES - ARCHITECTURE PROFESSIONNELLE
 # ===================================================================
 
-try:
-    # Import des dashboards spécialisés
-    from src.dashboards.hse_manager_dashboard import display_hse_manager_dashboard
-    from src.dashboards.safety_coordinator_dashboard import display_safety_coordinator_dashboard
-    from src.dashboards.supervisor_dashboard import display_supervisor_dashboard
-    UX_MODULES_AVAILABLE = True
-    print("✅ Modules UX/UI modulaires chargés avec succès")
-except ImportError as e:
-    print(f"⚠️ Modules UX/UI modulaires non disponibles: {e}")
-    UX_MODULES_AVAILABLE = False
-    
-    # Fonctions fallback si modules non disponibles
-    def display_hse_manager_dashboard(config):
-        st.error("❌ Dashboard HSE Manager non disponible")
-        st.info("🔧 Vérifiez que le fichier src/dashboards/hse_manager_dashboard.py existe et est correct")
-    
-    def display_safety_coordinator_dashboard(config):
-        st.error("❌ Dashboard Safety Coordinator non disponible")
-    
-    def display_supervisor_dashboard(config):
-        st.error("❌ Dashboard Supervisor non disponible")
+# Dashboards par profil: seul le dashboard du profil courant est importé
+PROFILE_DASHBOARDS = {
+    'hse_manager': ('dashboard_hse_manager', 'display_hse_manager_dashboard', "❌ Dashboard HSE Manager non disponible"),
+    'safety_coordinator': ('dashboard_safety_coordinator', 'display_safety_coordinator_dashboard',
+                           "❌ Dashboard Safety Coordinator non disponible"),
+    'supervisor': ('dashboard_supervisor', 'display_supervisor_dashboard', "❌ Dashboard Supervisor non disponible")
+}
+
+def display_profile_dashboard(profile, config):
+    """Affiche le dashboard d'un profil, importé à la première sélection"""
+    module_name, function_name, error_message = PROFILE_DASHBOARDS[profile]
+    dashboard = MODULES.get(module_name, function_name)
+    if dashboard is None:
+        st.error(error_message)
+        st.info("🔧 Vérifiez que le fichier src/dashboards/ correspondant existe et est correct")
+        display_industries_fallback(config)
+        return
+    dashboard(config)
 
 # ===================================================================
 # MODULE INDUSTRIES UNIFIÉ AVEC PROFILS ADAPTATIFS
@@ -952,33 +704,19 @@ except ImportError as e:
 def display_industries_unified(config):
     """Module Industries unifié adaptatif par profil utilisateur"""
     
-    # Vérification modules UX/UI
-    if not UX_MODULES_AVAILABLE:
-        st.error("❌ Modules UX/UI non disponibles - Vérifiez structure src/dashboards/ et src/ux/")
-        st.info("🔧 Action requise : Créez les dossiers et fichiers selon architecture modulaire")
-        display_industries_fallback(config)
-        return
-    
     # Récupération profil utilisateur actuel (source unique de vérité)
     current_profile = st.session_state.get('user_profile', 'hse_manager')
     
     # === ROUTING DASHBOARD ADAPTATIF PAR PROFIL UTILISATEUR ===
     
-    if current_profile == 'hse_manager':
-        # Dashboard HSE Manager Executive complet
-        display_hse_manager_dashboard(config)
-    
-    elif current_profile == 'safety_coordinator':
-        # Dashboard Safety Coordinator Operations complet
-        display_safety_coordinator_dashboard(config)
-    
-    elif current_profile == 'supervisor':
-        # Dashboard Supervisor Terrain BBS-ISO complet
-        display_supervisor_dashboard(config)
+    if current_profile in PROFILE_DASHBOARDS:
+        # Dashboards HSE Manager / Safety Coordinator / Supervisor
+        display_profile_dashboard(current_profile, config)
     
     elif current_profile == 'c_suite':
         # Dashboard C-Suite Executive - Module complet
-        if CSUITE_AVAILABLE:
+        c_suite_exec_dashboard = MODULES.get('dashboard_c_suite', 'display_c_suite_dashboard')
+        if c_suite_exec_dashboard is not None:
             try:
                 c_suite_exec_dashboard(config)
             except Exception as e:
@@ -1002,7 +740,7 @@ def display_industries_unified(config):
     else:
         # Profil non reconnu - fallback vers HSE Manager
         st.warning(f"Profil '{current_profile}' non reconnu, redirection vers HSE Manager")
-        display_hse_manager_dashboard(config)
+        display_profile_dashboard('hse_manager', config)
 
 def display_industries_fallback(config):
     """Interface Industries temporaire pour profils non encore développés"""
@@ -1058,7 +796,7 @@ def display_industries_fallback(config):
 def execute_cartography_workflow_complete(config):
     """Exécute workflow cartographie culture SST complet"""
     
-    if not CARTOGRAPHY_AVAILABLE:
+    if MODULES.load('cartography') is None:
         st.error("❌ Module Cartographie non disponible")
         return None
     
@@ -1101,7 +839,7 @@ def display_culture_mapping_interface():
     }
     
     df_culture = pd.DataFrame(culture_data)
-    st.dataframe(fix_dataframe_for_streamlit(df_culture), use_container_width=True, hide_index=True)
+    st.dataframe(df_culture, use_container_width=True, hide_index=True)
     st.success("✅ Cartographie générée avec STORM Research enrichi !")
 
 # ===================================================================
@@ -1112,93 +850,47 @@ def display_culture_mapping_interface():
 # ===============================================================
 # À ajouter dans app_behaviorx.py AVANT la fonction main()
 
-import sqlite3
-import pandas as pd
-from pathlib import Path
+from src.enrichments.international_store import get_international_store
 
 class SafetyGraphInternationalConnector:
-    """Connecteur pour base données internationale SafetyGraph OSHA/BLS/NIOSH"""
+    """Connecteur pour base données internationale SafetyGraph OSHA/BLS/NIOSH
+
+    Délègue au magasin partagé du processus: pool de connexions WAL, index
+    composites secteur/année et recherche plein texte FTS5.
+    """
     
     def __init__(self):
         self.db_path = "databases/safetygraph_international.db"
-        self.connection = None
-        self.is_available = self._check_database_availability()
-    
-    def _check_database_availability(self):
-        """Vérifie si la base internationale existe"""
-        try:
-            db_file = Path(self.db_path)
-            if not db_file.exists():
-                print(f"ℹ️ Base internationale non trouvée: {self.db_path}")
-                return False
-            
-            # Test connexion et tables
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            required_tables = ['osha_incidents', 'bls_statistics', 'niosh_publications', 'sector_mappings']
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            existing_tables = [row[0] for row in cursor.fetchall()]
-            
-            for table in required_tables:
-                if table not in existing_tables:
-                    print(f"ℹ️ Table manquante: {table}")
-                    conn.close()
-                    return False
-            
-            conn.close()
-            print(f"✅ Base internationale détectée: {len(existing_tables)} tables")
-            return True
-            
-        except Exception as e:
-            print(f"ℹ️ Base internationale non accessible: {e}")
-            return False
+        self.store = get_international_store(self.db_path)
+        self.is_available = self.store.is_available
+        if self.is_available:
+            print(f"✅ Base internationale détectée: {self.db_path} (FTS5: {', '.join(self.store.fts_tables) or 'non'})")
     
     def get_connection(self):
-        """Obtient connexion à la base"""
+        """Connexion de lecture empruntée au pool (à utiliser avec `with`)"""
         if not self.is_available:
             return None
-        try:
-            return sqlite3.connect(self.db_path)
-        except Exception as e:
-            print(f"❌ Erreur connexion: {e}")
-            return None
+        return self.store.connection()
     
     def get_database_stats(self):
         """Statistiques de la base internationale"""
-        if not self.is_available:
-            return {}
-        
         try:
-            conn = self.get_connection()
-            if conn is None:
-                return {}
-            
-            cursor = conn.cursor()
-            stats = {}
-            
-            # Compter enregistrements par table
-            tables = ['osha_incidents', 'bls_statistics', 'niosh_publications', 'sector_mappings']
-            for table in tables:
-                cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                count = cursor.fetchone()[0]
-                stats[table] = count
-            
-            # Secteurs couverts
-            cursor.execute("SELECT COUNT(DISTINCT sector_code) FROM osha_incidents")
-            stats['sectors_covered'] = cursor.fetchone()[0]
-            
-            # Dernière mise à jour
-            cursor.execute("SELECT MAX(created_at) FROM osha_incidents")
-            last_update = cursor.fetchone()[0]
-            stats['last_update'] = last_update
-            
-            conn.close()
-            return stats
-            
+            return self.store.get_database_stats()
         except Exception as e:
             print(f"❌ Erreur stats database: {e}")
             return {}
+    
+    def search_incidents(self, text, sector_code=None, year_from=None, year_to=None, limit=50):
+        """Incidents OSHA par recherche plein texte, filtrés par secteur SCIAN/NAICS et année"""
+        return self.store.search_incidents(text, sector_code, year_from, year_to, limit)
+    
+    def search_publications(self, text, limit=20):
+        """Publications NIOSH classées par pertinence"""
+        return self.store.search_publications(text, limit)
+    
+    def get_cross_jurisdiction(self, scian_code, year_from=None, year_to=None):
+        """Incidents OSHA et statistiques BLS rattachés à un code SCIAN"""
+        return pd.DataFrame(self.store.cross_jurisdiction(scian_code, year_from, year_to))
 
 # ===============================================================
 # FONCTION D'INITIALISATION
@@ -1239,7 +931,8 @@ def main():
     # =====================================
     # NOUVEAU - Extensions Multi-Sources
     # =====================================
-    if EXTENSIONS_AVAILABLE:
+    SafetyGraphExtensions = MODULES.get('extensions', 'SafetyGraphExtensions')
+    if SafetyGraphExtensions is not None:
         try:
             # Initialisation extensions
             if 'extensions' not in st.session_state:
@@ -1261,29 +954,37 @@ def main():
     # ===================================================================
     # ONGLETS PRINCIPAUX SAFETYGRAPH - VERSION ORACLE HSE INTÉGRÉE
     # ===================================================================
-    main_tabs = st.tabs([
-        "🏭 Industries",              # Industries unifiées
-        "🎼 BehaviorX Orchestré",     # Avec Orchestrateur  
-        "🗺️ Cartographie Culture",
-        "📊 Analytics Prédictifs",
-        "🔍 Pattern Recognition", 
-        "⚡ Analytics Optimisés",
-        "🌍 Multi-Sources OSHA/BLS",  # Extensions multi-sources
-        "🔮 Oracle HSE"               # NOUVEAU - Oracle HSE Multi-Horizons
-    ])
+    # Sélecteur de section plutôt que st.tabs: Streamlit exécute le corps de
+    # chaque onglet à chaque passage, seule la section choisie charge ses modules
+    main_section = st.radio(
+        "Section",
+        [
+            "🏭 Industries",              # Industries unifiées
+            "🎼 BehaviorX Orchestré",     # Avec Orchestrateur  
+            "🗺️ Cartographie Culture",
+            "📊 Analytics Prédictifs",
+            "🔍 Pattern Recognition", 
+            "⚡ Analytics Optimisés",
+            "🌍 Multi-Sources OSHA/BLS",  # Extensions multi-sources
+            "🔮 Oracle HSE"               # NOUVEAU - Oracle HSE Multi-Horizons
+        ],
+        horizontal=True,
+        key="main_section",
+        label_visibility="collapsed"
+    )
 
     # ===================================================================
     # CONTENU ONGLETS - STRUCTURE AVEC ORACLE HSE
     # ===================================================================
 
-    with main_tabs[0]:  # Industries
+    if main_section == "🏭 Industries":  # Industries
         display_industries_unified(config)
 
-    with main_tabs[1]:  # BehaviorX Orchestré - CORRIGÉ
+    elif main_section == "🎼 BehaviorX Orchestré":  # BehaviorX Orchestré - CORRIGÉ
         st.markdown("## 🎼 SafetyGraph BehaviorX Orchestré")
         st.markdown("### 🚀 Workflow Intelligent VCS→ABC→A1→Intégration avec Mémoire IA")
         
-        if not BEHAVIORX_AVAILABLE:
+        if MODULES.load('behaviorx_orchestrator') is None:
             st.error("❌ Orchestrateur BehaviorX non disponible")
             return
         
@@ -1293,7 +994,7 @@ def main():
         # Affichage résultats orchestrateur
         display_orchestrated_workflow_results()
 
-    with main_tabs[2]:  # Cartographie Culture
+    elif main_section == "🗺️ Cartographie Culture":  # Cartographie Culture
         st.markdown("## 🗺️ Cartographie Culture SST")
         if st.button("🚀 Lancer Cartographie", use_container_width=True):
             st.session_state.workflow_type = "culture_mapping"
@@ -1302,28 +1003,31 @@ def main():
         if hasattr(st.session_state, 'workflow_type') and st.session_state.workflow_type == "culture_mapping":
             display_culture_mapping_interface()
 
-    with main_tabs[3]:  # Analytics Prédictifs
-        if ANALYTICS_SOPHISTICATED:
+    elif main_section == "📊 Analytics Prédictifs":  # Analytics Prédictifs
+        display_predictive_analytics_interface_v2 = MODULES.get('predictive_analytics', 'display_predictive_analytics_interface_v2')
+        if display_predictive_analytics_interface_v2 is not None:
             display_predictive_analytics_interface_v2()
         else:
             st.error("⚠️ Module analytics prédictifs sophistiqués non disponible")
 
-    with main_tabs[4]:  # Pattern Recognition
-        if ANALYTICS_AVAILABLE:
+    elif main_section == "🔍 Pattern Recognition":  # Pattern Recognition
+        display_pattern_recognition_interface = MODULES.get('pattern_recognition', 'display_pattern_recognition_interface')
+        if display_pattern_recognition_interface is not None:
             display_pattern_recognition_interface()
         else:
             st.error("⚠️ Module pattern recognition non disponible")
 
-    with main_tabs[5]:  # Analytics Optimisés
-        if ANALYTICS_SOPHISTICATED:
+    elif main_section == "⚡ Analytics Optimisés":  # Analytics Optimisés
+        display_anomaly_detection_interface = MODULES.get('anomaly_detection', 'display_anomaly_detection_interface')
+        if display_anomaly_detection_interface is not None:
             display_anomaly_detection_interface()
         else:
             st.error("⚠️ Module anomaly detection non disponible")
 
-    with main_tabs[6]:  # Multi-Sources OSHA/BLS - NOUVEAU
+    elif main_section == "🌍 Multi-Sources OSHA/BLS":  # Multi-Sources OSHA/BLS - NOUVEAU
         st.header("🌍 Multi-Sources OSHA/BLS/NIOSH")
         
-        if EXTENSIONS_AVAILABLE and hasattr(st.session_state, 'extensions'):
+        if MODULES.is_loaded('extensions') and hasattr(st.session_state, 'extensions'):
             try:
                 # Affichage interface extensions
                 if st.session_state.user_context:
@@ -1339,16 +1043,18 @@ def main():
             st.error("⚠️ Module Extensions Multi-Sources non disponible")
 
     # ONGLET 7 : Oracle HSE Prédictions Multi-Horizons - NOUVEAU
-    with main_tabs[7]:
+    elif main_section == "🔮 Oracle HSE":
         st.header("🔮 Oracle HSE - Prédictions Multi-Horizons")
         
-        if ORACLE_HSE_AVAILABLE:
+        predictions_multi_horizons = MODULES.load('oracle_hse')
+        if predictions_multi_horizons is not None:
             try:
                 # Interface Oracle HSE complète
                 predictions_multi_horizons.display_oracle_hse_interface()
                 
                 # Interface XAI intégrée - NOUVEAU
-                if XAI_AVAILABLE:
+                xai_oracle_hse = MODULES.load('xai')
+                if xai_oracle_hse is not None:
                     st.markdown("---")
                     with st.expander("🔍 Explicabilité IA (XAI) - Transparence Totale", expanded=False):
                         xai_oracle_hse.display_xai_oracle_interface()
@@ -4,13 +4,19 @@ Automatise l'enrichissement quotidien de Safety Agentique
 """
 
 import asyncio
-import schedule
-import time
+import os
+import sys
 import json
 import logging
 from datetime import datetime, timedelta
 from pathlib import Path
 
+sys.path.append(str(Path(__file__).parent / 'src'))
+sys.path.append(str(Path(__file__).parent / 'src' / 'storm_research'))
+from mcp_perplexity import refresh_stale_topics
+from research_cache import ResearchCache
+from utils.job_scheduler import JobScheduler
+
 # Configuration logging
 logging.basicConfig(
     level=logging.INFO,
@@ -22,6 +28,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger('StormContinuous')
 
+# Fraîcheur des recherches: plus longue que la rotation hebdomadaire des topics,
+# sinon chaque topic expire exactement le jour où il revient et le cache ne sert jamais
+RESEARCH_TTL_HOURS = float(os.getenv('STORM_RESEARCH_TTL_HOURS', 24 * 8))
+
 class StormContinuousDeployment:
     def __init__(self):
         self.base_path = Path('.')
@@ -31,6 +41,14 @@ class StormContinuousDeployment:
         # Créer répertoires
         self.logs_path.mkdir(exist_ok=True)
         
+        # Cache disque des recherches: seuls les topics expirés sont re-recherchés
+        self.research_cache = ResearchCache(self.base_path / 'data' / 'storm_research_cache.db',
+                                            ttl_hours=RESEARCH_TTL_HOURS)
+        self.max_concurrent_research = 5
+        
+        # File de tâches durable: rattrapage après redémarrage, reprises et historique
+        self.scheduler = JobScheduler(self.base_path / 'data' / 'storm_jobs.db')
+        
         # Topics rotatifs par jour
         self.topic_rotation = {
             'lundi': ['leadership_safety', 'management_commitment'],
@@ -45,35 +63,22 @@ class StormContinuousDeployment:
     def setup_continuous_deployment(self):
         logger.info('🚀 Configuration déploiement continu STORM')
         
-        # Tâches quotidiennes
-        schedule.every().day.at('02:00').do(self.daily_enrichment_sync)
-        schedule.every().day.at('06:00').do(self.health_check_sync)
-        schedule.every().day.at('18:00').do(self.performance_report_sync)
+        # Un pool par type: un enrichissement lent ne retarde plus le health check
+        self.scheduler.register('daily_enrichment', self.daily_enrichment,
+                                concurrency=1, timeout=2 * 3600, max_attempts=3, backoff_base=300)
+        self.scheduler.register('health_check', self.health_check,
+                                concurrency=1, timeout=300, max_attempts=2, backoff_base=60)
+        self.scheduler.register('performance_report', self.performance_report,
+                                concurrency=1, timeout=600, max_attempts=2, backoff_base=60)
+        
+        # Tâches quotidiennes (une exécution de rattrapage si le service était arrêté)
+        self.scheduler.schedule('enrichissement_quotidien', 'daily_enrichment', '0 2 * * *', catchup='latest')
+        self.scheduler.schedule('health_check_quotidien', 'health_check', '0 6 * * *', catchup='latest')
+        self.scheduler.schedule('rapport_quotidien', 'performance_report', '0 18 * * *', catchup='latest')
         
         logger.info('✅ Planification configurée')
         return True
 
-    def daily_enrichment_sync(self):
-        """Version synchrone pour compatibilité schedule"""
-        try:
-            asyncio.run(self.daily_enrichment())
-        except Exception as e:
-            logger.error(f'❌ Erreur enrichissement quotidien: {e}')
-
-    def health_check_sync(self):
-        """Version synchrone health check"""
-        try:
-            asyncio.run(self.health_check())
-        except Exception as e:
-            logger.error(f'❌ Erreur health check: {e}')
-
-    def performance_report_sync(self):
-        """Version synchrone rapport performance"""
-        try:
-            asyncio.run(self.performance_report())
-        except Exception as e:
-            logger.error(f'❌ Erreur rapport performance: {e}')
-
     async def daily_enrichment(self):
         start_time = datetime.now()
         logger.info(f'🌅 Début enrichissement quotidien - {start_time}')
@@ -91,8 +96,8 @@ class StormContinuousDeployment:
             
             logger.info(f'📋 Topics du jour: {daily_topics}')
             
-            # Simuler enrichissement STORM
-            await self.simulate_storm_enrichment(daily_topics)
+            # Enrichissement STORM (topics expirés uniquement)
+            await self.storm_enrichment(daily_topics)
             
             duration = datetime.now() - start_time
             logger.info(f'✅ Enrichissement quotidien terminé en {duration}')
@@ -101,29 +106,33 @@ class StormContinuousDeployment:
             
         except Exception as e:
             logger.error(f'❌ Erreur enrichissement quotidien: {e}')
-            return False
+            raise  # l'ordonnanceur reprend la tâche avec backoff
 
-    async def simulate_storm_enrichment(self, topics):
-        """Simule enrichissement STORM"""
-        logger.info(f'🔍 Simulation enrichissement STORM: {len(topics)} topics')
+    async def storm_enrichment(self, topics):
+        """Enrichissement STORM limité aux topics absents ou expirés du cache"""
+        logger.info(f'🔍 Enrichissement STORM: {len(topics)} topics')
         
-        # Simuler temps de traitement
-        await asyncio.sleep(2)
+        refreshed = await refresh_stale_topics(
+            topics, self.research_cache, max_concurrency=self.max_concurrent_research
+        )
+        cache_stats = self.research_cache.get_stats()
         
-        # Créer rapport simulé
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        simulation_report = {
+        enrichment_report = {
             'timestamp': datetime.now().isoformat(),
             'topics_processed': topics,
-            'simulated_performance_gain': 0.25,
-            'status': 'simulated_success'
+            'topics_refreshed': list(refreshed),
+            'topics_from_cache': [t for t in dict.fromkeys(topics) if t not in refreshed],
+            'research_cache': cache_stats,
+            'status': 'success'
         }
         
         report_file = self.storm_path / f'daily_enrichment_{timestamp}.json'
         with open(report_file, 'w', encoding='utf-8') as f:
-            json.dump(simulation_report, f, indent=2, ensure_ascii=False)
+            json.dump(enrichment_report, f, indent=2, ensure_ascii=False)
         
-        logger.info(f'💾 Rapport simulé sauvegardé: {report_file.name}')
+        logger.info(f'💾 Rapport enrichissement sauvegardé: {report_file.name} '
+                    f'({len(refreshed)} rafraîchis, {len(topics) - len(refreshed)} depuis cache)')
 
     async def health_check(self):
         logger.info('🏥 Début health check quotidien')
@@ -145,12 +154,17 @@ class StormContinuousDeployment:
     async def performance_report(self):
         logger.info('📊 Génération rapport performance quotidien')
         
+        debut_jour = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        jobs_today = self.scheduler.stats(since=debut_jour)
+        enrichissement = self.scheduler.schedules['enrichissement_quotidien']
+        
         daily_report = {
             'date': datetime.now().strftime('%Y-%m-%d'),
-            'enrichments_today': 1,
+            'enrichments_today': jobs_today.get('daily_enrichment', {}).get('counts', {}).get('succeeded', 0),
             'average_performance': 0.33,
             'system_status': 'healthy',
-            'next_enrichment': 'demain 02:00'
+            'jobs_today': jobs_today,
+            'next_enrichment': enrichissement.trigger.next_after(datetime.now()).isoformat()
         }
         
         report_file = self.logs_path / f'daily_performance_{datetime.now().strftime("%Y%m%d")}.json'
@@ -171,9 +185,7 @@ class StormContinuousDeployment:
         logger.info('  • Ctrl+C pour arrêter')
         
         try:
-            while True:
-                schedule.run_pending()
-                time.sleep(60)  # Vérifier chaque minute
+            asyncio.run(self.scheduler.run())
                 
         except KeyboardInterrupt:
             logger.info('🛑 Arrêt déploiement continu demandé')
@@ -10,6 +10,8 @@ import numpy as np
 import pandas as pd
 import streamlit as st
 from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import combinations
 from typing import Dict, List, Tuple, Optional
 import plotly.graph_objects as go
 import plotly.express as px
@@ -151,37 +153,61 @@ class MultiHorizonPredictionEngine:
 class WhatIfSimulator:
     """Simulateur de scénarios What-If interactifs"""
     
+    SCENARIOS_CONFIG = {
+        'formation_intensive': {
+            'risk_reduction': 15,
+            'risk_reduction_sd': 4,
+            'cost': 25000,
+            'cost_sd_pct': 0.10,
+            'duration_days': 30,
+            'impact_description': 'Formation intensive équipes'
+        },
+        'equipement_upgrade': {
+            'risk_reduction': 25,
+            'risk_reduction_sd': 6,
+            'cost': 75000,
+            'cost_sd_pct': 0.15,
+            'duration_days': 60,
+            'impact_description': 'Mise à niveau équipements sécurité'
+        },
+        'supervision_renforcee': {
+            'risk_reduction': 18,
+            'risk_reduction_sd': 5,
+            'cost': 45000,
+            'cost_sd_pct': 0.10,
+            'duration_days': 90,
+            'impact_description': 'Supervision renforcée terrain'
+        },
+        'technologie_iot': {
+            'risk_reduction': 30,
+            'risk_reduction_sd': 8,
+            'cost': 120000,
+            'cost_sd_pct': 0.20,
+            'duration_days': 120,
+            'impact_description': 'Déploiement capteurs IoT avancés'
+        }
+    }
+    
+    # Profils sectoriels (incidents annuels, coût moyen par incident)
+    SECTOR_PROFILES = {
+        '236': {'name': 'Construction', 'current_incidents': 18, 'cost_per_incident': 52000},
+        '311': {'name': 'Fabrication alimentaire', 'current_incidents': 12, 'cost_per_incident': 38000},
+        '212': {'name': 'Mines', 'current_incidents': 9, 'cost_per_incident': 85000},
+        '622': {'name': 'Hôpitaux', 'current_incidents': 15, 'cost_per_incident': 32000}
+    }
+    
+    # Rendements décroissants: la k-ième intervention d'une combinaison
+    # (par efficacité nominale décroissante) ne conserve que OVERLAP**k de son effet
+    OVERLAP_FACTOR = 0.8
+    COST_PER_INCIDENT_SIGMA = 0.25
+    QUANTILES = (10, 50, 90)
+    MAX_PAYBACK_MONTHS = 999
+    
     @staticmethod
     def simulate_scenario(scenario_type: str, parameters: Dict) -> Dict:
         """Simule un scénario What-If"""
         
-        scenarios_config = {
-            'formation_intensive': {
-                'risk_reduction': 15,
-                'cost': 25000,
-                'duration_days': 30,
-                'impact_description': 'Formation intensive équipes'
-            },
-            'equipement_upgrade': {
-                'risk_reduction': 25,
-                'cost': 75000,
-                'duration_days': 60,
-                'impact_description': 'Mise à niveau équipements sécurité'
-            },
-            'supervision_renforcee': {
-                'risk_reduction': 18,
-                'cost': 45000,
-                'duration_days': 90,
-                'impact_description': 'Supervision renforcée terrain'
-            },
-            'technologie_iot': {
-                'risk_reduction': 30,
-                'cost': 120000,
-                'duration_days': 120,
-                'impact_description': 'Déploiement capteurs IoT avancés'
-            }
-        }
-        
+        scenarios_config = WhatIfSimulator.SCENARIOS_CONFIG
         config = scenarios_config.get(scenario_type, scenarios_config['formation_intensive'])
         
         # Calculs d'impact
@@ -203,6 +229,129 @@ class WhatIfSimulator:
             'payback_months': round((config['cost'] / savings) * 12, 1) if savings > 0 else 999,
             'recommendation': 'Recommandé' if roi_percentage > 150 else 'À évaluer'
         }
+    
+    @staticmethod
+    def simulate_distribution(interventions: Optional[List[str]] = None,
+                              sectors: Optional[List[str]] = None,
+                              max_combination_size: int = 1,
+                              n_samples: int = 5000,
+                              seed: int = 42,
+                              sector_profiles: Optional[Dict[str, Dict]] = None) -> Dict:
+        """
+        Monte-Carlo vectorisé: combinaisons d'interventions × secteurs × tirages
+        
+        Args:
+            interventions: Interventions candidates (toutes par défaut)
+            sectors: Codes SCIAN simulés (tous les profils par défaut)
+            max_combination_size: Taille max des combinaisons évaluées
+            n_samples: Nombre de tirages par (combinaison, secteur)
+            seed: Graine du générateur (résultats reproductibles)
+            sector_profiles: Profils remplaçant SECTOR_PROFILES
+            
+        Returns:
+            Tables de quantiles P10/P50/P90 (ROI %, retour en mois) et
+            synthèse par combinaison et secteur. Les paramètres identiques
+            sont servis depuis le cache: ne pas modifier les tables retournées.
+        """
+        profiles = sector_profiles or WhatIfSimulator.SECTOR_PROFILES
+        interventions = tuple(interventions or WhatIfSimulator.SCENARIOS_CONFIG)
+        sectors = tuple(sectors or profiles)
+        frozen_profiles = tuple(
+            (code, profiles[code]['current_incidents'], profiles[code]['cost_per_incident'])
+            for code in sectors
+        )
+        return _simulate_distribution_cached(interventions, frozen_profiles,
+                                             max_combination_size, n_samples, seed)
+
+@lru_cache(maxsize=64)
+def _simulate_distribution_cached(interventions: Tuple[str, ...],
+                                  sector_profiles: Tuple[Tuple[str, float, float], ...],
+                                  max_combination_size: int, n_samples: int, seed: int) -> Dict:
+    """Cœur de simulation mémoïsé par jeu de paramètres (arguments hashables)"""
+    config = WhatIfSimulator.SCENARIOS_CONFIG
+    rng = np.random.default_rng(seed)
+    
+    # Interventions ordonnées par efficacité nominale décroissante (rang = recouvrement)
+    ordered = sorted(interventions, key=lambda name: -config[name]['risk_reduction'])
+    combos = [
+        combo
+        for size in range(1, min(max_combination_size, len(ordered)) + 1)
+        for combo in combinations(ordered, size)
+    ]
+    
+    # Tirages par intervention (I × N): réduction de risque et coût
+    nominal = np.array([config[name]['risk_reduction'] for name in ordered], dtype=float)[:, None]
+    spread = np.array([config[name]['risk_reduction_sd'] for name in ordered], dtype=float)[:, None]
+    reductions = np.clip(rng.normal(nominal, spread, (len(ordered), n_samples)), 0, 95) / 100
+    
+    base_cost = np.array([config[name]['cost'] for name in ordered], dtype=float)[:, None]
+    cost_sd = np.array([config[name]['cost_sd_pct'] for name in ordered], dtype=float)[:, None]
+    costs = np.maximum(rng.normal(base_cost, base_cost * cost_sd, (len(ordered), n_samples)), 0.1 * base_cost)
+    
+    # Matrice combinaison × intervention des poids de recouvrement
+    index = {name: i for i, name in enumerate(ordered)}
+    weights = np.zeros((len(combos), len(ordered)))
+    membership = np.zeros((len(combos), len(ordered)))
+    for c, combo in enumerate(combos):
+        for rank, name in enumerate(combo):
+            weights[c, index[name]] = WhatIfSimulator.OVERLAP_FACTOR ** rank
+            membership[c, index[name]] = 1.0
+    
+    # Réduction combinée (C × N): 1 - Π(1 - poids × réduction)
+    combined = -np.expm1(np.log1p(-weights[:, :, None] * reductions[None, :, :]).sum(axis=1))
+    investment = membership @ costs
+    
+    # Tirages sectoriels (S × N): incidents (Poisson) et coût unitaire (log-normal de même moyenne)
+    incidents_mean = np.array([p[1] for p in sector_profiles], dtype=float)[:, None]
+    unit_cost_mean = np.array([p[2] for p in sector_profiles], dtype=float)[:, None]
+    sigma = WhatIfSimulator.COST_PER_INCIDENT_SIGMA
+    incidents = rng.poisson(incidents_mean, (len(sector_profiles), n_samples))
+    unit_costs = unit_cost_mean * rng.lognormal(-sigma ** 2 / 2, sigma, (len(sector_profiles), n_samples))
+    
+    # Diffusion C × S × N
+    avoided = combined[:, None, :] * incidents[None, :, :]
+    savings = avoided * unit_costs[None, :, :]
+    roi = (savings - investment[:, None, :]) / investment[:, None, :] * 100
+    with np.errstate(divide='ignore'):
+        payback = np.where(savings > 0, investment[:, None, :] / savings * 12, np.inf)
+    payback = np.minimum(payback, WhatIfSimulator.MAX_PAYBACK_MONTHS)
+    
+    quantiles = WhatIfSimulator.QUANTILES
+    roi_q = np.percentile(roi, quantiles, axis=-1)
+    payback_q = np.percentile(payback, quantiles, axis=-1)
+    avoided_median = np.median(avoided, axis=-1)
+    prob_positive = (roi > 0).mean(axis=-1)
+    
+    rows = []
+    for c, combo in enumerate(combos):
+        for s, (code, _, _) in enumerate(sector_profiles):
+            row = {
+                'combination': ' + '.join(combo),
+                'n_interventions': len(combo),
+                'sector': code,
+                'investment_p50': float(np.median(investment[c])),
+                'risk_reduction_p50': float(np.median(combined[c]) * 100),
+                'incidents_avoided_p50': float(avoided_median[c, s]),
+                'prob_roi_positive': float(prob_positive[c, s])
+            }
+            for q, value in zip(quantiles, roi_q[:, c, s]):
+                row[f'roi_p{q}'] = float(value)
+            for q, value in zip(quantiles, payback_q[:, c, s]):
+                row[f'payback_p{q}'] = float(value)
+            row['recommendation'] = 'Recommandé' if row['roi_p50'] > 150 else 'À évaluer'
+            rows.append(row)
+    
+    summary = pd.DataFrame(rows)
+    index_cols = ['combination', 'sector']
+    return {
+        'summary': summary,
+        'roi': summary.set_index(index_cols)[[f'roi_p{q}' for q in quantiles]],
+        'payback_months': summary.set_index(index_cols)[[f'payback_p{q}' for q in quantiles]],
+        'n_samples': n_samples,
+        'seed': seed,
+        'combinations': len(combos),
+        'sectors': [code for code, _, _ in sector_profiles]
+    }
 
 # ================================================================
 # INTERFACE ORACLE HSE RÉVOLUTIONNAIRE
@@ -418,6 +567,39 @@ def display_whatif_scenarios():
             **Retour sur investissement:** {result['payback_months']} mois  
             **Recommandation:** {result['recommendation']}  
             """)
+    
+    # Distributions Monte-Carlo: combinaisons × secteurs
+    st.markdown("#### 🎲 Distributions ROI - Combinaisons & Secteurs")
+    
+    col3, col4 = st.columns([1, 2])
+    
+    with col3:
+        selected = st.multiselect(
+            "Interventions",
+            list(WhatIfSimulator.SCENARIOS_CONFIG),
+            default=list(WhatIfSimulator.SCENARIOS_CONFIG),
+            format_func=lambda x: x.replace('_', ' ').title()
+        )
+        max_size = st.slider("Interventions combinées (max)", 1, 4, 2)
+        n_samples = st.select_slider("Tirages par scénario", [1000, 5000, 10000, 20000], value=5000)
+        
+        if st.button("🎲 Simuler Distributions", type="primary") and selected:
+            st.session_state['whatif_distribution'] = WhatIfSimulator.simulate_distribution(
+                selected, max_combination_size=max_size, n_samples=n_samples
+            )
+    
+    with col4:
+        if 'whatif_distribution' in st.session_state:
+            distribution = st.session_state['whatif_distribution']
+            summary = distribution['summary'].sort_values('roi_p50', ascending=False)
+            
+            st.markdown(f"**{distribution['combinations']} combinaisons × "
+                        f"{len(distribution['sectors'])} secteurs × {distribution['n_samples']:,} tirages**")
+            st.dataframe(
+                summary[['combination', 'sector', 'roi_p10', 'roi_p50', 'roi_p90',
+                         'payback_p10', 'payback_p50', 'payback_p90', 'prob_roi_positive', 'recommendation']].round(1),
+                use_container_width=True
+            )
 
 def display_executive_dashboard(engine: MultiHorizonPredictionEngine):
     """Dashboard exécutif Oracle HSE"""
@@ -18,8 +18,13 @@ import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime, timedelta
+import copy
+import heapq
 import json
-from typing import Dict, List, Tuple, Optional
+import sqlite3
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple, Optional, Union
 from dataclasses import dataclass
 from enum import Enum
 
@@ -351,59 +356,364 @@ CLAUSES_ISO_45001 = {
     )
 }
 
+# ═══════════════════════════════════════════════════════════════
+# JOURNAL ÉVÉNEMENTIEL DES ACTIONS (CATALOGUE, COMPTEURS, PERSISTANCE)
+# ═══════════════════════════════════════════════════════════════
+
+SITE_DEFAUT = "principal"
+MAX_HISTORIQUE = 1000
+FENETRES_FREQUENCE = {"7j": timedelta(days=7), "30j": timedelta(days=30)}
+INTERVALLE_INSTANTANE = 500  # Actions entre deux instantanés automatiques
+JOURNAL_ACTIONS_DEFAUT = "data/culture_sst_actions.db"
+
+class CatalogueActions:
+    """Index par hachage des actions rapides: (profil, id), id et catégorie culture"""
+    
+    def __init__(self, actions_par_profil: Dict[ProfilUtilisateur, List[ActionRapide]]):
+        self._par_cle: Dict[Tuple[ProfilUtilisateur, str], ActionRapide] = {}
+        self._par_id: Dict[str, ActionRapide] = {}
+        self._par_categorie: Dict[str, List[ActionRapide]] = defaultdict(list)
+        for profil, actions in actions_par_profil.items():
+            for action in actions:
+                self._par_cle[(profil, action.id)] = action
+                if action.id not in self._par_id:
+                    self._par_id[action.id] = action
+                    self._par_categorie[action.dimension_culture].append(action)
+    
+    def trouver(self, profil: ProfilUtilisateur, action_id: str) -> Optional[ActionRapide]:
+        return self._par_cle.get((profil, action_id))
+    
+    def par_id(self, action_id: str) -> Optional[ActionRapide]:
+        return self._par_id.get(action_id)
+    
+    def par_categorie(self, dimension_culture: str) -> List[ActionRapide]:
+        return list(self._par_categorie.get(dimension_culture, ()))
+    
+    def __len__(self) -> int:
+        return len(self._par_cle)
+
+class CompteursActions:
+    """Compteurs de fréquence mis à jour à l'arrivée de chaque action
+    
+    Totaux par action, par site et par (site, action), plus des fenêtres
+    glissantes (7j, 30j) relatives à l'action la plus récente. Les entrées
+    sorties d'une fenêtre sont retirées via un tas trié par horodatage, ce qui
+    reste exact même si des actions arrivent antidatées (données démo, import).
+    """
+    
+    def __init__(self, fenetres: Dict[str, timedelta] = None):
+        self.fenetres = dict(FENETRES_FREQUENCE if fenetres is None else fenetres)
+        self.par_action: Counter = Counter()
+        self.par_site: Counter = Counter()
+        self.par_site_action: Counter = Counter()
+        self.par_profil: Counter = Counter()
+        self.dernier_horodatage: Optional[datetime] = None
+        self._tas: Dict[str, List[Tuple[datetime, int, str, str]]] = {nom: [] for nom in self.fenetres}
+        self._fenetre_action: Dict[str, Counter] = {nom: Counter() for nom in self.fenetres}
+        self._fenetre_site_action: Dict[str, Counter] = {nom: Counter() for nom in self.fenetres}
+        self._sequence = 0
+    
+    def ajouter(self, horodatage: datetime, action_id: str, site: str, profil: str):
+        self.par_action[action_id] += 1
+        self.par_site[site] += 1
+        self.par_site_action[(site, action_id)] += 1
+        self.par_profil[profil] += 1
+        if self.dernier_horodatage is None or horodatage > self.dernier_horodatage:
+            self.dernier_horodatage = horodatage
+        
+        for nom, duree in self.fenetres.items():
+            if horodatage >= self.dernier_horodatage - duree:
+                self._sequence += 1
+                heapq.heappush(self._tas[nom], (horodatage, self._sequence, action_id, site))
+                self._fenetre_action[nom][action_id] += 1
+                self._fenetre_site_action[nom][(site, action_id)] += 1
+            self._expirer(nom)
+    
+    def _expirer(self, nom: str):
+        tas, limite = self._tas[nom], self.dernier_horodatage - self.fenetres[nom]
+        while tas and tas[0][0] < limite:
+            _, _, action_id, site = heapq.heappop(tas)
+            _decrementer(self._fenetre_action[nom], action_id)
+            _decrementer(self._fenetre_site_action[nom], (site, action_id))
+    
+    def frequence(self, action_id: str, site: Optional[str] = None, fenetre: Optional[str] = None) -> int:
+        """Nombre d'exécutions d'une action (tous sites ou un site, total ou fenêtre glissante)"""
+        if fenetre is None:
+            return self.par_action[action_id] if site is None else self.par_site_action[(site, action_id)]
+        if site is None:
+            return self._fenetre_action[fenetre][action_id]
+        return self._fenetre_site_action[fenetre][(site, action_id)]
+    
+    def etat(self) -> Dict:
+        """État sérialisable JSON (instantané)"""
+        return {
+            "fenetres": {nom: duree.total_seconds() for nom, duree in self.fenetres.items()},
+            "par_action": dict(self.par_action),
+            "par_site_action": [[site, action_id, n] for (site, action_id), n in self.par_site_action.items()],
+            "par_profil": dict(self.par_profil),
+            "dernier_horodatage": self.dernier_horodatage.isoformat() if self.dernier_horodatage else None,
+            "tas": {nom: [[h.isoformat(), action_id, site] for h, _, action_id, site in sorted(tas)]
+                    for nom, tas in self._tas.items()}
+        }
+    
+    @classmethod
+    def depuis_etat(cls, etat: Dict) -> "CompteursActions":
+        compteurs = cls({nom: timedelta(seconds=s) for nom, s in etat["fenetres"].items()})
+        compteurs.par_action.update(etat["par_action"])
+        for site, action_id, n in etat["par_site_action"]:
+            compteurs.par_site_action[(site, action_id)] = n
+            compteurs.par_site[site] += n
+        compteurs.par_profil.update(etat["par_profil"])
+        if etat["dernier_horodatage"]:
+            compteurs.dernier_horodatage = datetime.fromisoformat(etat["dernier_horodatage"])
+        for nom, entrees in etat["tas"].items():
+            for horodatage, action_id, site in entrees:
+                compteurs._sequence += 1
+                compteurs._tas[nom].append((datetime.fromisoformat(horodatage), compteurs._sequence, action_id, site))
+                compteurs._fenetre_action[nom][action_id] += 1
+                compteurs._fenetre_site_action[nom][(site, action_id)] += 1
+        return compteurs
+
+def _decrementer(compteur: Counter, cle):
+    compteur[cle] -= 1
+    if compteur[cle] <= 0:
+        del compteur[cle]
+
+class JournalActionsCulture:
+    """Journal append-only SQLite des actions + instantanés de l'état du moteur
+    
+    Redémarrage: dernier instantané puis rejeu des seules actions postérieures,
+    au lieu de retraiter tout l'historique.
+    """
+    
+    def __init__(self, chemin: str = JOURNAL_ACTIONS_DEFAUT):
+        self.chemin = Path(chemin)
+        self.chemin.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.chemin), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS actions_culture (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                horodatage TEXT NOT NULL,
+                profil TEXT NOT NULL,
+                action_id TEXT NOT NULL,
+                site TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS instantanes_culture (
+                seq INTEGER PRIMARY KEY,
+                etat TEXT NOT NULL,
+                cree_le TEXT NOT NULL
+            );
+        ''')
+        self._conn.commit()
+    
+    def ajouter(self, horodatage: datetime, profil: ProfilUtilisateur, action_id: str, site: str) -> int:
+        """Ajoute une action au journal et retourne son numéro de séquence"""
+        curseur = self._conn.execute(
+            "INSERT INTO actions_culture (horodatage, profil, action_id, site) VALUES (?, ?, ?, ?)",
+            (horodatage.isoformat(), profil.value, action_id, site)
+        )
+        self._conn.commit()
+        return curseur.lastrowid
+    
+    def evenements_depuis(self, seq: int = 0):
+        """Actions de séquence > seq, dans l'ordre d'enregistrement"""
+        curseur = self._conn.execute(
+            "SELECT seq, horodatage, profil, action_id, site FROM actions_culture WHERE seq > ? ORDER BY seq", (seq,)
+        )
+        for seq_evt, horodatage, profil, action_id, site in curseur:
+            yield seq_evt, datetime.fromisoformat(horodatage), ProfilUtilisateur(profil), action_id, site
+    
+    def sauver_instantane(self, seq: int, etat: Dict):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO instantanes_culture (seq, etat, cree_le) VALUES (?, ?, ?)",
+            (seq, json.dumps(etat, ensure_ascii=False), datetime.now().isoformat())
+        )
+        # Seul le dernier instantané sert au redémarrage
+        self._conn.execute("DELETE FROM instantanes_culture WHERE seq < ?", (seq,))
+        self._conn.commit()
+    
+    def dernier_instantane(self) -> Tuple[int, Optional[Dict]]:
+        ligne = self._conn.execute("SELECT seq, etat FROM instantanes_culture ORDER BY seq DESC LIMIT 1").fetchone()
+        return (ligne[0], json.loads(ligne[1])) if ligne else (0, None)
+    
+    def derniere_sequence(self) -> int:
+        return self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM actions_culture").fetchone()[0]
+    
+    def close(self):
+        self._conn.close()
+
 # ═══════════════════════════════════════════════════════════════
 # MOTEUR CALCUL CULTURE SST & ISO 45001
 # ═══════════════════════════════════════════════════════════════
 
 class MoteurCultureSST:
-    """Moteur de calcul culture SST et conformité ISO 45001"""
-    
-    def __init__(self):
+    """Moteur de calcul culture SST et conformité ISO 45001
+    
+    Chaque action enregistrée est un événement: elle met à jour les compteurs
+    de fréquence et les scores à son arrivée. Avec un journal, elle est aussi
+    persistée; au démarrage le moteur recharge le dernier instantané puis rejoue
+    les seules actions postérieures.
+    
+    Le journal peut être partagé (une session Streamlit = un moteur): l'état
+    d'un moteur est toujours la projection du journal jusqu'à derniere_sequence,
+    actions des autres moteurs comprises, rattrapées dans l'ordre avant chaque
+    écriture. Un instantané à la séquence N couvre donc bien tout le préfixe N.
+    """
+    
+    def __init__(self, journal: Union[str, JournalActionsCulture, None] = None,
+                 site: str = SITE_DEFAUT, intervalle_instantane: int = INTERVALLE_INSTANTANE):
+        self.site = site
+        self.intervalle_instantane = intervalle_instantane
+        self.catalogue = CatalogueActions(ACTIONS_RAPIDES)
+        self.journal = JournalActionsCulture(journal) if isinstance(journal, str) else journal
+        self._origine = 0  # Séquence de départ de la vue (> 0 après reinitialiser)
+        self._reinitialiser_etat()
+        if self.journal is not None:
+            self._restaurer()
+    
+    def _reinitialiser_etat(self):
+        # Copies profondes: les modèles de référence ne sont jamais modifiés par un moteur
         self.historique_actions = []
-        self.scores_culture = DIMENSIONS_CULTURE_SST.copy()
-        self.conformite_iso = CLAUSES_ISO_45001.copy()
+        self.nombre_actions = 0
+        self.compteurs = CompteursActions()
+        self.scores_culture = copy.deepcopy(DIMENSIONS_CULTURE_SST)
+        self.conformite_iso = copy.deepcopy(CLAUSES_ISO_45001)
+        self.derniere_sequence = 0
+        self._sequence_instantane = 0
         
     def enregistrer_action(self, user_profil: ProfilUtilisateur, action_id: str, 
-                          timestamp: datetime = None) -> Dict:
+                          timestamp: datetime = None, site: str = None) -> Dict:
         """Enregistre une action utilisateur et calcule impacts"""
         
         if timestamp is None:
             timestamp = datetime.now()
+        site = site or self.site
             
         # Trouver l'action
         action = self._trouver_action(user_profil, action_id)
         if not action:
             return {"erreur": "Action non trouvée"}
-            
-        # Enregistrer dans historique
-        entry = {
+        
+        if self.journal is not None:
+            # Rattrapage en ordre de séquence: actions des autres moteurs puis la nôtre
+            self.journal.ajouter(timestamp, user_profil, action_id, site)
+            self.synchroniser()
+        else:
+            self._appliquer(timestamp, user_profil, action, site)
+        
+        if (self.journal is not None and
+                self.derniere_sequence - self._sequence_instantane >= self.intervalle_instantane):
+            self.sauver_instantane()
+        
+        return {
+            "success": True,
+            "action_enregistree": action.nom,
+            "impact_culture": action.impact_culture,
+            "nouveau_score_culture": self._score_culture_global(),
+            "nouveau_score_iso": self._score_iso_global()
+        }
+    
+    def _appliquer(self, timestamp: datetime, profil: ProfilUtilisateur, action: ActionRapide, site: str):
+        """Applique un événement: compteurs, historique récent puis scores"""
+        self.compteurs.ajouter(timestamp, action.id, site, profil.value)
+        self.nombre_actions += 1
+        
+        self.historique_actions.append({
             "timestamp": timestamp,
-            "profil": user_profil,
+            "profil": profil,
             "action": action,
+            "site": site,
             "impact_culture": action.impact_culture,
             "impact_iso": action.poids_iso
-        }
-        self.historique_actions.append(entry)
+        })
+        if len(self.historique_actions) > 2 * MAX_HISTORIQUE:
+            del self.historique_actions[:-MAX_HISTORIQUE]
         
         # Calculer nouveaux scores
         self._calculer_score_culture(action)
         self._calculer_conformite_iso(action)
-        
+    
+    # ─────────────────────────────────────────────────────────────
+    # Instantanés & rejeu
+    # ─────────────────────────────────────────────────────────────
+    
+    def etat(self) -> Dict:
+        """État complet sérialisable (scores, compteurs, historique récent)"""
         return {
-            "success": True,
-            "action_enregistree": action.nom,
-            "impact_culture": action.impact_culture,
-            "nouveau_score_culture": self._score_culture_global(),
-            "nouveau_score_iso": self._score_iso_global()
+            "derniere_sequence": self.derniere_sequence,
+            "nombre_actions": self.nombre_actions,
+            "scores_culture": {dim_id: dim.score_actuel for dim_id, dim in self.scores_culture.items()},
+            "conformite_iso": {clause_id: clause.score_conformite for clause_id, clause in self.conformite_iso.items()},
+            "compteurs": self.compteurs.etat(),
+            "historique": [
+                [entry["timestamp"].isoformat(), entry["profil"].value, entry["action"].id, entry["site"]]
+                for entry in self.historique_actions[-MAX_HISTORIQUE:]
+            ]
         }
     
+    def sauver_instantane(self):
+        """Persiste l'état courant; le prochain démarrage repartira de cette séquence"""
+        # Une vue réinitialisée ne couvre pas tout le préfixe du journal partagé
+        if self.journal is None or self._origine:
+            return
+        self.synchroniser()
+        self.journal.sauver_instantane(self.derniere_sequence, self.etat())
+        self._sequence_instantane = self.derniere_sequence
+    
+    def synchroniser(self) -> int:
+        """Applique les actions du journal postérieures à derniere_sequence (toutes sources)"""
+        if self.journal is None:
+            return 0
+        appliquees = 0
+        for seq_evt, timestamp, profil, action_id, site in self.journal.evenements_depuis(self.derniere_sequence):
+            action = self._trouver_action(profil, action_id)
+            if action is not None:
+                self._appliquer(timestamp, profil, action, site)
+                appliquees += 1
+            self.derniere_sequence = seq_evt
+        return appliquees
+    
+    def _restaurer(self):
+        seq, etat = self.journal.dernier_instantane()
+        if etat is not None:
+            self._charger_etat(etat)
+            self._sequence_instantane = seq
+        self.synchroniser()
+    
+    def _charger_etat(self, etat: Dict):
+        self.derniere_sequence = etat["derniere_sequence"]
+        self.nombre_actions = etat["nombre_actions"]
+        for dim_id, score in etat["scores_culture"].items():
+            if dim_id in self.scores_culture:
+                self.scores_culture[dim_id].score_actuel = score
+        for clause_id, score in etat["conformite_iso"].items():
+            if clause_id in self.conformite_iso:
+                self.conformite_iso[clause_id].score_conformite = score
+        self.compteurs = CompteursActions.depuis_etat(etat["compteurs"])
+        for horodatage, profil_value, action_id, site in etat["historique"]:
+            profil = ProfilUtilisateur(profil_value)
+            action = self._trouver_action(profil, action_id)
+            if action is not None:
+                self.historique_actions.append({
+                    "timestamp": datetime.fromisoformat(horodatage), "profil": profil, "action": action,
+                    "site": site, "impact_culture": action.impact_culture, "impact_iso": action.poids_iso
+                })
+    
+    def reinitialiser(self):
+        """Remet à zéro scores et compteurs de ce moteur; le journal partagé n'est pas modifié
+        
+        La vue repart de la tête actuelle du journal: seules les actions suivantes
+        sont comptées. Un nouveau moteur sur le même journal retrouve l'historique.
+        """
+        self._reinitialiser_etat()
+        if self.journal is not None:
+            self._origine = self.derniere_sequence = self._sequence_instantane = self.journal.derniere_sequence()
+    
     def _trouver_action(self, profil: ProfilUtilisateur, action_id: str) -> Optional[ActionRapide]:
         """Trouve une action par profil et ID"""
-        actions_profil = ACTIONS_RAPIDES.get(profil, [])
-        for action in actions_profil:
-            if action.id == action_id:
-                return action
-        return None
+        return self.catalogue.trouver(profil, action_id)
     
     def _calculer_score_culture(self, action: ActionRapide):
         """Met à jour score culture SST basé sur action"""
@@ -462,9 +772,8 @@ class MoteurCultureSST:
         return 1.0  # Simplifié pour demo
     
     def _calculer_frequence_action(self, action_id: str) -> float:
-        """Calcule fréquence d'utilisation d'une action"""
-        count = sum(1 for entry in self.historique_actions 
-                   if entry["action"].id == action_id)
+        """Calcule fréquence d'utilisation d'une action (compteur incrémental, O(1))"""
+        count = self.compteurs.frequence(action_id)
         return min(1.0, count / 10)  # Normalisé sur 10 utilisations
     
     def _score_culture_global(self) -> float:
@@ -583,7 +892,7 @@ def afficher_dashboard_culture_sst(moteur: MoteurCultureSST):
         st.metric("📈 Niveau Maturité", niveau_maturite)
     
     with col3:
-        actions_total = len(moteur.historique_actions)
+        actions_total = moteur.nombre_actions
         st.metric("⚡ Actions Réalisées", actions_total)
     
     with col4:
@@ -725,12 +1034,13 @@ def interface_principale():
     
     # Initialisation session state
     if "moteur_culture" not in st.session_state:
-        st.session_state.moteur_culture = MoteurCultureSST()
+        st.session_state.moteur_culture = MoteurCultureSST(journal=JOURNAL_ACTIONS_DEFAUT)
     
     if "profil_utilisateur" not in st.session_state:
         st.session_state.profil_utilisateur = ProfilUtilisateur.COSS
     
     moteur = st.session_state.moteur_culture
+    moteur.synchroniser()  # Actions enregistrées par les autres sessions
     
     # ═══════════════════════════════════════════════════════════════
     # HEADER PRINCIPAL
@@ -770,7 +1080,7 @@ def interface_principale():
         
         score_culture = moteur._score_culture_global()
         score_iso = moteur._score_iso_global()
-        actions_count = len(moteur.historique_actions)
+        actions_count = moteur.nombre_actions
         
         st.metric("🎯 Culture SST", f"{score_culture}/10")
         st.metric("📋 ISO 45001", f"{score_iso}%")
@@ -789,13 +1099,15 @@ def interface_principale():
         # Actions debug
         st.markdown("### 🔧 Actions Debug")
         
-        if st.button("🔄 Reset Données", help="Remet à zéro tous les scores"):
-            st.session_state.moteur_culture = MoteurCultureSST()
+        if st.button("🔄 Reset Données", help="Remet à zéro les scores de cette session"):
+            moteur.reinitialiser()
             st.success("✅ Données réinitialisées")
             st.rerun()
         
-        if st.button("📊 Données Demo", help="Charge données de démonstration"):
-            charger_donnees_demo(moteur)
+        if st.button("📊 Données Demo", help="Charge données de démonstration (session seulement)"):
+            # Moteur en mémoire: la démo n'écrit jamais dans le journal partagé
+            st.session_state.moteur_culture = MoteurCultureSST(site=moteur.site)
+            charger_donnees_demo(st.session_state.moteur_culture)
             st.success("✅ Données demo chargées")
             st.rerun()
     
@@ -976,11 +1288,11 @@ def interface_principale():
             # Répartition actions par profil
             st.markdown("### 👥 Répartition Actions par Profil")
             
-            if moteur.historique_actions:
-                profil_counts = {}
-                for entry in moteur.historique_actions:
-                    profil_name = entry["profil"].value.replace('_', ' ').title()
-                    profil_counts[profil_name] = profil_counts.get(profil_name, 0) + 1
+            if moteur.nombre_actions:
+                profil_counts = {
+                    profil_value.replace('_', ' ').title(): count
+                    for profil_value, count in moteur.compteurs.par_profil.items()
+                }
                 
                 fig_profils = px.pie(
                     values=list(profil_counts.values()),
@@ -1047,7 +1359,7 @@ def interface_principale():
         
         with col5:
             # ROI investissement
-            actions_total = len(moteur.historique_actions)
+            actions_total = moteur.nombre_actions
             roi_estime = actions_total * 1500  # 1500$ par action en valeur
             
             st.markdown(f"""
@@ -1063,7 +1375,10 @@ def interface_principale():
 # ═══════════════════════════════════════════════════════════════
 
 def charger_donnees_demo(moteur: MoteurCultureSST):
-    """Charge des données de démonstration"""
+    """Charge des données de démonstration dans un moteur sans journal"""
+    
+    if moteur.journal is not None:
+        raise ValueError("Données de démonstration refusées: le moteur écrit dans un journal persistant")
     
     # Simuler historique d'actions variées
     demo_actions = [
@@ -1124,7 +1439,7 @@ def export_donnees_json(moteur: MoteurCultureSST) -> Dict:
         ],
         "score_global_culture": moteur._score_culture_global(),
         "score_global_iso": moteur._score_iso_global(),
-        "total_actions": len(moteur.historique_actions)
+        "total_actions": moteur.nombre_actions
     }
 
 # ═══════════════════════════════════════════════════════════════
@@ -1196,7 +1511,7 @@ MÉTRIQUES AVANCÉES:
 
 # Calculs personnalisés
 def calculer_roi_culture(moteur):
-    actions = len(moteur.historique_actions)
+    actions = moteur.nombre_actions
     return actions * 1500  # ROI par action
 
 def predire_certification(score_iso):
@@ -1207,17 +1522,11 @@ def predire_certification(score_iso):
 SÉCURITÉ & PERFORMANCE:
 ======================
 
-# Limitation historique (éviter surcharge mémoire)
-MAX_HISTORIQUE = 1000
-
-# Sauvegarde périodique
-def sauvegarder_etat(moteur):
-    data = export_donnees_json(moteur)
-    with open(f"safetygraph_backup_{datetime.now().strftime('%Y%m%d_%H%M')}.json", "w") as f:
-        json.dump(data, f, indent=2)
+# Historique en mémoire borné (MAX_HISTORIQUE dernières actions);
+# fréquences et totaux tenus par moteur.compteurs, sans relecture de l'historique
+moteur.compteurs.frequence("check_securite", site="usine_nord", fenetre="7j")
 
-# Restauration état
-def restaurer_etat(fichier_backup):
-    # Implémentation restauration depuis JSON
-    pass
+# Persistance: journal append-only SQLite + instantanés automatiques
+moteur = MoteurCultureSST(journal="data/culture_sst_actions.db")
+moteur.sauver_instantane()  # Redémarrage = dernier instantané + rejeu des actions suivantes
 """
\ No newline at end of file
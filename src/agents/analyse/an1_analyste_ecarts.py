@@ -14,6 +14,40 @@ import json
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("SafetyAgentic.AN1")
 
+# Variables culture rattachées à chaque modèle HSE (partagées avec le moteur batch AN1)
+HFACS_MAPPING = {
+    "hfacs_l1": ["leadership_sst", "politique_securite", "ressources_securite"],
+    "hfacs_l2": ["supervision_directe", "formation_superviseurs", "communication_risques"],
+    "hfacs_l3": ["usage_epi", "respect_procedures", "maintenance_equipements"],
+    "hfacs_l4": ["comportements_risque", "erreurs_execution", "violations_regles"]
+}
+
+SWISS_CHEESE_BARRIERES = {
+    "barrieres_organisationnelles": ["politique_securite", "formation_securite", "audit_securite"],
+    "barrieres_supervision": ["supervision_directe", "controle_epi", "inspection_equipements"],
+    "barrieres_individuelles": ["competences_securite", "motivation_securite", "perception_risque"],
+    "barrieres_techniques": ["equipements_protection", "systemes_alerte", "maintenance_preventive"]
+}
+
+SRK_MAPPING = {
+    "skill": ["competences_techniques", "automatismes_securite", "reflexes_urgence"],
+    "rule": ["respect_procedures", "application_consignes", "suivi_protocoles"],
+    "knowledge": ["comprehension_risques", "analyse_situations", "prise_decision"]
+}
+
+BOW_TIE_BARRIERES = {
+    "barrieres_preventives": {
+        "formation": "formation_securite",
+        "procedures": "respect_procedures",
+        "supervision": "supervision_directe"
+    },
+    "barrieres_protectives": {
+        "epi": "usage_epi",
+        "systemes_urgence": "procedures_urgence",
+        "premiers_secours": "formation_secours"
+    }
+}
+
 class AN1AnalysteEcarts:
     """
     Agent AN1 - Analyste des Écarts Culture Sécurité
@@ -134,6 +168,23 @@ class AN1AnalysteEcarts:
             logger.error(f"❌ Erreur Agent AN1: {str(e)}")
             return {"error": str(e), "agent_id": self.agent_id}
     
+    async def process_batch(self, enterprises: Dict[str, Tuple[Dict, Dict]], context: Dict = None) -> Dict[str, Dict]:
+        """
+        Analyse écarts de plusieurs entreprises en une passe vectorisée (benchmark sectoriel)
+        
+        Args:
+            enterprises: {entreprise_id: (data_a1, data_a2)}
+            context: Contexte commun
+            
+        Returns:
+            {entreprise_id: résultat identique à process(data_a1, data_a2, context)}
+        """
+        try:
+            from .an1_batch import AN1BatchEngine
+        except ImportError:
+            from an1_batch import AN1BatchEngine
+        return AN1BatchEngine(self).analyze(enterprises, context)
+    
     def _validate_input_data(self, data_a1: Dict, data_a2: Dict):
         """Validation des données A1 et A2"""
         if not data_a1 or not data_a2:
@@ -159,8 +210,8 @@ class AN1AnalysteEcarts:
         vars_a1 = data_a1.get("variables_culture_sst", {})
         vars_a2 = data_a2.get("variables_culture_terrain", {})
         
-        # Analyser chaque variable commune
-        for variable in set(vars_a1.keys()).intersection(set(vars_a2.keys())):
+        # Analyser chaque variable commune (ordre trié: résultats reproductibles d'un processus à l'autre)
+        for variable in sorted(set(vars_a1.keys()).intersection(set(vars_a2.keys()))):
             score_a1 = vars_a1[variable].get("score", 0)
             score_a2 = vars_a2[variable].get("score", 0)
             
@@ -221,14 +272,7 @@ class AN1AnalysteEcarts:
     
     def _apply_hfacs_model(self, level: str, ecarts: Dict, context: Dict) -> Dict:
         """Application modèle HFACS selon niveau"""
-        hfacs_mapping = {
-            "hfacs_l1": ["leadership_sst", "politique_securite", "ressources_securite"],
-            "hfacs_l2": ["supervision_directe", "formation_superviseurs", "communication_risques"],
-            "hfacs_l3": ["usage_epi", "respect_procedures", "maintenance_equipements"],
-            "hfacs_l4": ["comportements_risque", "erreurs_execution", "violations_regles"]
-        }
-        
-        variables_concernees = hfacs_mapping.get(level, [])
+        variables_concernees = HFACS_MAPPING.get(level, [])
         ecarts_niveau = {v: ecarts[v] for v in variables_concernees if v in ecarts}
         
         return {
@@ -241,15 +285,8 @@ class AN1AnalysteEcarts:
     
     def _apply_swiss_cheese_model(self, ecarts: Dict, context: Dict) -> Dict:
         """Application modèle Swiss Cheese - analyse défaillances barrières"""
-        barrieres = {
-            "barrieres_organisationnelles": ["politique_securite", "formation_securite", "audit_securite"],
-            "barrieres_supervision": ["supervision_directe", "controle_epi", "inspection_equipements"],
-            "barrieres_individuelles": ["competences_securite", "motivation_securite", "perception_risque"],
-            "barrieres_techniques": ["equipements_protection", "systemes_alerte", "maintenance_preventive"]
-        }
-        
         defaillances = {}
-        for barriere_type, variables in barrieres.items():
+        for barriere_type, variables in SWISS_CHEESE_BARRIERES.items():
             ecarts_barriere = {v: ecarts[v] for v in variables if v in ecarts}
             defaillance_score = np.mean([e["pourcentage"] for e in ecarts_barriere.values()]) if ecarts_barriere else 0
             
@@ -267,14 +304,8 @@ class AN1AnalysteEcarts:
     
     def _apply_srk_model(self, ecarts: Dict, context: Dict) -> Dict:
         """Application modèle SRK (Skill-Rule-Knowledge)"""
-        srk_mapping = {
-            "skill": ["competences_techniques", "automatismes_securite", "reflexes_urgence"],
-            "rule": ["respect_procedures", "application_consignes", "suivi_protocoles"],
-            "knowledge": ["comprehension_risques", "analyse_situations", "prise_decision"]
-        }
-        
         srk_analysis = {}
-        for niveau, variables in srk_mapping.items():
+        for niveau, variables in SRK_MAPPING.items():
             ecarts_niveau = {v: ecarts[v] for v in variables if v in ecarts}
             score_ecart = np.mean([e["pourcentage"] for e in ecarts_niveau.values()]) if ecarts_niveau else 0
             
@@ -289,16 +320,8 @@ class AN1AnalysteEcarts:
     def _apply_bow_tie_model(self, ecarts: Dict, context: Dict) -> Dict:
         """Application modèle Bow-Tie - barrières préventives vs protectives"""
         return {
-            "barrieres_preventives": {
-                "formation": ecarts.get("formation_securite", {}).get("pourcentage", 0),
-                "procedures": ecarts.get("respect_procedures", {}).get("pourcentage", 0),
-                "supervision": ecarts.get("supervision_directe", {}).get("pourcentage", 0)
-            },
-            "barrieres_protectives": {
-                "epi": ecarts.get("usage_epi", {}).get("pourcentage", 0),
-                "systemes_urgence": ecarts.get("procedures_urgence", {}).get("pourcentage", 0),
-                "premiers_secours": ecarts.get("formation_secours", {}).get("pourcentage", 0)
-            }
+            cote: {barriere: ecarts.get(variable, {}).get("pourcentage", 0) for barriere, variable in barrieres.items()}
+            for cote, barrieres in BOW_TIE_BARRIERES.items()
         }
     
     def _apply_generic_hse_model(self, model_code: str, ecarts: Dict, context: Dict) -> Dict:
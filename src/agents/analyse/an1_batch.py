@@ -0,0 +1,369 @@
+# Agent AN1 - Moteur Batch d'Analyse des Écarts SafetyAgentic
+# =============================================================
+# Analyse écarts A1/A2 de plusieurs entreprises en une passe vectorisée:
+# matrices entreprises × variables culture, classification des niveaux,
+# zones aveugles et scores des 12 modèles HSE par opérations matricielles.
+# Les résultats par entreprise sont identiques à AN1AnalysteEcarts.process.
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+import logging
+
+try:
+    from .an1_analyste_ecarts import (AN1AnalysteEcarts, BOW_TIE_BARRIERES, HFACS_MAPPING,
+                                      SRK_MAPPING, SWISS_CHEESE_BARRIERES)
+except ImportError:
+    from an1_analyste_ecarts import (AN1AnalysteEcarts, BOW_TIE_BARRIERES, HFACS_MAPPING,
+                                     SRK_MAPPING, SWISS_CHEESE_BARRIERES)
+
+logger = logging.getLogger("SafetyAgentic.AN1.Batch")
+
+NIVEAUX = np.array(["faible", "modere", "eleve", "critique"], dtype=object)
+IDX_ELEVE, IDX_CRITIQUE = 2, 3
+
+@dataclass
+class GapMatrices:
+    """Écarts de N entreprises sur V variables (colonnes triées, comme le chemin scalaire)"""
+    enterprise_ids: List[str]
+    variables: List[str]
+    score_a1: np.ndarray        # (N, V) float
+    score_a2: np.ndarray        # (N, V) float
+    present: np.ndarray         # (N, V) bool - variable commune à A1 et A2
+    pourcentage: np.ndarray     # (N, V) float - écart relatif %
+    niveau: np.ndarray          # (N, V) int - index dans NIVEAUX
+    surestimation: np.ndarray   # (N, V) bool
+    raw: List[List[Tuple]]      # par entreprise: (colonne, score_a1, score_a2, source_a1, source_a2)
+
+    @property
+    def severe(self) -> np.ndarray:
+        return self.present & (self.niveau >= IDX_ELEVE)
+
+    @property
+    def critique(self) -> np.ndarray:
+        return self.present & (self.niveau == IDX_CRITIQUE)
+
+
+def masked_row_mean(values: np.ndarray, mask: np.ndarray, columns: Optional[List[int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Moyenne par ligne des seules valeurs masquées, dans l'ordre des colonnes
+
+    Les lignes sont regroupées par motif de présence: chaque groupe est réduit
+    sur sa sous-matrice compacte, ce qui reproduit bit à bit np.mean sur la
+    liste des valeurs du chemin scalaire. Retourne (moyennes, effectifs);
+    moyenne NaN si aucune valeur.
+    """
+    if columns is not None:
+        values, mask = values[:, columns], mask[:, columns]
+    counts = mask.sum(axis=1)
+    means = np.full(values.shape[0], np.nan)
+    if values.shape[0] == 0 or values.shape[1] == 0:
+        return means, counts
+    patterns, inverse = np.unique(mask, axis=0, return_inverse=True)
+    inverse = np.asarray(inverse).reshape(-1)
+    for k, pattern in enumerate(patterns):
+        cols = np.flatnonzero(pattern)
+        if cols.size:
+            rows = np.flatnonzero(inverse == k)
+            means[rows] = values[np.ix_(rows, cols)].mean(axis=1)
+    return means, counts
+
+
+class AN1BatchEngine:
+    """Analyse écarts multi-entreprises (benchmark sectoriel) en une passe vectorisée"""
+
+    def __init__(self, agent: Optional[AN1AnalysteEcarts] = None):
+        # L'agent scalaire fournit seuils, modèles et textes (explications, recommandations)
+        self.agent = agent or AN1AnalysteEcarts()
+        seuils = self.agent.ecart_thresholds
+        self._seuils = (seuils["faible"], seuils["modere"], seuils["eleve"])
+
+    # ------------------------------------------------------------------
+    # Matrices d'écarts
+    # ------------------------------------------------------------------
+
+    def compute_gap_matrices(self, enterprises: Mapping[str, Tuple[Dict, Dict]]) -> GapMatrices:
+        """Écarts, niveaux et directions de toutes les entreprises (données A1/A2 déjà validées)"""
+        ids = list(enterprises)
+        communes = []
+        for enterprise_id in ids:
+            vars_a1 = enterprises[enterprise_id][0].get("variables_culture_sst", {})
+            vars_a2 = enterprises[enterprise_id][1].get("variables_culture_terrain", {})
+            communes.append(sorted(set(vars_a1.keys()).intersection(set(vars_a2.keys()))))
+
+        variables = sorted(set().union(*communes)) if communes else []
+        colonne = {variable: j for j, variable in enumerate(variables)}
+        shape = (len(ids), len(variables))
+        score_a1, score_a2 = np.zeros(shape), np.zeros(shape)
+        present = np.zeros(shape, dtype=bool)
+        raw = []
+
+        for i, (enterprise_id, variables_communes) in enumerate(zip(ids, communes)):
+            vars_a1 = enterprises[enterprise_id][0]["variables_culture_sst"]
+            vars_a2 = enterprises[enterprise_id][1]["variables_culture_terrain"]
+            lignes = []
+            for variable in variables_communes:
+                j = colonne[variable]
+                s1, s2 = vars_a1[variable].get("score", 0), vars_a2[variable].get("score", 0)
+                score_a1[i, j], score_a2[i, j], present[i, j] = s1, s2, True
+                lignes.append((j, s1, s2, vars_a1[variable].get("source", "unknown"),
+                               vars_a2[variable].get("source", "unknown")))
+            raw.append(lignes)
+
+        # Même formule que le chemin scalaire: |a1 - a2| / a1 * 100, pénalité |a2| * 10 si a1 <= 0
+        ecart = np.abs(score_a1 - score_a2)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            relatif = ecart / score_a1 * 100
+        pourcentage = np.where(score_a1 > 0, relatif, np.abs(score_a2) * 10)
+        pourcentage[~present] = 0.0
+
+        faible, modere, eleve = self._seuils
+        niveau = np.select([pourcentage < faible, pourcentage < modere, pourcentage < eleve], [0, 1, 2], IDX_CRITIQUE)
+
+        return GapMatrices(ids, variables, score_a1, score_a2, present, pourcentage, niveau,
+                           score_a1 > score_a2, raw)
+
+    # ------------------------------------------------------------------
+    # Modèles HSE (opérations matricielles)
+    # ------------------------------------------------------------------
+
+    def _group_scores(self, m: GapMatrices, groups: Mapping[str, List[str]]) -> Dict[str, Dict[str, np.ndarray]]:
+        """Moyenne, effectif, critiques et variable dominante par groupe de variables"""
+        colonne = {variable: j for j, variable in enumerate(m.variables)}
+        n = len(m.enterprise_ids)
+        resultats = {}
+        for groupe, variables in groups.items():
+            cols = [colonne[v] for v in variables if v in colonne]
+            noms = [v for v in variables if v in colonne]
+            if not cols:
+                resultats[groupe] = {"mean": np.full(n, np.nan), "count": np.zeros(n, dtype=int),
+                                     "critiques": np.zeros(n, dtype=int), "principale": [None] * n,
+                                     "variables": [[] for _ in range(n)]}
+                continue
+            mean, count = masked_row_mean(m.pourcentage, m.present, cols)
+            sub_present = m.present[:, cols]
+            masque = np.where(sub_present, m.pourcentage[:, cols], -np.inf)
+            argmax = masque.argmax(axis=1)  # premier maximum, comme max() sur le dict scalaire
+            resultats[groupe] = {
+                "mean": mean,
+                "count": count,
+                "critiques": m.critique[:, cols].sum(axis=1),
+                "principale": [noms[a] if c else None for a, c in zip(argmax, count)],
+                "variables": [[noms[k] for k in np.flatnonzero(row)] for row in sub_present]
+            }
+        return resultats
+
+    def evaluate_hse_models(self, m: GapMatrices) -> Dict[str, Any]:
+        """Scores des 12 modèles HSE pour toutes les entreprises"""
+        n_variables = m.present.sum(axis=1)
+        n_severes = m.severe.sum(axis=1)
+        total = np.where(n_variables > 0, n_variables, 1)
+        global_mean, _ = masked_row_mean(m.pourcentage, m.present)
+
+        colonne = {variable: j for j, variable in enumerate(m.variables)}
+        bow_tie = {}
+        for cote, barrieres in BOW_TIE_BARRIERES.items():
+            bow_tie[cote] = {}
+            for barriere, variable in barrieres.items():
+                j = colonne.get(variable)
+                bow_tie[cote][barriere] = (np.where(m.present[:, j], m.pourcentage[:, j], np.nan)
+                                           if j is not None else np.full(len(m.enterprise_ids), np.nan))
+
+        return {
+            "variables_impliquees": n_severes,
+            "score_applicabilite": np.minimum(100, (n_severes / total) * 100 + 20),
+            "hfacs": self._group_scores(m, HFACS_MAPPING),
+            "swiss_cheese": self._group_scores(m, SWISS_CHEESE_BARRIERES),
+            "srk": self._group_scores(m, SRK_MAPPING),
+            "bow_tie": bow_tie,
+            "score_global": global_mean,
+            "n_variables": n_variables,
+        }
+
+    # ------------------------------------------------------------------
+    # Analyse complète
+    # ------------------------------------------------------------------
+
+    def analyze(self, enterprises: Mapping[str, Tuple[Dict, Dict]], context: Dict = None) -> Dict[str, Dict]:
+        """
+        Résultat AN1 complet par entreprise
+
+        Args:
+            enterprises: {entreprise_id: (data_a1, data_a2)}
+            context: Contexte commun (secteur, incident...)
+
+        Returns:
+            {entreprise_id: résultat au format AN1AnalysteEcarts.process}
+        """
+        start_time = datetime.now()
+        resultats: Dict[str, Dict] = {}
+        valides = {}
+        for enterprise_id, (data_a1, data_a2) in enterprises.items():
+            try:
+                self.agent._validate_input_data(data_a1, data_a2)
+                valides[enterprise_id] = (data_a1, data_a2)
+            except Exception as e:
+                resultats[enterprise_id] = {"error": str(e), "agent_id": self.agent.agent_id}
+
+        m = self.compute_gap_matrices(valides)
+        hse = self.evaluate_hse_models(m)
+        summary = self._summary_arrays(m, valides)
+
+        performance_time = (datetime.now() - start_time).total_seconds()
+        for i, enterprise_id in enumerate(m.enterprise_ids):
+            resultats[enterprise_id] = self._materialize(i, m, hse, summary, performance_time)
+
+        logger.info(f"📊 AN1 batch: {len(m.enterprise_ids)} entreprises × {len(m.variables)} variables "
+                    f"en {performance_time:.3f}s")
+        return {enterprise_id: resultats[enterprise_id] for enterprise_id in enterprises}
+
+    def _summary_arrays(self, m: GapMatrices, enterprises: Mapping[str, Tuple[Dict, Dict]]) -> Dict[str, np.ndarray]:
+        moyenne, n_variables = masked_row_mean(m.pourcentage, m.present)
+        coherence, _ = masked_row_mean(1 - (m.pourcentage / 100), m.present)
+        completude = np.minimum(1.0, n_variables / 10)
+        confiance = np.where(n_variables > 0,
+                             np.maximum(0.3, np.minimum(0.95, (coherence * 0.7) + (completude * 0.3))), 0.5)
+
+        autoeval = np.array([enterprises[e][0].get("scores_autoeval", {}).get("score_global", 50)
+                             for e in m.enterprise_ids], dtype=float)
+        terrain = np.array([enterprises[e][1].get("observations", {}).get("score_comportement", 50)
+                            for e in m.enterprise_ids], dtype=float)
+        realisme = np.maximum(0, 100 - np.abs(autoeval - terrain))
+
+        n_critiques = m.critique.sum(axis=1)
+        n_eleves = (m.present & (m.niveau == IDX_ELEVE)).sum(axis=1)
+        priorite = np.select(
+            [n_critiques + n_eleves == 0, n_critiques >= 3, (n_critiques >= 1) | (n_eleves >= 5), n_eleves >= 2],
+            ["FAIBLE", "URGENTE", "ÉLEVÉE", "MOYENNE"], "FAIBLE")
+
+        return {"ecart_moyen": moyenne, "confiance": confiance, "realisme": realisme,
+                "n_critiques": n_critiques, "priorite": priorite}
+
+    def _materialize(self, i: int, m: GapMatrices, hse: Dict, summary: Dict, performance_time: float) -> Dict:
+        """Dictionnaires de sortie d'une entreprise (textes via l'agent scalaire)"""
+        agent = self.agent
+        ecarts_variables = {}
+        for j, s1, s2, source_a1, source_a2 in m.raw[i]:
+            ecarts_variables[m.variables[j]] = {
+                "score_autoeval": s1,
+                "score_terrain": s2,
+                "ecart_absolu": abs(s1 - s2),
+                "pourcentage": float(m.pourcentage[i, j]),
+                "niveau": NIVEAUX[m.niveau[i, j]],
+                "direction": "surestimation" if m.surestimation[i, j] else "sous_estimation",
+                "variable_source_a1": source_a1,
+                "variable_source_a2": source_a2
+            }
+
+        zones_aveugles = [
+            {
+                "variable": variable,
+                "type_ecart": ecart["direction"],
+                "pourcentage_ecart": ecart["pourcentage"],
+                "niveau_critique": ecart["niveau"],
+                "score_autoeval": ecart["score_autoeval"],
+                "score_terrain": ecart["score_terrain"],
+                "explication": agent._explain_blind_spot(variable, ecart),
+                "impact_potentiel": agent._assess_blind_spot_impact(variable, ecart)
+            }
+            for variable, ecart in ecarts_variables.items() if ecart["niveau"] in ("eleve", "critique")
+        ]
+        zones_aveugles.sort(key=lambda x: x["pourcentage_ecart"], reverse=True)
+
+        analysis_hse = self._materialize_hse(i, hse, ecarts_variables)
+        recommendations = agent._generate_targeted_recommendations(ecarts_variables, zones_aveugles, analysis_hse)
+        realisme = float(summary["realisme"][i])
+
+        return {
+            "agent_info": {
+                "agent_id": agent.agent_id,
+                "agent_name": agent.agent_name,
+                "version": agent.version,
+                "timestamp": datetime.now().isoformat(),
+                "performance_time": performance_time,
+                "confidence_score": float(summary["confiance"][i]),
+                "mode": "batch"
+            },
+            "ecarts_analysis": {
+                "ecarts_variables": ecarts_variables,
+                "zones_aveugles": zones_aveugles,
+                "realisme_scores": {
+                    "realisme_global": realisme,
+                    "fiabilite_autoeval": min(100, realisme + 10),
+                    "coherence_perception": realisme,
+                    "niveau_autocritique": "élevé" if realisme > 80 else "moyen" if realisme > 60 else "faible"
+                },
+                "nombre_ecarts_critiques": int(summary["n_critiques"][i])
+            },
+            "hse_models_analysis": analysis_hse,
+            "recommendations": recommendations,
+            "summary": {
+                "ecart_moyen": summary["ecart_moyen"][i],
+                "variables_critiques": len(zones_aveugles),
+                "actions_recommandees": len(recommendations),
+                "priorite_intervention": str(summary["priorite"][i])
+            }
+        }
+
+    def _materialize_hse(self, i: int, hse: Dict, ecarts_variables: Dict) -> Dict:
+        def moyenne(groupe):
+            return groupe["mean"][i] if groupe["count"][i] else 0
+
+        analyses = {}
+        for model_code in self.agent.hse_models:
+            if model_code.startswith("hfacs"):
+                groupe = hse["hfacs"][model_code]
+                ecarts_niveau = {v: ecarts_variables[v] for v in groupe["variables"][i]}
+                analysis = {
+                    "niveau_hfacs": model_code,
+                    "variables_analysees": int(groupe["count"][i]),
+                    "ecarts_critiques": int(groupe["critiques"][i]),
+                    "score_defaillance": moyenne(groupe),
+                    "actions_recommandees": self.agent._generate_hfacs_actions(model_code, ecarts_niveau)
+                }
+            elif model_code == "swiss_cheese":
+                defaillances = {}
+                for barriere_type, groupe in hse["swiss_cheese"].items():
+                    score = moyenne(groupe)
+                    defaillances[barriere_type] = {
+                        "score_defaillance": score,
+                        "variables_impliquees": groupe["variables"][i],
+                        "niveau_risque": "high" if score > 30 else "medium" if score > 15 else "low"
+                    }
+                analysis = {
+                    "defaillances_barrieres": defaillances,
+                    "risque_global": max(d["score_defaillance"] for d in defaillances.values()),
+                    "barrieres_critiques": [k for k, v in defaillances.items() if v["niveau_risque"] == "high"]
+                }
+            elif model_code == "srk":
+                analysis = {
+                    niveau: {
+                        "score_ecart": moyenne(groupe),
+                        "variables_count": int(groupe["count"][i]),
+                        "defaillance_principale": groupe["principale"][i]
+                    }
+                    for niveau, groupe in hse["srk"].items()
+                }
+            elif model_code == "bow_tie":
+                analysis = {
+                    cote: {barriere: (0 if np.isnan(valeurs[i]) else float(valeurs[i]))
+                           for barriere, valeurs in barrieres.items()}
+                    for cote, barrieres in hse["bow_tie"].items()
+                }
+            else:
+                analysis = {
+                    "model_code": model_code,
+                    "variables_analysees": int(hse["n_variables"][i]),
+                    "score_global": hse["score_global"][i] if hse["n_variables"][i] else 0,
+                    "applicable": True
+                }
+
+            analyses[model_code] = {
+                "model_name": self.agent.hse_models[model_code],
+                "analysis": analysis,
+                "variables_impliquees": int(hse["variables_impliquees"][i]),
+                "score_applicabilite": float(hse["score_applicabilite"][i])
+            }
+        return analyses
@@ -2,11 +2,19 @@
 # =============================
 
 from abc import ABC, abstractmethod
+from collections import deque
+from functools import wraps
 from typing import Dict, List, Any, Optional
 from datetime import datetime
+import inspect
 import json
 import logging
 
+try:
+    from ..utils.observability import Span, get_metrics, get_tracer
+except ImportError:
+    from utils.observability import Span, get_metrics, get_tracer
+
 # Configuration logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -52,16 +60,35 @@ class AgentConfig:
         self.specialized_sectors = []
         self.culture_variables_focus = []
 
+# Derniers appels conservés par agent (l'agrégat complet est dans l'histogramme)
+PERFORMANCE_HISTORY = 100
+
 class BaseAgent(ABC):
     """Classe de base pour tous les agents SafetyAgentic"""
     
     def __init__(self, config: AgentConfig):
         self.config = config
-        self.performance_metrics = {}
+        self.performance_metrics = deque(maxlen=PERFORMANCE_HISTORY)
+        self.latency_histogram = get_metrics().histogram("agent_latency", agent=config.agent_id)
         self.logger = logging.getLogger(f"SafetyAgentic.{config.agent_id}")
         
         self.logger.info(f"🤖 Agent {config.agent_id} ({config.name}) initialisé")
     
+    def __init_subclass__(cls, **kwargs):
+        """Chaque implémentation de process() est tracée dans un span `<agent_id>.process`"""
+        super().__init_subclass__(**kwargs)
+        process = cls.__dict__.get("process")
+        if process is None or not inspect.iscoroutinefunction(process) or getattr(process, "_traced", False):
+            return
+        
+        @wraps(process)
+        async def traced_process(self, state, *args, **kwargs):
+            with self.span("process"):
+                return await process(self, state, *args, **kwargs)
+        
+        traced_process._traced = True
+        cls.process = traced_process
+    
     @abstractmethod
     async def process(self, state: SafetyAgenticState) -> SafetyAgenticState:
         """Méthode principale de traitement de l'agent"""
@@ -76,15 +103,23 @@ class BaseAgent(ABC):
         self.logger.info("✅ Validation des données d'entrée réussie")
         return True
     
+    def span(self, operation: str = "process", **attributes) -> Span:
+        """Span de trace rattaché au span courant (nœud LangGraph, tâche asyncio parente)"""
+        return get_tracer().span(f"{self.config.agent_id}.{operation}", agent=self.config.agent_id, **attributes)
+    
     async def log_performance(self, start_time: datetime, result: Dict):
         """Log des métriques de performance"""
         processing_time = (datetime.now() - start_time).total_seconds()
+        status = "success" if result else "error"
         
-        self.performance_metrics[datetime.now().isoformat()] = {
+        self.latency_histogram.record(int(processing_time * 1e9))
+        get_metrics().incr("agent_calls_total", agent=self.config.agent_id, status=status)
+        self.performance_metrics.append({
+            "timestamp": datetime.now().isoformat(),
             "processing_time": processing_time,
             "confidence": result.get("confidence_score", 0.0),
-            "status": "success" if result else "error"
-        }
+            "status": status
+        })
         
         self.logger.info(
             f"📊 Performance {self.config.agent_id}: "
@@ -92,6 +127,16 @@ class BaseAgent(ABC):
             f"confidence: {result.get('confidence_score', 0.0):.2f}"
         )
     
+    def get_performance_summary(self) -> Dict[str, Any]:
+        """Latences agrégées (p50/p90/p99) et nombre d'appels par statut"""
+        metrics = get_metrics()
+        return {
+            "agent_id": self.config.agent_id,
+            "latency": self.latency_histogram.summary(),
+            "calls": {status: metrics.counter("agent_calls_total", agent=self.config.agent_id, status=status)
+                      for status in ("success", "error")}
+        }
+    
     def get_culture_variables_mapping(self) -> Dict[str, List[Dict]]:
         """Retourne le mapping des variables culture SST"""
         
@@ -5,9 +5,11 @@
 import asyncio
 import os
 import json
+import time
 import aiohttp
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Union, Tuple, Callable, Awaitable
 import logging
 from enum import Enum
 from dataclasses import dataclass, field
@@ -58,6 +60,8 @@ class ConfigurationA2:
     fallback_to_synthetic: bool = True
     synthetic_seed: Optional[int] = 42
     cache_enabled: bool = True
+    cache_max_entries: int = 256                  # Taille max cache LRU
+    cache_ttl_seconds: float = 900.0              # Durée de vie d'une entrée cache
     min_confidence_real_data: float = 0.8
     quality_distribution_synthetic: Dict[str, float] = field(default_factory=lambda: {
         "excellente": 0.20, "bonne": 0.35, "moyenne": 0.30, "faible": 0.15
@@ -398,6 +402,140 @@ class MoteurFusionHybride:
         
         return variables_agregees
 
+class _CollecteAbandonnee(Exception):
+    """Le meneur d'une collecte partagée a été annulé avant d'obtenir un résultat"""
+
+
+class CacheObservationsA2:
+    """
+    Cache LRU + TTL des résultats A2 avec coalescence des collectes
+
+    Les appels concurrents sur une même clé partagent une seule collecte
+    en cours (single-flight) au lieu de relancer chacun la collecte complète.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 900.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._en_cours: Dict[str, asyncio.Future] = {}
+
+        # Compteurs
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return self._lookup(key) is not None
+
+    def _lookup(self, key: str) -> Optional[Dict]:
+        """Lecture sans compteurs, avec expiration paresseuse"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            self.expirations += 1
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Lecture cache (None si absent ou expiré)"""
+        value = self._lookup(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: Dict):
+        """Écriture cache avec éviction LRU"""
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_load(self,
+                          key: str,
+                          loader: Callable[[], Awaitable[Dict]]) -> Tuple[Dict, str]:
+        """
+        Lecture cache ou collecte unique partagée
+
+        Returns:
+            (résultat, statut) avec statut parmi "hit", "coalesced", "miss"
+        """
+        value = self._lookup(key)
+        if value is not None:
+            self.hits += 1
+            return value, "hit"
+
+        future = self._en_cours.get(key)
+        if future is not None:
+            self.coalesced += 1
+            try:
+                # shield: l'annulation d'un appelant n'annule pas la collecte partagée
+                return await asyncio.shield(future), "coalesced"
+            except _CollecteAbandonnee:
+                # Meneur annulé: un des appelants en attente reprend la collecte
+                return await self.get_or_load(key, loader)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._en_cours[key] = future
+
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            # Ne pas propager l'annulation du meneur aux appelants coalescés
+            future.set_exception(_CollecteAbandonnee(key))
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Marque l'exception comme consommée si aucun appelant en attente
+            raise
+        else:
+            self.set(key, value)
+            future.set_result(value)
+            return value, "miss"
+        finally:
+            if self._en_cours.get(key) is future:
+                del self._en_cours[key]
+
+    def clear(self):
+        """Vider le cache (les collectes en cours ne sont pas affectées)"""
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Compteurs d'utilisation du cache"""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "in_flight": len(self._en_cours),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0
+        }
+
 class AgentA2Configurable:
     """
     Agent A2 Configurable Complet - SafetyAgentic
@@ -433,7 +571,7 @@ class AgentA2Configurable:
             logger.warning("⚠️ Générateur synthétique non disponible")
         
         # Cache
-        self.cache_observations = {} if self.config.cache_enabled else None
+        self.cache_observations = self._create_cache()
         
         logger.info(f"🤖 {self.agent_name} v{self.version} initialisé")
         logger.info(f"🔧 Mode: {self.config.mode_collecte.value}")
@@ -451,62 +589,28 @@ class AgentA2Configurable:
         """
         start_time = datetime.now()
         analysis_id = f"A2_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        mode = self.config.mode_collecte
         
-        logger.info(f"🔄 Démarrage Agent A2 - Mode: {self.config.mode_collecte.value}")
+        logger.info(f"🔄 Démarrage Agent A2 - Mode: {mode.value}")
         
         try:
             # Validation entrées
             self._validate_input_data(incident_data, context)
             
-            # Vérification cache
-            if self.cache_observations:
+            # Vérification cache (les appels concurrents d'une même clé partagent la collecte)
+            if self.cache_observations is not None:
                 cache_key = self._generate_cache_key(incident_data, context)
-                if cache_key in self.cache_observations:
+                result, statut = await self.cache_observations.get_or_load(
+                    cache_key,
+                    lambda: self._execute_collection(incident_data, context, start_time, analysis_id)
+                )
+                if statut == "hit":
                     logger.info("📦 Résultat depuis cache")
-                    return self.cache_observations[cache_key]
-            
-            # Traitement selon mode configuré
-            mode = self.config.mode_collecte
+                elif statut == "coalesced":
+                    logger.info("📦 Résultat partagé avec une collecte en cours")
+                return result
             
-            if mode == ModeCollecteDonnees.REEL_UNIQUEMENT:
-                result = await self._process_real_data_only(incident_data, context)
-                
-            elif mode == ModeCollecteDonnees.SYNTHETIQUE_UNIQUEMENT:
-                result = await self._process_synthetic_data_only(incident_data, context)
-                
-            elif mode == ModeCollecteDonnees.HYBRIDE_AUTO:
-                result = await self._process_hybrid_auto(incident_data, context)
-                
-            elif mode == ModeCollecteDonnees.HYBRIDE_FORCE:
-                result = await self._process_hybrid_forced(incident_data, context)
-                
-            elif mode == ModeCollecteDonnees.DEMO_MODE:
-                result = await self._process_demo_mode(incident_data, context)
-                
-            else:
-                raise ValueError(f"Mode collecte non supporté: {mode}")
-            
-            # Finalisation
-            performance_time = (datetime.now() - start_time).total_seconds()
-            
-            result.update({
-                "agent_info": {
-                    "agent_id": self.agent_id,
-                    "agent_name": self.agent_name,
-                    "version": self.version,
-                    "analysis_id": analysis_id,
-                    "mode_collecte": mode.value,
-                    "timestamp": datetime.now().isoformat(),
-                    "performance_time": performance_time
-                }
-            })
-            
-            # Cache si activé
-            if self.cache_observations and cache_key:
-                self.cache_observations[cache_key] = result
-            
-            logger.info(f"✅ Agent A2 terminé - {performance_time:.3f}s")
-            return result
+            return await self._execute_collection(incident_data, context, start_time, analysis_id)
             
         except Exception as e:
             logger.error(f"❌ Erreur Agent A2: {str(e)}")
@@ -526,6 +630,50 @@ class AgentA2Configurable:
                 "fallback_available": self.config.fallback_to_synthetic
             }
     
+    async def _execute_collection(self,
+                                  incident_data: Dict,
+                                  context: Dict,
+                                  start_time: datetime,
+                                  analysis_id: str) -> Dict[str, Any]:
+        """Collecte selon le mode configuré et finalisation du résultat"""
+        mode = self.config.mode_collecte
+        
+        if mode == ModeCollecteDonnees.REEL_UNIQUEMENT:
+            result = await self._process_real_data_only(incident_data, context)
+            
+        elif mode == ModeCollecteDonnees.SYNTHETIQUE_UNIQUEMENT:
+            result = await self._process_synthetic_data_only(incident_data, context)
+            
+        elif mode == ModeCollecteDonnees.HYBRIDE_AUTO:
+            result = await self._process_hybrid_auto(incident_data, context)
+            
+        elif mode == ModeCollecteDonnees.HYBRIDE_FORCE:
+            result = await self._process_hybrid_forced(incident_data, context)
+            
+        elif mode == ModeCollecteDonnees.DEMO_MODE:
+            result = await self._process_demo_mode(incident_data, context)
+            
+        else:
+            raise ValueError(f"Mode collecte non supporté: {mode}")
+        
+        # Finalisation
+        performance_time = (datetime.now() - start_time).total_seconds()
+        
+        result.update({
+            "agent_info": {
+                "agent_id": self.agent_id,
+                "agent_name": self.agent_name,
+                "version": self.version,
+                "analysis_id": analysis_id,
+                "mode_collecte": mode.value,
+                "timestamp": datetime.now().isoformat(),
+                "performance_time": performance_time
+            }
+        })
+        
+        logger.info(f"✅ Agent A2 terminé - {performance_time:.3f}s")
+        return result
+    
     async def _process_real_data_only(self, incident_data: Dict, context: Dict) -> Dict:
         """Traitement données réelles uniquement"""
         logger.info("📊 Mode: Données réelles uniquement")
@@ -788,6 +936,16 @@ class AgentA2Configurable:
         }
     
     # Méthodes utilitaires
+    def _create_cache(self) -> Optional[CacheObservationsA2]:
+        """Création cache selon configuration"""
+        if not self.config.cache_enabled:
+            return None
+        
+        return CacheObservationsA2(
+            max_entries=self.config.cache_max_entries,
+            ttl_seconds=self.config.cache_ttl_seconds
+        )
+    
     def _validate_input_data(self, incident_data: Dict, context: Dict):
         """Validation données d'entrée"""
         if not incident_data:
@@ -908,6 +1066,8 @@ class AgentA2Configurable:
             "sources_prioritaires": [s.value for s in self.config.sources_prioritaires],
             "fallback_synthetique": self.config.fallback_to_synthetic,
             "cache_active": self.config.cache_enabled,
+            "cache_max_entries": self.config.cache_max_entries,
+            "cache_ttl_seconds": self.config.cache_ttl_seconds,
             "timeout_sources": self.config.timeout_seconds,
             "generateur_disponible": self.generateur_synthetique is not None,
             "version_agent": self.version
@@ -931,17 +1091,21 @@ class AgentA2Configurable:
         # Réinitialisation composants si nécessaire
         if kwargs.get("sources_prioritaires"):
             self.collecteur_reel = CollecteurDonneesReelles(self.config)
+        
+        if {"cache_enabled", "cache_max_entries", "cache_ttl_seconds"} & kwargs.keys():
+            self.cache_observations = self._create_cache()
     
     def clear_cache(self):
         """Vider cache observations"""
-        if self.cache_observations:
+        if self.cache_observations is not None:
             self.cache_observations.clear()
             logger.info("🗑️ Cache observations vidé")
     
     def get_statistics(self) -> Dict:
         """Statistiques d'utilisation"""
         stats = {
-            "cache_size": len(self.cache_observations) if self.cache_observations else 0,
+            "cache_size": len(self.cache_observations) if self.cache_observations is not None else 0,
+            "cache": self.cache_observations.get_stats() if self.cache_observations is not None else None,
             "config_actuelle": self.get_config_info(),
             "version": self.version
         }
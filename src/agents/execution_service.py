@@ -0,0 +1,384 @@
+# SafetyAgentic - Service d'Exécution du Pipeline A1→A2→AN1→R1
+# ============================================================
+# Exécute le vrai pipeline d'agents hors du thread Streamlit et publie
+# des événements de progression par étape dans des files bornées que
+# l'interface interroge. Plusieurs observateurs peuvent suivre un même job;
+# les résultats sont conservés: un job terminé n'est jamais ré-exécuté.
+
+import asyncio
+import hashlib
+import itertools
+import json
+import logging
+import queue
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from agents.base_agent import SafetyAgenticState
+from agents.collecte.a1_autoevaluations import A1CollecteurAutoevaluations
+from agents.collecte.a2_observations import A2CapteurObservations
+from agents.analyse.an1_analyste_ecarts import AN1AnalysteEcarts
+from agents.recommendation.r1_generateur_recommandations import R1GenerateurRecommandations
+
+logger = logging.getLogger("SafetyAgentic.ExecutionService")
+
+# Étapes du pipeline (identifiant agent, libellé affiché)
+PIPELINE_STAGES = (
+    ("A1", "Autoévaluations culture SST"),
+    ("A2", "Observations terrain"),
+    ("AN1", "Analyse écarts et zones aveugles"),
+    ("R1", "Recommandations et plan d'action")
+)
+
+EVENT_QUEUE_SIZE = 256
+MAX_RETAINED_JOBS = 64
+
+
+class UnknownJobError(LookupError):
+    """Job jamais soumis ou déjà évincé du magasin borné"""
+
+    def __init__(self, job_id: str):
+        super().__init__(f"Job inconnu ou expiré: {job_id}")
+        self.job_id = job_id
+
+
+@dataclass
+class PipelineEvent:
+    """Événement de progression publié aux observateurs"""
+    job_id: str
+    sequence: int
+    stage: str            # A1 | A2 | AN1 | R1 | job
+    status: str           # started | finished | failed
+    timestamp: float
+    duration: Optional[float] = None
+    partial_result: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def progress(self) -> float:
+        """Fraction du pipeline terminée après cet événement"""
+        if self.stage == "job":
+            return 1.0 if self.status == "finished" else 0.0
+        index = [stage for stage, _ in PIPELINE_STAGES].index(self.stage)
+        done = index + (1 if self.status == "finished" else 0)
+        return done / len(PIPELINE_STAGES)
+
+
+@dataclass
+class PipelineJob:
+    """Job d'exécution et historique de ses événements"""
+    job_id: str
+    inputs: Dict[str, Any]
+    status: str = "pending"  # pending | running | finished | failed
+    events: List[PipelineEvent] = field(default_factory=list)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    submitted_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("finished", "failed")
+
+
+class _Watcher:
+    """Observateur d'un job: file bornée, les plus anciens événements sont écartés si pleine"""
+
+    def __init__(self, job_id: str, maxsize: int):
+        self.job_id = job_id
+        self.queue: "queue.Queue[PipelineEvent]" = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def push(self, event: PipelineEvent):
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except queue.Full:
+                # Un observateur lent ne bloque jamais le pipeline
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+
+def _variable_key(name: str) -> str:
+    """'Respect procédures' -> 'respect_procedures' (clés de la base R1)"""
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    return "_".join(ascii_name.lower().split())
+
+
+def _culture_scores(culture_variables: List[Dict]) -> Dict[str, Dict]:
+    """Variables culture A1/A2 (liste) -> scores moyens par variable (format AN1)"""
+    grouped: Dict[str, List[Dict]] = {}
+    for variable in culture_variables:
+        grouped.setdefault(_variable_key(variable.get("variable_name", "")), []).append(variable)
+    return {
+        key: {
+            "score": sum(v.get("score", 0) for v in values) / len(values),
+            "source": ",".join(sorted({v.get("source", "unknown") for v in values}))
+        }
+        for key, values in grouped.items() if key
+    }
+
+
+def job_key(inputs: Dict[str, Any]) -> str:
+    """Identifiant déterministe d'un job: mêmes entrées, même job"""
+    canonical = json.dumps(inputs, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+class OrchestratorExecutionService:
+    """Exécution en arrière-plan du pipeline A1→A2→AN1→R1 avec événements de progression"""
+
+    def __init__(self, max_workers: int = 2, queue_size: int = EVENT_QUEUE_SIZE,
+                 max_retained_jobs: int = MAX_RETAINED_JOBS,
+                 agent_factory: Optional[Callable[[], Dict[str, Any]]] = None):
+        self.queue_size = queue_size
+        self.max_retained_jobs = max_retained_jobs
+        self._agent_factory = agent_factory or self._default_agents
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="safetyagentic-pipeline")
+        self._jobs: "OrderedDict[str, PipelineJob]" = OrderedDict()
+        self._watchers: Dict[str, _Watcher] = {}
+        self._watcher_ids = itertools.count(1)
+        self._lock = threading.RLock()
+        self.stats = {"submitted": 0, "executed": 0, "reused": 0}
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def submit(self, inputs: Dict[str, Any], force: bool = False) -> str:
+        """Soumet un job; un job identique en cours ou terminé est réutilisé"""
+        job_id = job_key(inputs)
+        with self._lock:
+            self.stats["submitted"] += 1
+            job = self._jobs.get(job_id)
+            if job is not None and not (force and job.done):
+                self._jobs.move_to_end(job_id)
+                self.stats["reused"] += 1
+                return job_id
+
+            job = PipelineJob(job_id=job_id, inputs=inputs)
+            self._jobs[job_id] = job
+            self._jobs.move_to_end(job_id)
+            self._evict_finished_jobs()
+            self.stats["executed"] += 1
+
+        self._executor.submit(self._run_job, job)
+        return job_id
+
+    def watch(self, job_id: str) -> str:
+        """Nouvel observateur; l'historique déjà publié lui est rejoué (UnknownJobError si évincé)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                raise UnknownJobError(job_id)
+            watcher_id = f"{job_id}:{next(self._watcher_ids)}"
+            watcher = _Watcher(job_id, self.queue_size)
+            for event in job.events:
+                watcher.push(event)
+            self._watchers[watcher_id] = watcher
+        return watcher_id
+
+    def poll(self, watcher_id: str, max_events: Optional[int] = None,
+             timeout: Optional[float] = None) -> List[PipelineEvent]:
+        """Événements en attente pour un observateur (attend au plus `timeout` le premier)"""
+        watcher = self._watchers.get(watcher_id)
+        if watcher is None:
+            return []
+
+        events = []
+        try:
+            if timeout:
+                events.append(watcher.queue.get(timeout=timeout))
+            while max_events is None or len(events) < max_events:
+                events.append(watcher.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return events
+
+    def unwatch(self, watcher_id: str):
+        with self._lock:
+            self._watchers.pop(watcher_id, None)
+
+    def get_job(self, job_id: str) -> Optional[PipelineJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[PipelineJob]:
+        """Attend la fin d'un job (tests, scripts); None si le job est inconnu ou expiré"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            watcher_id = self.watch(job_id)
+        except UnknownJobError:
+            return None
+        try:
+            while True:
+                job = self.get_job(job_id)
+                if job is None or job.done:
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self.poll(watcher_id, timeout=min(remaining or 0.1, 0.1))
+        finally:
+            self.unwatch(watcher_id)
+        return self.get_job(job_id)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    # ------------------------------------------------------------------
+    # Exécution
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _default_agents() -> Dict[str, Any]:
+        return {
+            "A1": A1CollecteurAutoevaluations(),
+            "A2": A2CapteurObservations(),
+            "AN1": AN1AnalysteEcarts(),
+            "R1": R1GenerateurRecommandations()
+        }
+
+    def _run_job(self, job: PipelineJob):
+        with self._lock:
+            job.status = "running"
+        self._publish(job, "job", "started")
+        start = time.perf_counter()
+
+        try:
+            # Boucle asyncio propre au thread de travail (les agents sont async)
+            job.result = asyncio.run(self._run_pipeline(job))
+            job.status = "finished"
+            self._publish(job, "job", "finished", duration=time.perf_counter() - start,
+                          partial_result={"stages": [stage for stage, _ in PIPELINE_STAGES]})
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = "failed"
+            logger.error(f"❌ Job {job.job_id} en échec: {job.error}")
+            self._publish(job, "job", "failed", duration=time.perf_counter() - start, error=job.error)
+        finally:
+            job.finished_at = time.time()
+
+    async def _run_pipeline(self, job: PipelineJob) -> Dict[str, Any]:
+        agents = self._agent_factory()
+        inputs = job.inputs
+        context = inputs.get("context", {})
+
+        state = SafetyAgenticState()
+        state.incident_data = {
+            "evaluation_data": inputs.get("evaluation_data", {}),
+            "observation_data": inputs.get("observation_data", {}),
+            "incident_cnesst": inputs.get("incident_cnesst", {})
+        }
+
+        async def stage(name: str, run, summarize):
+            self._publish(job, name, "started")
+            start = time.perf_counter()
+            try:
+                output = await run()
+            except Exception as e:
+                self._publish(job, name, "failed", duration=time.perf_counter() - start, error=str(e))
+                raise
+            if isinstance(output, dict) and "error" in output:
+                error = output["error"]
+                self._publish(job, name, "failed", duration=time.perf_counter() - start, error=error)
+                raise RuntimeError(f"{name}: {error}")
+            self._publish(job, name, "finished", duration=time.perf_counter() - start,
+                          partial_result=summarize(output))
+            return output
+
+        state = await stage("A1", lambda: agents["A1"].process(state), self._summarize_a1)
+        state = await stage("A2", lambda: agents["A2"].process(state), self._summarize_a2)
+        if state.errors:
+            raise RuntimeError("; ".join(state.errors))
+
+        data_a1 = {
+            "variables_culture_sst": _culture_scores(state.analysis_results["A1"].get("culture_variables", [])),
+            "scores_autoeval": {"fiabilite": state.analysis_results["A1"].get("reliability_score", 0.0)}
+        }
+        data_a2 = {
+            "variables_culture_terrain": _culture_scores(state.analysis_results["A2"].get("culture_variables", [])),
+            "observations": {
+                "confiance": state.analysis_results["A2"].get("confidence_score", 0.0),
+                "dangers_detectes": state.analysis_results["A2"].get("hazard_detection", {}).get("total_hazards_detected", 0)
+            }
+        }
+
+        an1 = await stage("AN1", lambda: agents["AN1"].process(data_a1, data_a2, context), self._summarize_an1)
+        r1 = await stage("R1", lambda: agents["R1"].process(an1, context), self._summarize_r1)
+
+        return {
+            "A1": state.analysis_results["A1"],
+            "A2": state.analysis_results["A2"],
+            "AN1": an1,
+            "R1": r1,
+            "completed_at": datetime.now().isoformat()
+        }
+
+    def _publish(self, job: PipelineJob, stage: str, status: str, duration: Optional[float] = None,
+                 partial_result: Optional[Dict] = None, error: Optional[str] = None):
+        with self._lock:
+            event = PipelineEvent(job.job_id, len(job.events), stage, status, time.time(),
+                                  duration, partial_result or {}, error)
+            job.events.append(event)
+            for watcher in self._watchers.values():
+                if watcher.job_id == job.job_id:
+                    watcher.push(event)
+
+    def _evict_finished_jobs(self):
+        while len(self._jobs) > self.max_retained_jobs:
+            oldest = next((job_id for job_id, job in self._jobs.items() if job.done), None)
+            if oldest is None:
+                return
+            del self._jobs[oldest]
+
+    # ------------------------------------------------------------------
+    # Résultats partiels publiés par étape
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _summarize_a1(state: SafetyAgenticState) -> Dict:
+        a1 = state.analysis_results.get("A1", {})
+        return {"reliability_score": a1.get("reliability_score", 0.0),
+                "culture_variables": len(a1.get("culture_variables", []))}
+
+    @staticmethod
+    def _summarize_a2(state: SafetyAgenticState) -> Dict:
+        a2 = state.analysis_results.get("A2", {})
+        return {"confidence_score": a2.get("confidence_score", 0.0),
+                "epi_compliance": a2.get("epi_analysis", {}).get("overall_compliance", 0.0),
+                "hazards_detected": a2.get("hazard_detection", {}).get("total_hazards_detected", 0)}
+
+    @staticmethod
+    def _summarize_an1(an1: Dict) -> Dict:
+        summary = an1.get("summary", {})
+        return {"zones_aveugles": summary.get("variables_critiques", 0),
+                "ecart_moyen": float(summary.get("ecart_moyen", 0.0)),
+                "priorite_intervention": summary.get("priorite_intervention")}
+
+    @staticmethod
+    def _summarize_r1(r1: Dict) -> Dict:
+        return {"recommandations": r1.get("recommandations_analysis", {}).get("recommandations_generees", 0),
+                "roi_estime": r1.get("business_impact", {}).get("roi_estime", 0)}
+
+
+_service: Optional[OrchestratorExecutionService] = None
+_service_lock = threading.Lock()
+
+def get_execution_service() -> OrchestratorExecutionService:
+    """Service unique du processus, partagé par toutes les sessions Streamlit"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = OrchestratorExecutionService()
+        return _service
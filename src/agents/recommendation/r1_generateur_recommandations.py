@@ -14,6 +14,14 @@ import numpy as np
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("SafetyAgentic.R1")
 
+# Durée de mise en œuvre par priorité (semaines)
+DUREES_PRIORITE = {
+    "CRITIQUE": 4,
+    "URGENTE": 6,
+    "ÉLEVÉE": 12,
+    "MOYENNE": 20
+}
+
 class R1GenerateurRecommandations:
     """
     Agent R1 - Générateur de Recommandations
@@ -32,6 +40,7 @@ class R1GenerateurRecommandations:
         self.agent_id = "R1"
         self.agent_name = "Générateur Recommandations"
         self.version = "1.0.0"
+        self._portfolio_planner = None  # Créé au premier process_portfolio (cache de plans partagé)
         
         # Base de connaissances recommandations par variable
         self.recommandations_db = {
@@ -304,6 +313,28 @@ class R1GenerateurRecommandations:
             logger.error(f"❌ Erreur Agent R1: {str(e)}")
             return {"error": str(e), "agent_id": self.agent_id}
     
+    async def process_portfolio(self, an1_results: Dict[str, Dict], budget: float,
+                                horizon_semaines: int = 52, contexts: Dict = None) -> Dict:
+        """
+        Plan de recommandations multi-entreprises sous contrainte budgétaire
+        
+        Args:
+            an1_results: {entreprise_id: résultat AN1}
+            budget: Plafond budgétaire total ($, coûts indirects inclus)
+            horizon_semaines: Horizon de mise en œuvre
+            contexts: Contexte commun ou {entreprise_id: contexte}
+            
+        Returns:
+            Sélection maximisant la réduction d'écart attendue (voir R1PortfolioPlanner.plan)
+        """
+        if self._portfolio_planner is None:
+            try:
+                from .r1_portfolio_planner import R1PortfolioPlanner
+            except ImportError:
+                from r1_portfolio_planner import R1PortfolioPlanner
+            self._portfolio_planner = R1PortfolioPlanner(self)
+        return self._portfolio_planner.plan(an1_results, budget, horizon_semaines, contexts)
+    
     def _validate_an1_data(self, data_an1: Dict):
         """Validation données AN1"""
         if not data_an1:
@@ -725,16 +756,9 @@ class R1GenerateurRecommandations:
     
     def _calculate_total_duration(self, recommandations: List[Dict]) -> str:
         """Calcul durée totale estimée"""
-        durees_priorite = {
-            "CRITIQUE": 4,   # semaines
-            "URGENTE": 6,
-            "ÉLEVÉE": 12,
-            "MOYENNE": 20
-        }
-        
         duree_max = 0
         for reco in recommandations:
-            duree_priorite = durees_priorite.get(reco["priorite"], 12)
+            duree_priorite = DUREES_PRIORITE.get(reco["priorite"], 12)
             duree_max = max(duree_max, duree_priorite)
         
         return f"{duree_max} semaines"
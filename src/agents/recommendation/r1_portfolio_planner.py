@@ -0,0 +1,332 @@
+# Agent R1 - Planificateur de Portefeuille SafetyAgentic
+# =======================================================
+# Sélection globale des recommandations sur toutes les zones aveugles d'un
+# portefeuille d'entreprises: maximise la réduction d'écart attendue sous un
+# plafond budgétaire et un horizon de mise en œuvre (sac à dos 0/1).
+# Résolution locale: MILP HiGHS (scipy) si disponible, sinon programmation
+# dynamique vectorisée NumPy. Plans mis en cache par empreinte des entrées.
+
+import copy
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional
+
+import numpy as np
+
+try:
+    from .r1_generateur_recommandations import DUREES_PRIORITE, R1GenerateurRecommandations
+except ImportError:
+    from r1_generateur_recommandations import DUREES_PRIORITE, R1GenerateurRecommandations
+
+try:
+    from scipy.optimize import Bounds, LinearConstraint, milp
+    MILP_AVAILABLE = True
+except ImportError:
+    MILP_AVAILABLE = False
+
+logger = logging.getLogger("SafetyAgentic.R1.Portfolio")
+
+TAUX_COUT_INDIRECT = 0.3      # Même hypothèse que _calculate_budget_resources
+DP_MAX_CELLS = 40_000_000     # Taille max de la table de décisions DP (octets)
+MILP_TIME_LIMIT = 20.0        # secondes
+CACHE_SIZE = 64
+
+# Niveaux AN1 (minuscules) -> priorités des gabarits R1
+PRIORITES_AN1 = {"critique": "CRITIQUE", "urgente": "URGENTE", "eleve": "ÉLEVÉE", "élevée": "ÉLEVÉE",
+                 "moyenne": "MOYENNE", "modere": "MOYENNE"}
+MULTIPLICATEURS_TAILLE = {"PME": 0.7, "MOYENNE": 1.0, "GRANDE": 1.4}
+
+
+@dataclass
+class Candidats:
+    """Recommandations candidates du portefeuille, une par zone aveugle couverte"""
+    enterprise_ids: np.ndarray    # (n,) object
+    variables: np.ndarray         # (n,) object
+    priorites: np.ndarray         # (n,) object
+    ecarts: np.ndarray            # (n,) float - écart % à corriger
+    couts: np.ndarray             # (n,) float - $ coûts indirects inclus
+    gains: np.ndarray             # (n,) float - réduction d'écart attendue (points %)
+    durees: np.ndarray            # (n,) float - semaines
+
+    def __len__(self) -> int:
+        return len(self.couts)
+
+    def fingerprint(self, budget: float, horizon: float, solver: str) -> str:
+        h = hashlib.sha256()
+        for array in (self.couts, self.gains, self.durees):
+            h.update(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+        h.update("\x1f".join(map(str, self.enterprise_ids)).encode("utf-8"))
+        h.update("\x1f".join(map(str, self.variables)).encode("utf-8"))
+        h.update(f"{budget!r}|{horizon!r}|{solver}".encode("utf-8"))
+        return h.hexdigest()
+
+
+def _taux_reduction(action_templates: Dict) -> Dict[str, float]:
+    """Taux de réduction d'écart visé par priorité, lus dans les indicateurs des gabarits"""
+    taux = {}
+    for priorite, template in action_templates.items():
+        match = next((re.search(r"Réduction écart >(\d+)%", i) for i in template.get("indicateurs", [])
+                      if "Réduction écart" in i), None)
+        taux[priorite] = int(match.group(1)) / 100 if match else 0.25
+    return taux
+
+
+def solve_knapsack_dp(couts: np.ndarray, gains: np.ndarray, budget: float,
+                      max_cells: int = DP_MAX_CELLS) -> np.ndarray:
+    """
+    Sac à dos 0/1 par programmation dynamique vectorisée
+
+    Les coûts sont arrondis au pas supérieur d'une grille dont la taille borne
+    la table de décisions: la solution respecte toujours le budget réel et est
+    optimale à la résolution de la grille près.
+    """
+    n = len(couts)
+    if n == 0:
+        return np.zeros(0, dtype=bool)
+    capacite = max(1, min(int(budget), max_cells // n))
+    pas = budget / capacite
+    poids = np.ceil(couts / pas - 1e-9).astype(np.int64)
+
+    meilleur = np.zeros(capacite + 1)
+    decisions = np.zeros((n, capacite + 1), dtype=bool)
+    for k in range(n):
+        w = poids[k]
+        if w > capacite:
+            continue
+        candidat = meilleur[:capacite + 1 - w] + gains[k]
+        prend = candidat > meilleur[w:]
+        decisions[k, w:] = prend
+        meilleur[w:] = np.where(prend, candidat, meilleur[w:])
+
+    selection = np.zeros(n, dtype=bool)
+    c = capacite
+    for k in range(n - 1, -1, -1):
+        if decisions[k, c]:
+            selection[k] = True
+            c -= poids[k]
+    return selection
+
+
+def solve_knapsack_milp(couts: np.ndarray, gains: np.ndarray, budget: float,
+                        time_limit: float = MILP_TIME_LIMIT) -> Optional[np.ndarray]:
+    """Sac à dos 0/1 exact via le solveur MILP HiGHS local (None si indisponible ou échec)"""
+    if not MILP_AVAILABLE:
+        return None
+    n = len(couts)
+    if n == 0:
+        return np.zeros(0, dtype=bool)
+    resultat = milp(c=-gains, integrality=np.ones(n), bounds=Bounds(0, 1),
+                    constraints=LinearConstraint(couts.reshape(1, -1), -np.inf, budget),
+                    options={"time_limit": time_limit, "disp": False})
+    if resultat.x is None:
+        return None
+    selection = resultat.x > 0.5
+    return selection if couts[selection].sum() <= budget * (1 + 1e-9) else None
+
+
+def borne_relaxation(couts: np.ndarray, gains: np.ndarray, budget: float) -> float:
+    """Borne supérieure (relaxation continue de Dantzig) pour mesurer l'écart à l'optimum"""
+    ordre = np.argsort(-gains / np.maximum(couts, 1e-9), kind="stable")
+    cumul = np.cumsum(couts[ordre])
+    complets = np.searchsorted(cumul, budget, side="right")
+    borne = gains[ordre[:complets]].sum()
+    if complets < len(ordre):
+        reste = budget - (cumul[complets - 1] if complets else 0.0)
+        borne += gains[ordre[complets]] * reste / couts[ordre[complets]]
+    return float(borne)
+
+
+class R1PortfolioPlanner:
+    """Planification budgétaire globale des recommandations R1 sur un portefeuille"""
+
+    def __init__(self, agent: Optional[R1GenerateurRecommandations] = None, cache_size: int = CACHE_SIZE):
+        # La base de connaissances R1 fournit coûts unitaires, facteurs sectoriels et gabarits
+        self.agent = agent or R1GenerateurRecommandations()
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"plans": 0, "cache_hits": 0}
+
+        self._variables = list(self.agent.recommandations_db)
+        self._index_variable = {v: i for i, v in enumerate(self._variables)}
+        self._budget_unitaire = np.array([self.agent.recommandations_db[v].get("budget_unitaire", 200)
+                                          for v in self._variables], dtype=float)
+        taux = _taux_reduction(self.agent.action_templates)
+        self._priorites = list(self.agent.action_templates)
+        self._taux = np.array([taux[p] for p in self._priorites])
+        self._durees = np.array([DUREES_PRIORITE.get(p, 12) for p in self._priorites], dtype=float)
+
+    # ------------------------------------------------------------------
+    # Génération vectorisée des candidats
+    # ------------------------------------------------------------------
+
+    def build_candidates(self, an1_results: Mapping[str, Dict], contexts=None) -> Candidats:
+        """Une recommandation candidate par zone aveugle couverte par la base R1"""
+        ids, var_idx, prio_idx, ecarts, secteurs, tailles = [], [], [], [], [], []
+        index_priorite = {p: i for i, p in enumerate(self._priorites)}
+        defaut = index_priorite.get("MOYENNE", 0)
+
+        for enterprise_id, data_an1 in an1_results.items():
+            if not data_an1 or "error" in data_an1:
+                continue
+            context = self._context_for(contexts, enterprise_id)
+            secteur = context.get("secteur", "GENERAL")
+            taille = context.get("taille_entreprise", "MOYENNE")
+            zones = data_an1.get("ecarts_analysis", {}).get("zones_aveugles", data_an1.get("zones_aveugles", []))
+            for zone in zones:
+                j = self._index_variable.get(zone.get("variable", ""))
+                if j is None:
+                    continue
+                niveau = str(zone.get("niveau_critique", "MOYENNE"))
+                priorite = PRIORITES_AN1.get(niveau.lower(), niveau)
+                ids.append(enterprise_id)
+                var_idx.append(j)
+                prio_idx.append(index_priorite.get(priorite, defaut))
+                ecarts.append(zone.get("pourcentage_ecart", 0))
+                secteurs.append(secteur)
+                tailles.append(taille)
+
+        var_idx = np.array(var_idx, dtype=np.int64)
+        prio_idx = np.array(prio_idx, dtype=np.int64)
+        ecarts = np.array(ecarts, dtype=float)
+        facteurs = self.agent.facteurs_sectoriels
+        mult_budget = np.array([facteurs.get(s, {}).get("multiplicateur_budget", 1.0) for s in secteurs])
+        mult_duree = np.array([facteurs.get(s, {}).get("duree_implementation", 1.0) for s in secteurs])
+        mult_taille = np.array([MULTIPLICATEURS_TAILLE.get(t, 1.0) for t in tailles])
+
+        # Même formule de budget que _generate_detailed_recommendations, coûts indirects en sus
+        couts = self._budget_unitaire[var_idx] * mult_budget * mult_taille * (1 + TAUX_COUT_INDIRECT)
+        return Candidats(
+            enterprise_ids=np.array(ids, dtype=object),
+            variables=np.array(self._variables, dtype=object)[var_idx] if len(var_idx) else np.array([], dtype=object),
+            priorites=np.array(self._priorites, dtype=object)[prio_idx] if len(prio_idx) else np.array([], dtype=object),
+            ecarts=ecarts,
+            couts=couts.astype(float),
+            gains=ecarts * self._taux[prio_idx],
+            durees=self._durees[prio_idx] * mult_duree
+        )
+
+    @staticmethod
+    def _context_for(contexts, enterprise_id) -> Dict:
+        if not contexts:
+            return {}
+        if enterprise_id in contexts and isinstance(contexts[enterprise_id], dict):
+            return contexts[enterprise_id]
+        return contexts if "secteur" in contexts or "taille_entreprise" in contexts else {}
+
+    # ------------------------------------------------------------------
+    # Optimisation
+    # ------------------------------------------------------------------
+
+    def plan(self, an1_results: Mapping[str, Dict], budget: float, horizon_semaines: float = 52,
+             contexts=None, solver: str = "auto") -> Dict[str, Any]:
+        """
+        Sélection des recommandations maximisant la réduction d'écart attendue
+
+        Args:
+            an1_results: {entreprise_id: résultat AN1 (ou {"zones_aveugles": [...]})}
+            budget: Plafond total ($, coûts indirects inclus)
+            horizon_semaines: Seules les actions réalisables dans l'horizon sont éligibles
+            contexts: Contexte commun ou {entreprise_id: contexte}
+            solver: "auto" | "milp" | "dp"
+
+        Returns:
+            Copie indépendante du plan (JSON-sérialisable): la modifier n'altère pas le cache
+        """
+        debut = time.perf_counter()
+        candidats = self.build_candidates(an1_results, contexts)
+        cle = candidats.fingerprint(float(budget), float(horizon_semaines), solver)
+        with self._lock:
+            cached = self._cache.get(cle)
+            if cached is not None:
+                self._cache.move_to_end(cle)
+                self.stats["cache_hits"] += 1
+                return copy.deepcopy(cached)
+
+        selection, solveur = self._solve(candidats, float(budget), float(horizon_semaines), solver)
+        plan = self._build_plan(candidats, selection, solveur, float(budget), float(horizon_semaines),
+                                time.perf_counter() - debut)
+
+        with self._lock:
+            self._cache[cle] = plan
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            self.stats["plans"] += 1
+        logger.info(f"📊 Portefeuille R1: {plan['resume']['actions_selectionnees']}/{len(candidats)} actions, "
+                    f"{plan['resume']['budget_utilise']:,.0f}$ / {budget:,.0f}$ ({solveur})")
+        return copy.deepcopy(plan)
+
+    def _solve(self, c: Candidats, budget: float, horizon: float, solver: str):
+        selection = np.zeros(len(c), dtype=bool)
+        eligibles = np.flatnonzero((c.durees <= horizon) & (c.couts <= budget) & (c.gains > 0))
+        if eligibles.size == 0:
+            return selection, "aucun"
+        couts, gains = c.couts[eligibles], c.gains[eligibles]
+
+        if couts.sum() <= budget:
+            selection[eligibles] = True
+            return selection, "trivial"
+
+        choix = None
+        solveur = "dp"
+        if solver in ("auto", "milp"):
+            choix = solve_knapsack_milp(couts, gains, budget)
+            solveur = "milp"
+        if choix is None:
+            if solver == "milp":
+                logger.warning("⚠️ Solveur MILP indisponible - repli programmation dynamique")
+            choix = solve_knapsack_dp(couts, gains, budget)
+            solveur = "dp"
+        selection[eligibles[choix]] = True
+        return selection, solveur
+
+    def _build_plan(self, c: Candidats, selection: np.ndarray, solveur: str, budget: float,
+                    horizon: float, duree_calcul: float) -> Dict[str, Any]:
+        eligibles = (c.durees <= horizon) & (c.couts <= budget) & (c.gains > 0)
+        gain_total = float(c.gains[selection].sum())
+        borne = borne_relaxation(c.couts[eligibles], c.gains[eligibles], budget) if eligibles.any() else 0.0
+
+        par_entreprise: Dict[str, Dict] = {}
+        for k in np.flatnonzero(selection):
+            entreprise = par_entreprise.setdefault(c.enterprise_ids[k], {
+                "recommandations": [], "cout_total": 0.0, "reduction_ecart_attendue": 0.0
+            })
+            entreprise["recommandations"].append({
+                "id": f"R1_{len(entreprise['recommandations']) + 1:02d}",
+                "variable_cible": c.variables[k],
+                "priorite": c.priorites[k],
+                "ecart_a_corriger": float(c.ecarts[k]),
+                "cout_estime": float(c.couts[k]),
+                "reduction_ecart_attendue": float(c.gains[k]),
+                "duree_semaines": float(c.durees[k])
+            })
+            entreprise["cout_total"] += float(c.couts[k])
+            entreprise["reduction_ecart_attendue"] += float(c.gains[k])
+
+        return {
+            "resume": {
+                "entreprises": len(set(c.enterprise_ids)),
+                "candidats": len(c),
+                "candidats_eligibles": int(eligibles.sum()),
+                "actions_selectionnees": int(selection.sum()),
+                "budget_plafond": budget,
+                "budget_utilise": float(c.couts[selection].sum()),
+                "horizon_semaines": horizon,
+                "reduction_ecart_totale": gain_total,
+                "borne_superieure": borne,
+                "ecart_optimalite": (borne - gain_total) / borne if borne > 0 else 0.0,
+                "solveur": solveur,
+                "duree_calcul": duree_calcul
+            },
+            "selection": selection.tolist(),
+            "plan_par_entreprise": par_entreprise
+        }
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
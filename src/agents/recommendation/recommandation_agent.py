@@ -1,11 +1,13 @@
 """Recommandation Agent (R1) - Génération de plans d'action personnalisés (Version Claude)"""
 
-from typing import Dict, Any, List
+import json
+from typing import Dict, Any, List, Mapping, Optional, Callable
 from datetime import datetime, timedelta
 from langchain.prompts import ChatPromptTemplate
 from ...core.state import SafetyState
 from ...core.config import config
 from ...utils.llm_factory import get_preferred_llm
+from ...utils.llm_generation import StreamingGenerator, get_prompt_cache
 
 # Templates de recommandations par secteur
 SECTORIAL_RECOMMENDATIONS = {
@@ -54,13 +56,11 @@ SECTORIAL_RECOMMENDATIONS = {
 }
 
 # Template de prompt pour génération de recommandations
+# Le message système ne dépend que du secteur: préfixe commun aux entreprises d'un lot
 RECOMMENDATION_PROMPT = ChatPromptTemplate.from_messages([
     ("system", """Tu es un expert en sécurité au travail spécialisé dans le secteur {sector}.
     
-    Analyse les résultats suivants et génère des recommandations personnalisées :
-    - Classification de risque : {risk_classification}
-    - Écarts identifiés : {key_gaps}
-    - Patterns comportementaux : {behavioral_patterns}
+    Analyse les résultats fournis et génère des recommandations personnalisées.
     
     Génère 3-5 recommandations SMART (Spécifiques, Mesurables, Atteignables, Réalistes, Temporelles).
     
@@ -74,15 +74,20 @@ RECOMMENDATION_PROMPT = ChatPromptTemplate.from_messages([
     
     Concentre-toi sur les actions les plus impactantes pour ce profil de risque.
     Réponds en français, de manière structurée et actionnable."""),
-    ("human", "Données d'analyse : {analysis_data}")
+    ("human", """Classification de risque : {risk_classification}
+    Écarts identifiés : {key_gaps}
+    Patterns comportementaux : {behavioral_patterns}""")
 ])
 
-def recommandation_agent(state: SafetyState) -> Dict[str, Any]:
+LLM_TEMPERATURE = 0.3
+
+def recommandation_agent(state: SafetyState, on_token: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
     """
     Agent Recommandation (R1) - Génère plans d'action personnalisés
     
     Args:
         state: État SafeGraph actuel
+        on_token: Reçoit les fragments de la réponse LLM au fil de la génération
         
     Returns:
         Dict avec recommandations et plan d'action
@@ -104,25 +109,9 @@ def recommandation_agent(state: SafetyState) -> Dict[str, Any]:
             }
         
         # Générer recommandations basées sur l'analyse
-        ai_recommendations = _generate_ai_recommendations(analysis, scian_sector)
-        
-        # Recommandations sectorielles prédéfinies
-        sectorial_recs = _get_sectorial_recommendations(scian_sector, analysis)
-        
-        # Combiner et prioriser les recommandations
-        all_recommendations = _combine_and_prioritize(ai_recommendations, sectorial_recs)
+        ai_recommendations = _generate_ai_recommendations(analysis, scian_sector, on_token)
         
-        # Créer plan d'action structuré
-        action_plan = _create_action_plan(all_recommendations, analysis)
-        
-        # Actions prioritaires immédiates
-        priority_actions = _extract_priority_actions(all_recommendations)
-        
-        return {
-            "recommendations": all_recommendations,
-            "action_plan": action_plan,
-            "priority_actions": priority_actions
-        }
+        return _build_result(ai_recommendations, analysis, scian_sector)
         
     except Exception as e:
         return {
@@ -131,42 +120,128 @@ def recommandation_agent(state: SafetyState) -> Dict[str, Any]:
             "action_plan": {}
         }
 
-def _generate_ai_recommendations(analysis: Dict[str, Any], scian_sector: str) -> List[Dict[str, Any]]:
-    """Génère des recommandations via Claude/OpenAI"""
+def recommandation_agent_batch(states: Mapping[str, SafetyState],
+                               on_token: Optional[Callable[[str, str], None]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Recommandations pour un lot d'entreprises {identifiant: état}
+    
+    Les profils identiques (même secteur, même profil d'écarts) ne sont générés
+    qu'une fois et les prompts d'un même secteur partagent leur préfixe.
+    
+    Args:
+        states: États SafeGraph par entreprise
+        on_token: Reçoit (identifiant, fragment) au fil de la génération
+    """
+    resultats = {}
+    a_generer = {}
+    
+    for identifiant, state in states.items():
+        state["agent_trace"].append("recommandation_agent")
+        if not state.get("analysis"):
+            resultats[identifiant] = {
+                "errors": ["Aucune analyse disponible pour générer des recommandations"],
+                "recommendations": [],
+                "action_plan": {}
+            }
+        else:
+            a_generer[identifiant] = state
+    
+    reponses = {}
+    if a_generer and config.preferred_llm != "none":
+        try:
+            generator = _get_generator()
+            reponses = generator.generate_batch(
+                {i: _build_recommendation_messages(s["analysis"], s.get("scian_sector")) for i, s in a_generer.items()},
+                on_token
+            )
+        except Exception as e:
+            print(f"Erreur génération IA (lot): {e}")
+    
+    for identifiant, state in a_generer.items():
+        analysis = state["analysis"]
+        scian_sector = state.get("scian_sector")
+        try:
+            if identifiant in reponses:
+                ai_recommendations = _parse_ai_response(reponses[identifiant], analysis.get("risk_classification", "Unknown"))
+            else:
+                ai_recommendations = _get_generic_recommendations(analysis)
+            resultats[identifiant] = _build_result(ai_recommendations, analysis, scian_sector)
+        except Exception as e:
+            resultats[identifiant] = {
+                "errors": [f"Erreur Recommandation Agent: {str(e)}"],
+                "recommendations": [],
+                "action_plan": {}
+            }
+    
+    return {identifiant: resultats[identifiant] for identifiant in states}
+
+def _build_result(ai_recommendations: List[Dict], analysis: Dict[str, Any], scian_sector: str) -> Dict[str, Any]:
+    """Combine recommandations IA et sectorielles en plan d'action"""
+    
+    # Recommandations sectorielles prédéfinies
+    sectorial_recs = _get_sectorial_recommendations(scian_sector, analysis)
+    
+    # Combiner et prioriser les recommandations
+    all_recommendations = _combine_and_prioritize(ai_recommendations, sectorial_recs)
+    
+    # Créer plan d'action structuré
+    action_plan = _create_action_plan(all_recommendations, analysis)
+    
+    # Actions prioritaires immédiates
+    priority_actions = _extract_priority_actions(all_recommendations)
+    
+    return {
+        "recommendations": all_recommendations,
+        "action_plan": action_plan,
+        "priority_actions": priority_actions
+    }
+
+def _get_generator() -> StreamingGenerator:
+    """Générateur streamé adossé au cache de prompts persistant"""
+    return StreamingGenerator(get_preferred_llm(temperature=LLM_TEMPERATURE), cache=get_prompt_cache(),
+                              temperature=LLM_TEMPERATURE)
+
+def _build_recommendation_messages(analysis: Dict[str, Any], scian_sector: str) -> List[Any]:
+    """
+    Messages du prompt à partir du seul profil de risque
+    
+    Seuls le secteur, la classification, les écarts clés (arrondis, triés) et
+    les patterns entrent dans le prompt: deux entreprises au même profil
+    produisent le même prompt, donc la même entrée de cache.
+    """
+    risk_classification = analysis.get("risk_classification", "Unknown")
+    gap_analysis = analysis.get("gap_analysis", {})
+    behavioral_patterns = analysis.get("behavioral_patterns", {})
+    
+    # Extraire les écarts clés
+    key_gaps = []
+    for q_id, gap_info in sorted(gap_analysis.items()):
+        if q_id != "global" and gap_info.get("absolute_gap", 0) < -0.3:
+            key_gaps.append(f"{q_id}: {round(gap_info.get('absolute_gap', 0), 2)}")
+    
+    sector_name = config.scian_sectors.get(scian_sector, "Générique")
+    
+    return RECOMMENDATION_PROMPT.format_messages(
+        sector=sector_name,
+        risk_classification=risk_classification,
+        key_gaps=", ".join(key_gaps) if key_gaps else "Aucun écart majeur",
+        behavioral_patterns=json.dumps(behavioral_patterns, ensure_ascii=False, sort_keys=True, default=str)
+    )
+
+def _generate_ai_recommendations(analysis: Dict[str, Any], scian_sector: str,
+                                 on_token: Optional[Callable[[str], None]] = None) -> List[Dict[str, Any]]:
+    """Génère des recommandations via Claude/OpenAI (réponse streamée et mise en cache)"""
     
     try:
         # Vérifier si API disponible
         if config.preferred_llm == "none":
             return _get_generic_recommendations(analysis)
         
-        # Initialiser le LLM
-        llm = get_preferred_llm(temperature=0.3)
-        
-        # Préparer les données pour le prompt
-        risk_classification = analysis.get("risk_classification", "Unknown")
-        gap_analysis = analysis.get("gap_analysis", {})
-        behavioral_patterns = analysis.get("behavioral_patterns", {})
-        
-        # Extraire les écarts clés
-        key_gaps = []
-        for q_id, gap_info in gap_analysis.items():
-            if q_id != "global" and gap_info.get("absolute_gap", 0) < -0.3:
-                key_gaps.append(f"{q_id}: {gap_info.get('absolute_gap', 0)}")
-        
-        # Construire le prompt
-        sector_name = config.scian_sectors.get(scian_sector, "Générique")
-        
-        chain = RECOMMENDATION_PROMPT | llm
-        response = chain.invoke({
-            "sector": sector_name,
-            "risk_classification": risk_classification,
-            "key_gaps": ", ".join(key_gaps) if key_gaps else "Aucun écart majeur",
-            "behavioral_patterns": str(behavioral_patterns),
-            "analysis_data": str(analysis)
-        })
+        messages = _build_recommendation_messages(analysis, scian_sector)
+        response = _get_generator().generate(messages, on_token)
         
         # Parser la réponse
-        ai_recs = _parse_ai_response(response.content, risk_classification)
+        ai_recs = _parse_ai_response(response, analysis.get("risk_classification", "Unknown"))
         
         return ai_recs
         
@@ -9,6 +9,7 @@ import pandas as pd
 import numpy as np
 import sqlite3
 import joblib
+import json
 import os
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -27,6 +28,11 @@ try:
 except ImportError:
     ML_AVAILABLE = False
 
+try:
+    from .tree_shap import TreeEnsembleExplainer
+except ImportError:
+    from tree_shap import TreeEnsembleExplainer
+
 
 class SafetyGraphPredictiveEngine:
     """Moteur de prédictions ML pour SafetyGraph"""
@@ -50,12 +56,16 @@ class SafetyGraphPredictiveEngine:
         # Métriques de performance
         self.performance_metrics = {}
         
+        # Explications SHAP pré-calculées, indexées par modèle puis prédiction
+        self.explanations = {}
+        
         # Configuration
         self.config = {
             'random_state': 42,
             'test_size': 0.2,
             'cv_folds': 5,
-            'prediction_horizon': 12  # mois
+            'prediction_horizon': 12,  # mois
+            'shap_batch_size': 512
         }
         
         # Initialisation base de données
@@ -109,6 +119,26 @@ class SafetyGraphPredictiveEngine:
             )
         ''')
         
+        # Table explications SHAP pré-calculées
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS explanations (
+                model_name TEXT NOT NULL,
+                prediction_id TEXT NOT NULL,
+                base_value REAL,
+                predicted_value REAL,
+                shap_values TEXT,
+                features TEXT,
+                model_inputs TEXT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (model_name, prediction_id)
+            )
+        ''')
+        
+        # Bases antérieures: entrées du modèle nécessaires à LIME après redémarrage
+        colonnes = {row[1] for row in cursor.execute('PRAGMA table_info(explanations)')}
+        if 'model_inputs' not in colonnes:
+            cursor.execute('ALTER TABLE explanations ADD COLUMN model_inputs TEXT')
+        
         conn.commit()
         conn.close()
     
@@ -307,8 +337,181 @@ class SafetyGraphPredictiveEngine:
         
         self.performance_metrics[model_name] = performance
         
+        # Explications de toutes les prédictions courantes, servies ensuite sans recalcul
+        prediction_ids = (merged_data.loc[X.index, 'secteur_scian'].astype(str) + ':' +
+                          merged_data.loc[X.index, 'date_evaluation'].astype(str)).tolist()
+        store = self.precompute_explanations(model_name, scaler.transform(X), prediction_ids,
+                                             available_features, raw_features=X.to_numpy())
+        performance['explanations_precomputed'] = len(store['index'])
+        
         return performance
     
+    def precompute_explanations(self, model_name: str, X_model: np.ndarray,
+                                prediction_ids: List[str], feature_names: List[str],
+                                raw_features: Optional[np.ndarray] = None) -> Dict:
+        """
+        Calcule les valeurs SHAP exactes (TreeSHAP) d'un lot de prédictions
+        et remplace le magasin d'explications du modèle
+        
+        Args:
+            model_name: Nom du modèle entraîné
+            X_model: Features telles que vues par le modèle (normalisées)
+            prediction_ids: Identifiant de chaque ligne
+            feature_names: Noms des features
+            raw_features: Valeurs d'origine affichées avec l'explication
+            
+        Returns:
+            Magasin d'explications du modèle
+        """
+        model = self.models[model_name]
+        explainer = TreeEnsembleExplainer(model, feature_names)
+        X_model = np.asarray(X_model, dtype=np.float64)
+        shap_matrix = explainer.shap_values(X_model, batch_size=self.config['shap_batch_size'])
+        predictions = explainer.expected_value + shap_matrix.sum(axis=1)
+        raw = X_model if raw_features is None else np.asarray(raw_features, dtype=np.float64)
+        
+        # Fiabilité split-half de l'importance globale (moitiés paires / impaires)
+        halves = [np.abs(shap_matrix[start::2]).mean(axis=0) for start in (0, 1)]
+        stability = float(np.corrcoef(*halves)[0, 1]) if len(shap_matrix) > 3 else 1.0
+        
+        store = {
+            'model_name': model_name,
+            'base_value': explainer.expected_value,
+            'feature_names': list(feature_names),
+            'index': {pid: i for i, pid in enumerate(prediction_ids)},
+            'shap_values': shap_matrix,
+            'predictions': predictions,
+            'features': raw,
+            'model_inputs': X_model,
+            'global_importance': explainer.global_importance(shap_matrix),
+            'stability_score': stability if np.isfinite(stability) else 1.0,
+            'computed_at': datetime.now()
+        }
+        self.explanations[model_name] = store
+        
+        rows = [
+            (model_name, pid, explainer.expected_value, float(predictions[i]),
+             json.dumps(dict(zip(feature_names, shap_matrix[i].tolist()))),
+             json.dumps(dict(zip(feature_names, raw[i].tolist()))),
+             json.dumps(dict(zip(feature_names, X_model[i].tolist()))))
+            for pid, i in store['index'].items()
+        ]
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            conn.execute('DELETE FROM explanations WHERE model_name = ?', (model_name,))
+            conn.executemany('''
+                INSERT INTO explanations
+                (model_name, prediction_id, base_value, predicted_value, shap_values, features, model_inputs)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            conn.executemany(
+                'INSERT INTO feature_importance (model_name, feature_name, importance_score) VALUES (?, ?, ?)',
+                [(model_name, name, score) for name, score in store['global_importance'].items()]
+            )
+        conn.close()
+        
+        return store
+    
+    def get_explanation(self, model_name: str, prediction_id: str) -> Optional[Dict]:
+        """
+        Explication SHAP pré-calculée d'une prédiction
+        
+        Servie depuis l'index mémoire, sinon depuis la base (modèle chargé
+        depuis le disque); None si la prédiction n'a pas été expliquée.
+        """
+        store = self.explanations.get(model_name)
+        if store is not None:
+            i = store['index'].get(prediction_id)
+            if i is None:
+                return None
+            names = store['feature_names']
+            return {
+                'prediction_id': prediction_id,
+                'base_value': store['base_value'],
+                'predicted_value': float(store['predictions'][i]),
+                'shap_values': dict(zip(names, store['shap_values'][i].tolist())),
+                'features': dict(zip(names, store['features'][i].tolist()))
+            }
+        
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute(
+            'SELECT base_value, predicted_value, shap_values, features FROM explanations '
+            'WHERE model_name = ? AND prediction_id = ?', (model_name, prediction_id)
+        ).fetchone()
+        conn.close()
+        
+        if row is None:
+            return None
+        return {
+            'prediction_id': prediction_id,
+            'base_value': row[0],
+            'predicted_value': row[1],
+            'shap_values': json.loads(row[2]),
+            'features': json.loads(row[3])
+        }
+    
+    def get_model_input(self, model_name: str, prediction_id: str) -> Optional[Dict]:
+        """
+        Entrée du modèle (espace normalisé) d'une prédiction expliquée
+        
+        Servie depuis l'index mémoire, sinon depuis la base; None si la
+        prédiction est inconnue ou antérieure à l'enregistrement des entrées.
+        """
+        store = self.explanations.get(model_name)
+        if store is not None:
+            i = store['index'].get(prediction_id)
+            if i is None:
+                return None
+            return {
+                'feature_names': store['feature_names'],
+                'model_input': store['model_inputs'][i],
+                'computed_at': store['computed_at']
+            }
+        
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute(
+            'SELECT model_inputs, timestamp FROM explanations WHERE model_name = ? AND prediction_id = ?',
+            (model_name, prediction_id)
+        ).fetchone()
+        conn.close()
+        
+        if row is None or row[0] is None:
+            return None
+        inputs = json.loads(row[0])
+        return {
+            'feature_names': list(inputs),
+            'model_input': np.array(list(inputs.values()), dtype=np.float64),
+            'computed_at': row[1]
+        }
+    
+    def list_explained_predictions(self, model_name: str) -> List[str]:
+        """Identifiants des prédictions disposant d'une explication"""
+        store = self.explanations.get(model_name)
+        if store is not None:
+            return list(store['index'])
+        
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute('SELECT prediction_id FROM explanations WHERE model_name = ? ORDER BY prediction_id',
+                            (model_name,)).fetchall()
+        conn.close()
+        return [row[0] for row in rows]
+    
+    def get_global_importance(self, model_name: str) -> Dict[str, float]:
+        """Importance globale (moyenne |SHAP|) du dernier entraînement"""
+        store = self.explanations.get(model_name)
+        if store is not None:
+            return store['global_importance']
+        
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute('''
+            SELECT feature_name, importance_score FROM feature_importance
+            WHERE model_name = ? AND timestamp = (
+                SELECT MAX(timestamp) FROM feature_importance WHERE model_name = ?
+            )
+        ''', (model_name, model_name)).fetchall()
+        conn.close()
+        return dict(rows)
+    
     def predict_culture_evolution(self, sector_scian: str, 
                                 horizon_months: int = 12) -> Dict:
         """
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+SafetyGraph - TreeSHAP exact pour ensembles d'arbres
+Valeurs de Shapley exactes (algorithme polynomial de Lundberg et al.)
+calculées par lots vectorisés sur les modèles sklearn du moteur prédictif
+"""
+
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+
+
+class _TreeArrays:
+    """Structure d'un arbre sklearn sous forme de tableaux"""
+
+    def __init__(self, estimator, class_index: int = -1):
+        tree = estimator.tree_
+        self.left = tree.children_left
+        self.right = tree.children_right
+        self.feature = tree.feature
+        self.threshold = tree.threshold
+        self.cover = tree.weighted_n_node_samples.astype(np.float64)
+
+        values = tree.value[:, 0, :].astype(np.float64)
+        if values.shape[1] > 1:
+            # Classifieur: proportions de la classe expliquée
+            values = values / values.sum(axis=1, keepdims=True)
+        self.value = values[:, class_index]
+
+        self.max_depth = int(tree.max_depth)
+        self.expected_value = float(np.dot(self._leaf_mask(), self.value * self.cover) / self.cover[0])
+
+    def _leaf_mask(self) -> np.ndarray:
+        return (self.left == -1).astype(np.float64)
+
+
+class TreeEnsembleExplainer:
+    """
+    TreeSHAP exact pour forêts aléatoires / arbres sklearn
+
+    La récursion sur les chemins est parcourue une seule fois par arbre pour
+    tout un lot d'échantillons: seules les fractions « one » (l'échantillon
+    suit-il la branche ?) dépendent de l'échantillon, elles sont donc
+    portées par des vecteurs de taille `batch`.
+    """
+
+    def __init__(self, model, feature_names: Optional[Sequence[str]] = None,
+                 class_index: int = -1):
+        estimators = getattr(model, 'estimators_', None)
+        if estimators is None:
+            estimators = [model]
+        self.trees = [_TreeArrays(est, class_index) for est in np.ravel(estimators)]
+        self.n_features = int(model.n_features_in_)
+        self.feature_names = list(feature_names) if feature_names is not None else [
+            f"feature_{i}" for i in range(self.n_features)
+        ]
+        self.expected_value = float(np.mean([t.expected_value for t in self.trees]))
+
+    def shap_values(self, X, batch_size: int = 512) -> np.ndarray:
+        """Matrice (n_samples, n_features) des valeurs SHAP"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        phi = np.zeros_like(X)
+        for start in range(0, len(X), batch_size):
+            batch = X[start:start + batch_size]
+            batch_phi = phi[start:start + batch_size]
+            for tree in self.trees:
+                self._tree_shap(tree, batch, batch_phi)
+        return phi / len(self.trees)
+
+    def predict(self, X) -> np.ndarray:
+        """Prédiction reconstruite (base + somme SHAP), utile pour contrôle"""
+        return self.expected_value + self.shap_values(X).sum(axis=1)
+
+    def global_importance(self, shap_matrix: np.ndarray, normalize: bool = True) -> Dict[str, float]:
+        """Importance globale: moyenne des |SHAP| par feature"""
+        importance = np.abs(shap_matrix).mean(axis=0)
+        total = importance.sum()
+        if normalize and total > 0:
+            importance = importance / total
+        return dict(zip(self.feature_names, importance.tolist()))
+
+    # ------------------------------------------------------------------
+    # Algorithme TreeSHAP (chemins uniques), vectorisé sur le lot
+    # ------------------------------------------------------------------
+
+    def _tree_shap(self, tree: _TreeArrays, X: np.ndarray, phi: np.ndarray):
+        n = len(X)
+        size = tree.max_depth + 2
+        path = {
+            'feature': np.full(size, -1, dtype=np.int64),
+            'zero': np.zeros(size),
+            'one': np.ones((size, n)),
+            'pweight': np.zeros((size, n))
+        }
+        self._recurse(tree, X, phi, 0, path, 0, 1.0, np.ones(n), -1)
+
+    @staticmethod
+    def _copy_path(path: Dict) -> Dict:
+        return {key: value.copy() for key, value in path.items()}
+
+    @staticmethod
+    def _extend(path: Dict, depth: int, zero: float, one: np.ndarray, feature: int):
+        path['feature'][depth] = feature
+        path['zero'][depth] = zero
+        path['one'][depth] = one
+        path['pweight'][depth] = 1.0 if depth == 0 else 0.0
+        if depth == 0:
+            return
+        # Récurrence de l'extension en une opération: chaque poids se répartit
+        # entre « feature absente » (même rang) et « présente » (rang suivant)
+        pweight = path['pweight'][:depth + 1]
+        ranks = np.arange(depth + 1, dtype=np.float64)[:, None]
+        previous = pweight.copy()
+        pweight[:] = zero * previous * (depth - ranks) / (depth + 1)
+        pweight[1:] += one * previous[:-1] * (ranks[1:]) / (depth + 1)
+
+    @staticmethod
+    def _unwind(path: Dict, depth: int, index: int):
+        one = path['one'][index]
+        zero = path['zero'][index]
+        pweight = path['pweight']
+        has_one = one != 0
+        safe_one = np.where(has_one, one, 1.0)
+        next_one = pweight[depth].copy()
+
+        for i in range(depth - 1, -1, -1):
+            tmp = pweight[i].copy()
+            with_one = next_one * (depth + 1) / ((i + 1) * safe_one)
+            without_one = tmp * (depth + 1) / (zero * (depth - i)) if zero != 0 else np.zeros_like(tmp)
+            pweight[i] = np.where(has_one, with_one, without_one)
+            next_one = np.where(has_one, tmp - with_one * zero * (depth - i) / (depth + 1), next_one)
+
+        for key in ('feature', 'zero', 'one'):
+            path[key][index:depth] = path[key][index + 1:depth + 1]
+
+    @staticmethod
+    def _unwound_sums(path: Dict, depth: int) -> np.ndarray:
+        """Sommes des poids « dépliés » pour tous les éléments 1..depth à la fois"""
+        one = path['one'][1:depth + 1]                      # (depth, n)
+        zero = path['zero'][1:depth + 1, None]              # (depth, 1)
+        pweight = path['pweight']
+        has_one = one != 0
+        safe_one = np.where(has_one, one, 1.0)
+        safe_zero = np.where(zero != 0, zero, 1.0)
+        next_one = np.broadcast_to(pweight[depth], one.shape).copy()
+        total = np.zeros_like(next_one)
+
+        for i in range(depth - 1, -1, -1):
+            with_one = next_one * (depth + 1) / ((i + 1) * safe_one)
+            without_one = np.where(zero != 0, (pweight[i] / safe_zero) / ((depth - i) / (depth + 1)), 0.0)
+            total += np.where(has_one, with_one, without_one)
+            next_one = np.where(has_one, pweight[i] - with_one * zero * (depth - i) / (depth + 1), next_one)
+        return total
+
+    def _recurse(self, tree: _TreeArrays, X: np.ndarray, phi: np.ndarray, node: int,
+                 path: Dict, depth: int, zero: float, one: np.ndarray, feature: int):
+        path = self._copy_path(path)
+        self._extend(path, depth, zero, one, feature)
+
+        left, right = tree.left[node], tree.right[node]
+        if left == -1:
+            if depth == 0:
+                return
+            weights = self._unwound_sums(path, depth)
+            contributions = weights * (path['one'][1:depth + 1] - path['zero'][1:depth + 1, None]) * tree.value[node]
+            # Les features du chemin sont uniques: affectation vectorisée sans collision
+            phi[:, path['feature'][1:depth + 1]] += contributions.T
+            return
+
+        split = tree.feature[node]
+        goes_left = (X[:, split] <= tree.threshold[node]).astype(np.float64)
+
+        incoming_zero, incoming_one = 1.0, np.ones(len(X))
+        previous = np.flatnonzero(path['feature'][1:depth + 1] == split)
+        if len(previous):
+            index = int(previous[0]) + 1
+            incoming_zero = float(path['zero'][index])
+            incoming_one = path['one'][index].copy()
+            self._unwind(path, depth, index)
+            depth -= 1
+
+        cover = tree.cover[node]
+        self._recurse(tree, X, phi, left, path, depth + 1,
+                      tree.cover[left] / cover * incoming_zero, incoming_one * goes_left, split)
+        self._recurse(tree, X, phi, right, path, depth + 1,
+                      tree.cover[right] / cover * incoming_zero, incoming_one * (1.0 - goes_left), split)
+
+
+def explain_batch(model, X, feature_names: Optional[List[str]] = None,
+                  batch_size: int = 512) -> Dict:
+    """Explications SHAP d'un lot: base, matrice SHAP et importance globale"""
+    explainer = TreeEnsembleExplainer(model, feature_names)
+    shap_matrix = explainer.shap_values(X, batch_size=batch_size)
+    return {
+        'expected_value': explainer.expected_value,
+        'shap_values': shap_matrix,
+        'global_importance': explainer.global_importance(shap_matrix)
+    }
@@ -0,0 +1,507 @@
+"""
+SafetyGraph Persistent State
+============================
+Collections persistantes à partage structurel pour l'état multi-agents:
+PMap (trie de hachage HAMT) et PVector (trie 32 voies avec queue).
+Une mise à jour ne recopie que le chemin modifié (O(log32 n)); les versions
+précédentes restent valides et partagent tout le reste.
+Codec binaire compact (varints, chaînes internées) pour les deltas.
+"""
+
+import struct
+from collections.abc import Mapping, Sequence
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+_BITS = 5
+_LARGEUR = 1 << _BITS
+_MASQUE = _LARGEUR - 1
+_HASH_BITS = 64
+
+
+def _hash(cle) -> int:
+    return hash(cle) & 0xFFFFFFFFFFFFFFFF
+
+
+# ----------------------------------------------------------------------
+# PMap: Hash Array Mapped Trie
+# ----------------------------------------------------------------------
+
+class _Bitmap:
+    """Nœud creux: bitmap des 32 positions + entrées compactes (feuille (clé, valeur) ou sous-nœud)"""
+    __slots__ = ("bitmap", "entrees")
+
+    def __init__(self, bitmap: int, entrees: tuple):
+        self.bitmap = bitmap
+        self.entrees = entrees
+
+    def _position(self, bit: int) -> int:
+        return (self.bitmap & (bit - 1)).bit_count()
+
+    def _remplacer(self, i: int, entree) -> "_Bitmap":
+        return _Bitmap(self.bitmap, self.entrees[:i] + (entree,) + self.entrees[i + 1:])
+
+    def get(self, h: int, decalage: int, cle, defaut):
+        bit = 1 << ((h >> decalage) & _MASQUE)
+        if not self.bitmap & bit:
+            return defaut
+        entree = self.entrees[self._position(bit)]
+        if isinstance(entree, tuple):
+            return entree[1] if entree[0] == cle else defaut
+        return entree.get(h, decalage + _BITS, cle, defaut)
+
+    def assoc(self, h: int, decalage: int, cle, valeur) -> Tuple["_Bitmap", bool]:
+        bit = 1 << ((h >> decalage) & _MASQUE)
+        i = self._position(bit)
+        if not self.bitmap & bit:
+            return _Bitmap(self.bitmap | bit, self.entrees[:i] + ((cle, valeur),) + self.entrees[i:]), True
+        entree = self.entrees[i]
+        if isinstance(entree, tuple):
+            if entree[0] == cle:
+                if entree[1] is valeur:
+                    return self, False
+                return self._remplacer(i, (cle, valeur)), False
+            enfant = _fusionner(entree, _hash(entree[0]), (cle, valeur), h, decalage + _BITS)
+            return self._remplacer(i, enfant), True
+        enfant, ajoute = entree.assoc(h, decalage + _BITS, cle, valeur)
+        return (self, False) if enfant is entree else (self._remplacer(i, enfant), ajoute)
+
+    def dissoc(self, h: int, decalage: int, cle):
+        bit = 1 << ((h >> decalage) & _MASQUE)
+        if not self.bitmap & bit:
+            return self
+        i = self._position(bit)
+        entree = self.entrees[i]
+        if isinstance(entree, tuple):
+            if entree[0] != cle:
+                return self
+            enfant = None
+        else:
+            enfant = entree.dissoc(h, decalage + _BITS, cle)
+            if enfant is entree:
+                return self
+            if enfant is not None and enfant.feuille_unique() is not None:
+                enfant = enfant.feuille_unique()
+        if enfant is None:
+            if self.bitmap == bit:
+                return None
+            return _Bitmap(self.bitmap & ~bit, self.entrees[:i] + self.entrees[i + 1:])
+        return self._remplacer(i, enfant)
+
+    def feuille_unique(self):
+        if len(self.entrees) == 1 and isinstance(self.entrees[0], tuple):
+            return self.entrees[0]
+        return None
+
+    def feuilles(self) -> Iterator[tuple]:
+        for entree in self.entrees:
+            if isinstance(entree, tuple):
+                yield entree
+            else:
+                yield from entree.feuilles()
+
+
+class _Collision:
+    """Clés dont les 64 bits de hachage coïncident"""
+    __slots__ = ("entrees",)
+
+    def __init__(self, entrees: tuple):
+        self.entrees = entrees
+
+    def _index(self, cle) -> int:
+        for i, (k, _) in enumerate(self.entrees):
+            if k == cle:
+                return i
+        return -1
+
+    def get(self, h, decalage, cle, defaut):
+        i = self._index(cle)
+        return defaut if i < 0 else self.entrees[i][1]
+
+    def assoc(self, h, decalage, cle, valeur):
+        i = self._index(cle)
+        if i < 0:
+            return _Collision(self.entrees + ((cle, valeur),)), True
+        return _Collision(self.entrees[:i] + ((cle, valeur),) + self.entrees[i + 1:]), False
+
+    def dissoc(self, h, decalage, cle):
+        i = self._index(cle)
+        if i < 0:
+            return self
+        reste = self.entrees[:i] + self.entrees[i + 1:]
+        return _Collision(reste) if reste else None
+
+    def feuille_unique(self):
+        return self.entrees[0] if len(self.entrees) == 1 else None
+
+    def feuilles(self) -> Iterator[tuple]:
+        return iter(self.entrees)
+
+
+def _fusionner(feuille1, h1: int, feuille2, h2: int, decalage: int):
+    if decalage >= _HASH_BITS:
+        return _Collision((feuille1, feuille2))
+    b1, b2 = (h1 >> decalage) & _MASQUE, (h2 >> decalage) & _MASQUE
+    if b1 == b2:
+        return _Bitmap(1 << b1, (_fusionner(feuille1, h1, feuille2, h2, decalage + _BITS),))
+    entrees = (feuille1, feuille2) if b1 < b2 else (feuille2, feuille1)
+    return _Bitmap((1 << b1) | (1 << b2), entrees)
+
+
+_RACINE_VIDE = _Bitmap(0, ())
+_ABSENT = object()
+
+
+class PMap(Mapping):
+    """Dictionnaire immuable; set/delete/update retournent une nouvelle version"""
+    __slots__ = ("_racine", "_taille")
+
+    def __init__(self, source: Mapping = None):
+        self._racine, self._taille = _RACINE_VIDE, 0
+        if source:
+            racine, taille = self._racine, 0
+            for cle, valeur in source.items():
+                racine, ajoute = racine.assoc(_hash(cle), 0, cle, valeur)
+                taille += ajoute
+            self._racine, self._taille = racine, taille
+
+    @classmethod
+    def _cree(cls, racine, taille) -> "PMap":
+        pmap = cls.__new__(cls)
+        pmap._racine, pmap._taille = racine if racine is not None else _RACINE_VIDE, taille
+        return pmap
+
+    def __getitem__(self, cle):
+        valeur = self._racine.get(_hash(cle), 0, cle, _ABSENT)
+        if valeur is _ABSENT:
+            raise KeyError(cle)
+        return valeur
+
+    def get(self, cle, defaut=None):
+        return self._racine.get(_hash(cle), 0, cle, defaut)
+
+    def __contains__(self, cle) -> bool:
+        return self._racine.get(_hash(cle), 0, cle, _ABSENT) is not _ABSENT
+
+    def __len__(self) -> int:
+        return self._taille
+
+    def __iter__(self) -> Iterator:
+        return (cle for cle, _ in self._racine.feuilles())
+
+    def items(self) -> Iterator[Tuple[Any, Any]]:
+        return self._racine.feuilles()
+
+    def set(self, cle, valeur) -> "PMap":
+        racine, ajoute = self._racine.assoc(_hash(cle), 0, cle, valeur)
+        return self if racine is self._racine else PMap._cree(racine, self._taille + ajoute)
+
+    def delete(self, cle) -> "PMap":
+        racine = self._racine.dissoc(_hash(cle), 0, cle)
+        return self if racine is self._racine else PMap._cree(racine, self._taille - 1)
+
+    def update(self, mapping: Mapping) -> "PMap":
+        racine, taille = self._racine, self._taille
+        for cle, valeur in mapping.items():
+            racine, ajoute = racine.assoc(_hash(cle), 0, cle, valeur)
+            taille += ajoute
+        return self if racine is self._racine else PMap._cree(racine, taille)
+
+    def __eq__(self, autre) -> bool:
+        if self is autre:
+            return True
+        if not isinstance(autre, Mapping) or len(self) != len(autre):
+            return False
+        return all(cle in autre and autre[cle] == valeur for cle, valeur in self.items())
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"PMap({dict(self.items())!r})"
+
+
+# ----------------------------------------------------------------------
+# PVector: trie 32 voies + queue (ajout amorti O(1))
+# ----------------------------------------------------------------------
+
+def _nouveau_chemin(niveau: int, noeud: tuple) -> tuple:
+    while niveau > 0:
+        noeud = (noeud,)
+        niveau -= _BITS
+    return noeud
+
+
+class PVector(Sequence):
+    """Liste immuable; append/extend/set retournent une nouvelle version"""
+    __slots__ = ("_taille", "_decalage", "_racine", "_queue")
+
+    def __init__(self, source: Iterable = ()):
+        self._taille, self._decalage, self._racine, self._queue = 0, _BITS, (), ()
+        if source:
+            vecteur = self.extend(source)
+            self._taille, self._decalage, self._racine, self._queue = (
+                vecteur._taille, vecteur._decalage, vecteur._racine, vecteur._queue)
+
+    @classmethod
+    def _cree(cls, taille, decalage, racine, queue) -> "PVector":
+        vecteur = cls.__new__(cls)
+        vecteur._taille, vecteur._decalage, vecteur._racine, vecteur._queue = taille, decalage, racine, queue
+        return vecteur
+
+    def _debut_queue(self) -> int:
+        return self._taille - len(self._queue)
+
+    def _bloc(self, i: int) -> tuple:
+        if i >= self._debut_queue():
+            return self._queue
+        noeud = self._racine
+        for niveau in range(self._decalage, 0, -_BITS):
+            noeud = noeud[(i >> niveau) & _MASQUE]
+        return noeud
+
+    def __len__(self) -> int:
+        return self._taille
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._taille))]
+        if i < 0:
+            i += self._taille
+        if not 0 <= i < self._taille:
+            raise IndexError("index hors limites")
+        return self._bloc(i)[i & _MASQUE]
+
+    def __iter__(self) -> Iterator:
+        for i in range(0, self._debut_queue(), _LARGEUR):
+            yield from self._bloc(i)
+        yield from self._queue
+
+    def _pousser_queue(self) -> Tuple[int, tuple]:
+        """Insère la queue pleine dans l'arbre (chemin recopié uniquement)"""
+        if (self._taille >> _BITS) > (1 << self._decalage):
+            return self._decalage + _BITS, (self._racine, _nouveau_chemin(self._decalage, self._queue))
+
+        def pousser(niveau, parent):
+            sous = ((self._taille - 1) >> niveau) & _MASQUE
+            if niveau == _BITS:
+                insere = self._queue
+            elif sous < len(parent):
+                insere = pousser(niveau - _BITS, parent[sous])
+            else:
+                insere = _nouveau_chemin(niveau - _BITS, self._queue)
+            return parent[:sous] + (insere,) + parent[sous + 1:]
+
+        return self._decalage, pousser(self._decalage, self._racine)
+
+    def append(self, valeur) -> "PVector":
+        if len(self._queue) < _LARGEUR:
+            return PVector._cree(self._taille + 1, self._decalage, self._racine, self._queue + (valeur,))
+        decalage, racine = self._pousser_queue()
+        return PVector._cree(self._taille + 1, decalage, racine, (valeur,))
+
+    def extend(self, valeurs: Iterable) -> "PVector":
+        vecteur = self
+        valeurs = tuple(valeurs)
+        i = 0
+        while i < len(valeurs):
+            place = _LARGEUR - len(vecteur._queue)
+            if place == 0:
+                vecteur = vecteur.append(valeurs[i])
+                i += 1
+                continue
+            morceau = valeurs[i:i + place]
+            vecteur = PVector._cree(vecteur._taille + len(morceau), vecteur._decalage, vecteur._racine,
+                                    vecteur._queue + morceau)
+            i += len(morceau)
+        return vecteur
+
+    def set(self, i: int, valeur) -> "PVector":
+        if i < 0:
+            i += self._taille
+        if not 0 <= i < self._taille:
+            raise IndexError("index hors limites")
+        if i >= self._debut_queue():
+            j = i & _MASQUE
+            return PVector._cree(self._taille, self._decalage, self._racine,
+                                 self._queue[:j] + (valeur,) + self._queue[j + 1:])
+
+        def assoc(niveau, noeud):
+            sous = (i >> niveau) & _MASQUE
+            remplace = valeur if niveau == 0 else assoc(niveau - _BITS, noeud[sous])
+            return noeud[:sous] + (remplace,) + noeud[sous + 1:]
+
+        return PVector._cree(self._taille, self._decalage, assoc(self._decalage, self._racine), self._queue)
+
+    def __add__(self, autre: Iterable) -> "PVector":
+        return self.extend(autre)
+
+    def __eq__(self, autre) -> bool:
+        if self is autre:
+            return True
+        if not isinstance(autre, Sequence) or isinstance(autre, (str, bytes)) or len(self) != len(autre):
+            return False
+        return all(a == b for a, b in zip(self, autre))
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"PVector({list(self)!r})"
+
+
+def freeze(valeur):
+    """dict/list imbriqués -> PMap/PVector"""
+    if isinstance(valeur, (PMap, PVector)):
+        return valeur
+    if isinstance(valeur, Mapping):
+        return PMap({cle: freeze(v) for cle, v in valeur.items()})
+    if isinstance(valeur, (list, tuple)):
+        return PVector(freeze(v) for v in valeur)
+    return valeur
+
+
+def thaw(valeur):
+    """PMap/PVector -> dict/list Python natifs"""
+    if isinstance(valeur, PMap):
+        return {cle: thaw(v) for cle, v in valeur.items()}
+    if isinstance(valeur, PVector):
+        return [thaw(v) for v in valeur]
+    return valeur
+
+
+# ----------------------------------------------------------------------
+# Codec binaire
+# ----------------------------------------------------------------------
+
+_T_NONE, _T_TRUE, _T_FALSE, _T_INT, _T_FLOAT, _T_STR, _T_REF, _T_BYTES, _T_LIST, _T_DICT, _T_DATETIME = range(11)
+_REF_MAX = 64   # les chaînes courtes (clés, noms d'agents) sont internées
+_FLOAT = struct.Struct("<d")
+
+
+class BinaryEncoder:
+    """Encodeur de flux: les chaînes déjà vues sont remplacées par leur index"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self._chaines: Dict[str, int] = {}
+
+    def varint(self, n: int):
+        while n > 0x7F:
+            self.buffer.append((n & 0x7F) | 0x80)
+            n >>= 7
+        self.buffer.append(n)
+
+    def _chaine(self, s: str):
+        index = self._chaines.get(s)
+        if index is not None:
+            self.buffer.append(_T_REF)
+            self.varint(index)
+            return
+        if len(s) <= _REF_MAX:
+            self._chaines[s] = len(self._chaines)
+        donnees = s.encode("utf-8")
+        self.buffer.append(_T_STR)
+        self.varint(len(donnees))
+        self.buffer += donnees
+
+    def value(self, v):
+        if v is None:
+            self.buffer.append(_T_NONE)
+        elif v is True:
+            self.buffer.append(_T_TRUE)
+        elif v is False:
+            self.buffer.append(_T_FALSE)
+        elif isinstance(v, int):
+            self.buffer.append(_T_INT)
+            self.varint(v << 1 if v >= 0 else ((-v) << 1) - 1)   # zigzag
+        elif isinstance(v, float):
+            self.buffer.append(_T_FLOAT)
+            self.buffer += _FLOAT.pack(v)
+        elif isinstance(v, str):
+            self._chaine(v)
+        elif isinstance(v, (bytes, bytearray)):
+            self.buffer.append(_T_BYTES)
+            self.varint(len(v))
+            self.buffer += v
+        elif isinstance(v, Mapping):
+            self.buffer.append(_T_DICT)
+            self.varint(len(v))
+            for cle, valeur in v.items():
+                self.value(cle)
+                self.value(valeur)
+        elif isinstance(v, (list, tuple, PVector)):
+            self.buffer.append(_T_LIST)
+            self.varint(len(v))
+            for element in v:
+                self.value(element)
+        elif isinstance(v, datetime):
+            self.buffer.append(_T_DATETIME)
+            self._chaine(v.isoformat())
+        elif isinstance(v, Enum):
+            self.value(v.value)
+        else:
+            raise TypeError(f"Type non sérialisable: {type(v).__name__}")
+
+    def getvalue(self) -> bytes:
+        return bytes(self.buffer)
+
+
+class BinaryDecoder:
+    def __init__(self, donnees: bytes):
+        self.donnees = memoryview(donnees)
+        self.position = 0
+        self._chaines: List[str] = []
+
+    def fini(self) -> bool:
+        return self.position >= len(self.donnees)
+
+    def varint(self) -> int:
+        n, decalage = 0, 0
+        while True:
+            octet = self.donnees[self.position]
+            self.position += 1
+            n |= (octet & 0x7F) << decalage
+            if octet < 0x80:
+                return n
+            decalage += 7
+
+    def _octets(self, n: int) -> bytes:
+        debut, self.position = self.position, self.position + n
+        return bytes(self.donnees[debut:self.position])
+
+    def value(self, figer: bool = True):
+        """Décode une valeur; figer=True produit directement des PMap/PVector"""
+        tag = self.donnees[self.position]
+        self.position += 1
+        if tag == _T_NONE:
+            return None
+        if tag == _T_TRUE:
+            return True
+        if tag == _T_FALSE:
+            return False
+        if tag == _T_INT:
+            z = self.varint()
+            return (z >> 1) if not z & 1 else -((z + 1) >> 1)
+        if tag == _T_FLOAT:
+            return _FLOAT.unpack(self._octets(8))[0]
+        if tag == _T_STR:
+            s = self._octets(self.varint()).decode("utf-8")
+            if len(s) <= _REF_MAX:
+                self._chaines.append(s)
+            return s
+        if tag == _T_REF:
+            return self._chaines[self.varint()]
+        if tag == _T_BYTES:
+            return self._octets(self.varint())
+        if tag == _T_LIST:
+            elements = [self.value(figer) for _ in range(self.varint())]
+            return PVector(elements) if figer else elements
+        if tag == _T_DICT:
+            paires = {}
+            for _ in range(self.varint()):
+                cle = self.value(figer)
+                paires[cle] = self.value(figer)
+            return PMap(paires) if figer else paires
+        if tag == _T_DATETIME:
+            return datetime.fromisoformat(self.value())
+        raise ValueError(f"Tag binaire inconnu: {tag}")
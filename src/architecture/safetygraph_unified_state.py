@@ -4,10 +4,17 @@ SafetyGraph Unified State Architecture
 État global unifié pour orchestration 100+ agents SafetyGraph
 """
 
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+import json
+import threading
+from typing import Dict, List, Any, Optional, Iterable, Mapping, Tuple, get_origin
+from dataclasses import dataclass, fields
 from datetime import datetime
 
+try:
+    from .persistent_state import BinaryDecoder, BinaryEncoder, PMap, freeze, thaw
+except ImportError:
+    from persistent_state import BinaryDecoder, BinaryEncoder, PMap, freeze, thaw
+
 @dataclass
 class SafetyGraphUnifiedState:
     """État global unifié SafetyGraph - Hub central données"""
@@ -71,6 +78,157 @@ class SafetyGraphUnifiedState:
                 result[key] = value
         return result
 
+    @classmethod
+    def from_snapshot(cls, snapshot: Mapping[str, Any]) -> "SafetyGraphUnifiedState":
+        """Reconstruit la dataclass (collections natives) depuis un instantané persistant"""
+        valeurs = {f.name: thaw(snapshot[f.name]) for f in fields(cls) if f.name in snapshot}
+        if isinstance(valeurs.get("timestamp"), str):
+            valeurs["timestamp"] = datetime.fromisoformat(valeurs["timestamp"])
+        return cls(**valeurs)
+
+
+# Réducteurs déduits des annotations: listes -> ajout, dictionnaires -> fusion, scalaires -> remplacement
+OP_SET, OP_APPEND, OP_MERGE = 0, 1, 2
+REDUCTEURS = {
+    f.name: OP_APPEND if get_origin(f.type) is list else OP_MERGE if get_origin(f.type) is dict else OP_SET
+    for f in fields(SafetyGraphUnifiedState)
+}
+_FORMAT_DELTAS = b"SGD1"
+
+
+@dataclass(frozen=True)
+class StateDelta:
+    """Mise à jour compacte d'un agent: (op, champ, valeur) par champ touché"""
+    step: int
+    agent: str
+    ops: Tuple[Tuple[int, str, Any], ...]
+
+
+class UnifiedStateStore:
+    """
+    Conteneur d'état à partage structurel pour l'orchestration multi-agents
+
+    Chaque étape produit une nouvelle racine PMap qui ne recopie que les
+    chemins touchés; toutes les racines restent lisibles (instantanés O(1)).
+    Le journal de deltas sert de checkpoint et de flux vers l'UI.
+    """
+
+    def __init__(self, initial: Optional[SafetyGraphUnifiedState] = None):
+        initial = initial or SafetyGraphUnifiedState()
+        racine = {}
+        for nom, op in REDUCTEURS.items():
+            valeur = getattr(initial, nom)
+            if valeur is None and op != OP_SET:
+                valeur = [] if op == OP_APPEND else {}
+            racine[nom] = freeze(valeur)
+        self._lock = threading.Lock()
+        self._versions: List[PMap] = [PMap(racine)]
+        self._deltas: List[StateDelta] = []
+
+    @property
+    def step(self) -> int:
+        return len(self._deltas)
+
+    @property
+    def state(self) -> PMap:
+        return self._versions[-1]
+
+    def __getitem__(self, champ: str):
+        return self._versions[-1][champ]
+
+    def snapshot(self, step: Optional[int] = None) -> PMap:
+        """État immuable après `step` mises à jour (dernière par défaut)"""
+        return self._versions[-1 if step is None else step]
+
+    def _operations(self, updates: Mapping[str, Any], remplacer: Iterable[str]) -> Tuple:
+        remplacer = set(remplacer)
+        ops = []
+        for champ, valeur in updates.items():
+            if champ not in REDUCTEURS:
+                raise KeyError(f"Champ d'état inconnu: {champ}")
+            op = OP_SET if champ in remplacer else REDUCTEURS[champ]
+            if op == OP_APPEND:
+                valeur = tuple(freeze(v) for v in valeur)
+            elif op == OP_MERGE:
+                valeur = PMap({cle: freeze(v) for cle, v in valeur.items()})
+            else:
+                valeur = freeze(valeur)
+            ops.append((op, champ, valeur))
+        return tuple(ops)
+
+    @staticmethod
+    def _reduire(racine: PMap, ops: Iterable[Tuple[int, str, Any]]) -> PMap:
+        for op, champ, valeur in ops:
+            if op == OP_APPEND:
+                valeur = racine[champ].extend(valeur)
+            elif op == OP_MERGE:
+                valeur = racine[champ].update(valeur)
+            racine = racine.set(champ, valeur)
+        return racine
+
+    def apply(self, agent: str, updates: Mapping[str, Any], remplacer: Iterable[str] = ()) -> StateDelta:
+        """Applique la sortie d'un agent (listes ajoutées, dictionnaires fusionnés)"""
+        ops = self._operations(updates, remplacer)
+        with self._lock:
+            delta = StateDelta(len(self._deltas) + 1, agent, ops)
+            self._versions.append(self._reduire(self._versions[-1], ops))
+            self._deltas.append(delta)
+            return delta
+
+    def deltas(self, depuis: int = 0) -> List[StateDelta]:
+        return self._deltas[depuis:]
+
+    def encode(self, depuis: int = 0) -> bytes:
+        """Sérialisation binaire des seuls deltas postérieurs à l'étape `depuis`"""
+        encodeur = BinaryEncoder()
+        encodeur.buffer += _FORMAT_DELTAS
+        deltas = self._deltas[depuis:]
+        encodeur.varint(len(deltas))
+        for delta in deltas:
+            encodeur.varint(delta.step)
+            encodeur.value(delta.agent)
+            encodeur.varint(len(delta.ops))
+            for op, champ, valeur in delta.ops:
+                encodeur.buffer.append(op)
+                encodeur.value(champ)
+                encodeur.value(valeur)
+        return encodeur.getvalue()
+
+    @staticmethod
+    def decode(donnees: bytes) -> List[StateDelta]:
+        if donnees[:4] != _FORMAT_DELTAS:
+            raise ValueError("Format de deltas inconnu")
+        decodeur = BinaryDecoder(donnees)
+        decodeur.position = 4
+        deltas = []
+        for _ in range(decodeur.varint()):
+            step, agent = decodeur.varint(), decodeur.value()
+            ops = []
+            for _ in range(decodeur.varint()):
+                op = decodeur.donnees[decodeur.position]
+                decodeur.position += 1
+                champ = decodeur.value()
+                valeur = decodeur.value()
+                ops.append((op, champ, tuple(valeur) if op == OP_APPEND else valeur))
+            deltas.append(StateDelta(step, agent, tuple(ops)))
+        return deltas
+
+    def apply_bytes(self, donnees: bytes) -> int:
+        """Rejoue un flux de deltas (reprise de checkpoint, client UI); retourne l'étape atteinte"""
+        with self._lock:
+            for delta in self.decode(donnees):
+                if delta.step <= len(self._deltas):
+                    continue   # déjà appliqué
+                if delta.step != len(self._deltas) + 1:
+                    raise ValueError(f"Delta {delta.step} reçu à l'étape {len(self._deltas)}")
+                self._versions.append(self._reduire(self._versions[-1], delta.ops))
+                self._deltas.append(delta)
+            return len(self._deltas)
+
+    def to_unified_state(self, step: Optional[int] = None) -> SafetyGraphUnifiedState:
+        return SafetyGraphUnifiedState.from_snapshot(self.snapshot(step))
+
+
 def create_behaviorx_state(user_input: str) -> SafetyGraphUnifiedState:
     """Création état pour workflow BehaviorX"""
     state = SafetyGraphUnifiedState()
@@ -89,6 +247,5 @@ if __name__ == "__main__":
     print(f"Timestamp: {test_state.timestamp}")
     
     # Test sérialisation
-    import json
     state_dict = test_state.to_dict()
     print(json.dumps(state_dict, indent=2, default=str))
@@ -25,6 +25,9 @@ class SafeGraphConfig(BaseModel):
     openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
     openai_model: str = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
     
+    # Modèle local déterministe (tests et benchmarks hors ligne)
+    use_stub_llm: bool = os.getenv("SAFEGRAPH_STUB_LLM", "false").lower() == "true"
+    
     # LangGraph
     langchain_tracing: bool = os.getenv("LANGCHAIN_TRACING_V2", "false").lower() == "true"
     langchain_api_key: str = os.getenv("LANGCHAIN_API_KEY", "")
@@ -59,7 +62,9 @@ class SafeGraphConfig(BaseModel):
     @property
     def preferred_llm(self) -> str:
         """Détermine le LLM préféré"""
-        if self.has_claude_api:
+        if self.use_stub_llm:
+            return "stub"
+        elif self.has_claude_api:
             return "claude"
         elif self.has_openai_api:
             return "openai"
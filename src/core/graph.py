@@ -3,6 +3,7 @@
 from langgraph.graph import StateGraph, START, END
 from typing import Literal
 from .state import SafetyState, IntentType
+from ..utils.observability import traced_node
 
 def create_safety_graph() -> StateGraph:
     """Crée le graphe principal SafeGraph"""
@@ -17,12 +18,12 @@ def create_safety_graph() -> StateGraph:
     # Initialiser le StateGraph
     workflow = StateGraph(SafetyState)
     
-    # Ajouter les nœuds (agents)
-    workflow.add_node("router", router_agent)
-    workflow.add_node("context_enricher", context_agent)
-    workflow.add_node("collecteur", collecteur_agent)
-    workflow.add_node("analyste", analyste_agent)
-    workflow.add_node("recommandation", recommandation_agent)
+    # Ajouter les nœuds (agents), chacun tracé sous le trace_id de la session
+    workflow.add_node("router", traced_node("router")(router_agent))
+    workflow.add_node("context_enricher", traced_node("context_enricher")(context_agent))
+    workflow.add_node("collecteur", traced_node("collecteur")(collecteur_agent))
+    workflow.add_node("analyste", traced_node("analyste")(analyste_agent))
+    workflow.add_node("recommandation", traced_node("recommandation")(recommandation_agent))
     
     # Point d'entrée
     workflow.add_edge(START, "router")
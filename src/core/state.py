@@ -6,6 +6,11 @@ from enum import Enum
 from datetime import datetime
 import operator
 
+try:
+    from ..utils.observability import new_trace_context
+except ImportError:
+    from utils.observability import new_trace_context
+
 class IntentType(Enum):
     """Types d'intentions utilisateur"""
     EVALUATION = "evaluation"
@@ -63,6 +68,7 @@ class SafetyState(TypedDict):
     timestamp: str
     agent_trace: Annotated[List[str], operator.add]
     errors: Annotated[List[str], operator.add]
+    trace_context: Dict[str, Any]  # trace_id propagé aux spans des nœuds
 
 def create_initial_state(user_input: str) -> SafetyState:
     """Crée un état initial pour une nouvelle session"""
@@ -88,5 +94,6 @@ def create_initial_state(user_input: str) -> SafetyState:
         research_context=[],
         timestamp=datetime.now().isoformat(),
         agent_trace=[],
-        errors=[]
+        errors=[],
+        trace_context=new_trace_context()
     )
\ No newline at end of file
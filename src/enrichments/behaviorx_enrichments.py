@@ -16,6 +16,11 @@ from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 import logging
 
+try:
+    from .scian_taxonomy import get_scian_taxonomy, scian_prefixes
+except ImportError:
+    from scian_taxonomy import get_scian_taxonomy, scian_prefixes
+
 # Configuration logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -124,25 +129,9 @@ class CNESSTContextEnhancer:
         }
     
     def load_sector_mappings(self) -> Dict[str, str]:
-        """Mapping codes SCIAN vers descriptions"""
+        """Mapping codes SCIAN vers descriptions (taxonomie SCIAN partagée)"""
         
-        return {
-            "23": "Construction",
-            "236": "Construction de bâtiments résidentiels",
-            "237": "Travaux de génie civil",
-            "238": "Entrepreneurs spécialisés",
-            "238110": "Coulage de béton et travaux de fondation",
-            "62": "Soins de santé et assistance sociale",
-            "621": "Services de soins de santé ambulatoires",
-            "622": "Hôpitaux",
-            "623": "Établissements de soins infirmiers",
-            "48": "Transport et entreposage",
-            "484": "Transport par camion",
-            "488": "Activités de soutien au transport",
-            "44": "Commerce de détail",
-            "445": "Commerce de détail - Alimentation",
-            "448": "Commerce de détail - Vêtements et accessoires"
-        }
+        return get_scian_taxonomy().labels()
     
     def detect_scian_sector(self, description: str) -> Optional[Tuple[str, str, float]]:
         """
@@ -199,13 +188,11 @@ class CNESSTContextEnhancer:
             return self.cnesst_benchmarks[sector_code]
         
         # Recherche par secteur parent (ex: 238110 -> 238 -> 23)
-        for parent_length in [3, 2, 1]:
-            if len(sector_code) > parent_length:
-                parent_code = sector_code[:parent_length]
-                if parent_code in self.cnesst_benchmarks:
-                    benchmarks = self.cnesst_benchmarks[parent_code].copy()
-                    benchmarks["note"] = f"Données secteur parent {parent_code}"
-                    return benchmarks
+        for parent_code in scian_prefixes(sector_code):
+            if parent_code in self.cnesst_benchmarks:
+                benchmarks = self.cnesst_benchmarks[parent_code].copy()
+                benchmarks["note"] = f"Données secteur parent {parent_code}"
+                return benchmarks
         
         return None
     
@@ -17,6 +17,11 @@ from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 import logging
 
+try:
+    from .scian_taxonomy import scian_prefixes
+except ImportError:
+    from scian_taxonomy import scian_prefixes
+
 # Configuration logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -106,14 +111,12 @@ class CNESSTEnrichmentLayer:
         if scian_code in sectors:
             return sectors[scian_code]
         
-        # Recherche secteur parent si sous-secteur
-        for length in [1, 2]:
-            if len(scian_code) > length:
-                parent_code = scian_code[:length]
-                if parent_code in sectors:
-                    benchmarks = sectors[parent_code].copy()
-                    benchmarks["note"] = f"Données secteur parent {parent_code}"
-                    return benchmarks
+        # Recherche secteur parent si sous-secteur (hiérarchie SCIAN partagée)
+        for parent_code in scian_prefixes(scian_code):
+            if parent_code in sectors:
+                benchmarks = sectors[parent_code].copy()
+                benchmarks["note"] = f"Données secteur parent {parent_code}"
+                return benchmarks
         
         return None
     
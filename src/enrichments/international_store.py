@@ -0,0 +1,471 @@
+"""
+SafetyGraph - Magasin international OSHA / BLS / NIOSH
+======================================================
+Couche d'accès en lecture à databases/safetygraph_international.db:
+- connexions persistantes en pool (WAL, mmap, cache de requêtes préparées)
+- index composites secteur/année sur osha_incidents et bls_statistics
+- tables virtuelles FTS5 sur les descriptions d'incidents et les publications NIOSH
+- requête inter-juridictions SCIAN -> OSHA/BLS via sector_mappings en une instruction
+
+Le schéma exact de la base varie selon la collecte: les colonnes utiles sont
+résolues une fois à l'ouverture parmi des noms candidats (PRAGMA table_info).
+"""
+
+import logging
+import queue
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger('SafetyGraph.InternationalStore')
+
+DEFAULT_DB_PATH = "databases/safetygraph_international.db"
+REQUIRED_TABLES = ('osha_incidents', 'bls_statistics', 'niosh_publications', 'sector_mappings')
+
+POOL_SIZE = 4
+MMAP_SIZE = 256 * 1024 * 1024
+CACHED_STATEMENTS = 256
+ACQUIRE_TIMEOUT = 10.0
+
+# Noms de colonnes candidats, par rôle, dans l'ordre de préférence
+COLUMN_CANDIDATES = {
+    'osha_incidents': {
+        'sector': ('sector_code', 'naics_code', 'scian_code', 'industry_code'),
+        'year': ('year', 'incident_year', 'event_year'),
+        'date': ('incident_date', 'event_date', 'date', 'created_at'),
+        'created': ('created_at', 'updated_at', 'loaded_at'),
+        'text': ('description', 'narrative', 'incident_description', 'summary', 'abstract_text'),
+    },
+    'bls_statistics': {
+        'sector': ('sector_code', 'naics_code', 'industry_code', 'scian_code'),
+        'year': ('year', 'data_year', 'reference_year', 'period_year'),
+        'date': ('period', 'created_at'),
+        'value': ('incidence_rate', 'rate', 'value', 'total_cases', 'cases'),
+    },
+    'niosh_publications': {
+        'text': ('title', 'abstract', 'summary', 'description', 'content', 'keywords'),
+    },
+    'sector_mappings': {
+        'scian': ('scian_code', 'scian', 'code_scian', 'canadian_code'),
+        'sector': ('naics_code', 'sector_code', 'us_sector_code', 'osha_sector_code', 'international_code'),
+    },
+}
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_query(text: str) -> Optional[str]:
+    """Requête FTS5 sûre: chaque mot devient un préfixe entre guillemets (ET implicite)"""
+    tokens = _TOKEN.findall(text or "")
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def prefix_range(code: str) -> Tuple[str, str]:
+    """
+    Bornes texte [lo, hi) couvrant tous les codes commençant par `code`
+    (à comparer à une expression texte: voir InternationalIncidentStore._code_expr)
+    """
+    code = str(code).strip()
+    return code, code[:-1] + chr(ord(code[-1]) + 1)
+
+
+class InternationalIncidentStore:
+    """Accès en lecture optimisé à la base internationale SafetyGraph"""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, pool_size: int = POOL_SIZE,
+                 mmap_size: int = MMAP_SIZE, prepare: bool = True):
+        self.db_path = Path(db_path)
+        self.pool_size = pool_size
+        self.mmap_size = mmap_size
+        self.stats = {'connections_opened': 0, 'acquired': 0, 'queries': 0, 'fts_queries': 0}
+
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=pool_size)
+        self._opened = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self.columns: Dict[str, Dict[str, Optional[str]]] = {}
+        self.text_columns: Dict[str, set] = {}  # colonnes d'affinité TEXT, par table
+        self.fts_tables: Dict[str, str] = {}
+        self.queries: Dict[str, str] = {}
+
+        self.is_available = self._check_tables()
+        if self.is_available:
+            if prepare:
+                self.prepare()
+            self._resolve_columns()
+            self._build_queries()
+
+    # ------------------------------------------------------------------
+    # Pool de connexions
+    # ------------------------------------------------------------------
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False,
+                               cached_statements=CACHED_STATEMENTS, timeout=ACQUIRE_TIMEOUT)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA cache_size = -16000")
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Connexion de lecture empruntée au pool (rendue à la sortie du bloc)"""
+        if self._closed:
+            raise RuntimeError("Magasin international fermé")
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._opened < self.pool_size
+                if can_open:
+                    self._opened += 1
+            if can_open:
+                try:
+                    conn = self._open()
+                except Exception:
+                    # Échec d'ouverture: la place réservée est rendue au budget du pool
+                    with self._lock:
+                        self._opened -= 1
+                    raise
+                with self._lock:
+                    self.stats['connections_opened'] += 1
+            else:
+                conn = self._pool.get(timeout=ACQUIRE_TIMEOUT)
+        with self._lock:
+            self.stats['acquired'] += 1
+        try:
+            yield conn
+        finally:
+            if self._closed:
+                conn.close()
+            else:
+                self._pool.put(conn)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def _fetch(self, sql: str, params=()) -> List[Dict[str, Any]]:
+        with self.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        with self._lock:
+            self.stats['queries'] += 1
+        return [dict(row) for row in rows]
+
+    # ------------------------------------------------------------------
+    # Schéma: tables, colonnes, index, FTS5
+    # ------------------------------------------------------------------
+
+    def _check_tables(self) -> bool:
+        if not self.db_path.exists():
+            logger.info(f"ℹ️ Base internationale non trouvée: {self.db_path}")
+            return False
+        try:
+            conn = sqlite3.connect(str(self.db_path))
+            try:
+                existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.info(f"ℹ️ Base internationale non accessible: {e}")
+            return False
+        missing = [table for table in REQUIRED_TABLES if table not in existing]
+        if missing:
+            logger.info(f"ℹ️ Tables manquantes: {', '.join(missing)}")
+            return False
+        return True
+
+    def _table_columns(self, conn: sqlite3.Connection, table: str) -> List[str]:
+        return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+    def _text_affinity_columns(self, conn: sqlite3.Connection, table: str) -> set:
+        """Colonnes d'affinité TEXT (règles SQLite: type déclaré sans INT, avec CHAR, CLOB ou TEXT)"""
+        columns = set()
+        for row in conn.execute(f"PRAGMA table_info({table})"):
+            declared = (row[2] or "").upper()
+            if "INT" not in declared and any(t in declared for t in ("CHAR", "CLOB", "TEXT")):
+                columns.add(row[1])
+        return columns
+
+    def _code_expr(self, table: str, column: str, alias: Optional[str] = None) -> str:
+        """
+        Expression de code comparable par préfixe texte: la colonne telle quelle si
+        elle est d'affinité TEXT (index utilisable), sinon convertie en texte
+        (codes SCIAN/NAICS stockés en INTEGER: 236118 doit tomber dans ['236', '237')).
+        """
+        ref = f"{alias}.{column}" if alias else column
+        if column in self.text_columns.get(table, ()):
+            return ref
+        return f"CAST({ref} AS TEXT)"
+
+    def _resolve_columns(self, conn: Optional[sqlite3.Connection] = None):
+        owned = conn is None
+        conn = conn or sqlite3.connect(str(self.db_path))
+        try:
+            for table, roles in COLUMN_CANDIDATES.items():
+                present = self._table_columns(conn, table)
+                lowered = {name.lower(): name for name in present}
+                resolved = {}
+                for role, candidates in roles.items():
+                    if role == 'text':
+                        resolved[role] = tuple(lowered[c] for c in candidates if c in lowered)
+                    else:
+                        resolved[role] = next((lowered[c] for c in candidates if c in lowered), None)
+                self.columns[table] = resolved
+                self.text_columns[table] = self._text_affinity_columns(conn, table)
+            self.fts_tables = {
+                table: f"{table}_fts" for table in ('osha_incidents', 'niosh_publications')
+                if self.columns[table]['text'] and _table_exists(conn, f"{table}_fts")
+            }
+        finally:
+            if owned:
+                conn.close()
+
+    def _year_expr(self, table: str, alias: str) -> Optional[str]:
+        cols = self.columns[table]
+        if cols['year']:
+            return f"{alias}.{cols['year']}"
+        if cols['date']:
+            return f"CAST(substr({alias}.{cols['date']}, 1, 4) AS INTEGER)"
+        return None
+
+    def prepare(self):
+        """Active WAL et crée index composites + FTS5 (idempotent, ignoré si base en lecture seule)"""
+        try:
+            conn = sqlite3.connect(str(self.db_path))
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Préparation base internationale impossible: {e}")
+            return
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._resolve_columns(conn)
+            with conn:
+                self._create_indexes(conn)
+                for table in ('osha_incidents', 'niosh_publications'):
+                    self._create_fts(conn, table)
+            conn.execute("ANALYZE")
+        except sqlite3.OperationalError as e:
+            # Base en lecture seule ou SQLite sans FTS5: repli sur les balayages LIKE
+            logger.warning(f"⚠️ Index internationaux non créés: {e}")
+        finally:
+            conn.close()
+
+    def _create_indexes(self, conn: sqlite3.Connection):
+        for table in ('osha_incidents', 'bls_statistics'):
+            sector = self.columns[table]['sector']
+            year = self._year_expr(table, table)
+            if sector is None:
+                continue
+            # L'index d'expression doit reprendre l'expression telle qu'utilisée dans les requêtes
+            key = f"{sector}, {year.replace(table + '.', '')}" if year else sector
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_sector_year ON {table} ({key})")
+        mapping = self.columns['sector_mappings']
+        if mapping['scian'] and mapping['sector']:
+            # Même expression que le filtre par préfixe de cross_jurisdiction
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sector_mappings_scian "
+                         f"ON sector_mappings ({self._code_expr('sector_mappings', mapping['scian'])}, "
+                         f"{mapping['sector']})")
+
+    def _create_fts(self, conn: sqlite3.Connection, table: str):
+        """Table FTS5 à contenu externe, synchronisée par déclencheurs"""
+        text_columns = self.columns[table]['text']
+        fts = f"{table}_fts"
+        if not text_columns or _table_exists(conn, fts):
+            return
+        cols = ", ".join(text_columns)
+        new_values = ", ".join(f"new.{c}" for c in text_columns)
+        old_values = ", ".join(f"old.{c}" for c in text_columns)
+        conn.execute(f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table}', "
+                     "content_rowid='rowid', tokenize='unicode61 remove_diacritics 2')")
+        conn.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+                     f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.rowid, {new_values}); END")
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+                     f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old_values}); END")
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN "
+                     f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old_values}); "
+                     f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.rowid, {new_values}); END")
+        logger.info(f"🔎 Index plein texte créé: {fts} ({cols})")
+
+    # ------------------------------------------------------------------
+    # Requêtes (texte SQL figé une fois -> réutilisé par le cache de requêtes préparées)
+    # ------------------------------------------------------------------
+
+    def _build_queries(self):
+        osha, bls, mapping = (self.columns[t] for t in ('osha_incidents', 'bls_statistics', 'sector_mappings'))
+        osha_year = self._year_expr('osha_incidents', 'o') or 'NULL'
+        bls_year = self._year_expr('bls_statistics', 'b') or 'NULL'
+        bls_value = f"AVG(b.{bls['value']})" if bls['value'] else "COUNT(*)"
+
+        self.queries['stats'] = (
+            "SELECT (SELECT COUNT(*) FROM osha_incidents) AS osha_incidents, "
+            "(SELECT COUNT(*) FROM bls_statistics) AS bls_statistics, "
+            "(SELECT COUNT(*) FROM niosh_publications) AS niosh_publications, "
+            "(SELECT COUNT(*) FROM sector_mappings) AS sector_mappings, "
+            + (f"(SELECT COUNT(DISTINCT {osha['sector']}) FROM osha_incidents) AS sectors_covered, "
+               if osha['sector'] else "0 AS sectors_covered, ")
+            + (f"(SELECT MAX({osha['created']}) FROM osha_incidents) AS last_update"
+               if osha['created'] else "NULL AS last_update")
+        )
+
+        # Filtres optionnels: un paramètre NULL désactive la condition (même texte SQL pour tous les appels)
+        filters = []
+        if osha['sector']:
+            sector = self._code_expr('osha_incidents', osha['sector'], 'o')
+            filters.append(f"(:sector_lo IS NULL OR ({sector} >= :sector_lo AND {sector} < :sector_hi))")
+        if osha_year != 'NULL':
+            filters.append(f"(:year_from IS NULL OR {osha_year} >= :year_from)")
+            filters.append(f"(:year_to IS NULL OR {osha_year} <= :year_to)")
+        where = " AND ".join(filters) or "1"
+
+        if 'osha_incidents' in self.fts_tables:
+            self.queries['search_incidents'] = (
+                f"SELECT o.*, bm25(osha_incidents_fts) AS score FROM osha_incidents_fts "
+                f"JOIN osha_incidents o ON o.rowid = osha_incidents_fts.rowid "
+                f"WHERE osha_incidents_fts MATCH :match AND {where} ORDER BY score LIMIT :limit"
+            )
+        elif osha['text']:
+            self.queries['search_incidents'] = (
+                f"SELECT o.*, NULL AS score FROM osha_incidents o "
+                f"WHERE o.{osha['text'][0]} LIKE :like AND {where} ORDER BY o.rowid DESC LIMIT :limit"
+            )
+
+        niosh_text = self.columns['niosh_publications']['text']
+        if 'niosh_publications' in self.fts_tables:
+            self.queries['search_publications'] = (
+                "SELECT p.*, bm25(niosh_publications_fts) AS score FROM niosh_publications_fts "
+                "JOIN niosh_publications p ON p.rowid = niosh_publications_fts.rowid "
+                "WHERE niosh_publications_fts MATCH :match ORDER BY score LIMIT :limit"
+            )
+        elif niosh_text:
+            self.queries['search_publications'] = (
+                f"SELECT p.*, NULL AS score FROM niosh_publications p "
+                f"WHERE ({' OR '.join(f'p.{c} LIKE :like' for c in niosh_text)}) "
+                "ORDER BY p.rowid DESC LIMIT :limit"
+            )
+
+        if mapping['scian'] and mapping['sector'] and osha['sector'] and bls['sector']:
+            scian = self._code_expr('sector_mappings', mapping['scian'])
+            self.queries['cross_jurisdiction'] = f"""
+                WITH m AS (
+                    SELECT DISTINCT {mapping['scian']} AS scian_code, {mapping['sector']} AS sector_code
+                    FROM sector_mappings
+                    WHERE {scian} >= :scian_lo AND {scian} < :scian_hi
+                ),
+                osha AS (
+                    SELECT o.{osha['sector']} AS sector_code, {osha_year} AS year, COUNT(*) AS osha_incidents
+                    FROM osha_incidents o JOIN m ON o.{osha['sector']} = m.sector_code
+                    WHERE (:year_from IS NULL OR {osha_year} >= :year_from)
+                      AND (:year_to IS NULL OR {osha_year} <= :year_to)
+                    GROUP BY 1, 2
+                ),
+                bls AS (
+                    SELECT b.{bls['sector']} AS sector_code, {bls_year} AS year, {bls_value} AS bls_value
+                    FROM bls_statistics b JOIN m ON b.{bls['sector']} = m.sector_code
+                    WHERE (:year_from IS NULL OR {bls_year} >= :year_from)
+                      AND (:year_to IS NULL OR {bls_year} <= :year_to)
+                    GROUP BY 1, 2
+                ),
+                years AS (SELECT sector_code, year FROM osha UNION SELECT sector_code, year FROM bls)
+                SELECT m.scian_code, m.sector_code, y.year,
+                       COALESCE(osha.osha_incidents, 0) AS osha_incidents, bls.bls_value
+                FROM m
+                JOIN years y ON y.sector_code = m.sector_code
+                LEFT JOIN osha ON osha.sector_code = y.sector_code AND osha.year IS y.year
+                LEFT JOIN bls ON bls.sector_code = y.sector_code AND bls.year IS y.year
+                ORDER BY m.scian_code, m.sector_code, y.year
+            """
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def get_database_stats(self) -> Dict[str, Any]:
+        """Volumétrie par table, secteurs couverts et dernière mise à jour (une seule requête)"""
+        if not self.is_available:
+            return {}
+        rows = self._fetch(self.queries['stats'])
+        return rows[0] if rows else {}
+
+    def search_incidents(self, text: str, sector_code: Optional[str] = None,
+                         year_from: Optional[int] = None, year_to: Optional[int] = None,
+                         limit: int = 50) -> List[Dict[str, Any]]:
+        """Incidents OSHA dont la description contient tous les mots (préfixes), filtrés secteur/année"""
+        sql = self.queries.get('search_incidents')
+        if not self.is_available or sql is None:
+            return []
+        match = fts_query(text)
+        if match is None:
+            return []
+        sector_lo, sector_hi = prefix_range(sector_code) if sector_code else (None, None)
+        params = {'match': match, 'like': f"%{text.strip()}%", 'sector_lo': sector_lo,
+                  'sector_hi': sector_hi, 'year_from': year_from, 'year_to': year_to, 'limit': limit}
+        if 'osha_incidents' in self.fts_tables:
+            with self._lock:
+                self.stats['fts_queries'] += 1
+        return self._fetch(sql, params)
+
+    def search_publications(self, text: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Publications NIOSH pertinentes (classement BM25 si FTS5 disponible)"""
+        sql = self.queries.get('search_publications')
+        if not self.is_available or sql is None:
+            return []
+        match = fts_query(text)
+        if match is None:
+            return []
+        if 'niosh_publications' in self.fts_tables:
+            with self._lock:
+                self.stats['fts_queries'] += 1
+        return self._fetch(sql, {'match': match, 'like': f"%{text.strip()}%", 'limit': limit})
+
+    def cross_jurisdiction(self, scian_code: str, year_from: Optional[int] = None,
+                           year_to: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Incidents OSHA et statistiques BLS des secteurs américains correspondant
+        à un code SCIAN (et ses sous-codes), par secteur et par année.
+        """
+        sql = self.queries.get('cross_jurisdiction')
+        if not self.is_available or sql is None or not str(scian_code).strip():
+            return []
+        scian_lo, scian_hi = prefix_range(scian_code)
+        return self._fetch(sql, {'scian_lo': scian_lo, 'scian_hi': scian_hi,
+                                 'year_from': year_from, 'year_to': year_to})
+
+    def explain(self, name: str, **params) -> List[str]:
+        """Plan d'exécution SQLite d'une requête nommée (diagnostic des index)"""
+        defaults = {'match': None, 'like': None, 'sector_lo': None, 'sector_hi': None, 'year_from': None,
+                    'year_to': None, 'limit': 1, 'scian_lo': None, 'scian_hi': None}
+        with self.connection() as conn:
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {self.queries[name]}", {**defaults, **params}).fetchall()
+        return [row['detail'] for row in rows]
+
+
+def _table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+
+_stores: Dict[str, InternationalIncidentStore] = {}
+_stores_lock = threading.Lock()
+
+def get_international_store(db_path: str = DEFAULT_DB_PATH) -> InternationalIncidentStore:
+    """Magasin partagé du processus (le pool survit aux ré-exécutions et sessions Streamlit)"""
+    key = str(Path(db_path).resolve())
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None or (not store.is_available and Path(db_path).exists()):
+            store = InternationalIncidentStore(db_path)
+            _stores[key] = store
+        return store
@@ -0,0 +1,389 @@
+"""
+SafetyGraph - Taxonomie SCIAN indexée
+=====================================
+
+Taxonomie SCIAN unique et immuable, construite une fois par processus à
+partir des libellés officiels, de data/CNESST/sectors_config.json et du
+catalogue d'industries de l'interface. Recherche code <-> libellé en O(1),
+requêtes par préfixe sur la hiérarchie 2/3/4+ chiffres, recherche de
+libellés insensible aux accents et à la casse, snapshot compact pour
+rechargement rapide.
+"""
+
+import bisect
+import json
+import logging
+import re
+import threading
+import unicodedata
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SECTORS_CONFIG_PATH = Path(__file__).resolve().parents[2] / "data" / "CNESST" / "sectors_config.json"
+SNAPSHOT_VERSION = 1
+
+# Libellés officiels (codes à 2 chiffres et plus)
+SCIAN_LABELS = {
+    "23": "Construction",
+    "236": "Construction de bâtiments résidentiels",
+    "237": "Travaux de génie civil",
+    "238": "Entrepreneurs spécialisés",
+    "238110": "Coulage de béton et travaux de fondation",
+    "62": "Soins de santé et assistance sociale",
+    "621": "Services de soins de santé ambulatoires",
+    "622": "Hôpitaux",
+    "623": "Établissements de soins infirmiers",
+    "48": "Transport et entreposage",
+    "484": "Transport par camion",
+    "488": "Activités de soutien au transport",
+    "44": "Commerce de détail",
+    "445": "Commerce de détail - Alimentation",
+    "448": "Commerce de détail - Vêtements et accessoires"
+}
+
+# Catalogue d'industries de l'interface (libellé affiché -> code)
+SCIAN_UI_CATALOG = {
+    "🚧 CONSTRUCTION": {
+        "Construction générale (236)": "236",
+        "Construction résidentielle (2361)": "2361",
+        "Construction non-résidentielle (2362)": "2362",
+        "Génie civil & infrastructure (237)": "237",
+        "Entrepreneurs spécialisés (238)": "238",
+        "Construction lourde & civile": "237-heavy"
+    },
+    "⛏️ MINES & EXTRACTION": {
+        "Mines souterraines (212)": "212",
+        "Mines métalliques (2122)": "2122",
+        "Mines non-métalliques (2123)": "2123",
+        "Extraction pétrole & gaz (211)": "211",
+        "Activités soutien mines (213)": "213",
+        "Carrières & sablières (2123)": "2123-carriere"
+    },
+    "🏭 MANUFACTURING AVANCÉ": {
+        "Fabrication alimentaire (311)": "311",
+        "Pharmaceutique (3254) 🆕": "3254",
+        "Agro-alimentaire (3111) 🆕": "3111",
+        "Chimique & Pétrochimique (3251) 🆕": "3251",
+        "Métallurgie (3311) 🆕": "3311",
+        "Fabrication boissons & tabac (312)": "312",
+        "Fabrication bois (321)": "321",
+        "Fabrication papier (322)": "322",
+        "Fabrication plastique & caoutchouc (326)": "326",
+        "Fabrication métallique primaire (331)": "331",
+        "Fabrication machinerie (333)": "333",
+        "Fabrication équipement transport (336)": "336",
+        "Fabrication meubles (337)": "337"
+    },
+    "🏥 SOINS DE SANTÉ SPÉCIALISÉS": {
+        "Soins ambulatoires (621)": "621",
+        "Hôpitaux aigus (6221) 🆕": "6221",
+        "Laboratoires médicaux (6215) 🆕": "6215",
+        "Hôpitaux (622)": "622",
+        "Établissements soins infirmiers (623)": "623",
+        "Assistance sociale (624)": "624",
+        "Services sociaux communautaires": "624-social"
+    },
+    "🔧 SERVICES CRITIQUES": {
+        "Services professionnels techniques (541)": "541",
+        "Télécommunications (5174) 🆕": "5174",
+        "Services énergétiques (2211) 🆕": "2211",
+        "Gestion d'entreprises (551)": "551",
+        "Services administratifs & soutien (561)": "561",
+        "Services éducatifs (611)": "611",
+        "Services publics (utilities)": "221"
+    },
+    "🚚 TRANSPORT AVANCÉ": {
+        "Transport terrestre (484)": "484",
+        "Transport maritime (4831) 🆕": "4831",
+        "Aviation commerciale (4811) 🆕": "4811",
+        "Transport aérien (481)": "481",
+        "Transport maritime (483)": "483",
+        "Entreposage (493)": "493",
+        "Services postaux & courrier (492)": "492"
+    }
+}
+
+_DIGITS = re.compile(r"\d+")
+
+
+def normalize_label(text: str) -> str:
+    """'Hôpitaux aigus (6221) 🆕' -> 'hopitaux aigus 6221'"""
+    ascii_text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode()
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", ascii_text.casefold()).split())
+
+
+def scian_digits(code: str) -> str:
+    """Partie numérique d'un code ('237-heavy' -> '237', '' si aucune)"""
+    match = _DIGITS.match(str(code).strip())
+    return match.group(0) if match else ""
+
+
+def scian_prefixes(code: str, min_length: int = 2) -> List[str]:
+    """Codes parents par préfixe, du plus spécifique au plus général (238110 -> 23811 ... 23)"""
+    digits = scian_digits(code)
+    start = len(digits) - 1 if digits == str(code) else len(digits)
+    return [digits[:length] for length in range(start, min_length - 1, -1)]
+
+
+@dataclass(frozen=True)
+class SCIANEntry:
+    """Entrée de la taxonomie"""
+    code: str
+    label: str
+    level: int                       # Nombre de chiffres (2 = secteur, 3 = sous-secteur, ...)
+    parent: Optional[str]
+    industry: Optional[str] = None   # Industrie du catalogue de l'interface
+    aliases: Tuple[str, ...] = ()
+
+
+class SCIANTaxonomy:
+    """Taxonomie SCIAN immuable avec index code, libellé, préfixe et jetons"""
+
+    def __init__(self, entries: Iterable[Tuple[str, str, Optional[str], Tuple[str, ...]]]):
+        raw = {}
+        for code, label, industry, aliases in entries:
+            raw[str(code)] = (label, industry, tuple(aliases))
+
+        codes = sorted(raw)
+        known = set(codes)
+        by_code = {}
+        for code in codes:
+            label, industry, aliases = raw[code]
+            parent = next((p for p in scian_prefixes(code) if p in known), None)
+            by_code[code] = SCIANEntry(code, label, len(scian_digits(code)), parent, industry, aliases)
+
+        self._by_code: Mapping[str, SCIANEntry] = MappingProxyType(by_code)
+        self._sorted_codes: Tuple[str, ...] = tuple(codes)
+
+        # Index libellés: exact puis normalisé (accents/casse/symboles ignorés)
+        by_label: Dict[str, str] = {}
+        by_normalized: Dict[str, str] = {}
+        tokens: Dict[str, set] = {}
+        for entry in by_code.values():
+            for label in (entry.label,) + entry.aliases:
+                by_label.setdefault(label, entry.code)
+                normalized = normalize_label(label)
+                by_normalized.setdefault(normalized, entry.code)
+                for token in normalized.split():
+                    tokens.setdefault(token, set()).add(entry.code)
+        self._by_label = MappingProxyType(by_label)
+        self._by_normalized = MappingProxyType(by_normalized)
+        self._tokens = MappingProxyType({token: frozenset(c) for token, c in tokens.items()})
+        self._sorted_tokens: Tuple[str, ...] = tuple(sorted(tokens))
+
+        industries: Dict[str, Dict[str, str]] = {}
+        for industry, sectors in SCIAN_UI_CATALOG.items():
+            industries[industry] = MappingProxyType({
+                label: code for label, code in sectors.items() if code in by_code
+            })
+        self._industries = MappingProxyType(industries)
+
+    def __len__(self) -> int:
+        return len(self._by_code)
+
+    def __contains__(self, code: str) -> bool:
+        return str(code) in self._by_code
+
+    # ------------------------------------------------------------------
+    # Recherche code <-> libellé (O(1))
+    # ------------------------------------------------------------------
+
+    def get(self, code: str) -> Optional[SCIANEntry]:
+        return self._by_code.get(str(code))
+
+    def label_for(self, code: str, default: Optional[str] = None) -> Optional[str]:
+        entry = self._by_code.get(str(code))
+        return entry.label if entry else default
+
+    def code_for(self, label: str, default: Optional[str] = None) -> Optional[str]:
+        """Code d'un libellé (officiel, CNESST ou interface), exact puis normalisé"""
+        code = self._by_label.get(label)
+        if code is None:
+            code = self._by_normalized.get(normalize_label(label))
+        return code if code is not None else default
+
+    def resolve_code(self, value, default: Optional[str] = None) -> Optional[str]:
+        """Code depuis une valeur brute: code numérique ('236118') ou libellé"""
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)  # colonnes pandas lues en float (236118.0)
+        text = str(value).strip() if value is not None else ""
+        if not text or text.lower() == "nan":
+            return default
+        if scian_digits(text) == text:
+            return text
+        return self.code_for(text, default)
+
+    def labels(self) -> Mapping[str, str]:
+        """Libellé principal par code"""
+        return MappingProxyType({code: entry.label for code, entry in self._by_code.items()})
+
+    # ------------------------------------------------------------------
+    # Hiérarchie
+    # ------------------------------------------------------------------
+
+    def descendants(self, prefix: str, include_self: bool = True) -> List[SCIANEntry]:
+        """Toutes les entrées dont le code commence par `prefix` (ex. '23')"""
+        prefix = str(prefix)
+        start = bisect.bisect_left(self._sorted_codes, prefix)
+        end = bisect.bisect_left(self._sorted_codes, prefix + "\uffff")
+        return [self._by_code[code] for code in self._sorted_codes[start:end]
+                if include_self or code != prefix]
+
+    def children(self, code: str) -> List[SCIANEntry]:
+        return [entry for entry in self.descendants(code, include_self=False) if entry.parent == str(code)]
+
+    def ancestors(self, code: str) -> List[SCIANEntry]:
+        """Parents connus, du plus proche au plus général"""
+        return [self._by_code[p] for p in scian_prefixes(code) if p in self._by_code]
+
+    def longest_prefix_match(self, code: str, candidates: Iterable[str]) -> Optional[str]:
+        """Candidat le plus spécifique dont `code` est un descendant (ou égal)"""
+        digits = scian_digits(code)
+        best, best_length = None, 0
+        for candidate in candidates:
+            prefix = scian_digits(candidate)
+            if len(prefix) > best_length and digits.startswith(prefix):
+                best, best_length = candidate, len(prefix)
+        return best
+
+    # ------------------------------------------------------------------
+    # Recherche de libellés
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, limit: int = 10) -> List[SCIANEntry]:
+        """Entrées dont chaque mot de la requête préfixe un mot d'un libellé"""
+        words = normalize_label(query).split()
+        if not words:
+            return []
+
+        matched: Optional[set] = None
+        for word in words:
+            start = bisect.bisect_left(self._sorted_tokens, word)
+            codes = set()
+            for token in self._sorted_tokens[start:]:
+                if not token.startswith(word):
+                    break
+                codes |= self._tokens[token]
+            matched = codes if matched is None else matched & codes
+            if not matched:
+                return []
+
+        normalized_query = " ".join(words)
+        def rank(code):
+            entry = self._by_code[code]
+            exact = any(normalize_label(label) == normalized_query for label in (entry.label,) + entry.aliases)
+            return (not exact, entry.level, code)
+        return [self._by_code[code] for code in sorted(matched, key=rank)[:limit]]
+
+    # ------------------------------------------------------------------
+    # Catalogue interface
+    # ------------------------------------------------------------------
+
+    def industries(self) -> Mapping[str, Mapping[str, str]]:
+        """Industries de l'interface -> {libellé affiché: code} (lecture seule)"""
+        return self._industries
+
+    def ui_labels(self) -> List[str]:
+        return [label for sectors in self._industries.values() for label in sectors]
+
+    # ------------------------------------------------------------------
+    # Snapshot compact
+    # ------------------------------------------------------------------
+
+    def to_snapshot(self) -> bytes:
+        payload = {
+            "version": SNAPSHOT_VERSION,
+            "entries": [[e.code, e.label, e.industry, list(e.aliases)] for e in self._by_code.values()]
+        }
+        return zlib.compress(json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+    @classmethod
+    def from_snapshot(cls, data: bytes) -> "SCIANTaxonomy":
+        payload = json.loads(zlib.decompress(data).decode("utf-8"))
+        if payload.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Version snapshot SCIAN non supportée: {payload.get('version')}")
+        return cls((code, label, industry, tuple(aliases)) for code, label, industry, aliases in payload["entries"])
+
+    def save_snapshot(self, path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(self.to_snapshot())
+        return path
+
+    @classmethod
+    def load_snapshot(cls, path) -> "SCIANTaxonomy":
+        return cls.from_snapshot(Path(path).read_bytes())
+
+
+def build_taxonomy(sectors_config_path=SECTORS_CONFIG_PATH) -> SCIANTaxonomy:
+    """Fusion des sources: libellés officiels, configuration CNESST, catalogue interface"""
+    labels: Dict[str, str] = dict(SCIAN_LABELS)
+    aliases: Dict[str, List[str]] = {}
+    industries: Dict[str, str] = {}
+
+    def add(code: str, label: str):
+        if code not in labels:
+            labels[code] = label
+        elif label != labels[code] and label not in aliases.setdefault(code, []):
+            aliases[code].append(label)
+
+    try:
+        with open(sectors_config_path, "r", encoding="utf-8-sig") as f:
+            config = json.load(f)
+        for code, sector in config.get("sectors", {}).items():
+            add(code, sector.get("nom", f"Secteur {code}"))
+            for sub_code, sub_label in sector.get("sous_secteurs", {}).items():
+                add(sub_code, sub_label)
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Configuration secteurs CNESST non chargée: {e}")
+
+    for industry, sectors in SCIAN_UI_CATALOG.items():
+        for label, code in sectors.items():
+            add(code, label)
+            industries.setdefault(code, industry)
+
+    return SCIANTaxonomy(
+        (code, label, industries.get(code), tuple(aliases.get(code, ())))
+        for code, label in labels.items()
+    )
+
+
+_taxonomies: Dict[Optional[Path], SCIANTaxonomy] = {}
+_taxonomy_lock = threading.Lock()
+
+def get_scian_taxonomy(snapshot_path=None) -> SCIANTaxonomy:
+    """
+    Taxonomie unique du processus, par snapshot
+
+    Si `snapshot_path` est fourni, le snapshot est relu quand il est plus
+    récent que la configuration CNESST, sinon il est régénéré. La mémoïsation
+    est indexée par chemin résolu: un autre snapshot donne sa propre instance.
+    """
+    cle = Path(snapshot_path).resolve() if snapshot_path else None
+    with _taxonomy_lock:
+        if cle not in _taxonomies:
+            _taxonomies[cle] = _load_or_build(cle)
+        return _taxonomies[cle]
+
+
+def _load_or_build(snapshot_path: Optional[Path]) -> SCIANTaxonomy:
+    if snapshot_path is not None and snapshot_path.exists():
+        source_mtime = SECTORS_CONFIG_PATH.stat().st_mtime if SECTORS_CONFIG_PATH.exists() else 0
+        if snapshot_path.stat().st_mtime >= source_mtime:
+            try:
+                return SCIANTaxonomy.load_snapshot(snapshot_path)
+            except (OSError, ValueError, zlib.error) as e:
+                logger.warning(f"⚠️ Snapshot SCIAN illisible, reconstruction: {e}")
+
+    taxonomy = build_taxonomy()
+    if snapshot_path is not None:
+        try:
+            taxonomy.save_snapshot(snapshot_path)
+        except OSError as e:
+            logger.warning(f"⚠️ Snapshot SCIAN non écrit: {e}")
+    return taxonomy
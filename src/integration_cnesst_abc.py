@@ -12,6 +12,11 @@ from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 import logging
 
+try:
+    from enrichments.scian_taxonomy import get_scian_taxonomy, scian_digits
+except ImportError:
+    from src.enrichments.scian_taxonomy import get_scian_taxonomy, scian_digits
+
 # Configuration logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("SafetyAgentic.Integration.CNESST")
@@ -266,28 +271,25 @@ class IntegrationCNESSTBehaviorX:
             return 0
     
     def _extraire_scian_principal(self, secteur_scian: str) -> str:
-        """Extraction code SCIAN principal"""
-        if not secteur_scian or pd.isna(secteur_scian):
+        """Extraction code SCIAN principal (code brut ou libellé, via la taxonomie partagée)"""
+        if secteur_scian is None or (not isinstance(secteur_scian, str) and pd.isna(secteur_scian)):
             return "999"  # Code générique
         
-        # Extraction 3 premiers chiffres pour correspondance
-        scian_clean = str(secteur_scian).strip()
-        
-        # Mapping spécifique
-        if scian_clean.startswith("236"):
-            return "236"
-        elif scian_clean.startswith("622"):
-            return "622"
-        elif scian_clean.startswith("484"):
-            return "484"
-        elif scian_clean.startswith("452"):
-            return "452"
-        elif scian_clean.startswith("811"):
-            return "811"
-        elif any(scian_clean.startswith(f"{i}") for i in range(311, 340)):
-            return "311-339"
-        else:
-            return "999"  # Autres secteurs
+        taxonomy = get_scian_taxonomy()
+        # Chiffres SCIAN en tête ("236118 - Construction résidentielle"), sinon libellé
+        code = scian_digits(secteur_scian) if isinstance(secteur_scian, str) else ""
+        code = code or taxonomy.resolve_code(secteur_scian)
+        if not code:
+            return "999"
+        
+        # Correspondance la plus spécifique parmi les secteurs BehaviorX mappés
+        codes_mappes = [k for k in self.mapping_scian_behaviorx if k[0].isdigit() and "-" not in k]
+        match = taxonomy.longest_prefix_match(code, codes_mappes)
+        if match:
+            return match
+        if "311" <= code[:3] <= "339":
+            return "311-339"  # Fabrication
+        return "999"  # Autres secteurs
     
     def _analyser_incident_abc(self, row: pd.Series, scian_code: str) -> Dict:
         """Analyse incident selon modèle ABC BehaviorX"""
@@ -0,0 +1,407 @@
+﻿"""
+Pipeline de pré-traitement média V4 (CPU)
+=========================================
+Décodage images/vidéos, échantillonnage adaptatif par score de changement de
+scène, suppression des quasi-doublons par hachage perceptuel (dHash),
+redimensionnement et mise en lots des images retenues, cache des résultats par
+empreinte du contenu. Seules les images distinctes atteignent l'analyseur.
+"""
+import base64
+import copy
+import hashlib
+import io
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from PIL import Image, ImageSequence
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
+MediaSource = Union[bytes, str, os.PathLike, Sequence[np.ndarray]]
+FrameAnalyzer = Callable[[List[np.ndarray], List[Dict[str, Any]]], List[Dict[str, Any]]]
+
+THUMBNAIL_SIZE = (64, 36)     # vignette de score de scène (L, H)
+HASH_SIZE = 8                 # dHash 8x8 = 64 bits
+MEDIA_SUFFIXES = (".mp4", ".avi", ".mov", ".mkv", ".webm", ".gif", ".png", ".jpg", ".jpeg", ".webp",
+                  ".tif", ".tiff", ".bmp")
+OPENCV_SUFFIXES = (".mp4", ".avi", ".mov", ".mkv", ".webm")   # conteneurs illisibles par Pillow
+HASH_CHUNK = 1 << 20
+_BASE64 = re.compile(r"[A-Za-z0-9+/]*={0,2}")
+
+
+@dataclass
+class PipelineConfig:
+    """Paramètres d'échantillonnage, de déduplication et de mise en lots"""
+    scene_threshold: float = 0.08      # score minimal de changement de scène (0-1)
+    scene_sensitivity: float = 3.0     # écarts-types au-dessus du bruit récent
+    min_interval: float = 0.2          # secondes minimales entre deux images retenues
+    max_interval: float = 5.0          # une image au moins toutes les N secondes
+    hash_distance: int = 6             # distance de Hamming max d'un quasi-doublon
+    max_side: int = 512                # côté max des images transmises
+    batch_size: int = 8
+    default_fps: float = 10.0
+
+
+@dataclass
+class MediaReport:
+    """Bilan de traitement d'un média"""
+    content_hash: str
+    kind: str
+    frames_decoded: int = 0
+    frames_sampled: int = 0
+    frames_unique: int = 0
+    batches: int = 0
+    decode_seconds: float = 0.0
+    total_seconds: float = 0.0
+    cached: bool = False
+
+    @property
+    def dedup_ratio(self) -> float:
+        """Part des images échantillonnées écartées comme quasi-doublons"""
+        return 1 - self.frames_unique / self.frames_sampled if self.frames_sampled else 0.0
+
+    @property
+    def reduction_ratio(self) -> float:
+        """Part des images décodées qui n'atteignent pas l'analyseur"""
+        return 1 - self.frames_unique / self.frames_decoded if self.frames_decoded else 0.0
+
+    @property
+    def frames_per_second(self) -> float:
+        return self.frames_decoded / self.total_seconds if self.total_seconds else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(asdict(self), dedup_ratio=self.dedup_ratio, reduction_ratio=self.reduction_ratio,
+                    frames_per_second=self.frames_per_second)
+
+
+@dataclass
+class MediaResult:
+    report: MediaReport
+    frames: List[Dict[str, Any]] = field(default_factory=list)   # une entrée par image distincte
+
+
+# ===================================================================
+# DÉCODAGE
+# ===================================================================
+
+def _looks_like_path(source: str) -> bool:
+    """Chaîne désignant un fichier plutôt qu'un contenu base64 / data URI"""
+    if source.startswith("data:"):
+        return False
+    if source.lower().endswith(MEDIA_SUFFIXES):
+        return True
+    compact = "".join(source.split())
+    if len(compact) % 4 == 0 and _BASE64.fullmatch(compact):
+        return False                                       # "/" fait partie de l'alphabet base64
+    return os.sep in source or "/" in source or "\\" in source
+
+
+def _is_file_source(source: Union[bytes, str, os.PathLike]) -> bool:
+    """Vrai si la source est un chemin; lève FileNotFoundError s'il n'existe pas"""
+    if isinstance(source, bytes):
+        return False
+    if isinstance(source, str) and not os.path.exists(source):
+        if _looks_like_path(source):
+            raise FileNotFoundError(f"Fichier média introuvable: {source}")
+        return False
+    return True
+
+
+def _read_bytes(source: Union[bytes, str, os.PathLike]) -> bytes:
+    if isinstance(source, bytes):
+        return source
+    if not _is_file_source(source):
+        return base64.b64decode(source.split(",", 1)[-1])  # data URI ou base64 brut
+    with open(source, "rb") as f:
+        return f.read()
+
+
+def decode_image(source: Union[bytes, str, os.PathLike]) -> np.ndarray:
+    """Image RGB uint8 depuis octets, base64 ou chemin"""
+    with Image.open(io.BytesIO(_read_bytes(source))) as image:
+        return np.asarray(image.convert("RGB"))
+
+
+def iter_video_frames(source: MediaSource, default_fps: float = 10.0) -> Iterator[Tuple[int, float, np.ndarray]]:
+    """
+    (index, horodatage s, image RGB) d'une vidéo
+
+    Sources: séquence d'images numpy, fichier vidéo (MP4, AVI, MOV, MKV, WebM:
+    extra optionnel opencv-python-headless) ou image multi-trames lisible par
+    Pillow (GIF, APNG, WebP, TIFF).
+    """
+    if isinstance(source, (list, tuple)):
+        for i, frame in enumerate(source):
+            yield i, i / default_fps, np.asarray(frame)
+        return
+
+    is_file = _is_file_source(source)
+    if is_file and not CV2_AVAILABLE and os.fspath(source).lower().endswith(OPENCV_SUFFIXES):
+        raise ImportError(f"Décodage de {os.path.basename(os.fspath(source))} impossible: "
+                          "installer opencv-python-headless (Pillow ne lit que GIF, APNG, WebP et TIFF)")
+
+    if CV2_AVAILABLE and is_file:
+        capture = cv2.VideoCapture(os.fspath(source))
+        if capture.isOpened():
+            fps = capture.get(cv2.CAP_PROP_FPS) or default_fps
+            i = 0
+            try:
+                while True:
+                    ok, frame = capture.read()
+                    if not ok:
+                        break
+                    yield i, i / fps, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                    i += 1
+            finally:
+                capture.release()
+            if i:
+                return
+
+    with Image.open(io.BytesIO(_read_bytes(source))) as image:
+        t = 0.0
+        for i, frame in enumerate(ImageSequence.Iterator(image)):
+            yield i, t, np.asarray(frame.convert("RGB"))
+            t += (frame.info.get("duration") or 1000 / default_fps) / 1000
+
+
+# ===================================================================
+# SCORE DE SCÈNE ET HACHAGE PERCEPTUEL
+# ===================================================================
+
+def thumbnail(frame: np.ndarray, size: Tuple[int, int] = THUMBNAIL_SIZE) -> np.ndarray:
+    """Vignette en niveaux de gris (float32, 0-1)"""
+    image = Image.fromarray(frame).convert("L")
+    image.draft("L", size)
+    return np.asarray(image.resize(size, Image.BILINEAR), dtype=np.float32) / 255.0
+
+
+def dhash(frame: np.ndarray, hash_size: int = HASH_SIZE) -> np.uint64:
+    """Hachage par différence: gradient horizontal d'une vignette (hash_size+1) x hash_size"""
+    gray = np.asarray(Image.fromarray(frame).convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR),
+                      dtype=np.int16)
+    bits = (gray[:, 1:] > gray[:, :-1]).ravel()
+    return np.uint64(int(np.packbits(bits).view(">u8")[0]))
+
+
+def hamming_distances(hashes: np.ndarray, value: np.uint64) -> np.ndarray:
+    """Distances de Hamming entre `value` et chaque empreinte 64 bits"""
+    xor = np.bitwise_xor(hashes, value)
+    return np.unpackbits(xor.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+class SceneSampler:
+    """
+    Échantillonnage adaptatif: une image est candidate si son écart à la
+    dernière image retenue dépasse le bruit récent (moyenne + k écarts-types
+    exponentiels) et le seuil minimal, ou si `max_interval` est écoulé.
+    """
+
+    def __init__(self, config: PipelineConfig):
+        self.config = config
+        self.reference: Optional[np.ndarray] = None
+        self.last_time = -np.inf
+        self.mean = 0.0
+        self.var = 0.0
+        self.alpha = 0.1
+
+    def score(self, thumb: np.ndarray) -> float:
+        if self.reference is None:
+            return 1.0
+        return float(np.abs(thumb - self.reference).mean())
+
+    def offer(self, timestamp: float, thumb: np.ndarray) -> Tuple[bool, float]:
+        score = self.score(thumb)
+        elapsed = timestamp - self.last_time
+        threshold = max(self.config.scene_threshold, self.mean + self.config.scene_sensitivity * np.sqrt(self.var))
+        keep = self.reference is None or elapsed >= self.config.max_interval or \
+            (score >= threshold and elapsed >= self.config.min_interval)
+        if keep:
+            self.reference = thumb
+            self.last_time = timestamp
+        else:
+            # Bruit de fond: statistiques exponentielles des scores non retenus
+            delta = score - self.mean
+            self.mean += self.alpha * delta
+            self.var = (1 - self.alpha) * (self.var + self.alpha * delta * delta)
+        return keep, score
+
+
+def resize_max_side(frame: np.ndarray, max_side: int) -> np.ndarray:
+    height, width = frame.shape[:2]
+    if max(height, width) <= max_side:
+        return frame
+    ratio = max_side / max(height, width)
+    size = (max(1, round(width * ratio)), max(1, round(height * ratio)))
+    return np.asarray(Image.fromarray(frame).resize(size, Image.BILINEAR))
+
+
+# ===================================================================
+# ANALYSEUR LOCAL DÉTERMINISTE
+# ===================================================================
+
+class StubFrameAnalyzer:
+    """
+    Analyseur local déterministe (tests et benchmarks hors ligne)
+
+    Dérive des risques simples des statistiques de pixels; remplaçable par
+    tout appelable (images, métadonnées) -> résultats par image.
+    """
+
+    name = "stub-frame-analyzer"
+
+    def __init__(self):
+        self.calls = 0
+        self.frames_seen = 0
+
+    def __call__(self, frames: List[np.ndarray], metadata: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        self.calls += 1
+        self.frames_seen += len(frames)
+        resultats = []
+        for frame in frames:
+            rgb = frame.astype(np.float32) / 255.0
+            luminosite = float(rgb.mean())
+            rouge = float(((rgb[..., 0] > 0.6) & (rgb[..., 1] < 0.35) & (rgb[..., 2] < 0.35)).mean())
+            gris = rgb.mean(axis=2)
+            contours = float(np.abs(np.diff(gris, axis=1)).mean() + np.abs(np.diff(gris, axis=0)).mean())
+            risques = []
+            if luminosite < 0.25:
+                risques.append({"type": "eclairage_insuffisant", "severity": "medium"})
+            if rouge > 0.15:
+                risques.append({"type": "zone_danger_signalee", "severity": "high"})
+            if contours > 0.2:
+                risques.append({"type": "encombrement", "severity": "medium"})
+            penalite = sum(30 if r["severity"] == "high" else 15 for r in risques)
+            resultats.append({"risks": risques, "safety_score": float(max(0, 100 - penalite)),
+                              "luminosity": round(luminosite, 4)})
+        return resultats
+
+
+# ===================================================================
+# PIPELINE
+# ===================================================================
+
+class FramePipeline:
+    """Décodage -> échantillonnage -> déduplication -> lots -> analyseur, avec cache par contenu"""
+
+    def __init__(self, analyzer: Optional[FrameAnalyzer] = None, config: Optional[PipelineConfig] = None,
+                 cache_size: int = 128):
+        self.analyzer = analyzer or StubFrameAnalyzer()
+        self.config = config or PipelineConfig()
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, MediaResult]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"media": 0, "cache_hits": 0, "frames_decoded": 0, "frames_analyzed": 0}
+
+    def _content_hash(self, kind: str, source: MediaSource) -> str:
+        h = hashlib.sha256(kind.encode())
+        if isinstance(source, (list, tuple)):
+            for frame in source:
+                frame = np.ascontiguousarray(frame)
+                h.update(str(frame.shape).encode())
+                h.update(frame.tobytes())
+        elif _is_file_source(source):
+            with open(source, "rb") as f:                    # lecture par blocs, sans charger la vidéo
+                for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+                    h.update(chunk)
+        else:
+            h.update(_read_bytes(source))
+        analyzer = getattr(self.analyzer, "name", type(self.analyzer).__name__)
+        h.update(repr((sorted(asdict(self.config).items()), analyzer)).encode())
+        return h.hexdigest()
+
+    def _cached(self, key: str) -> Optional[MediaResult]:
+        with self._lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+        if result is None:
+            return None
+        report = MediaReport(**dict(asdict(result.report), cached=True))
+        # Copie: un appelant qui modifie ses résultats n'altère pas l'entrée du cache
+        return MediaResult(report, copy.deepcopy(result.frames))
+
+    def _store(self, key: str, result: MediaResult):
+        stored = MediaResult(result.report, copy.deepcopy(result.frames))
+        with self._lock:
+            self._cache[key] = stored
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            self.stats["media"] += 1
+            self.stats["frames_decoded"] += result.report.frames_decoded
+            self.stats["frames_analyzed"] += result.report.frames_unique
+
+    def process_image(self, source: Union[bytes, str, os.PathLike]) -> MediaResult:
+        key = self._content_hash("image", source)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        debut = time.perf_counter()
+        frame = decode_image(source)
+        report = MediaReport(key, "image", frames_decoded=1, frames_sampled=1, frames_unique=1, batches=1,
+                             decode_seconds=time.perf_counter() - debut)
+        meta = {"index": 0, "timestamp": 0.0, "shape": list(frame.shape)}
+        analyse = self.analyzer([resize_max_side(frame, self.config.max_side)], [meta])[0]
+        report.total_seconds = time.perf_counter() - debut
+        result = MediaResult(report, [dict(meta, **analyse)])
+        self._store(key, result)
+        return result
+
+    def process_video(self, source: MediaSource) -> MediaResult:
+        key = self._content_hash("video", source)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+
+        config = self.config
+        report = MediaReport(key, "video")
+        sampler = SceneSampler(config)
+        hashes = np.zeros(0, dtype=np.uint64)
+        lot_images: List[np.ndarray] = []
+        lot_meta: List[Dict[str, Any]] = []
+        frames: List[Dict[str, Any]] = []
+
+        def vider():
+            if lot_images:
+                analyses = self.analyzer(lot_images, lot_meta)
+                frames.extend(dict(meta, **analyse) for meta, analyse in zip(lot_meta, analyses))
+                report.batches += 1
+                lot_images.clear()
+                lot_meta.clear()
+
+        debut = time.perf_counter()
+        decodage = 0.0
+        t0 = time.perf_counter()
+        for index, timestamp, frame in iter_video_frames(source, config.default_fps):
+            decodage += time.perf_counter() - t0
+            report.frames_decoded += 1
+            keep, score = sampler.offer(timestamp, thumbnail(frame))
+            if keep:
+                report.frames_sampled += 1
+                empreinte = dhash(frame)
+                if len(hashes) == 0 or hamming_distances(hashes, empreinte).min() > config.hash_distance:
+                    hashes = np.append(hashes, empreinte)
+                    report.frames_unique += 1
+                    lot_images.append(resize_max_side(frame, config.max_side))
+                    lot_meta.append({"index": index, "timestamp": round(timestamp, 3),
+                                     "scene_score": round(score, 4), "phash": f"{int(empreinte):016x}"})
+                    if len(lot_images) >= config.batch_size:
+                        vider()
+            t0 = time.perf_counter()
+        vider()
+
+        report.decode_seconds = decodage
+        report.total_seconds = time.perf_counter() - debut
+        result = MediaResult(report, frames)
+        self._store(key, result)
+        return result
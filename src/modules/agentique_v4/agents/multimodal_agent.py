@@ -2,13 +2,24 @@
 Agent Multimodal V4 - Analyse d'images et vidéos d'incidents
 """
 from typing import Dict, Any, List, Optional
+import asyncio
 import base64
 
+from .multimodal.frame_pipeline import FramePipeline, MediaResult, PipelineConfig, StubFrameAnalyzer
+
+CRITICAL_SCORE = 60.0  # score sécurité sous lequel une image est un moment critique
+
 class MultimodalAgent:
     """Agent capable d'analyser images et vidéos pour la sécurité"""
     
-    def __init__(self, model: str = "claude-opus-4-1-20250805"):
+    def __init__(self, model: str = "claude-opus-4-1-20250805", analyzer=None,
+                 config: Optional[PipelineConfig] = None):
         self.model = model
+        # Analyseur enfichable; sans analyseur, l'heuristique locale de pixels sert de repli
+        # et les résultats sont marqués dégradés (le modèle n'est pas appelé)
+        self.stub = analyzer is None
+        self.analyzer_name = "stub" if self.stub else getattr(analyzer, "name", type(analyzer).__name__)
+        self.pipeline = FramePipeline(StubFrameAnalyzer() if self.stub else analyzer, config)
         self.capabilities = {
             "image_analysis": True,
             "video_analysis": True,
@@ -26,19 +37,63 @@ class MultimodalAgent:
         Returns:
             Dict contenant les risques identifiés et recommandations
         """
-        # TODO: Implémenter l'appel à Claude Opus 4.1
+        try:
+            result = await asyncio.to_thread(self.pipeline.process_image, image_data)
+        except Exception as e:
+            return {"status": "error", "error": str(e)}
+        
+        frame = result.frames[0]
         return {
-            "status": "success",
-            "risks_detected": [],
-            "safety_score": 0.0,
-            "recommendations": []
+            **self._provenance(),
+            "risks_detected": frame["risks"],
+            "safety_score": frame["safety_score"],
+            "recommendations": self._recommendations(frame["risks"]),
+            "processing": result.report.to_dict()
         }
     
     async def analyze_video(self, video_path: str) -> Dict[str, Any]:
-        """Analyse une vidéo pour incidents de sécurité"""
-        # TODO: Implémenter l'analyse vidéo
+        """
+        Analyse une vidéo pour incidents de sécurité
+        
+        Seules les images distinctes (changement de scène, hors quasi-doublons)
+        sont transmises à l'analyseur; le bilan de traitement indique le débit
+        et le taux de déduplication.
+        """
+        try:
+            result: MediaResult = await asyncio.to_thread(self.pipeline.process_video, video_path)
+        except Exception as e:
+            return {"status": "error", "error": str(e)}
+        
+        timeline = [
+            {"timestamp": f["timestamp"], "frame_index": f["index"], "risks": f["risks"],
+             "safety_score": f["safety_score"]}
+            for f in result.frames
+        ]
+        return {
+            **self._provenance(),
+            "timeline_events": [e for e in timeline if e["risks"]],
+            "critical_moments": [e for e in timeline if e["safety_score"] < CRITICAL_SCORE],
+            "frames_analyzed": len(timeline),
+            "processing": result.report.to_dict()
+        }
+    
+    def _provenance(self) -> Dict[str, Any]:
+        """Statut et analyseur d'un résultat; la sortie heuristique locale est dégradée"""
+        if not self.stub:
+            return {"status": "success", "analyzer": self.analyzer_name}
         return {
-            "status": "success",
-            "timeline_events": [],
-            "critical_moments": []
+            "status": "degraded",
+            "analyzer": "stub",
+            "warning": f"Aucun analyseur branché ({self.model} non appelé): risques estimés "
+                       "par heuristique de pixels"
+        }
+    
+    @staticmethod
+    def _recommendations(risks: List[Dict[str, Any]]) -> List[str]:
+        """Recommandations associées aux risques détectés"""
+        actions = {
+            "eclairage_insuffisant": "Renforcer l'éclairage de la zone",
+            "zone_danger_signalee": "Vérifier le balisage et restreindre l'accès à la zone",
+            "encombrement": "Dégager les voies de circulation"
         }
+        return [actions[r["type"]] for r in risks if r["type"] in actions]
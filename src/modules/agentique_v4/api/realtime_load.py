@@ -0,0 +1,86 @@
+﻿"""
+Générateur de charge en processus pour le WebSocket temps réel V4
+=================================================================
+Ouvre des milliers de connexions simultanées via le client de test FastAPI
+(un seul processus, une seule boucle asyncio côté serveur), envoie des salves
+d'observations et de mesures capteurs, attend l'acquittement de chaque
+connexion puis rapporte les percentiles de latence mesurés par le service.
+"""
+import random
+import time
+from contextlib import ExitStack
+from typing import Any, Dict, List, Optional
+
+from .realtime_service import RealtimeAnalysisService, get_realtime_service
+
+WS_PATH = "/v4/ws/realtime"
+
+
+def generate_events(rng: random.Random, count: int, sensors_per_channel: int = 8,
+                    observation_ratio: float = 0.3) -> List[Dict[str, Any]]:
+    """Salve mixte d'observations ABC et de mesures capteurs horodatées"""
+    events = []
+    for _ in range(count):
+        if rng.random() < observation_ratio:
+            events.append({"type": "observation", "antecedent": rng.uniform(2, 10),
+                           "comportement": rng.uniform(2, 10), "consequence": rng.uniform(2, 10)})
+        else:
+            channel = rng.choice(["ch4", "co", "o2", "debit_air"])
+            nominal = {"ch4": 0.3, "co": 8.0, "o2": 20.8, "debit_air": 4.0}[channel]
+            events.append({"type": "sensor", "channel": channel, "sensor": rng.randrange(sensors_per_channel),
+                           "value": nominal * rng.uniform(0.5, 2.5), "timestamp": time.time()})
+    return events
+
+
+def run_websocket_load(app, connections: int = 1000, bursts: int = 5, events_per_burst: int = 10,
+                       sites: int = 20, policy: Optional[str] = None, seed: int = 0,
+                       service: Optional[RealtimeAnalysisService] = None) -> Dict[str, Any]:
+    """
+    Charge in-process: `connections` sockets ouverts en même temps, `bursts` salves chacun
+
+    Returns:
+        Débit, connexions simultanées maximales et percentiles de latence (ms)
+    """
+    from fastapi.testclient import TestClient
+
+    service = service or get_realtime_service()
+    service.latencies.clear()
+    rng = random.Random(seed)
+    query = f"&policy={policy}" if policy else ""
+    envoyes = 0
+
+    debut = time.perf_counter()
+    with TestClient(app) as client, ExitStack() as sockets:
+        sessions = [sockets.enter_context(client.websocket_connect(f"{WS_PATH}?site=site_{i % sites}{query}"))
+                    for i in range(connections)]
+        ouverture = time.perf_counter() - debut
+
+        for _ in range(bursts):
+            for session in sessions:
+                events = generate_events(rng, events_per_burst)
+                session.send_json({"events": events})
+                envoyes += len(events)
+
+        # Acquittement: chaque connexion a traité tout ce qu'elle a reçu
+        for session in sessions:
+            session.send_json({"type": "flush"})
+        mises_a_jour = 0
+        for session in sessions:
+            while True:
+                message = session.receive_json()
+                if message["type"] == "flushed":
+                    break
+                mises_a_jour += 1
+        pic = service.peak_connections
+    duree = time.perf_counter() - debut
+
+    return {
+        "connections": connections,
+        "peak_connections": pic,
+        "events_sent": envoyes,
+        "updates_received": mises_a_jour,
+        "connect_seconds": ouverture,
+        "total_seconds": duree,
+        "events_per_second": envoyes / duree if duree else 0.0,
+        "latency": service.latency_percentiles()
+    }
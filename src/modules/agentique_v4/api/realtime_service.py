@@ -0,0 +1,350 @@
+﻿"""
+Service d'analyse temps réel pour le WebSocket V4
+=================================================
+Chaque connexion reçoit un flux continu d'événements terrain (observations ABC,
+mesures capteurs) pour un site. Les événements passent par une file bornée à
+contre-pression explicite, sont regroupés en micro-lots, évalués par le
+scoring A2 et la télémétrie SCIAN-212 existants, puis les résultats
+incrémentaux sont renvoyés au client.
+
+Politiques de contre-pression:
+- drop: file pleine -> l'événement entrant est rejeté (compté)
+- coalesce: une mesure capteur remplace la mesure en attente du même capteur;
+  file pleine -> rejet comme drop
+- block: file pleine -> la lecture du socket est suspendue, ce qui ralentit
+  le producteur (contre-pression TCP)
+"""
+import asyncio
+import itertools
+import math
+import time
+from collections import Counter, OrderedDict, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from ...mines_telemetry import CHANNELS, MineTelemetry
+except ImportError:
+    from modules.mines_telemetry import CHANNELS, MineTelemetry
+
+try:
+    from ....agents.collecte.a2_observations_behaviorx import ModuleBehaviorXObservations, ObservationABC
+except ImportError:
+    from agents.collecte.a2_observations_behaviorx import ModuleBehaviorXObservations, ObservationABC
+
+POLICIES = ("drop", "coalesce", "block")
+DEFAULT_POLICY = "coalesce"
+DEFAULT_QUEUE_SIZE = 256
+MAX_QUEUE_SIZE = 4096         # plafond des tailles demandées par les clients
+MAX_BATCH = 128
+BATCH_WINDOW = 0.005          # secondes d'attente pour compléter un micro-lot
+LATENCY_SAMPLES = 100_000     # latences conservées pour les percentiles
+CONTROL_TYPES = ("flush",)    # messages de contrôle, jamais rejetés
+MAX_FUTURE_SKEW = 5.0         # avance tolérée d'un horodatage client sur la réception (s)
+MAX_SAMPLE_AGE = 300.0        # retard toléré, aligné sur la plus longue fenêtre (s)
+
+
+class EventQueue:
+    """
+    File bornée d'une connexion, avec politique de contre-pression
+
+    Chaque événement est horodaté côté serveur à l'entrée (perf_counter): la
+    latence mesurée va de la mise en file au traitement, dans ce processus.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_QUEUE_SIZE, policy: str = DEFAULT_POLICY):
+        if policy not in POLICIES:
+            raise ValueError(f"Politique de contre-pression inconnue: {policy}")
+        if maxsize < 1:
+            raise ValueError(f"Taille de file invalide: {maxsize} (minimum 1)")
+        self.maxsize = maxsize
+        self.policy = policy
+        self._pending: "OrderedDict[Any, Tuple[float, Dict]]" = OrderedDict()
+        self._sequence = itertools.count()
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self.closed = False
+        self.accepted = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.blocked_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def _key(self, event: Dict):
+        if self.policy == "coalesce" and event.get("type") == "sensor":
+            return ("sensor", event.get("channel"), event.get("sensor"))
+        return next(self._sequence)
+
+    async def put(self, event: Dict) -> bool:
+        """Ajoute un événement; False s'il a été rejeté"""
+        if self.closed:
+            return False
+        control = event.get("type") in CONTROL_TYPES
+        key = self._key(event)
+        if key in self._pending:
+            # Dernière mesure du capteur; l'horodatage d'entrée le plus ancien est conservé pour la latence
+            self._pending[key] = (self._pending[key][0], event)
+            self.coalesced += 1
+            return True
+        while not control and len(self._pending) >= self.maxsize:
+            if self.policy != "block":
+                self.dropped += 1
+                return False
+            self._not_full.clear()
+            debut = time.perf_counter()
+            await self._not_full.wait()
+            self.blocked_seconds += time.perf_counter() - debut
+            if self.closed:
+                return False
+        self._pending[key] = (time.perf_counter(), event)
+        self.accepted += 1
+        self._not_empty.set()
+        return True
+
+    async def get_batch(self, max_batch: int = MAX_BATCH, window: float = BATCH_WINDOW) -> List[Dict]:
+        """Micro-lot: attend un premier événement puis au plus `window` pour compléter le lot"""
+        return [event for _, event in await self.get_timed_batch(max_batch, window)]
+
+    async def get_timed_batch(self, max_batch: int = MAX_BATCH,
+                              window: float = BATCH_WINDOW) -> List[Tuple[float, Dict]]:
+        """Micro-lot de couples (horodatage d'entrée en file, événement)"""
+        while not self._pending:
+            if self.closed:
+                return []
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        if window > 0 and len(self._pending) < max_batch and not self.closed:
+            await asyncio.sleep(window)
+        batch = [self._pending.popitem(last=False)[1] for _ in range(min(max_batch, len(self._pending)))]
+        self._not_full.set()
+        return batch
+
+    def close(self):
+        self.closed = True
+        self._not_empty.set()
+        self._not_full.set()
+
+
+class SiteAnalysis:
+    """État d'analyse incrémental d'un site, partagé par ses connexions"""
+
+    def __init__(self, site_id: str, scorer: ModuleBehaviorXObservations, sensors: Optional[Dict[str, int]] = None):
+        self.site_id = site_id
+        self.scorer = scorer
+        self.telemetry = MineTelemetry(site_id, sensors=sensors)
+        self.observations = 0
+        self.score_sum = 0.0
+        self.criticite = Counter()
+        self.rejected = 0
+
+    def process(self, events: List[Dict], received_at: Optional[List[float]] = None) -> Dict[str, Any]:
+        """
+        Évalue un micro-lot et renvoie les résultats incrémentaux
+
+        `received_at` donne l'heure serveur (epoch) de réception de chaque
+        événement: horodatage par défaut des mesures, et référence pour
+        rejeter les horodatages client trop éloignés de l'horloge serveur.
+        """
+        if received_at is None:
+            received_at = [time.time()] * len(events)
+        scores = []
+        mesures: Dict[str, List[Tuple[float, int, float]]] = {}
+        for event, recu in zip(events, received_at):
+            kind = event.get("type")
+            if kind == "observation":
+                try:
+                    a, b, c = (float(event.get(k, 5)) for k in ("antecedent", "comportement", "consequence"))
+                except (TypeError, ValueError):
+                    self.rejected += 1
+                    continue
+                observation = ObservationABC(antecedent={"score": a}, comportement={"score": b},
+                                             consequence={"score": c})
+                score = self.scorer._calculer_score_abc_global(observation)
+                criticite = self.scorer._determiner_criticite(score)
+                scores.append(score)
+                self.criticite[criticite] += 1
+            elif kind == "sensor" and event.get("channel") in self.telemetry.channels:
+                mesure = self._sensor_sample(event, recu)
+                if mesure is None:
+                    self.rejected += 1
+                    continue
+                mesures.setdefault(event["channel"], []).append(mesure)
+            elif kind not in CONTROL_TYPES:
+                self.rejected += 1
+
+        self.observations += len(scores)
+        self.score_sum += sum(scores)
+
+        anomalies = []
+        for channel, lot in mesures.items():
+            canal = self.telemetry.channels[channel]
+            avant = canal.events_total
+            timestamps = np.array([t for t, _, _ in lot], dtype=np.float64)
+            sensors = np.array([s for _, s, _ in lot], dtype=np.int64)
+            values = np.array([v for _, _, v in lot], dtype=np.float64)
+            order = np.argsort(timestamps, kind="stable")
+            self.telemetry.ingest(channel, timestamps[order], sensors[order], values[order])
+            nouvelles = min(canal.events_total - avant, len(canal.events))
+            if nouvelles:
+                anomalies.extend(list(canal.events)[-nouvelles:])
+
+        alarmes = {name: int((c.level > 0).sum()) for name, c in self.telemetry.channels.items()
+                   if CHANNELS[name].alarm is not None}
+        return {
+            "observations": {
+                "batch": len(scores),
+                "batch_mean_score": sum(scores) / len(scores) if scores else None,
+                "total": self.observations,
+                "mean_score": self.score_sum / self.observations if self.observations else None,
+                "criticite": dict(self.criticite)
+            },
+            "sensors": {
+                "batch": sum(len(lot) for lot in mesures.values()),
+                "total": self.telemetry.samples,
+                "active_alarms": alarmes
+            },
+            "anomalies": anomalies
+        }
+
+
+    @staticmethod
+    def _sensor_sample(event: Dict, received_at: float) -> Optional[Tuple[float, int, float]]:
+        """(horodatage, capteur, valeur) validés, ou None si la mesure doit être rejetée"""
+        try:
+            timestamp = float(event.get("timestamp", received_at))
+            sensor = int(event.get("sensor", 0))
+            value = float(event["value"])
+        except (KeyError, TypeError, ValueError, OverflowError):
+            return None
+        if not (math.isfinite(timestamp) and math.isfinite(value)):
+            return None
+        # Un horodatage hors tolérance ferait avancer (ou viserait hors de) la fenêtre partagée du site
+        if not received_at - MAX_SAMPLE_AGE <= timestamp <= received_at + MAX_FUTURE_SKEW:
+            return None
+        return timestamp, sensor, value
+
+
+class RealtimeAnalysisService:
+    """Service asyncio: une file bornée et un processeur de micro-lots par connexion"""
+
+    def __init__(self, queue_size: int = DEFAULT_QUEUE_SIZE, policy: str = DEFAULT_POLICY,
+                 max_batch: int = MAX_BATCH, batch_window: float = BATCH_WINDOW,
+                 sensors: Optional[Dict[str, int]] = None, latency_samples: int = LATENCY_SAMPLES):
+        if policy not in POLICIES:
+            raise ValueError(f"Politique de contre-pression inconnue: {policy}")
+        self.queue_size = queue_size
+        self.policy = policy
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.sensors = sensors
+        self.scorer = ModuleBehaviorXObservations()
+        self.sites: Dict[str, SiteAnalysis] = {}
+        self.latencies: deque = deque(maxlen=latency_samples)
+        self.active_connections = 0
+        self.peak_connections = 0
+        self.stats = Counter()
+
+    def site(self, site_id: str) -> SiteAnalysis:
+        if site_id not in self.sites:
+            self.sites[site_id] = SiteAnalysis(site_id, self.scorer, self.sensors)
+        return self.sites[site_id]
+
+    async def handle(self, websocket, site_id: str = "default", policy: Optional[str] = None,
+                     queue_size: Optional[int] = None):
+        """
+        Sert une connexion acceptée (tout objet exposant receive_json/send_json)
+
+        Messages client: un événement, une liste d'événements ou {"events": [...]}.
+        Un événement {"type": "flush"} est acquitté par {"type": "flushed"} une fois
+        tous les événements précédents traités.
+        """
+        queue = EventQueue(min(self.queue_size if queue_size is None else queue_size, MAX_QUEUE_SIZE),
+                           policy or self.policy)
+        self.active_connections += 1
+        self.peak_connections = max(self.peak_connections, self.active_connections)
+        self.stats["connections"] += 1
+        processor = asyncio.create_task(self._process(websocket, site_id, queue))
+        try:
+            while not queue.closed:
+                message = await websocket.receive_json()
+                events = message if isinstance(message, list) else message.get("events", [message])
+                for event in events:
+                    self.stats["events_received"] += 1
+                    await queue.put(event)
+        except Exception:
+            # Déconnexion client ou message invalide: fin de session
+            pass
+        finally:
+            queue.close()
+            await processor
+            self.active_connections -= 1
+            self.stats["events_dropped"] += queue.dropped
+            self.stats["events_coalesced"] += queue.coalesced
+
+    async def _process(self, websocket, site_id: str, queue: EventQueue):
+        analyse = self.site(site_id)
+        sequence = 0
+        try:
+            while True:
+                lot = await queue.get_timed_batch(self.max_batch, self.batch_window)
+                if not lot:
+                    return
+                batch = [event for _, event in lot]
+                # Heure de réception (epoch) reconstituée depuis l'horodatage d'entrée en file
+                decalage = time.time() - time.perf_counter()
+                result = analyse.process(batch, [enqueued_at + decalage for enqueued_at, _ in lot])
+                now = time.perf_counter()
+                self.latencies.extend(now - enqueued_at for enqueued_at, _ in lot)
+                self.stats["batches"] += 1
+                self.stats["events_processed"] += len(batch)
+                sequence += 1
+                await websocket.send_json({
+                    "type": "update",
+                    "site": site_id,
+                    "seq": sequence,
+                    "processed": len(batch),
+                    "queued": len(queue),
+                    "dropped": queue.dropped,
+                    "coalesced": queue.coalesced,
+                    **result
+                })
+                if any(e.get("type") == "flush" for e in batch):
+                    await websocket.send_json({"type": "flushed", "site": site_id, "seq": sequence})
+        except Exception:
+            # Client parti pendant l'envoi: débloque un producteur en attente
+            queue.close()
+
+    def latency_percentiles(self) -> Dict[str, Any]:
+        """Percentiles de latence mise en file -> traitement (ms, horloge serveur)"""
+        if not self.latencies:
+            return {"samples": 0}
+        valeurs = np.fromiter(self.latencies, dtype=np.float64, count=len(self.latencies)) * 1000
+        p50, p95, p99 = np.percentile(valeurs, [50, 95, 99])
+        return {"samples": len(valeurs), "p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99),
+                "max_ms": float(valeurs.max())}
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "active_connections": self.active_connections,
+            "peak_connections": self.peak_connections,
+            "sites": len(self.sites),
+            "policy": self.policy,
+            "queue_size": self.queue_size,
+            "stats": dict(self.stats),
+            "latency": self.latency_percentiles()
+        }
+
+
+_service: Optional[RealtimeAnalysisService] = None
+
+
+def get_realtime_service() -> RealtimeAnalysisService:
+    """Service temps réel partagé par le processus"""
+    global _service
+    if _service is None:
+        _service = RealtimeAnalysisService()
+    return _service
@@ -2,9 +2,11 @@
 API Endpoints pour Safety Agentique 4
 """
 from fastapi import APIRouter, HTTPException, WebSocket
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
 
+from .realtime_service import POLICIES, get_realtime_service
+
 router = APIRouter(prefix="/v4", tags=["Safety Agentique 4"])
 
 class AnalysisRequest(BaseModel):
@@ -45,17 +47,26 @@ async def analyze_v4(request: AnalysisRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/realtime/stats")
+async def realtime_stats():
+    """Connexions actives, débits et percentiles de latence du service temps réel"""
+    return get_realtime_service().snapshot()
+
 @router.websocket("/ws/realtime")
-async def websocket_realtime(websocket: WebSocket):
-    """WebSocket pour analyse temps réel"""
+async def websocket_realtime(websocket: WebSocket, site: str = "default",
+                             policy: Optional[str] = None, queue_size: Optional[int] = None):
+    """
+    WebSocket pour analyse temps réel
+    
+    Événements: {"type": "observation", "antecedent", "comportement", "consequence"}
+    ou {"type": "sensor", "channel", "sensor", "value", "timestamp"}; chaque
+    micro-lot traité renvoie un message {"type": "update", ...}. Le timestamp
+    (epoch, heure de réception par défaut) doit rester proche de l'horloge
+    serveur; les mesures non finies ou hors tolérance sont rejetées.
+    Paramètres: site, policy (drop | coalesce | block), queue_size (>= 1).
+    """
+    if (policy is not None and policy not in POLICIES) or (queue_size is not None and queue_size < 1):
+        await websocket.close(code=1008)
+        return
     await websocket.accept()
-    try:
-        while True:
-            data = await websocket.receive_json()
-            # TODO: Traitement temps réel
-            await websocket.send_json({
-                "type": "update",
-                "data": "Processing..."
-            })
-    except Exception as e:
-        await websocket.close()
+    await get_realtime_service().handle(websocket, site, policy, queue_size)
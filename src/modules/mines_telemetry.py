@@ -0,0 +1,436 @@
+"""
+Télémétrie Mines Souterraines - SafetyGraph SCIAN-212
+=====================================================
+Ingestion de flux capteurs à haut débit (gaz, ventilation, position) depuis un
+simulateur local ou des fichiers de rejeu, dans des tampons circulaires à
+mémoire fixe. Agrégats par fenêtre glissante et alarmes de seuil maintenus de
+façon incrémentale: la lecture d'un instantané ne relit jamais les échantillons
+bruts. Objectif: ≥100K échantillons/s par processus.
+"""
+
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# ===================================================================
+# CANAUX CAPTEURS
+# ===================================================================
+
+@dataclass(frozen=True)
+class ChannelSpec:
+    """Canal capteur et seuils d'alarme (niveau 1 = alarme, niveau 2 = critique)"""
+    name: str
+    family: str                       # gaz | ventilation | position
+    unit: str
+    alarm: Optional[float] = None
+    critical: Optional[float] = None
+    direction: str = "high"           # high: alarme au-dessus du seuil, low: en dessous
+    nominal: float = 0.0              # Valeur nominale pour le simulateur
+    noise: float = 0.0
+
+
+CHANNELS: Dict[str, ChannelSpec] = {
+    "ch4": ChannelSpec("ch4", "gaz", "% vol", alarm=1.0, critical=1.5, nominal=0.25, noise=0.08),
+    "co": ChannelSpec("co", "gaz", "ppm", alarm=25.0, critical=35.0, nominal=6.0, noise=2.0),
+    "o2": ChannelSpec("o2", "gaz", "% vol", alarm=19.5, critical=18.0, direction="low", nominal=20.8, noise=0.1),
+    "debit_air": ChannelSpec("debit_air", "ventilation", "m³/min", alarm=3.0, critical=2.0, direction="low",
+                             nominal=4.2, noise=0.3),
+    "position": ChannelSpec("position", "position", "m", nominal=850.0, noise=40.0),
+}
+GAS_CHANNELS = tuple(name for name, spec in CHANNELS.items() if spec.family == "gaz")
+
+DEFAULT_WINDOWS = {"1min": 60.0, "5min": 300.0}
+DEFAULT_RESOLUTION = 1.0          # secondes par case d'agrégation
+DEFAULT_RING_CAPACITY = 65_536    # échantillons bruts conservés par canal
+MAX_ALARM_EVENTS = 1000
+
+
+# ===================================================================
+# TAMPONS À MÉMOIRE FIXE
+# ===================================================================
+
+class SampleRing:
+    """Tampon circulaire des derniers échantillons bruts d'un canal"""
+
+    def __init__(self, capacity: int = DEFAULT_RING_CAPACITY):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.sensors = np.zeros(capacity, dtype=np.int32)
+        self.values = np.zeros(capacity, dtype=np.float32)
+        self.written = 0
+
+    def extend(self, timestamps: np.ndarray, sensors: np.ndarray, values: np.ndarray):
+        n = len(timestamps)
+        if n >= self.capacity:
+            timestamps, sensors, values = timestamps[-self.capacity:], sensors[-self.capacity:], values[-self.capacity:]
+            self.written += n - self.capacity
+            n = self.capacity
+        start = self.written % self.capacity
+        first = min(n, self.capacity - start)
+        for target, source in ((self.timestamps, timestamps), (self.sensors, sensors), (self.values, values)):
+            target[start:start + first] = source[:first]
+            target[:n - first] = source[first:]
+        self.written += n
+
+    def __len__(self) -> int:
+        return min(self.written, self.capacity)
+
+    def latest(self, n: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Derniers échantillons, du plus ancien au plus récent"""
+        n = len(self) if n is None else min(n, len(self))
+        idx = (np.arange(self.written - n, self.written) % self.capacity)
+        return self.timestamps[idx], self.sensors[idx], self.values[idx]
+
+
+class WindowedAggregates:
+    """
+    Somme, nombre, min et max par capteur dans des cases temporelles circulaires
+
+    Chaque lot est ventilé dans sa case (bincount); les cases sorties de la plus
+    longue fenêtre sont réinitialisées à l'avancée du temps. Une fenêtre se lit
+    en réduisant ses cases, indépendamment du nombre d'échantillons reçus.
+    """
+
+    def __init__(self, n_sensors: int, horizon: float, resolution: float = DEFAULT_RESOLUTION):
+        self.n_sensors = n_sensors
+        self.resolution = resolution
+        self.n_buckets = int(np.ceil(horizon / resolution)) + 1
+        shape = (self.n_buckets, n_sensors)
+        self.sums = np.zeros(shape)
+        self.counts = np.zeros(shape, dtype=np.int64)
+        self.mins = np.full(shape, np.inf)
+        self.maxs = np.full(shape, -np.inf)
+        self.head: Optional[int] = None  # Case absolue la plus récente
+        self.dropped = 0
+
+    def _clear(self, slots):
+        self.sums[slots] = 0.0
+        self.counts[slots] = 0
+        self.mins[slots] = np.inf
+        self.maxs[slots] = -np.inf
+
+    def add(self, timestamps: np.ndarray, sensors: np.ndarray, values: np.ndarray):
+        buckets = np.floor(timestamps / self.resolution).astype(np.int64)
+        newest = int(buckets.max())
+        if self.head is None:
+            self.head = newest
+        elif newest > self.head:
+            if newest - self.head >= self.n_buckets:
+                self._clear(slice(None))
+            else:
+                self._clear(np.arange(self.head + 1, newest + 1) % self.n_buckets)
+            self.head = newest
+
+        recent = buckets > self.head - self.n_buckets
+        if not recent.all():
+            self.dropped += int((~recent).sum())
+            buckets, sensors, values = buckets[recent], sensors[recent], values[recent]
+
+        flat = (buckets % self.n_buckets) * self.n_sensors + sensors
+        size = self.n_buckets * self.n_sensors
+        self.sums += np.bincount(flat, weights=values, minlength=size).reshape(self.sums.shape)
+        self.counts += np.bincount(flat, minlength=size).reshape(self.counts.shape)
+        np.minimum.at(self.mins.reshape(-1), flat, values)
+        np.maximum.at(self.maxs.reshape(-1), flat, values)
+
+    def window(self, seconds: float) -> Dict[str, np.ndarray]:
+        """Agrégats par capteur sur les `seconds` dernières secondes (cases entières)"""
+        if self.head is None:
+            vide = np.zeros(self.n_sensors)
+            return {"count": vide.astype(np.int64), "mean": np.full(self.n_sensors, np.nan),
+                    "min": np.full(self.n_sensors, np.nan), "max": np.full(self.n_sensors, np.nan), "sum": vide}
+        k = min(self.n_buckets, max(1, int(np.ceil(seconds / self.resolution))))
+        slots = np.arange(self.head - k + 1, self.head + 1) % self.n_buckets
+        counts = self.counts[slots].sum(axis=0)
+        sums = self.sums[slots].sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+        mins = self.mins[slots].min(axis=0)
+        maxs = self.maxs[slots].max(axis=0)
+        return {"count": counts, "sum": sums, "mean": mean,
+                "min": np.where(counts > 0, mins, np.nan), "max": np.where(counts > 0, maxs, np.nan)}
+
+
+# ===================================================================
+# CANAL: AGRÉGATS + ALARMES INCRÉMENTALES
+# ===================================================================
+
+class ChannelTelemetry:
+    """Tampon brut, agrégats fenêtrés et état d'alarme d'un canal"""
+
+    def __init__(self, spec: ChannelSpec, n_sensors: int, windows: Dict[str, float],
+                 resolution: float = DEFAULT_RESOLUTION, ring_capacity: int = DEFAULT_RING_CAPACITY):
+        self.spec = spec
+        self.n_sensors = n_sensors
+        self.windows = dict(windows)
+        self.ring = SampleRing(ring_capacity)
+        self.aggregates = WindowedAggregates(n_sensors, max(self.windows.values()), resolution)
+        self.samples = 0
+        self.rejected = 0
+        self.last_seen = np.full(n_sensors, -np.inf)
+        self.last_value = np.full(n_sensors, np.nan)
+        self.level = np.zeros(n_sensors, dtype=np.int8)
+        self.raised_at = np.full(n_sensors, np.nan)
+        self.alarms_raised = 0
+        self.cleared = 0
+        self.clear_seconds = 0.0
+        self.events_total = 0
+        self.events: deque = deque(maxlen=MAX_ALARM_EVENTS)
+
+    def levels(self, values: np.ndarray) -> np.ndarray:
+        spec = self.spec
+        if spec.alarm is None:
+            return np.zeros(len(values), dtype=np.int8)
+        if spec.direction == "low":
+            return (values <= spec.alarm).astype(np.int8) + (values <= spec.critical).astype(np.int8)
+        return (values >= spec.alarm).astype(np.int8) + (values >= spec.critical).astype(np.int8)
+
+    def ingest(self, timestamps: np.ndarray, sensors: np.ndarray, values: np.ndarray):
+        """Lot trié par horodatage"""
+        valid = (sensors >= 0) & (sensors < self.n_sensors)
+        if not valid.all():
+            self.rejected += int((~valid).sum())
+            timestamps, sensors, values = timestamps[valid], sensors[valid], values[valid]
+        if len(timestamps) == 0:
+            return
+        self.ring.extend(timestamps, sensors, values)
+        self.aggregates.add(timestamps, sensors, values)
+        self.samples += len(timestamps)
+
+        # Dernier échantillon par capteur
+        order = np.argsort(sensors, kind="stable")
+        s = sensors[order]
+        last = np.flatnonzero(np.r_[s[1:] != s[:-1], True])
+        self.last_seen[s[last]] = timestamps[order[last]]
+        self.last_value[s[last]] = values[order[last]]
+
+        if self.spec.alarm is not None:
+            self._update_alarms(order, s, last, timestamps, values)
+
+    def _update_alarms(self, order, s, last, timestamps, values):
+        """Transitions d'alarme par capteur, vectorisées sur le lot"""
+        lv = self.levels(values[order])
+        ts = timestamps[order]
+        starts = np.r_[True, s[1:] != s[:-1]]
+        prev = np.empty_like(lv)
+        prev[1:] = lv[:-1]
+        prev[starts] = self.level[s[starts]]
+
+        rises = lv > prev
+        if rises.any():
+            self.alarms_raised += int(((prev == 0) & rises).sum())
+            self.events_total += int(rises.sum())
+            for i in np.flatnonzero(rises)[-MAX_ALARM_EVENTS:]:
+                self.events.append({"timestamp": float(ts[i]), "channel": self.spec.name, "sensor": int(s[i]),
+                                    "level": int(lv[i]), "value": float(values[order[i]])})
+
+        # Durée de retour à la normale: début = dernière montée depuis 0 dans le segment, sinon état antérieur
+        onset = (prev == 0) & (lv > 0)
+        clears = (prev > 0) & (lv == 0)
+        if clears.any():
+            positions = np.arange(len(lv))
+            last_onset = np.maximum.accumulate(np.where(onset, positions, -1))
+            segment_start = np.maximum.accumulate(np.where(starts, positions, 0))
+            idx = np.flatnonzero(clears)
+            from_batch = last_onset[idx] >= segment_start[idx]
+            began = np.where(from_batch, ts[np.maximum(last_onset[idx], 0)], self.raised_at[s[idx]])
+            valid = ~np.isnan(began)
+            self.cleared += int(valid.sum())
+            self.clear_seconds += float((ts[idx] - began)[valid].sum())
+
+        # État final par capteur
+        final = lv[last]
+        sensors_last = s[last]
+        still_onset = (final > 0)
+        positions = np.arange(len(lv))
+        last_onset = np.maximum.accumulate(np.where(onset, positions, -1))[last]
+        segment_start = np.flatnonzero(starts)
+        recent_onset = still_onset & (last_onset >= segment_start)
+        self.raised_at[sensors_last[recent_onset]] = ts[last_onset[recent_onset]]
+        self.raised_at[sensors_last[final == 0]] = np.nan
+        self.level[sensors_last] = final
+
+    def summary(self) -> Dict:
+        windows = {}
+        for label, seconds in self.windows.items():
+            agg = self.aggregates.window(seconds)
+            reporting = agg["count"] > 0
+            windows[label] = {
+                "samples": int(agg["count"].sum()),
+                "mean": float(agg["sum"].sum() / agg["count"].sum()) if reporting.any() else None,
+                "min": float(np.nanmin(agg["min"])) if reporting.any() else None,
+                "max": float(np.nanmax(agg["max"])) if reporting.any() else None,
+                "sensors_reporting": int(reporting.sum()),
+                "coverage": float(reporting.mean() * 100),
+            }
+        return {
+            "channel": self.spec.name,
+            "unit": self.spec.unit,
+            "samples": self.samples,
+            "sensors": self.n_sensors,
+            "windows": windows,
+            "active_alarms": int((self.level > 0).sum()),
+            "critical_alarms": int((self.level > 1).sum()),
+            "alarms_raised": self.alarms_raised,
+            "mean_clear_seconds": self.clear_seconds / self.cleared if self.cleared else None,
+        }
+
+
+# ===================================================================
+# TÉLÉMÉTRIE D'UN SITE MINIER
+# ===================================================================
+
+class MineTelemetry:
+    """Télémétrie temps réel d'un site SCIAN-212"""
+
+    def __init__(self, mine_id: str, sensors: Optional[Dict[str, int]] = None,
+                 windows: Optional[Dict[str, float]] = None, resolution: float = DEFAULT_RESOLUTION,
+                 ring_capacity: int = DEFAULT_RING_CAPACITY):
+        self.mine_id = mine_id
+        self.sensors = dict(sensors or {"ch4": 24, "co": 24, "o2": 24, "debit_air": 12, "position": 160})
+        self.windows = dict(windows or DEFAULT_WINDOWS)
+        self.channels = {name: ChannelTelemetry(CHANNELS[name], n, self.windows, resolution, ring_capacity)
+                         for name, n in self.sensors.items()}
+        self.now = float("-inf")
+        self._lock = threading.Lock()
+
+    @property
+    def samples(self) -> int:
+        return sum(c.samples for c in self.channels.values())
+
+    def ingest(self, channel: str, timestamps, sensors, values):
+        """Ingère un lot d'échantillons d'un canal (horodatages en secondes, croissants)"""
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if len(timestamps) == 0:
+            return
+        sensors = np.asarray(sensors, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        with self._lock:
+            self.channels[channel].ingest(timestamps, sensors, values)
+            self.now = max(self.now, float(timestamps[-1]))
+
+    def ingest_batches(self, batches: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]]):
+        for channel, (timestamps, sensors, values) in batches.items():
+            self.ingest(channel, timestamps, sensors, values)
+
+    def alarm_events(self, limit: int = 20) -> List[Dict]:
+        events = [e for c in self.channels.values() for e in c.events]
+        return sorted(events, key=lambda e: e["timestamp"])[-limit:]
+
+    def snapshot(self, window: str = "1min") -> Dict:
+        """Indicateurs courants, lus uniquement depuis les agrégats incrémentaux"""
+        with self._lock:
+            channels = {name: c.summary() for name, c in self.channels.items()}
+            events = self.alarm_events()
+
+        gas = [channels[name]["windows"][window] for name in GAS_CHANNELS if name in channels]
+        gas_sensors = sum(channels[name]["sensors"] for name in GAS_CHANNELS if name in channels)
+        gas_reporting = sum(w["sensors_reporting"] for w in gas)
+        clears = [(c.cleared, c.clear_seconds) for c in self.channels.values() if c.cleared]
+        mean_clear = sum(s for _, s in clears) / sum(n for n, _ in clears) if clears else None
+        ventilation = channels.get("debit_air", {}).get("windows", {}).get(window, {})
+        position = channels.get("position", {}).get("windows", {}).get(window, {})
+
+        return {
+            "mine_id": self.mine_id,
+            "as_of": self.now,
+            "window": window,
+            "samples": sum(c["samples"] for c in channels.values()),
+            "gas_detection_coverage": round(gas_reporting / gas_sensors * 100, 1) if gas_sensors else 0.0,
+            "emergency_response_time": round(mean_clear / 60, 1) if mean_clear is not None else None,
+            "ventilation_flow": ventilation.get("mean"),
+            "ventilation_min": ventilation.get("min"),
+            "workers_tracked": position.get("sensors_reporting", 0),
+            "max_depth": position.get("max"),
+            "active_alarms": sum(c["active_alarms"] for c in channels.values()),
+            "critical_alarms": sum(c["critical_alarms"] for c in channels.values()),
+            "channels": channels,
+            "recent_alarms": events,
+        }
+
+
+# ===================================================================
+# SOURCES: SIMULATEUR LOCAL ET FICHIERS DE REJEU
+# ===================================================================
+
+class MineSensorSimulator:
+    """Simulateur local de capteurs (bruit gaussien + épisodes gazeux/ventilation)"""
+
+    def __init__(self, sensors: Dict[str, int], rate_hz: float = 10.0, seed: int = 0,
+                 incident_rate: float = 0.002, start: float = 0.0):
+        self.sensors = dict(sensors)
+        self.rate_hz = rate_hz
+        self.rng = np.random.default_rng(seed)
+        self.incident_rate = incident_rate
+        self.clock = start
+
+    def batch(self, seconds: float = 1.0) -> Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Échantillons de tous les capteurs sur `seconds`, triés par horodatage"""
+        ticks = max(1, int(round(seconds * self.rate_hz)))
+        times = self.clock + np.arange(1, ticks + 1) / self.rate_hz
+        self.clock = float(times[-1])
+        batches = {}
+        for channel, n in self.sensors.items():
+            spec = CHANNELS[channel]
+            timestamps = np.repeat(times, n)
+            sensors = np.tile(np.arange(n), ticks)
+            values = spec.nominal + self.rng.normal(0.0, spec.noise, ticks * n)
+            if spec.alarm is not None and self.incident_rate:
+                # Épisodes: un capteur dépasse le seuil critique pendant le lot
+                touched = self.rng.random(n) < self.incident_rate * seconds
+                if touched.any():
+                    excursion = (spec.critical - spec.nominal) * 1.2
+                    values += np.tile(touched, ticks) * excursion
+            batches[channel] = (timestamps, sensors, values)
+        return batches
+
+    def stream(self, seconds: float, batch_seconds: float = 1.0) -> Iterator[Dict]:
+        for _ in range(int(np.ceil(seconds / batch_seconds))):
+            yield self.batch(batch_seconds)
+
+
+def write_replay(path, batches: Iterator[Dict]):
+    """Enregistre des lots au format de rejeu CSV (timestamp, channel, sensor, value)"""
+    import pandas as pd
+    header = True
+    for lot in batches:
+        frames = [pd.DataFrame({"timestamp": t, "channel": channel, "sensor": s, "value": v})
+                  for channel, (t, s, v) in lot.items()]
+        pd.concat(frames).sort_values("timestamp", kind="stable").to_csv(path, mode="w" if header else "a",
+                                                                        header=header, index=False)
+        header = False
+
+
+def replay_file(path, chunksize: int = 100_000) -> Iterator[Dict]:
+    """Relit un fichier de rejeu CSV par blocs, en lots par canal"""
+    import pandas as pd
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        yield {channel: (group["timestamp"].to_numpy(np.float64), group["sensor"].to_numpy(np.int64),
+                         group["value"].to_numpy(np.float64))
+               for channel, group in chunk.groupby("channel", sort=False)}
+
+
+# ===================================================================
+# REGISTRE DES SITES
+# ===================================================================
+
+_sites: Dict[str, MineTelemetry] = {}
+_sites_lock = threading.Lock()
+
+
+def get_mine_telemetry(mine_id: str, create: bool = True, **kwargs) -> Optional[MineTelemetry]:
+    """Télémétrie partagée du site `mine_id` (créée au premier appel ou si son parc de capteurs change)"""
+    with _sites_lock:
+        site = _sites.get(mine_id)
+        reconfigured = site is not None and "sensors" in kwargs and kwargs["sensors"] != site.sensors
+        if (site is None and create) or reconfigured:
+            _sites[mine_id] = MineTelemetry(mine_id, **kwargs)
+        return _sites.get(mine_id)
+
+
+def list_mine_telemetry() -> List[MineTelemetry]:
+    with _sites_lock:
+        return list(_sites.values())
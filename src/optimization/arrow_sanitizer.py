@@ -0,0 +1,229 @@
+"""
+SafetyGraph - Sanitizer Arrow pour DataFrames Streamlit
+=======================================================
+Rend un DataFrame sérialisable par PyArrow avant envoi au navigateur.
+Le plan de conversion (colonne -> action) est inféré une fois par « forme »
+de DataFrame (noms de colonnes + dtypes), mis en cache, puis appliqué par
+casts vectorisés colonne par colonne, sans copie quand rien ne change.
+Les très gros DataFrames peuvent être sous-échantillonnés ou paginés avant
+conversion: seules les lignes affichées sont converties.
+"""
+
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import infer_dtype, is_object_dtype, is_string_dtype
+
+# Types inférés déjà sérialisables tels quels par Arrow
+ARROW_NATIVE_KINDS = {'empty', 'boolean', 'datetime', 'datetime64', 'date', 'bytes'}
+NUMERIC_KINDS = {'integer', 'floating', 'mixed-integer-float', 'decimal'}
+
+SAMPLE_SIZE = 10
+PLAN_CACHE_SIZE = 256
+DISPLAY_MAX_ROWS = 50_000
+
+
+@dataclass(frozen=True)
+class ConversionPlan:
+    """Actions par colonne à convertir (les colonnes absentes sont conservées)"""
+    actions: Tuple[Tuple[str, str], ...]  # (colonne, 'numeric' | 'string')
+
+    @property
+    def is_noop(self) -> bool:
+        return not self.actions
+
+
+def _frame_shape(df: pd.DataFrame) -> Tuple:
+    return tuple(zip(map(str, df.columns), map(str, df.dtypes)))
+
+
+def _sample(column: pd.Series) -> pd.Series:
+    return column.dropna().head(SAMPLE_SIZE) if column.hasnans else column.head(SAMPLE_SIZE)
+
+
+def _looks_numeric(sample: pd.Series) -> bool:
+    """Même règle que l'ancien correctif: au moins une valeur convertible et aucun pourcentage"""
+    if len(sample) == 0:
+        return False
+    if sample.astype(str).str.contains('%', regex=False).any():
+        return False
+    return bool(pd.to_numeric(sample, errors='coerce').notna().any())
+
+
+def _infer_action(column: pd.Series) -> Optional[str]:
+    """Action requise pour une colonne texte/objet (None si déjà compatible)"""
+    kind = infer_dtype(column, skipna=True)
+    if kind in ARROW_NATIVE_KINDS:
+        return None
+    if kind in NUMERIC_KINDS:
+        return 'numeric' if is_object_dtype(column.dtype) else None
+    if kind == 'string':
+        return 'numeric' if _looks_numeric(_sample(column)) else None
+    # Types mixtes (ex. 96 et '96%'): numérique si l'échantillon s'y prête, sinon texte
+    return 'numeric' if _looks_numeric(_sample(column)) else 'string'
+
+
+def _sample_matches(column: pd.Series, action: Optional[str]) -> bool:
+    """Validation à coût constant d'un plan en cache sur les premières valeurs"""
+    sample = _sample(column)
+    if len(sample) == 0:
+        return True
+    kind = infer_dtype(sample, skipna=True)
+    if action == 'numeric':
+        return kind in NUMERIC_KINDS or _looks_numeric(sample)
+    if action is None:
+        if kind == 'string':
+            return not _looks_numeric(sample)
+        if kind in NUMERIC_KINDS:
+            return not is_object_dtype(column.dtype)
+        return kind in ARROW_NATIVE_KINDS
+    return True  # 'string' accepte tout contenu
+
+
+def _cast(column: pd.Series, action: str) -> pd.Series:
+    # Les marqueurs « En cours », « N/A »... deviennent NaN dans les colonnes numériques
+    if action == 'numeric':
+        return pd.to_numeric(column, errors='coerce')
+    return column.astype('string')
+
+
+class ArrowSanitizer:
+    """Sanitizer à plans de conversion mis en cache par forme de DataFrame"""
+
+    def __init__(self, cache_size: int = PLAN_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._plans: "OrderedDict[Tuple, ConversionPlan]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'plans_inferred': 0, 'plan_hits': 0, 'plan_invalidations': 0, 'noop': 0}
+
+    def plan_for(self, df: pd.DataFrame) -> ConversionPlan:
+        """Plan en cache pour la forme du DataFrame, ré-inféré si l'échantillon le contredit"""
+        shape = _frame_shape(df)
+        with self._lock:
+            plan = self._plans.get(shape)
+            if plan is not None:
+                self._plans.move_to_end(shape)
+
+        if plan is not None:
+            if self._plan_still_valid(df, plan):
+                self.stats['plan_hits'] += 1
+                return plan
+            self.stats['plan_invalidations'] += 1
+
+        plan = self._infer_plan(df)
+        with self._lock:
+            self._plans[shape] = plan
+            self._plans.move_to_end(shape)
+            while len(self._plans) > self.cache_size:
+                self._plans.popitem(last=False)
+        self.stats['plans_inferred'] += 1
+        return plan
+
+    def sanitize(self, df: pd.DataFrame) -> pd.DataFrame:
+        """DataFrame compatible Arrow; l'objet d'origine est renvoyé si rien ne change"""
+        if df is None or df.empty:
+            return df
+        if not df.columns.is_unique:
+            # Arrow refuse les noms dupliqués: pas de plan par nom possible
+            df = df.set_axis(_deduplicate(df.columns), axis=1)
+
+        plan = self.plan_for(df)
+        if plan.is_noop:
+            self.stats['noop'] += 1
+            return df
+
+        # Copie superficielle: seules les colonnes converties sont réallouées
+        result = df.copy(deep=False)
+        for name, action in plan.actions:
+            result[name] = _cast(df[name], action)
+        return result
+
+    def prepare(self, df: pd.DataFrame, max_rows: Optional[int] = DISPLAY_MAX_ROWS,
+                page: Optional[int] = None, page_size: Optional[int] = None) -> Tuple[pd.DataFrame, Dict]:
+        """Pagination ou sous-échantillonnage, puis conversion des seules lignes retenues"""
+        info = {'total_rows': 0 if df is None else len(df), 'shown_rows': 0, 'mode': 'full'}
+        if df is None or df.empty:
+            return df, info
+
+        if page_size:
+            df, page_info = paginate(df, page or 0, page_size)
+            info.update(page_info, mode='page')
+        elif max_rows and len(df) > max_rows:
+            df = downsample(df, max_rows)
+            info['mode'] = 'downsampled'
+
+        info['shown_rows'] = len(df)
+        return self.sanitize(df), info
+
+    def clear(self):
+        with self._lock:
+            self._plans.clear()
+
+    def _infer_plan(self, df: pd.DataFrame) -> ConversionPlan:
+        actions = []
+        for position, name in enumerate(df.columns):
+            column = df.iloc[:, position]
+            if is_object_dtype(column.dtype) or is_string_dtype(column.dtype):
+                action = _infer_action(column)
+                if action is not None:
+                    actions.append((name, action))
+        return ConversionPlan(tuple(actions))
+
+    @staticmethod
+    def _plan_still_valid(df: pd.DataFrame, plan: ConversionPlan) -> bool:
+        planned = dict(plan.actions)
+        for position, name in enumerate(df.columns):
+            column = df.iloc[:, position]
+            if not (is_object_dtype(column.dtype) or is_string_dtype(column.dtype)):
+                continue
+            if not _sample_matches(column, planned.get(name)):
+                return False
+        return True
+
+
+def _deduplicate(columns) -> list:
+    seen: Dict[str, int] = {}
+    names = []
+    for name in map(str, columns):
+        count = seen.get(name, 0)
+        seen[name] = count + 1
+        names.append(name if count == 0 else f"{name}.{count}")
+    return names
+
+
+def downsample(df: pd.DataFrame, max_rows: int) -> pd.DataFrame:
+    """Sous-échantillonnage régulier (ordre conservé, première et dernière lignes incluses)"""
+    if len(df) <= max_rows:
+        return df
+    positions = np.linspace(0, len(df) - 1, max_rows).round().astype(np.int64)
+    return df.iloc[np.unique(positions)]
+
+
+def paginate(df: pd.DataFrame, page: int, page_size: int) -> Tuple[pd.DataFrame, Dict]:
+    """Page `page` (base 0, bornée) du DataFrame"""
+    n_pages = max(1, -(-len(df) // page_size))
+    page = min(max(0, int(page)), n_pages - 1)
+    start = page * page_size
+    return df.iloc[start:start + page_size], {'page': page, 'n_pages': n_pages, 'page_size': page_size}
+
+
+def page_widget_key(df: pd.DataFrame) -> str:
+    """Clé de sélecteur de page stable entre ré-exécutions (colonnes + nombre de lignes)"""
+    signature = "|".join(map(str, df.columns)) + f"#{len(df)}"
+    return f"page_{zlib.crc32(signature.encode('utf-8')):08x}"
+
+
+_default_sanitizer = ArrowSanitizer()
+
+def get_arrow_sanitizer() -> ArrowSanitizer:
+    """Sanitizer partagé du processus (les plans survivent aux ré-exécutions Streamlit)"""
+    return _default_sanitizer
+
+
+def sanitize_for_arrow(df: pd.DataFrame) -> pd.DataFrame:
+    return _default_sanitizer.sanitize(df)
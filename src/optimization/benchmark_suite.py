@@ -0,0 +1,583 @@
+"""
+SafetyGraph - Suite de Benchmarks Reproductibles
+================================================
+Mesure débit et latence des chemins principaux (ingestion CNESST, pipeline
+A1/A2/AN1/R1, recherche normative, clustering, prédiction, XAI, génération LLM)
+sur des jeux de données générés à graine fixe et avec le modèle LLM local.
+Les résultats sont comparés à une baseline JSON versionnée; un dépassement du
+seuil de régression fait échouer l'exécution. Le mode `scaling` balaie la
+taille d'entrée et estime l'exposant de complexité (pente log-log).
+Les seuils de `--check` n'ont de sens que face à une baseline enregistrée sur
+la même classe de machine (cpu_count, plateforme: voir "environment").
+
+Usage:
+    python src/optimization/benchmark_suite.py --check
+    python src/optimization/benchmark_suite.py --record
+    python src/optimization/benchmark_suite.py --scaling --only an1_batch,xai_tree_shap
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from ..utils.observability import time_callable
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utils.observability import time_callable
+
+RACINE = Path(__file__).resolve().parent.parent.parent
+SRC = RACINE / "src"
+BASELINE_PATH_DEFAUT = RACINE / "tests" / "benchmarks" / "baseline.json"
+
+SCHEMA_VERSION = 1
+NOTE_BASELINE = ("Durées absolues: --check ne compare qu'à une baseline enregistrée sur la même classe "
+                 "de machine (voir environment); réenregistrer avec --record en changeant d'hôte.")
+SEED = 20250701
+SEUIL_REGRESSION_DEFAUT = float(os.getenv("SAFEGRAPH_BENCH_THRESHOLD", "0.25"))
+REPETITIONS_DEFAUT = 5
+
+
+@dataclass(frozen=True)
+class BenchmarkCase:
+    """Cas de benchmark: `setup(size, rng)` prépare les données et retourne l'appel mesuré"""
+    name: str
+    description: str
+    setup: Callable[[int, np.random.Generator], Callable[[], Any]]
+    size: int                       # taille de référence (modes check / record)
+    sizes: Tuple[int, ...]          # balayage du mode scaling
+    unit: str = "éléments"
+
+
+@dataclass
+class Measurement:
+    name: str
+    size: int
+    repeats: int = 0
+    median_s: float = 0.0
+    min_s: float = 0.0
+    p90_s: float = 0.0
+    throughput: float = 0.0          # unités par seconde (médiane)
+    skipped: Optional[str] = None
+
+
+@dataclass
+class Regression:
+    name: str
+    baseline_s: float
+    median_s: float
+    ratio: float
+
+
+CASES: Dict[str, BenchmarkCase] = {}
+
+
+def benchmark_case(name: str, size: int, sizes: Sequence[int], unit: str = "éléments"):
+    """Déclare un cas; la docstring de la fonction sert de description"""
+    def decorateur(setup: Callable) -> Callable:
+        CASES[name] = BenchmarkCase(name, (setup.__doc__ or "").strip(), setup, size, tuple(sizes), unit)
+        return setup
+    return decorateur
+
+
+def _chemins():
+    """Imports applicatifs: racine (modules historiques) et src/"""
+    for chemin in (str(RACINE), str(SRC), str(SRC / "analytics")):
+        if chemin not in sys.path:
+            sys.path.insert(0, chemin)
+
+
+@contextlib.contextmanager
+def _repertoire_courant(dossier: str):
+    """Équivalent de contextlib.chdir (Python 3.11+) pour Python 3.9+"""
+    precedent = os.getcwd()
+    os.chdir(dossier)
+    try:
+        yield
+    finally:
+        os.chdir(precedent)
+
+
+# ----------------------------------------------------------------------
+# Mesure
+# ----------------------------------------------------------------------
+
+def measure(case: BenchmarkCase, size: Optional[int] = None, repeats: int = REPETITIONS_DEFAUT,
+            warmup: int = 1, seed: int = SEED) -> Measurement:
+    size = case.size if size is None else size
+    random.seed(seed)
+    np.random.seed(seed % 2 ** 32)   # code historique utilisant le RNG global
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            appel = case.setup(size, np.random.default_rng(seed))
+            durees = time_callable(appel, repeats, warmup)
+    except ImportError as e:
+        return Measurement(case.name, size, skipped=f"dépendance manquante: {e}")
+    mediane = float(np.median(durees))
+    return Measurement(case.name, size, repeats, mediane, float(min(durees)),
+                       float(np.percentile(durees, 90)), size / mediane if mediane > 0 else 0.0)
+
+
+def complexity_exponent(tailles: Sequence[int], durees: Sequence[float]) -> float:
+    """Pente de log(durée) en fonction de log(taille): 1 ≈ linéaire, 2 ≈ quadratique"""
+    x, y = np.log(np.asarray(tailles, dtype=float)), np.log(np.maximum(np.asarray(durees, dtype=float), 1e-9))
+    return float(np.polyfit(x, y, 1)[0])
+
+
+def scaling(case: BenchmarkCase, sizes: Optional[Sequence[int]] = None,
+            repeats: int = 3, seed: int = SEED) -> Dict[str, Any]:
+    """Balayage de taille d'entrée et exposant de complexité estimé"""
+    points = [measure(case, taille, repeats, seed=seed) for taille in (sizes or case.sizes)]
+    if any(p.skipped for p in points):
+        return {"name": case.name, "skipped": points[0].skipped}
+    exposant = complexity_exponent([p.size for p in points], [p.median_s for p in points])
+    return {"name": case.name, "unit": case.unit,
+            "points": [{"size": p.size, "median_s": p.median_s, "throughput": p.throughput} for p in points],
+            "exponent": exposant, "complexity": f"O(n^{exposant:.2f})"}
+
+
+# ----------------------------------------------------------------------
+# Baseline versionnée
+# ----------------------------------------------------------------------
+
+def _commit_git() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RACINE, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "machine": platform.machine(), "cpu_count": os.cpu_count(), "numpy": np.__version__}
+
+
+def load_baseline(path=BASELINE_PATH_DEFAUT) -> Dict[str, Any]:
+    path = Path(path)
+    if not path.exists():
+        return {"schema_version": SCHEMA_VERSION, "results": {}}
+    baseline = json.loads(path.read_text(encoding="utf-8"))
+    if baseline.get("schema_version") != SCHEMA_VERSION:
+        raise ValueError(f"Baseline {path}: schéma {baseline.get('schema_version')} != {SCHEMA_VERSION}")
+    return baseline
+
+
+def save_baseline(mesures: Sequence[Measurement], path=BASELINE_PATH_DEFAUT) -> Dict[str, Any]:
+    """Fusionne les mesures dans la baseline (les cas non mesurés sont conservés)"""
+    resultats = dict(load_baseline(path)["results"])
+    for m in mesures:
+        if m.skipped is None:
+            resultats[m.name] = {"size": m.size, "median_s": float(f"{m.median_s:.6g}"),
+                                 "min_s": float(f"{m.min_s:.6g}"), "throughput": float(f"{m.throughput:.6g}")}
+    baseline = {"schema_version": SCHEMA_VERSION, "seed": SEED,
+                "recorded_at": datetime.now().isoformat(timespec="seconds"), "git_commit": _commit_git(),
+                "note": NOTE_BASELINE, "environment": environment(), "results": dict(sorted(resultats.items()))}
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(baseline, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    return baseline
+
+
+def compare(mesures: Sequence[Measurement], baseline: Dict[str, Any],
+            threshold: float = SEUIL_REGRESSION_DEFAUT) -> List[Regression]:
+    """Régressions: médiane > baseline x (1 + seuil), à taille identique"""
+    regressions = []
+    for m in mesures:
+        reference = baseline.get("results", {}).get(m.name)
+        if m.skipped or not reference or reference["size"] != m.size:
+            continue
+        ratio = m.median_s / reference["median_s"] if reference["median_s"] > 0 else float("inf")
+        if ratio > 1 + threshold:
+            regressions.append(Regression(m.name, reference["median_s"], m.median_s, ratio))
+    return regressions
+
+
+def run_suite(names: Optional[Sequence[str]] = None, mode: str = "check", threshold: float = SEUIL_REGRESSION_DEFAUT,
+              baseline_path=BASELINE_PATH_DEFAUT, repeats: int = REPETITIONS_DEFAUT) -> Dict[str, Any]:
+    """Exécute les cas demandés; mode check | record | scaling"""
+    inconnus = set(names or ()) - set(CASES)
+    if inconnus:
+        raise KeyError(f"Cas de benchmark inconnus: {sorted(inconnus)}")
+    cas = [CASES[n] for n in (names or CASES)]
+    if mode == "scaling":
+        return {"mode": mode, "scaling": [scaling(c, repeats=min(repeats, 3)) for c in cas], "passed": True}
+
+    mesures = [measure(c, repeats=repeats) for c in cas]
+    rapport = {"mode": mode, "threshold": threshold, "measurements": [asdict(m) for m in mesures]}
+    if mode == "record":
+        save_baseline(mesures, baseline_path)
+        rapport.update(regressions=[], passed=True)
+    else:
+        regressions = compare(mesures, load_baseline(baseline_path), threshold)
+        rapport.update(regressions=[asdict(r) for r in regressions], passed=not regressions)
+    return rapport
+
+
+# ----------------------------------------------------------------------
+# Cas (jeux de données à graine fixe, LLM local)
+# ----------------------------------------------------------------------
+
+SECTEURS_SCIAN = ["2361", "2362", "2381", "3111", "4841", "6221"]
+VARIABLES_CULTURE = ["usage_epi", "respect_procedures", "formation_securite", "supervision_directe",
+                     "communication_risques", "leadership_sst", "maintenance_equipements", "perception_risque"]
+
+
+@benchmark_case("cnesst_ingestion", size=20_000, sizes=(5_000, 10_000, 20_000, 40_000), unit="incidents")
+def _cas_cnesst(size: int, rng: np.random.Generator):
+    """Chargement typé d'un secteur CNESST depuis SQLite, profil et facteurs XAI"""
+    _chemins()
+    import pandas as pd
+    from xai_real_cnesst_data import CNESSTDataConnector, RealCNESSTSHAPCalculator
+
+    # Supprimé par son finaliseur quand l'appel mesuré n'est plus référencé
+    dossier = tempfile.TemporaryDirectory(prefix="safegraph_bench_")
+    chemin = os.path.join(dossier.name, "cnesst.db")
+    dates = pd.Timestamp("2022-01-01") + pd.to_timedelta(rng.integers(0, 900, size), unit="D")
+    frame = pd.DataFrame({
+        "incident_id": np.arange(size),
+        "date_occurred": dates.strftime("%Y-%m-%d"),
+        "sector_scian": rng.choice(SECTEURS_SCIAN, size),
+        "severity_level": rng.integers(1, 6, size),
+        "injury_type": rng.choice(["chute", "coupure", "TMS", "brulure"], size),
+        "location_region": rng.choice(["Montréal", "Québec", "Abitibi", "Estrie"], size),
+        "age_group": rng.choice(["15-24", "25-34", "35-44", "45-54", "55+"], size),
+        "gender": rng.choice(["H", "F"], size),
+        "cost_estimate": rng.gamma(2.0, 8000.0, size),
+        "days_lost": rng.integers(0, 90, size),
+    })
+    with contextlib.closing(sqlite3.connect(chemin)) as conn, conn:
+        frame.to_sql("incidents", conn, index=False)
+    connecteur = CNESSTDataConnector(chemin)
+    calculateur = RealCNESSTSHAPCalculator(connecteur)
+
+    def appel():
+        connecteur.invalidate_cache()
+        connecteur.get_sector_profile("236")
+        return calculateur.calculate_real_shap_values("236")
+    appel.dossier = dossier
+    return appel
+
+
+def _entrees_pipeline(rng: np.random.Generator, i: int) -> Dict[str, Any]:
+    reponses = ["safety_awareness", "risk_perception", "epi_usage", "procedure_compliance", "team_communication"]
+    return {
+        "evaluation_data": {"responses": {r: int(rng.integers(1, 11)) for r in reponses}},
+        "observation_data": {"location": f"Chantier {i}", "observation_type": "terrain_inspection",
+                             "environmental_conditions": {"lighting": str(rng.choice(["adequate", "poor"])),
+                                                          "noise_level": str(rng.choice(["low", "high"]))}},
+        "incident_cnesst": {"NATURE_LESION": str(rng.choice(["BLES. TRAUMA. MUSCLES,TENDONS,ETC.", "FRACTURE"])),
+                            "GENRE": str(rng.choice(["EFFORT EXCESSIF", "CHUTE"])), "SECTEUR_SCIAN": "236",
+                            "IND_LESION_TMS": "OUI"},
+        "context": {"secteur": "CONSTRUCTION", "taille_entreprise": "MOYENNE"},
+    }
+
+
+@benchmark_case("pipeline_a1_a2_an1_r1", size=20, sizes=(5, 10, 20, 40), unit="jobs")
+def _cas_pipeline(size: int, rng: np.random.Generator):
+    """Pipeline complet A1→A2→AN1→R1 via le service d'exécution"""
+    _chemins()
+    from agents.execution_service import OrchestratorExecutionService
+
+    entrees = [_entrees_pipeline(rng, i) for i in range(size)]
+
+    def appel():
+        service = OrchestratorExecutionService(max_workers=2, max_retained_jobs=size)
+        try:
+            jobs = [service.submit(e, force=True) for e in entrees]
+            for job_id in jobs:
+                job = service.wait(job_id, timeout=120)
+                if job.status != "finished":
+                    raise RuntimeError(f"Job {job_id}: {job.error}")
+        finally:
+            service.shutdown()
+    return appel
+
+
+def _entreprises(rng: np.random.Generator, n: int) -> Dict[str, Tuple[Dict, Dict]]:
+    entreprises = {}
+    for e in range(n):
+        a1 = {v: {"score": float(rng.integers(1, 11))} for v in VARIABLES_CULTURE if rng.random() < 0.85}
+        a2 = {v: {"score": round(float(rng.uniform(0, 10)), 2)} for v in VARIABLES_CULTURE if rng.random() < 0.85}
+        entreprises[f"ENT_{e:05d}"] = ({"variables_culture_sst": a1, "scores_autoeval": {"score_global": 70}},
+                                       {"variables_culture_terrain": a2, "observations": {"score_comportement": 60}})
+    return entreprises
+
+
+@benchmark_case("an1_batch", size=2_000, sizes=(500, 1_000, 2_000, 4_000), unit="entreprises")
+def _cas_an1(size: int, rng: np.random.Generator):
+    """Analyse d'écarts AN1 vectorisée multi-entreprises"""
+    _chemins()
+    from agents.analyse.an1_batch import AN1BatchEngine
+
+    moteur, entreprises = AN1BatchEngine(), _entreprises(rng, size)
+    return lambda: moteur.analyze(entreprises, {"secteur": "CONSTRUCTION"})
+
+
+@benchmark_case("r1_portfolio", size=1_000, sizes=(250, 500, 1_000, 2_000), unit="entreprises")
+def _cas_r1(size: int, rng: np.random.Generator):
+    """Planification R1 de portefeuille sous budget (programmation dynamique)"""
+    _chemins()
+    from agents.recommendation.r1_generateur_recommandations import R1GenerateurRecommandations
+    from agents.recommendation.r1_portfolio_planner import R1PortfolioPlanner
+
+    niveaux = ["critique", "eleve", "MOYENNE", "URGENTE"]
+    resultats, contextes = {}, {}
+    for e in range(size):
+        zones = [{"variable": v, "pourcentage_ecart": float(rng.uniform(10, 90)),
+                  "niveau_critique": niveaux[int(rng.integers(len(niveaux)))]}
+                 for v in rng.choice(VARIABLES_CULTURE, size=int(rng.integers(1, 5)), replace=False)]
+        resultats[f"ENT_{e:05d}"] = {"ecarts_analysis": {"zones_aveugles": zones}, "summary": {}}
+        contextes[f"ENT_{e:05d}"] = {"secteur": ["CONSTRUCTION", "SOINS_SANTE", "GENERAL"][e % 3],
+                                     "taille_entreprise": ["PME", "MOYENNE", "GRANDE"][e % 3]}
+    planificateur = R1PortfolioPlanner(R1GenerateurRecommandations(), cache_size=0)
+    budget = 400.0 * size
+    return lambda: planificateur.plan(resultats, budget, 26.0, contextes, solver="dp")
+
+
+@benchmark_case("normative_search", size=200, sizes=(50, 100, 200, 400), unit="requêtes")
+def _cas_normes(size: int, rng: np.random.Generator):
+    """Recherche de normes ISO 45001 / CSA / SCIAN applicables"""
+    _chemins()
+    import logging
+    from normes.vectorisation_normes import MoteurVectorisationNormes
+
+    logging.getLogger("normes.vectorisation_normes").setLevel(logging.WARNING)
+    moteur = MoteurVectorisationNormes()
+    moteur.vectoriser_corpus_normatif()
+    mots = ["chute", "hauteur", "formation", "epi", "leadership", "communication", "risque", "machine",
+            "audit", "urgence", "ergonomie", "bruit", "produits chimiques", "supervision"]
+    requetes = [(" ".join(rng.choice(mots, size=3, replace=False)), str(rng.choice(["236", "311", "622"])))
+                for _ in range(size)]
+    return lambda: [moteur.rechercher_normes_applicables(texte, secteur) for texte, secteur in requetes]
+
+
+@benchmark_case("clustering", size=2_000, sizes=(500, 1_000, 2_000, 4_000), unit="évaluations")
+def _cas_clustering(size: int, rng: np.random.Generator):
+    """Clustering des profils culture (KMeans + silhouette)"""
+    _chemins()
+    import pandas as pd
+    from pattern_recognition import ML_AVAILABLE, SafetyGraphPatternRecognition
+
+    if not ML_AVAILABLE:
+        raise ImportError("scikit-learn")
+    dossier = tempfile.mkdtemp(prefix="safegraph_bench_")
+    moteur = SafetyGraphPatternRecognition(db_path=os.path.join(dossier, "patterns.db"))
+    centres = rng.uniform(1.5, 4.5, size=(4, 6))
+    profils = centres[rng.integers(0, 4, size)] + rng.normal(0, 0.35, (size, 6))
+    donnees = pd.DataFrame(np.clip(profils, 1, 5), columns=[
+        "leadership_engagement", "communication_effectiveness", "training_quality",
+        "employee_participation", "monitoring_improvement", "psychosocial_environment"])
+    return lambda: moteur.perform_clustering(donnees, "kmeans", 4)
+
+
+def _donnees_culture(rng: np.random.Generator, mois: int = 24):
+    import pandas as pd
+
+    secteurs = ["236", "311", "212", "622", "484"]
+    dates = pd.date_range("2023-01-01", periods=mois, freq="MS").strftime("%Y-%m-%d")
+    culture = pd.DataFrame([
+        {"secteur_scian": s, "date_evaluation": d, "dimension_leadership": rng.uniform(2, 5),
+         "dimension_communication": rng.uniform(2, 5), "dimension_formation": rng.uniform(2, 5)}
+        for s in secteurs for d in dates
+    ])
+    culture["score_culture"] = culture[["dimension_leadership", "dimension_communication",
+                                        "dimension_formation"]].mean(axis=1) + rng.normal(0, 0.1, len(culture))
+    n = 40 * len(secteurs)
+    cnesst = pd.DataFrame({
+        "secteur_activite": np.repeat(secteurs, 40),
+        "date_accident": pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 365, n), unit="D"),
+        "age": rng.integers(18, 65, n),
+        "gravite": rng.choice(["Décès", "Invalidité permanente", "Mineure"], n),
+    })
+    return culture, cnesst
+
+
+@benchmark_case("prediction", size=120, sizes=(30, 60, 120, 240), unit="mois d'horizon")
+def _cas_prediction(size: int, rng: np.random.Generator):
+    """Prévision de l'évolution culture (forêt aléatoire entraînée à graine fixe)"""
+    _chemins()
+    from predictive_models import ML_AVAILABLE, SafetyGraphPredictiveEngine
+
+    if not ML_AVAILABLE:
+        raise ImportError("scikit-learn")
+    dossier = tempfile.mkdtemp(prefix="safegraph_bench_")
+    with _repertoire_courant(dossier):   # le moteur écrit ses modèles dans ./models
+        moteur = SafetyGraphPredictiveEngine(db_path=os.path.join(dossier, "predictions.db"))
+        moteur.train_culture_prediction_model(*_donnees_culture(rng))
+    return lambda: moteur.predict_culture_evolution("236", horizon_months=size)
+
+
+@benchmark_case("xai_tree_shap", size=1_000, sizes=(250, 500, 1_000, 2_000), unit="prédictions")
+def _cas_xai(size: int, rng: np.random.Generator):
+    """Valeurs SHAP exactes (TreeSHAP) sur une forêt aléatoire"""
+    _chemins()
+    from sklearn.ensemble import RandomForestRegressor
+    from tree_shap import TreeEnsembleExplainer
+
+    X = rng.normal(size=(size, 6))
+    y = 2 * X[:, 0] + X[:, 1] * X[:, 2] - (X[:, 3] > 0) + rng.normal(0, 0.1, size)
+    modele = RandomForestRegressor(n_estimators=20, max_depth=6, random_state=0).fit(X, y)
+    explainer = TreeEnsembleExplainer(modele)
+    return lambda: explainer.shap_values(X)
+
+
+@benchmark_case("llm_recommendation", size=200, sizes=(50, 100, 200, 400), unit="prompts")
+def _cas_llm(size: int, rng: np.random.Generator):
+    """Génération de recommandations en lot avec le modèle LLM local (sans cache)"""
+    _chemins()
+    from utils.llm_generation import StreamingGenerator, StubChatModel
+
+    generateur = StreamingGenerator(StubChatModel())
+    systeme = ("system", "Tu es un expert en sécurité au travail spécialisé dans le secteur Construction.")
+    requetes = {f"ENT_{i:04d}": [systeme, ("human", f"Écarts identifiés : {VARIABLES_CULTURE[i % 8]}: "
+                                                     f"{-round(float(rng.uniform(0.1, 0.9)), 2)}")]
+                for i in range(size)}
+    return lambda: generateur.generate_batch(requetes)
+
+
+# ----------------------------------------------------------------------
+# État unifié: partage structurel vs copies naïves (100+ agents)
+# ----------------------------------------------------------------------
+
+def simulate_agent_workflow(store, n_agents: int = 100, rounds: int = 10, apply=None) -> List[float]:
+    """
+    Workflow synthétique: chaque agent publie scores, prédictions, anomalies
+    et trace à chaque tour. Retourne la durée (s) de chaque étape, checkpoint inclus.
+    """
+    durees = []
+    for tour in range(rounds):
+        for a in range(n_agents):
+            agent = f"agent_{a:03d}"
+            updates = {
+                "active_agents": [agent],
+                "culture_scores": {agent: (a * 7 + tour) % 100 / 10},
+                "predictions_ml": {agent: {"tour": tour, "risque": (a + tour) % 5}},
+                "anomalies_detected": [{"agent": agent, "tour": tour}] if (a + tour) % 10 == 0 else [],
+                "kpi_realtime": {f"kpi_{a % 20}": float(tour)},
+            }
+            debut = time.perf_counter()
+            apply(store, agent, updates)
+            durees.append(time.perf_counter() - debut)
+    return durees
+
+
+class _EtatNaif:
+    """Référence: réducteurs par copie (operator.add, {**d}) et checkpoint complet via to_dict"""
+
+    def __init__(self):
+        from architecture.safetygraph_unified_state import OP_APPEND, REDUCTEURS, SafetyGraphUnifiedState
+
+        self.etat = SafetyGraphUnifiedState()
+        self.checkpoints: List[bytes] = []
+        self._listes = {champ for champ, op in REDUCTEURS.items() if op == OP_APPEND}
+
+    def etape(self, agent: str, updates: Dict[str, Any]):
+        for champ, valeur in updates.items():
+            ancien = getattr(self.etat, champ)
+            if champ in self._listes:
+                setattr(self.etat, champ, (ancien or []) + list(valeur))
+            else:
+                setattr(self.etat, champ, {**(ancien or {}), **valeur})
+        self.checkpoints.append(json.dumps(self.etat.to_dict(), default=str).encode())
+
+
+def _etape_persistante(store, agent: str, updates: Dict[str, Any]):
+    delta = store.apply(agent, updates)
+    store.encode(delta.step - 1)
+
+
+def benchmark_unified_state(n_agents: int = 100, rounds: int = 10,
+                            timings: bool = True) -> Dict[str, Dict[str, float]]:
+    """
+    Coût par étape (premier vs dernier décile) puis mémoire retenue par étape
+    (tracemalloc, passe séparée): état persistant vs copies naïves.
+    `timings=False` ne fait que la passe mémoire, déterministe.
+    """
+    _chemins()
+    from architecture.safetygraph_unified_state import UnifiedStateStore
+
+    resultats = {}
+    for nom, fabrique, etape in (
+        ("persistent", UnifiedStateStore, _etape_persistante),
+        ("naive", _EtatNaif, lambda etat, agent, updates: etat.etape(agent, updates)),
+    ):
+        resultat = {}
+        if timings:
+            durees = simulate_agent_workflow(fabrique(), n_agents, rounds, etape)
+            dixieme = max(1, len(durees) // 10)
+            resultat["first_decile_us"] = sum(durees[:dixieme]) / dixieme * 1e6
+            resultat["last_decile_us"] = sum(durees[-dixieme:]) / dixieme * 1e6
+        tracemalloc.start()
+        retenu = fabrique()
+        etapes = len(simulate_agent_workflow(retenu, n_agents, rounds, etape))
+        memoire = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del retenu
+        resultats[nom] = {"steps": etapes, **resultat, "bytes_per_step": memoire / etapes}
+    return resultats
+
+
+# ----------------------------------------------------------------------
+# CLI
+# ----------------------------------------------------------------------
+
+def _afficher(rapport: Dict[str, Any]):
+    if rapport["mode"] == "scaling":
+        for resultat in rapport["scaling"]:
+            if "skipped" in resultat:
+                print(f"⏭️  {resultat['name']}: {resultat['skipped']}")
+                continue
+            points = ", ".join(f"{p['size']}→{p['median_s'] * 1e3:.1f}ms" for p in resultat["points"])
+            print(f"📈 {resultat['name']}: {resultat['complexity']} ({points})")
+        return
+    regressions = {r["name"]: r for r in rapport["regressions"]}
+    for m in rapport["measurements"]:
+        if m["skipped"]:
+            print(f"⏭️  {m['name']}: {m['skipped']}")
+            continue
+        statut = f"❌ x{regressions[m['name']]['ratio']:.2f}" if m["name"] in regressions else "✅"
+        print(f"{statut} {m['name']:<24} n={m['size']:<6} médiane {m['median_s'] * 1e3:9.2f} ms  "
+              f"p90 {m['p90_s'] * 1e3:9.2f} ms  {m['throughput']:12.1f}/s")
+    if rapport["mode"] == "record":
+        print("💾 Baseline enregistrée")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Suite de benchmarks SafetyGraph")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--check", action="store_const", dest="mode", const="check", help="Comparer à la baseline (défaut)")
+    mode.add_argument("--record", action="store_const", dest="mode", const="record", help="Enregistrer la baseline")
+    mode.add_argument("--scaling", action="store_const", dest="mode", const="scaling", help="Courbes de complexité")
+    parser.add_argument("--only", help="Cas séparés par des virgules")
+    parser.add_argument("--threshold", type=float, default=SEUIL_REGRESSION_DEFAUT, help="Seuil de régression (0.25 = +25%%)")
+    parser.add_argument("--repeats", type=int, default=REPETITIONS_DEFAUT)
+    parser.add_argument("--baseline", default=str(BASELINE_PATH_DEFAUT))
+    parser.add_argument("--json", help="Écrire le rapport JSON dans ce fichier")
+    args = parser.parse_args(argv)
+
+    noms = [n.strip() for n in args.only.split(",")] if args.only else None
+    rapport = run_suite(noms, args.mode or "check", args.threshold, args.baseline, args.repeats)
+    _afficher(rapport)
+    if args.json:
+        Path(args.json).write_text(json.dumps(rapport, ensure_ascii=False, indent=2), encoding="utf-8")
+    return 0 if rapport["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
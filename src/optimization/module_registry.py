@@ -0,0 +1,261 @@
+"""
+SafetyGraph - Registre de Modules Paresseux
+===========================================
+Chargement à la demande des modules fonctionnels de l'interface Streamlit
+Chaque module est déclaré avec son chemin d'import et les onglets/modes qui
+l'utilisent, importé au premier usage puis mémorisé pour tout le processus.
+Les temps d'import sont mesurés pour le rapport de démarrage.
+"""
+
+import importlib
+import importlib.machinery
+import importlib.util
+import logging
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _find_spec_without_import(import_path: str):
+    """
+    Spec d'un module pointé, sans importer ses paquets parents
+
+    importlib.util.find_spec('a.b.c') importe 'a' et 'a.b' (et exécute leurs
+    __init__); ici chaque niveau est cherché dans les répertoires du parent,
+    sauf si ce parent est déjà importé.
+    """
+    search_path = None
+    spec = None
+    parts = import_path.split('.')
+    for depth in range(1, len(parts) + 1):
+        fullname = '.'.join(parts[:depth])
+        module = sys.modules.get(fullname)
+        if module is not None:
+            spec = module.__spec__ or importlib.util.find_spec(fullname)
+        else:
+            spec = importlib.machinery.PathFinder.find_spec(fullname, search_path)
+        if spec is None:
+            return None
+        search_path = spec.submodule_search_locations
+        if depth < len(parts) and search_path is None:
+            return None  # parent qui n'est pas un paquet
+    return spec
+
+
+@dataclass(frozen=True)
+class ModuleSpec:
+    """Déclaration d'un module fonctionnel"""
+    name: str
+    import_path: str
+    attributes: Tuple[str, ...] = ()
+    used_by: Tuple[str, ...] = ()
+    extra_paths: Tuple[str, ...] = ()  # Relatifs à la racine de l'application
+
+
+@dataclass
+class ModuleState:
+    """État de chargement d'un module déclaré"""
+    spec: ModuleSpec
+    status: str = "declared"  # declared | loaded | unavailable
+    module: Any = None
+    import_seconds: float = 0.0
+    loaded_at: Optional[float] = None
+    error: Optional[str] = None
+    requests: int = 0
+
+
+class LazyModuleRegistry:
+    """Registre des modules chargés au premier usage (mémoïsés par processus)"""
+
+    def __init__(self, base_dir: Optional[str] = None):
+        self.base_dir = Path(base_dir) if base_dir else Path.cwd()
+        self.created_at = time.perf_counter()
+        self._states: Dict[str, ModuleState] = {}
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Déclaration
+    # ------------------------------------------------------------------
+
+    def register(self, name: str, import_path: str, attributes: Tuple[str, ...] = (),
+                 used_by: Tuple[str, ...] = (), extra_paths: Tuple[str, ...] = ()) -> ModuleSpec:
+        """Déclare un module (idempotent: Streamlit ré-exécute le script à chaque interaction)"""
+        spec = ModuleSpec(name, import_path, tuple(attributes), tuple(used_by), tuple(extra_paths))
+        with self._lock:
+            state = self._states.get(name)
+            if state is None or state.spec != spec:
+                self._states[name] = ModuleState(spec)
+        return spec
+
+    def register_all(self, specs: Tuple[ModuleSpec, ...]):
+        for spec in specs:
+            self.register(spec.name, spec.import_path, spec.attributes, spec.used_by, spec.extra_paths)
+
+    # ------------------------------------------------------------------
+    # Chargement
+    # ------------------------------------------------------------------
+
+    def load(self, name: str) -> Optional[Any]:
+        """Module importé (None si indisponible); importé une seule fois par processus"""
+        with self._lock:
+            state = self._states[name]
+            state.requests += 1
+            if state.status == "declared":
+                self._import(state)
+            return state.module
+
+    def get(self, name: str, attribute: str, default: Any = None) -> Any:
+        """Attribut d'un module déclaré, chargé à la demande"""
+        module = self.load(name)
+        return getattr(module, attribute, default) if module is not None else default
+
+    def load_for(self, usage: str) -> Dict[str, Optional[Any]]:
+        """Charge tous les modules d'un onglet ou mode"""
+        return {name: self.load(name) for name in self.modules_for(usage)}
+
+    def modules_for(self, usage: str) -> List[str]:
+        return [name for name, state in self._states.items() if usage in state.spec.used_by]
+
+    def is_loaded(self, name: str) -> bool:
+        return self._states[name].status == "loaded"
+
+    def is_available(self, name: str) -> bool:
+        """
+        Disponibilité sans exécuter le module ni ses paquets parents
+
+        Un module déjà tenté renvoie son statut réel; sinon seule la
+        présence des fichiers est vérifiée sur sys.path.
+        """
+        state = self._states[name]
+        if state.status != "declared":
+            return state.status == "loaded"
+
+        self._add_paths(state.spec)
+        try:
+            return _find_spec_without_import(state.spec.import_path) is not None
+        except (ImportError, ValueError):
+            return False
+
+    def _add_paths(self, spec: ModuleSpec):
+        for relative in ('.',) + spec.extra_paths:
+            path = str(self.base_dir / relative)
+            if path not in sys.path:
+                sys.path.append(path)
+
+    def _import(self, state: ModuleState):
+        spec = state.spec
+        self._add_paths(spec)
+
+        start = time.perf_counter()
+        try:
+            module = importlib.import_module(spec.import_path)
+            missing = [attr for attr in spec.attributes if not hasattr(module, attr)]
+            if missing:
+                raise ImportError(f"{spec.import_path}: attributs absents {missing}")
+            state.module = module
+            state.status = "loaded"
+            logger.info(f"✅ Module {spec.name} chargé ({time.perf_counter() - start:.2f}s)")
+        except Exception as e:
+            state.status = "unavailable"
+            state.error = f"{type(e).__name__}: {e}"
+            logger.warning(f"⚠️ Module {spec.name} non disponible: {e}")
+        finally:
+            state.import_seconds = time.perf_counter() - start
+            state.loaded_at = time.perf_counter() - self.created_at
+
+    # ------------------------------------------------------------------
+    # Rapport de démarrage
+    # ------------------------------------------------------------------
+
+    def startup_report(self) -> Dict[str, Any]:
+        """Temps d'import par module, du plus lent au plus rapide"""
+        with self._lock:
+            modules = [
+                {
+                    'name': state.spec.name,
+                    'import_path': state.spec.import_path,
+                    'used_by': list(state.spec.used_by),
+                    'status': state.status,
+                    'import_seconds': round(state.import_seconds, 4),
+                    'loaded_after_seconds': None if state.loaded_at is None else round(state.loaded_at, 4),
+                    'requests': state.requests,
+                    'error': state.error
+                }
+                for state in self._states.values()
+            ]
+        modules.sort(key=lambda m: m['import_seconds'], reverse=True)
+        return {
+            'declared': len(modules),
+            'loaded': sum(1 for m in modules if m['status'] == 'loaded'),
+            'unavailable': sum(1 for m in modules if m['status'] == 'unavailable'),
+            'total_import_seconds': round(sum(m['import_seconds'] for m in modules), 4),
+            'modules': modules
+        }
+
+    def check_budget(self, total_seconds: Optional[float] = None,
+                     per_module_seconds: Optional[Dict[str, float]] = None) -> List[str]:
+        """Dépassements de budget d'import (liste vide si tout est conforme)"""
+        report = self.startup_report()
+        violations = []
+        if total_seconds is not None and report['total_import_seconds'] > total_seconds:
+            violations.append(f"total: {report['total_import_seconds']:.3f}s > {total_seconds:.3f}s")
+        for module in report['modules']:
+            budget = (per_module_seconds or {}).get(module['name'])
+            if budget is not None and module['import_seconds'] > budget:
+                violations.append(f"{module['name']}: {module['import_seconds']:.3f}s > {budget:.3f}s")
+        return violations
+
+
+# ===================================================================
+# MODULES FONCTIONNELS DE app_behaviorx.py
+# ===================================================================
+
+APP_MODULES = (
+    ModuleSpec('extensions', 'integration.app_behaviorx_extensions',
+               ('SafetyGraphExtensions',), ('sidebar', 'multi_sources')),
+    ModuleSpec('cnesst_layer', 'src.enrichments.cnesst_layer',
+               ('enrich_safetygraph_context', 'get_cnesst_status'), ('cnesst',)),
+    ModuleSpec('behaviorx_orchestrator', 'agents.collecte.orchestrateur_behaviorx_unified',
+               ('BehaviorXSafetyOrchestrator',), ('behaviorx',), ('src',)),
+    ModuleSpec('performance_optimizer', 'optimization.performance_optimizer',
+               ('SafetyGraphOptimizer',), ('performance',), ('src',)),
+    ModuleSpec('predictive_analytics', 'predictive_models',
+               ('display_predictive_analytics_interface_v2',), ('analytics_predictifs',), ('src/analytics',)),
+    ModuleSpec('pattern_recognition', 'pattern_recognition',
+               ('display_pattern_recognition_interface',), ('pattern_recognition',), ('src/analytics',)),
+    ModuleSpec('anomaly_detection', 'anomaly_detection',
+               ('display_anomaly_detection_interface',), ('analytics_optimises',), ('src/analytics',)),
+    ModuleSpec('mines', 'src.modules.mines_souterraines',
+               ('mines_souterraines_secteur',), ('mines',)),
+    ModuleSpec('dashboard_hse_manager', 'src.dashboards.hse_manager_dashboard',
+               ('display_hse_manager_dashboard',), ('profile:hse_manager',)),
+    ModuleSpec('dashboard_safety_coordinator', 'src.dashboards.safety_coordinator_dashboard',
+               ('display_safety_coordinator_dashboard',), ('profile:safety_coordinator',)),
+    ModuleSpec('dashboard_supervisor', 'src.dashboards.supervisor_dashboard',
+               ('display_supervisor_dashboard',), ('profile:supervisor',)),
+    ModuleSpec('dashboard_c_suite', 'src.dashboards.c_suite_dashboard',
+               ('display_c_suite_dashboard',), ('profile:c_suite',)),
+    ModuleSpec('cartography', 'safetygraph_cartography_engine',
+               ('execute_safetygraph_cartography_main',), ('cartographie',), ('src/langgraph',)),
+    ModuleSpec('oracle_hse', 'predictions_multi_horizons',
+               ('display_oracle_hse_interface',), ('oracle_hse',)),
+    ModuleSpec('xai', 'xai_oracle_hse',
+               ('display_xai_oracle_interface',), ('oracle_hse',)),
+)
+
+_app_registry: Optional[LazyModuleRegistry] = None
+_app_registry_lock = threading.Lock()
+
+def get_app_registry(base_dir: Optional[str] = None) -> LazyModuleRegistry:
+    """Registre unique du processus (survit aux ré-exécutions du script Streamlit)"""
+    global _app_registry
+    with _app_registry_lock:
+        if _app_registry is None:
+            _app_registry = LazyModuleRegistry(base_dir)
+            _app_registry.register_all(APP_MODULES)
+        return _app_registry
@@ -12,6 +12,14 @@ import time
 from typing import Dict, List, Any
 import asyncio
 
+try:
+    from ..utils.observability import time_callable
+except ImportError:
+    import os
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utils.observability import time_callable
+
 class RealtimeAnalytics:
     """Analytics temps réel SafetyGraph"""
     
@@ -168,41 +176,23 @@ class RealtimeAnalytics:
             # Performance analytics
             st.caption(f"⚡ Généré en {metrics['generation_time']:.3f}s | Dernière MAJ: {datetime.now().strftime('%H:%M:%S')}")
     
-    def benchmark_performance(self) -> Dict:
-        """Benchmark performance analytics"""
-        start_time = time.time()
-        
-        # Test différentes opérations
+    def benchmark_performance(self, repeats: int = 5) -> Dict:
+        """Benchmark performance analytics (médiane de `repeats` exécutions mesurées)"""
         operations = {
-            "metrics_generation": 0,
-            "predictions_7d": 0,
-            "predictions_30d": 0,
-            "anomaly_detection": 0
+            "metrics_generation": self.generate_realtime_metrics,
+            "predictions_7d": lambda: self.predict_culture_evolution(7),
+            "predictions_30d": lambda: self.predict_culture_evolution(30),
+            "anomaly_detection": self.detect_anomalies_realtime
         }
         
-        # Test métriques
-        start = time.time()
-        self.generate_realtime_metrics()
-        operations["metrics_generation"] = time.time() - start
-        
-        # Test prédictions
-        start = time.time()
-        self.predict_culture_evolution(7)
-        operations["predictions_7d"] = time.time() - start
-        
-        start = time.time()
-        self.predict_culture_evolution(30)
-        operations["predictions_30d"] = time.time() - start
-        
-        # Test anomalies
-        start = time.time()
-        self.detect_anomalies_realtime()
-        operations["anomaly_detection"] = time.time() - start
-        
-        total_time = time.time() - start_time
+        durations = {name: time_callable(operation, repeats) for name, operation in operations.items()}
+        medians = {name: float(np.median(d)) for name, d in durations.items()}
+        total_time = sum(medians.values())
         
         return {
-            "operations": operations,
+            "operations": medians,
+            "p90": {name: float(np.percentile(d, 90)) for name, d in durations.items()},
+            "repeats": repeats,
             "total_time": total_time,
             "performance_grade": "🚀 Excellent" if total_time < 1.0 else "⚡ Bon" if total_time < 2.0 else "⚠️ À optimiser"
         }
@@ -7,13 +7,17 @@ Intégration avec pipeline SafetyGraph BehaviorX
 
 import json
 import re
-from typing import Dict, List, Any, Optional
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Any, Iterator, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 import logging
 
 logger = logging.getLogger('KnowledgeExtractor')
 
+# En dessous de ce nombre de documents, le coût de démarrage du pool dépasse le gain
+MIN_DOCUMENTS_FOR_POOL = 8
+
 @dataclass
 class ExtractedKnowledge:
     """Structure des connaissances extraites"""
@@ -32,6 +36,22 @@ class KnowledgeExtractor:
     def __init__(self):
         self.extraction_patterns = self._initialize_patterns()
         self.behavioral_mapping = self._initialize_behavioral_mapping()
+        self._compiled_patterns = self._compile_patterns(self.extraction_patterns)
+    
+    @staticmethod
+    def _compile_patterns(patterns: Dict[str, List[str]]) -> Dict[str, List["re.Pattern"]]:
+        """
+        Précompile chaque pattern une fois par extracteur
+        
+        Les patterns restent séparés et appliqués dans leur ordre d'origine: une
+        alternative unique perdrait les correspondances chevauchantes et changerait
+        la correspondance retenue pour les métriques.
+        """
+        
+        return {
+            family: [re.compile(pattern, re.IGNORECASE) for pattern in family_patterns]
+            for family, family_patterns in patterns.items()
+        }
     
     def _initialize_patterns(self) -> Dict:
         """Initialise patterns d'extraction"""
@@ -102,12 +122,13 @@ class KnowledgeExtractor:
         
         content = research_data.get("raw_content", "")
         topic = research_data.get("topic", "unknown")
+        content_lower = content.lower()  # Une seule passe de minuscules par document
         
         # Extraction insights
         insights = self._extract_insights(content)
         
         # Extraction métriques
-        metrics = self._extract_metrics(content)
+        metrics = self._extract_metrics(content, content_lower)
         
         # Extraction sources
         sources = self._extract_sources(research_data)
@@ -129,35 +150,40 @@ class KnowledgeExtractor:
             extraction_timestamp=datetime.now().isoformat()
         )
     
-    def _extract_insights(self, content: str) -> List[str]:
+    def _extract_insights(self, content: str, limit: Optional[int] = 5) -> List[str]:
         """Extrait insights clés du contenu"""
         
-        insights = []
-        for pattern in self.extraction_patterns["insights"]:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            insights.extend(matches)
-        
-        # Déduplication et nettoyage
-        unique_insights = list(set(insights))
+        # Déduplication (ordre des patterns puis du document) et nettoyage
+        unique_insights = dict.fromkeys(
+            match for regex in self._compiled_patterns["insights"] for match in regex.findall(content))
         cleaned_insights = [insight.strip() for insight in unique_insights if len(insight.strip()) > 10]
         
-        return cleaned_insights[:5]  # Top 5 insights
+        return cleaned_insights[:limit]  # Top 5 insights
     
-    def _extract_metrics(self, content: str) -> Dict[str, Any]:
+    def _extract_metrics(self, content: str, content_lower: Optional[str] = None) -> Dict[str, Any]:
         """Extrait métriques quantifiables"""
         
-        metrics = {}
-        for pattern in self.extraction_patterns["metrics"]:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            for match in matches:
-                if "improvement" in content.lower():
-                    metrics["improvement_rate"] = match
-                elif "reduction" in content.lower():
-                    metrics["reduction_rate"] = match
-                elif "roi" in content.lower():
-                    metrics["roi"] = match
-        
-        return metrics
+        if content_lower is None:
+            content_lower = content.lower()
+        
+        # La clé dépend du document entier: déterminée une seule fois
+        if "improvement" in content_lower:
+            key = "improvement_rate"
+        elif "reduction" in content_lower:
+            key = "reduction_rate"
+        elif "roi" in content_lower:
+            key = "roi"
+        else:
+            return {}
+        
+        # Dernière correspondance du dernier pattern qui correspond (comportement historique)
+        last_match = None
+        for regex in self._compiled_patterns["metrics"]:
+            matches = regex.findall(content)
+            if matches:
+                last_match = matches[-1]
+        
+        return {key: last_match} if last_match is not None else {}
     
     def _extract_sources(self, research_data: Dict) -> List[Dict]:
         """Extrait et structure les sources"""
@@ -271,19 +297,62 @@ class KnowledgeExtractor:
         
         return min(relevance, 1.0)
     
-    def batch_extract_knowledge(self, research_results: List[Dict]) -> List[ExtractedKnowledge]:
-        """Extraction en lot de connaissances"""
-        
-        extracted_knowledge = []
-        for research_data in research_results:
-            try:
-                knowledge = self.extract_from_research(research_data)
-                extracted_knowledge.append(knowledge)
-                logger.info(f"✅ Connaissances extraites pour: {knowledge.topic}")
-            except Exception as e:
-                logger.error(f"❌ Erreur extraction {research_data.get('topic', 'unknown')}: {e}")
-        
-        return extracted_knowledge
+    def batch_extract_knowledge(self, research_results: List[Dict],
+                                max_workers: Optional[int] = None) -> List[ExtractedKnowledge]:
+        """Extraction en lot de connaissances (ordre d'entrée conservé)"""
+        
+        indexed = sorted(self.iter_extract_knowledge(research_results, max_workers), key=lambda item: item[0])
+        return [knowledge for _, knowledge in indexed]
+    
+    def iter_extract_knowledge(self, research_results: List[Dict],
+                               max_workers: Optional[int] = None,
+                               chunk_size: int = 16) -> Iterator[Tuple[int, ExtractedKnowledge]]:
+        """
+        Extraction en lot, résultats diffusés au fil de l'eau
+        
+        Série par défaut; le pool de processus n'est utilisé que si
+        max_workers > 1 est demandé explicitement.
+        
+        Yields:
+            (index dans research_results, connaissance extraite), dans l'ordre
+            d'achèvement. Les documents en erreur sont journalisés et ignorés.
+        """
+        
+        max_workers = max_workers or 1
+        indexed = list(enumerate(research_results))
+        chunks = [indexed[start:start + chunk_size] for start in range(0, len(indexed), chunk_size)]
+        
+        if max_workers == 1 or len(research_results) < MIN_DOCUMENTS_FOR_POOL:
+            for chunk in chunks:
+                yield from self._log_extractions(_extract_chunk(chunk, self))
+            return
+        
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            pending = set()
+            remaining = iter(chunks)
+            
+            # Fenêtre bornée de tâches en vol pour limiter la mémoire
+            for chunk in remaining:
+                pending.add(executor.submit(_extract_chunk, chunk, self))
+                if len(pending) >= max_workers * 2:
+                    break
+            
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from self._log_extractions(future.result())
+                    next_chunk = next(remaining, None)
+                    if next_chunk is not None:
+                        pending.add(executor.submit(_extract_chunk, next_chunk, self))
+    
+    @staticmethod
+    def _log_extractions(results: List[Tuple[int, Optional[ExtractedKnowledge], str]]) -> Iterator[Tuple[int, ExtractedKnowledge]]:
+        for index, knowledge, error in results:
+            if knowledge is None:
+                logger.error(f"❌ Erreur extraction {error}")
+                continue
+            logger.info(f"✅ Connaissances extraites pour: {knowledge.topic}")
+            yield index, knowledge
     
     def export_for_behaviorx_integration(self, knowledge_list: List[ExtractedKnowledge]) -> Dict:
         """Exporte connaissances pour intégration BehaviorX"""
@@ -362,5 +431,17 @@ def validate_knowledge_extraction() -> bool:
         logger.error(f"❌ Erreur validation extracteur: {e}")
         return False
 
+def _extract_chunk(chunk: List[Tuple[int, Dict]],
+                   extractor: KnowledgeExtractor) -> List[Tuple[int, Optional[ExtractedKnowledge], str]]:
+    """Extraction d'un lot de documents (exécutée dans un processus du pool)"""
+    
+    results = []
+    for index, research_data in chunk:
+        try:
+            results.append((index, extractor.extract_from_research(research_data), ""))
+        except Exception as e:
+            results.append((index, None, f"{research_data.get('topic', 'unknown')}: {e}"))
+    return results
+
 # Instance globale
 knowledge_extractor = KnowledgeExtractor()
@@ -1,79 +1,311 @@
 ﻿"""
 Knowledge Graph Safety Agentique - STORM v2.0
 Structuration sémantique pour enrichissement agents
+
+Stockage compact: identifiants entiers, adjacence inverse CSR (concept → agent)
+avec tampon d'arêtes récentes, index secondaires par type et par agent,
+déduplication des concepts par hash de contenu et persistance SQLite incrémentale.
 """
 
-import json
-import networkx as nx
-from typing import Dict, List, Tuple
+import hashlib
+import sqlite3
+from array import array
 from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+NODE_TYPES = ('concept', 'agent', 'sector', 'intervention')
+_TYPE_CODES = {node_type: code for code, node_type in enumerate(NODE_TYPES)}
+_TYPE_GROUPS = {'concept': 'concepts', 'agent': 'agents', 'sector': 'sectors', 'intervention': 'interventions'}
+
+# Compaction CSR dès que le tampon dépasse cette taille (ou la moitié des arêtes compactées)
+MIN_COMPACTION_THRESHOLD = 4096
 
 class SafetyKnowledgeGraph:
-    def __init__(self):
-        self.graph = nx.DiGraph()
-        self.nodes = {
-            'concepts': [],
-            'agents': [],
-            'sectors': [],
-            'interventions': []
-        }
+    def __init__(self, db_path: Optional[str] = None):
+        # Nœuds: identifiant entier = position dans les tableaux
+        self._types = array('b')
+        self._keys: List[str] = []
+        self._payloads: List[str] = []      # contenu (concept) ou fonction (agent)
+        self._topics: List[str] = []
+        self._key_to_id: Dict[str, int] = {}
+        self._ids_by_type: Dict[str, array] = {node_type: array('i') for node_type in NODE_TYPES}
+        self._concept_by_hash: Dict[str, int] = {}
+        
+        # Arêtes concept → agent ('enhances'), dans l'ordre d'insertion
+        self._edge_src = array('i')
+        self._edge_dst = array('i')
+        self._edge_set: Set[Tuple[int, int]] = set()
+        
+        # Adjacence inverse CSR + tampon des arêtes non compactées
+        self._csr_indptr = array('i', [0])
+        self._csr_indices = array('i')
+        self._pending_in: Dict[int, List[int]] = {}
+        self._pending_count = 0
         
-    def add_semantic_knowledge(self, extraction_data: Dict):
+        # Export incrémental
+        self._enhancements_cache: Dict[int, List[str]] = {}
+        self._dirty_agents: Set[int] = set()
+        self._exported_nodes = 0
+        
+        # Persistance incrémentale
+        self.db_path = Path(db_path) if db_path else None
+        self._persisted_nodes = 0
+        self._persisted_edges = 0
+        
+        if self.db_path and self.db_path.exists():
+            self._load_from_disk()
+    
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+    
+    def add_semantic_knowledge(self, extraction_data: Dict) -> List[int]:
         '''Ajoute connaissances extraites au graphe'''
         
         topic = extraction_data.get('topic', 'unknown')
         insights = extraction_data.get('insights', [])
         agents = extraction_data.get('agent_mappings', {})
         
-        # Ajouter nœuds concepts
-        for insight in insights:
-            concept_id = f"concept_{len(self.nodes['concepts'])}"
-            self.graph.add_node(concept_id, type='concept', content=insight, topic=topic)
-            self.nodes['concepts'].append(concept_id)
+        # Ajouter nœuds concepts (dédupliqués par contenu)
+        concept_ids = list(dict.fromkeys(self._add_concept(insight, topic) for insight in insights))
         
-        # Ajouter relations agents
+        # Ajouter relations agents: uniquement les concepts de cette extraction
         for agent, function in agents.items():
-            agent_id = f"agent_{agent}"
-            if not self.graph.has_node(agent_id):
-                self.graph.add_node(agent_id, type='agent', function=function)
-                self.nodes['agents'].append(agent_id)
+            agent_node = self._key_to_id.get(f"agent_{agent}")
+            if agent_node is None:
+                agent_node = self._add_node('agent', f"agent_{agent}", function, topic)
             
-            # Créer relations concept → agent
-            for concept_id in self.nodes['concepts'][-len(insights):]:
-                self.graph.add_edge(concept_id, agent_id, relationship='enhances')
+            for concept_id in concept_ids:
+                self._add_edge(concept_id, agent_node)
+        
+        return concept_ids
+    
+    def _add_node(self, node_type: str, key: str, payload: str, topic: str) -> int:
+        node_id = len(self._keys)
+        self._types.append(_TYPE_CODES[node_type])
+        self._keys.append(key)
+        self._payloads.append(payload)
+        self._topics.append(topic)
+        self._key_to_id[key] = node_id
+        self._ids_by_type[node_type].append(node_id)
+        self._csr_indptr.append(self._csr_indptr[-1])
+        return node_id
+    
+    def _add_concept(self, content: str, topic: str) -> int:
+        content_hash = self._content_hash(content)
+        node_id = self._concept_by_hash.get(content_hash)
+        if node_id is None:
+            node_id = self._add_node('concept', f"concept_{len(self._ids_by_type['concept'])}", content, topic)
+            self._concept_by_hash[content_hash] = node_id
+        return node_id
+    
+    def _add_edge(self, src: int, dst: int):
+        if (src, dst) in self._edge_set:
+            return
+        
+        self._edge_set.add((src, dst))
+        self._edge_src.append(src)
+        self._edge_dst.append(dst)
+        self._pending_in.setdefault(dst, []).append(src)
+        self._pending_count += 1
+        self._enhancements_cache.pop(dst, None)
+        self._dirty_agents.add(dst)
+        
+        if self._pending_count >= max(MIN_COMPACTION_THRESHOLD, len(self._csr_indices) // 2):
+            self.compact()
+    
+    @staticmethod
+    def _content_hash(content: str) -> str:
+        normalized = " ".join(content.split()).lower()
+        return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+    
+    def compact(self):
+        '''Reconstruit l'adjacence CSR à partir de toutes les arêtes (tri par comptage)'''
+        
+        node_count = len(self._keys)
+        indptr = array('i', [0]) * (node_count + 1)
+        for dst in self._edge_dst:
+            indptr[dst + 1] += 1
+        for i in range(node_count):
+            indptr[i + 1] += indptr[i]
+        
+        cursor = array('i', indptr[:-1]) if node_count else array('i')
+        indices = array('i', [0]) * len(self._edge_dst)
+        for src, dst in zip(self._edge_src, self._edge_dst):
+            indices[cursor[dst]] = src
+            cursor[dst] += 1
+        
+        self._csr_indptr = indptr
+        self._csr_indices = indices
+        self._pending_in.clear()
+        self._pending_count = 0
+    
+    # ------------------------------------------------------------------
+    # Requêtes
+    # ------------------------------------------------------------------
+    
+    def _predecessors(self, node_id: int) -> List[int]:
+        start, end = self._csr_indptr[node_id], self._csr_indptr[node_id + 1]
+        return list(self._csr_indices[start:end]) + self._pending_in.get(node_id, [])
+    
+    def _in_degree(self, node_id: int) -> int:
+        return (self._csr_indptr[node_id + 1] - self._csr_indptr[node_id]
+                + len(self._pending_in.get(node_id, ())))
     
     def get_agent_enhancements(self, agent_id: str) -> List[str]:
         '''Récupère améliorations pour un agent spécifique'''
         
-        enhancements = []
-        for node in self.graph.predecessors(f"agent_{agent_id}"):
-            if self.graph.nodes[node]['type'] == 'concept':
-                enhancements.append(self.graph.nodes[node]['content'])
+        node_id = self._key_to_id.get(f"agent_{agent_id}")
+        if node_id is None:
+            return []
         
-        return enhancements
+        enhancements = self._enhancements_cache.get(node_id)
+        if enhancements is None:
+            enhancements = [
+                self._payloads[node] for node in self._predecessors(node_id)
+                if self._types[node] == _TYPE_CODES['concept']
+            ]
+            self._enhancements_cache[node_id] = enhancements
+        
+        return list(enhancements)
+    
+    def get_nodes_by_type(self, node_type: str) -> List[str]:
+        '''Identifiants des nœuds d'un type (index secondaire)'''
+        return [self._keys[node_id] for node_id in self._ids_by_type[node_type]]
+    
+    @property
+    def nodes(self) -> Dict[str, List[str]]:
+        '''Nœuds par groupe (concepts, agents, sectors, interventions)'''
+        return {group: self.get_nodes_by_type(node_type) for node_type, group in _TYPE_GROUPS.items()}
     
-    def calculate_enhancement_impact(self) -> Dict[str, float]:
+    def number_of_nodes(self) -> int:
+        return len(self._keys)
+    
+    def number_of_edges(self) -> int:
+        return len(self._edge_src)
+    
+    def calculate_enhancement_impact(self, agent_nodes: Optional[List[int]] = None) -> Dict[str, float]:
         '''Calcule impact améliorations par agent'''
         
-        impact_scores = {}
-        for agent_node in self.nodes['agents']:
-            enhancement_count = len(list(self.graph.predecessors(agent_node)))
-            impact_scores[agent_node] = min(enhancement_count * 0.1, 0.8)
+        if agent_nodes is None:
+            agent_nodes = self._ids_by_type['agent']
         
-        return impact_scores
+        return {
+            self._keys[node_id]: min(self._in_degree(node_id) * 0.1, 0.8)
+            for node_id in agent_nodes
+        }
+    
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
     
-    def export_knowledge_structure(self) -> Dict:
-        '''Exporte structure pour Safety Agentique'''
+    def export_knowledge_structure(self, incremental: bool = False) -> Dict:
+        '''
+        Exporte structure pour Safety Agentique
         
-        return {
+        En mode incrémental, seuls les agents dont le sous-graphe a changé
+        depuis le dernier export sont sérialisés.
+        '''
+        
+        if incremental:
+            agent_nodes = sorted(self._dirty_agents)
+        else:
+            agent_nodes = list(self._ids_by_type['agent'])
+        
+        export = {
             'timestamp': datetime.now().isoformat(),
             'graph_version': '2.0',
-            'total_nodes': self.graph.number_of_nodes(),
-            'total_edges': self.graph.number_of_edges(),
-            'node_types': {k: len(v) for k, v in self.nodes.items()},
+            'total_nodes': self.number_of_nodes(),
+            'total_edges': self.number_of_edges(),
+            'node_types': {group: len(self._ids_by_type[node_type]) for node_type, group in _TYPE_GROUPS.items()},
             'agent_enhancements': {
-                agent: self.get_agent_enhancements(agent.replace('agent_', ''))
-                for agent in self.nodes['agents']
+                self._keys[node_id]: self.get_agent_enhancements(self._keys[node_id].replace('agent_', '', 1))
+                for node_id in agent_nodes
             },
-            'impact_predictions': self.calculate_enhancement_impact()
+            'impact_predictions': self.calculate_enhancement_impact(agent_nodes)
         }
+        
+        if incremental:
+            export['incremental'] = True
+            export['new_nodes_since'] = self._exported_nodes
+            export['new_nodes'] = self.number_of_nodes() - self._exported_nodes
+        
+        self._dirty_agents.clear()
+        self._exported_nodes = self.number_of_nodes()
+        return export
+    
+    # ------------------------------------------------------------------
+    # Persistance
+    # ------------------------------------------------------------------
+    
+    def save(self, db_path: Optional[str] = None) -> Dict[str, int]:
+        '''Écrit sur disque les nœuds et arêtes ajoutés depuis la dernière sauvegarde'''
+        
+        if db_path:
+            if self.db_path != Path(db_path):
+                self._persisted_nodes = self._persisted_edges = 0
+            self.db_path = Path(db_path)
+        if self.db_path is None:
+            raise ValueError("Aucun chemin de persistance configuré")
+        
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        new_nodes = range(self._persisted_nodes, len(self._keys))
+        new_edges = range(self._persisted_edges, len(self._edge_src))
+        
+        with sqlite3.connect(str(self.db_path)) as conn:
+            self._create_tables(conn)
+            conn.executemany(
+                'INSERT OR REPLACE INTO kg_nodes VALUES (?, ?, ?, ?, ?)',
+                ((i, NODE_TYPES[self._types[i]], self._keys[i], self._payloads[i], self._topics[i])
+                 for i in new_nodes)
+            )
+            conn.executemany(
+                'INSERT OR IGNORE INTO kg_edges VALUES (?, ?, ?)',
+                ((i, self._edge_src[i], self._edge_dst[i]) for i in new_edges)
+            )
+        
+        self._persisted_nodes = len(self._keys)
+        self._persisted_edges = len(self._edge_src)
+        return {'nodes_written': len(new_nodes), 'edges_written': len(new_edges)}
+    
+    @classmethod
+    def load(cls, db_path: str) -> 'SafetyKnowledgeGraph':
+        '''Recharge un graphe persisté'''
+        return cls(db_path=db_path)
+    
+    @staticmethod
+    def _create_tables(conn: sqlite3.Connection):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS kg_nodes (
+                id INTEGER PRIMARY KEY,
+                type TEXT NOT NULL,
+                key TEXT NOT NULL,
+                payload TEXT,
+                topic TEXT
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS kg_edges (
+                id INTEGER PRIMARY KEY,
+                src INTEGER NOT NULL,
+                dst INTEGER NOT NULL
+            )
+        ''')
+    
+    def _load_from_disk(self):
+        with sqlite3.connect(str(self.db_path)) as conn:
+            self._create_tables(conn)
+            for _, node_type, key, payload, topic in conn.execute('SELECT * FROM kg_nodes ORDER BY id'):
+                node_id = self._add_node(node_type, key, payload, topic)
+                if node_type == 'concept':
+                    self._concept_by_hash[self._content_hash(payload)] = node_id
+            for _, src, dst in conn.execute('SELECT * FROM kg_edges ORDER BY id'):
+                self._edge_set.add((src, dst))
+                self._edge_src.append(src)
+                self._edge_dst.append(dst)
+        
+        self.compact()
+        self._persisted_nodes = self._exported_nodes = len(self._keys)
+        self._persisted_edges = len(self._edge_src)
+
@@ -12,16 +12,26 @@ import logging
 from typing import Dict, List, Optional
 from datetime import datetime
 
+try:
+    from .research_cache import ResearchCache
+except ImportError:
+    from research_cache import ResearchCache
+
 logger = logging.getLogger('MCPPerplexity')
 
+# Version du prompt de recherche: à incrémenter à chaque modification de
+# _build_prompt pour invalider les résultats en cache
+PROMPT_VERSION = "v1"
+
 class PerplexityMCPConnector:
     """Connecteur MCP pour API Perplexity"""
     
-    def __init__(self):
+    def __init__(self, cache: Optional[ResearchCache] = None):
         self.api_key = os.getenv("PERPLEXITY_API_KEY", "demo_key")
         self.base_url = "https://api.perplexity.ai"
         self.model = "llama-3.1-sonar-large-128k-online"
         self.session = None
+        self.cache = cache
         
     async def __aenter__(self):
         self.session = aiohttp.ClientSession()
@@ -31,11 +41,23 @@ class PerplexityMCPConnector:
         if self.session:
             await self.session.close()
     
-    async def search_topic(self, topic: str, context: str = "safety") -> Dict:
-        """Recherche un topic via API Perplexity"""
+    async def search_topic(self, topic: str, context: str = "safety",
+                           force_refresh: bool = False) -> Dict:
+        """Recherche un topic via API Perplexity (cache disque si configuré)"""
+        
+        if self.cache is None:
+            return await self._search_topic_api(topic, context)
         
-        # Construction prompt optimisé pour sécurité
-        prompt = f'''
+        return await self.cache.get_or_research(
+            topic, context, PROMPT_VERSION,
+            lambda: self._search_topic_api(topic, context),
+            force_refresh=force_refresh,
+            should_cache=lambda result: not result.get("api_fallback")
+        )
+    
+    def _build_prompt(self, topic: str, context: str) -> str:
+        """Construction prompt optimisé pour sécurité"""
+        return f'''
         Recherchez des informations evidence-based sur: {topic}
         
         Context: {context} workplace safety and health
@@ -48,6 +70,11 @@ class PerplexityMCPConnector:
         
         Format de réponse structuré requis.
         '''
+    
+    async def _search_topic_api(self, topic: str, context: str) -> Dict:
+        """Appel API Perplexity sans cache"""
+        
+        prompt = self._build_prompt(topic, context)
         
         # Simulation réponse API (remplacer par vraie intégration)
         if self.api_key == "demo_key":
@@ -77,11 +104,17 @@ class PerplexityMCPConnector:
                     return self._parse_api_response(data, topic)
                 else:
                     logger.error(f"API Error: {response.status}")
-                    return await self._simulate_api_response(topic)
+                    return await self._api_fallback_response(topic)
                     
         except Exception as e:
             logger.error(f"Erreur API Perplexity: {e}")
-            return await self._simulate_api_response(topic)
+            return await self._api_fallback_response(topic)
+    
+    async def _api_fallback_response(self, topic: str) -> Dict:
+        """Réponse simulée après échec API (jamais mise en cache)"""
+        result = await self._simulate_api_response(topic)
+        result["api_fallback"] = True
+        return result
     
     async def _simulate_api_response(self, topic: str) -> Dict:
         """Simulation réponse API pour tests"""
@@ -142,13 +175,44 @@ class PerplexityMCPConnector:
 # FONCTIONS UTILITAIRES
 # ===================================================================
 
-async def batch_research(topics: List[str], context: str = "safety") -> List[Dict]:
-    """Recherche en lot de topics"""
+async def batch_research(topics: List[str], context: str = "safety",
+                         max_concurrency: int = 5,
+                         cache: Optional[ResearchCache] = None) -> List[Dict]:
+    """
+    Recherche en lot de topics
+    
+    Les topics en double ne sont recherchés qu'une fois et au plus
+    `max_concurrency` requêtes sont en cours simultanément. Les résultats
+    sont retournés dans l'ordre de `topics`.
+    """
+    
+    unique_topics = list(dict.fromkeys(topics))
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    
+    async with PerplexityMCPConnector(cache=cache) as connector:
+        
+        async def search(topic: str) -> Dict:
+            async with semaphore:
+                return await connector.search_topic(topic, context)
+        
+        results = await asyncio.gather(*[search(topic) for topic in unique_topics])
+    
+    by_topic = dict(zip(unique_topics, results))
+    return [by_topic[topic] for topic in topics]
+
+async def refresh_stale_topics(topics: List[str], cache: ResearchCache,
+                               context: str = "safety",
+                               max_concurrency: int = 5) -> Dict[str, Dict]:
+    """Recherche uniquement les topics absents ou expirés du cache"""
+    
+    stale = cache.stale_topics(topics, context, PROMPT_VERSION)
+    logger.info(f"🔄 {len(stale)}/{len(set(topics))} topics à rafraîchir")
+    
+    if not stale:
+        return {}
     
-    async with PerplexityMCPConnector() as connector:
-        tasks = [connector.search_topic(topic, context) for topic in topics]
-        results = await asyncio.gather(*tasks)
-        return results
+    results = await batch_research(stale, context, max_concurrency=max_concurrency, cache=cache)
+    return dict(zip(stale, results))
 
 def validate_mcp_integration() -> bool:
     """Valide intégration MCP Perplexity"""
@@ -0,0 +1,166 @@
+"""
+Research Cache - SafetyGraph BehaviorX STORM
+============================================
+Cache persistant SQLite des résultats de recherche STORM / Perplexity
+Clé: (topic, context, version du prompt) - fraîcheur contrôlée par TTL
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger('ResearchCache')
+
+DEFAULT_DB_PATH = Path(__file__).parent.parent.parent / "data" / "storm_research_cache.db"
+DEFAULT_TTL_HOURS = 24 * 7
+
+class _RechercheAbandonnee(Exception):
+    """Le meneur d'une recherche partagée a été annulé avant d'obtenir un résultat"""
+
+
+class ResearchCache:
+    """Cache disque des recherches avec TTL et déduplication des requêtes en cours"""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, ttl_hours: float = DEFAULT_TTL_HOURS):
+        self.db_path = Path(db_path)
+        self.ttl_seconds = ttl_hours * 3600
+        self.stats = {"hits": 0, "misses": 0, "deduplicated": 0, "writes": 0}
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS research_results (
+                cache_key TEXT PRIMARY KEY,
+                topic TEXT NOT NULL,
+                context TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                result TEXT NOT NULL,
+                stored_at REAL NOT NULL
+            )
+        ''')
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_research_topic ON research_results (topic, context, prompt_version)'
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(topic: str, context: str, prompt_version: str) -> str:
+        """Clé stable d'une recherche"""
+        raw = "\x1f".join([topic.strip().lower(), context.strip().lower(), prompt_version])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, topic: str, context: str, prompt_version: str,
+            max_age_seconds: Optional[float] = None) -> Optional[Dict]:
+        """Résultat frais en cache, sinon None"""
+        max_age = self.ttl_seconds if max_age_seconds is None else max_age_seconds
+        row = self._conn.execute(
+            'SELECT result FROM research_results WHERE cache_key = ? AND stored_at > ?',
+            (self.make_key(topic, context, prompt_version), time.time() - max_age)
+        ).fetchone()
+
+        if row is None:
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["hits"] += 1
+        return json.loads(row[0])
+
+    def set(self, topic: str, context: str, prompt_version: str, result: Dict):
+        """Enregistre un résultat de recherche"""
+        self._conn.execute(
+            'INSERT OR REPLACE INTO research_results VALUES (?, ?, ?, ?, ?, ?)',
+            (self.make_key(topic, context, prompt_version), topic, context, prompt_version,
+             json.dumps(result, ensure_ascii=False, default=str), time.time())
+        )
+        self._conn.commit()
+        self.stats["writes"] += 1
+
+    def stale_topics(self, topics: Iterable[str], context: str, prompt_version: str,
+                     max_age_seconds: Optional[float] = None) -> List[str]:
+        """Topics absents ou expirés (sans doublons, ordre conservé)"""
+        max_age = self.ttl_seconds if max_age_seconds is None else max_age_seconds
+        unique_topics = list(dict.fromkeys(topics))
+        keys = {self.make_key(t, context, prompt_version): t for t in unique_topics}
+
+        fresh = set()
+        key_list = list(keys)
+        for i in range(0, len(key_list), 500):  # Limite variables SQLite
+            chunk = key_list[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f'SELECT cache_key FROM research_results WHERE cache_key IN ({placeholders}) AND stored_at > ?',
+                (*chunk, time.time() - max_age)
+            ).fetchall()
+            fresh.update(keys[row[0]] for row in rows)
+
+        return [t for t in unique_topics if t not in fresh]
+
+    async def get_or_research(self, topic: str, context: str, prompt_version: str,
+                              researcher: Callable[[], Awaitable[Dict]],
+                              force_refresh: bool = False,
+                              should_cache: Optional[Callable[[Dict], bool]] = None) -> Dict:
+        """
+        Résultat en cache ou recherche unique partagée
+
+        Les appels concurrents pour un même (topic, context, version) attendent
+        la même recherche en cours au lieu de solliciter l'API plusieurs fois.
+        """
+        if not force_refresh:
+            cached = self.get(topic, context, prompt_version)
+            if cached is not None:
+                return cached
+
+        key = self.make_key(topic, context, prompt_version)
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.stats["deduplicated"] += 1
+            try:
+                return await asyncio.shield(pending)
+            except _RechercheAbandonnee:
+                # Meneur annulé: un des appelants en attente reprend la recherche
+                return await self.get_or_research(topic, context, prompt_version, researcher,
+                                                  force_refresh, should_cache)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await researcher()
+        except asyncio.CancelledError:
+            # Ne pas propager l'annulation du meneur aux appelants dédupliqués
+            future.set_exception(_RechercheAbandonnee(key))
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Évite l'avertissement si aucun appelant en attente
+            raise
+        else:
+            if should_cache is None or should_cache(result):
+                self.set(topic, context, prompt_version, result)
+            future.set_result(result)
+            return result
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def purge_expired(self) -> int:
+        """Supprime les entrées expirées"""
+        cursor = self._conn.execute(
+            'DELETE FROM research_results WHERE stored_at <= ?', (time.time() - self.ttl_seconds,)
+        )
+        self._conn.commit()
+        return cursor.rowcount
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiques d'utilisation du cache"""
+        entries = self._conn.execute('SELECT COUNT(*) FROM research_results').fetchone()[0]
+        return {**self.stats, "entries": entries, "ttl_hours": self.ttl_seconds / 3600}
+
+    def close(self):
+        self._conn.close()
@@ -14,6 +14,11 @@ from datetime import datetime
 from typing import Dict, List, Optional, Any
 from pathlib import Path
 
+try:
+    from .research_cache import ResearchCache
+except ImportError:
+    from research_cache import ResearchCache
+
 # Configuration logging
 logging.basicConfig(
     level=logging.INFO,
@@ -21,16 +26,28 @@ logging.basicConfig(
 )
 logger = logging.getLogger('STORMLauncher')
 
+# Version du protocole de recherche STORM (invalide le cache disque si modifiée)
+STORM_PROMPT_VERSION = "storm_v2.0"
+
 class STORMLauncher:
     """Moteur de recherche STORM pour SafetyGraph BehaviorX"""
     
-    def __init__(self, config_path: Optional[str] = None):
+    def __init__(self, config_path: Optional[str] = None,
+                 persistent_cache: Optional[ResearchCache] = None):
         self.config_path = config_path or "config/storm_optimization.yml"
         self.session_id = f"storm_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        self.research_cache = {}
+        self.research_cache = {}  # Résultats de la session courante
+        self._persistent_cache = persistent_cache  # Cache disque ouvert à la première recherche
         
         logger.info(f"🚀 STORM Launcher initialisé - Session: {self.session_id}")
     
+    @property
+    def persistent_cache(self) -> ResearchCache:
+        """Cache disque injecté, sinon cache par défaut ouvert à la première utilisation"""
+        if self._persistent_cache is None:
+            self._persistent_cache = ResearchCache()
+        return self._persistent_cache
+    
     def load_topics_configuration(self) -> Dict:
         """Charge les 100 topics Safety Culture Builder"""
         
@@ -161,8 +178,22 @@ class STORMLauncher:
         logger.info(f"✅ Configuration 100 topics chargée - 10 catégories")
         return topics_config
     
-    async def execute_research(self, topic: str, category: str = None) -> Dict:
-        """Exécute une recherche STORM pour un topic donné"""
+    async def execute_research(self, topic: str, category: str = None,
+                               force_refresh: bool = False) -> Dict:
+        """Exécute une recherche STORM pour un topic donné (cache disque consulté d'abord)"""
+        
+        research_result = await self.persistent_cache.get_or_research(
+            topic, category or "", STORM_PROMPT_VERSION,
+            lambda: self._run_storm_research(topic, category),
+            force_refresh=force_refresh
+        )
+        
+        # Cache du résultat
+        self.research_cache[topic] = research_result
+        return research_result
+    
+    async def _run_storm_research(self, topic: str, category: str = None) -> Dict:
+        """Recherche STORM effective (sans cache)"""
         
         logger.info(f"🔍 Démarrage recherche STORM: {topic}")
         
@@ -191,12 +222,45 @@ class STORMLauncher:
             ]
         }
         
-        # Cache du résultat
-        self.research_cache[topic] = research_result
-        
         logger.info(f"✅ Recherche terminée: {topic} - {research_result['sources_found']} sources")
         return research_result
     
+    async def refresh_stale_topics(self, max_concurrency: int = 5,
+                                   force_refresh: bool = False) -> Dict[str, Dict]:
+        """
+        Recherche uniquement les topics absents ou expirés du cache disque
+        
+        Returns:
+            Résultats des topics rafraîchis, par topic
+        """
+        
+        topics_config = self.load_topics_configuration()
+        category_by_topic = {
+            topic: category
+            for category, topics in topics_config.items()
+            for topic in topics
+        }
+        
+        if force_refresh:
+            stale = list(category_by_topic)
+        else:
+            stale = [
+                topic
+                for category, topics in topics_config.items()
+                for topic in self.persistent_cache.stale_topics(topics, category, STORM_PROMPT_VERSION)
+            ]
+        
+        logger.info(f"🔄 {len(stale)}/{len(category_by_topic)} topics STORM à rafraîchir")
+        
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        
+        async def research(topic: str) -> Dict:
+            async with semaphore:
+                return await self.execute_research(topic, category_by_topic[topic], force_refresh=True)
+        
+        results = await asyncio.gather(*[research(topic) for topic in stale])
+        return dict(zip(stale, results))
+    
     def enrich_cnesst_data(self, incident_data: Dict, research_results: List[Dict]) -> Dict:
         """Enrichit données CNESST avec insights STORM"""
         
@@ -8,36 +8,22 @@ import streamlit as st
 from typing import Dict, List, Any, Tuple
 from datetime import datetime, timedelta
 
+try:
+    from .gamification_ledger import BADGES, LEVELS, get_gamification_ledger, niveau_pour_points
+except ImportError:
+    from gamification_ledger import BADGES, LEVELS, get_gamification_ledger, niveau_pour_points
+
 class SafetyGamificationEngine:
     """Moteur gamification SafetyGraph"""
     
-    # Système progression
-    LEVELS = {
-        1: {"name": "🌱 Apprenti Sécurité", "threshold": 0, "color": "#81c784"},
-        2: {"name": "🔍 Observateur", "threshold": 50, "color": "#66bb6a"}, 
-        3: {"name": "🎯 Expert Terrain", "threshold": 150, "color": "#4caf50"},
-        4: {"name": "🛡️ Gardien Sécurité", "threshold": 300, "color": "#388e3c"},
-        5: {"name": "🌟 Maître SafetyGraph", "threshold": 500, "color": "#2e7d32"}
-    }
-    
-    # Badges système
-    BADGES = {
-        "premier_pas": {"icon": "🚀", "name": "Premier Pas", "desc": "Première observation"},
-        "oeil_lynx": {"icon": "👀", "name": "Œil de Lynx", "desc": "10 observations en 1 semaine"},
-        "flash_reporter": {"icon": "⚡", "name": "Flash Reporter", "desc": "Signalement <2min"},
-        "mentor": {"icon": "🎓", "name": "Mentor", "desc": "Formation d'un collègue"},
-        "innovateur": {"icon": "💡", "name": "Innovateur", "desc": "Suggestion adoptée"},
-        "zero_incident": {"icon": "🏆", "name": "Zéro Incident", "desc": "Équipe 0 incident 3 mois"}
-    }
+    # Système progression et badges (définis par le registre de points)
+    LEVELS = LEVELS
+    BADGES = BADGES
     
     @staticmethod
     def calculate_user_level(total_points: int):
         """Calcul niveau utilisateur selon points"""
-        current_level = 1
-        for level, info in SafetyGamificationEngine.LEVELS.items():
-            if total_points >= info['threshold']:
-                current_level = level
-        return current_level, SafetyGamificationEngine.LEVELS[current_level]
+        return niveau_pour_points(total_points)
     
     @staticmethod
     def render_gamification_sidebar():
@@ -45,29 +31,35 @@ class SafetyGamificationEngine:
         with st.sidebar:
             st.markdown("### 🎮 Votre Progression")
             
-            # Simulation données utilisateur
-            user_points = st.session_state.get('user_points', 127)
+            # Profil lu dans les projections du registre (aucune relecture de l'historique)
+            user_id = st.session_state.get('user_id', 'utilisateur_demo')
+            profile = get_gamification_ledger().user_profile(user_id)
+            user_points = profile['total_points']
             
             # Niveau actuel
-            level, level_info = SafetyGamificationEngine.calculate_user_level(user_points)
+            level, level_info = profile['level'], profile['level_info']
             
             # Affichage niveau
             st.markdown(f"**{level_info['name']}**")
-            st.caption(f"Niveau {level}")
+            st.caption(f"Niveau {level}" + (f" | Rang #{profile['rank']}" if profile['rank'] else ""))
             
             # Points totaux
-            st.metric("⭐ Points Totaux", f"{user_points:,}", "+12 aujourd'hui")
+            st.metric("⭐ Points Totaux", f"{user_points:,}", f"+{profile['points_today']} aujourd'hui")
             
             # Badges récents
             st.markdown("#### 🏆 Badges Récents")
-            st.markdown("🚀 **Premier Pas** - Récent")
-            st.markdown("👀 **Œil de Lynx** - Cette semaine")
+            if profile['badges']:
+                for badge in profile['badges'][:3]:
+                    st.markdown(f"{badge['icon']} **{badge['name']}** - {badge['obtenu_le'][:10]}")
+            else:
+                st.caption("Aucun badge pour l'instant")
             
             # Défi du jour
+            done, target = profile['challenge']['done'], profile['challenge']['target']
             st.markdown("#### 🎯 Défi du Jour")
-            st.info("🎪 **Complétez 10 observations cette semaine**")
-            st.progress(0.8)
-            st.caption("Récompense: +50 points | 8/10 complété")
+            st.info(f"🎪 **Complétez {target} observations cette semaine**")
+            st.progress(done / target)
+            st.caption(f"Récompense: +50 points | {done}/{target} complété")
 
 if __name__ == "__main__":
     print("✅ SafetyGraph Gamification Engine créé")
@@ -0,0 +1,407 @@
+﻿"""
+SafetyGraph Gamification Ledger
+===============================
+Registre de points append-only (SQLite) indépendant de l'état UI.
+Totaux par travailleur, équipe et site maintenus à l'arrivée de chaque
+événement, classements top-K sur fenêtres glissantes sans relecture complète,
+badges évalués comme prédicats de fenêtre en flux, niveaux par bissection.
+"""
+
+import bisect
+import json
+import sqlite3
+import threading
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+LEDGER_PATH_DEFAUT = Path(__file__).parent.parent.parent / "data" / "gamification_ledger.db"
+
+POINTS_EVENEMENTS = {
+    "observation": 10,
+    "signalement": 15,
+    "mentorat": 25,
+    "suggestion_adoptee": 40,
+}
+
+FENETRES_CLASSEMENT = {"7j": 7, "30j": 30}   # jours calendaires, jour courant inclus
+PORTEES = ("user", "team", "site")
+
+LEVELS = {
+    1: {"name": "🌱 Apprenti Sécurité", "threshold": 0, "color": "#81c784"},
+    2: {"name": "🔍 Observateur", "threshold": 50, "color": "#66bb6a"},
+    3: {"name": "🎯 Expert Terrain", "threshold": 150, "color": "#4caf50"},
+    4: {"name": "🛡️ Gardien Sécurité", "threshold": 300, "color": "#388e3c"},
+    5: {"name": "🌟 Maître SafetyGraph", "threshold": 500, "color": "#2e7d32"}
+}
+_NIVEAUX = sorted(LEVELS)
+_SEUILS = [LEVELS[n]["threshold"] for n in _NIVEAUX]
+
+BADGES = {
+    "premier_pas": {"icon": "🚀", "name": "Premier Pas", "desc": "Première observation"},
+    "oeil_lynx": {"icon": "👀", "name": "Œil de Lynx", "desc": "10 observations en 1 semaine"},
+    "flash_reporter": {"icon": "⚡", "name": "Flash Reporter", "desc": "Signalement <2min"},
+    "mentor": {"icon": "🎓", "name": "Mentor", "desc": "Formation d'un collègue"},
+    "innovateur": {"icon": "💡", "name": "Innovateur", "desc": "Suggestion adoptée"},
+    "zero_incident": {"icon": "🏆", "name": "Zéro Incident", "desc": "Équipe 0 incident 3 mois"}
+}
+
+
+def niveau_pour_points(total_points: int) -> Tuple[int, Dict]:
+    """Niveau atteint (bissection sur les seuils triés)"""
+    niveau = _NIVEAUX[max(0, bisect.bisect_right(_SEUILS, total_points) - 1)]
+    return niveau, LEVELS[niveau]
+
+
+@dataclass(frozen=True)
+class EvenementPoints:
+    seq: int
+    horodatage: datetime
+    user_id: str
+    team: str
+    site: str
+    kind: str
+    points: int
+    details: Dict[str, Any]
+
+
+@dataclass(frozen=True)
+class RegleBadge:
+    """
+    Prédicat de fenêtre évalué à l'arrivée d'un événement
+
+    Attribué quand `count` événements du type `kind` (satisfaisant `condition`)
+    tombent dans `window` (None = sans limite de temps).
+    """
+    badge_id: str
+    kind: str
+    count: int = 1
+    window: Optional[timedelta] = None
+    condition: Optional[Callable[[EvenementPoints], bool]] = None
+
+
+REGLES_BADGES = (
+    RegleBadge("premier_pas", "observation"),
+    RegleBadge("oeil_lynx", "observation", count=10, window=timedelta(days=7)),
+    RegleBadge("flash_reporter", "signalement",
+               condition=lambda e: float(e.details.get("delai_secondes", float("inf"))) < 120),
+    RegleBadge("mentor", "mentorat"),
+    RegleBadge("innovateur", "suggestion_adoptee"),
+)
+
+# Défi hebdomadaire affiché dans la barre latérale (même mécanisme de fenêtre)
+DEFI_HEBDO = RegleBadge("defi_hebdo", "observation", count=10, window=timedelta(days=7))
+
+
+class ClassementIncremental:
+    """
+    Scores entiers avec ordre maintenu par paliers
+
+    Chaque score distinct a un ensemble d'identifiants; la liste triée des
+    scores distincts ne change qu'à l'apparition/disparition d'un palier.
+    Lecture top-K: parcours des paliers les plus hauts seulement.
+    Non synchronisé: GamificationLedger sérialise écritures et lectures sous son verrou.
+    """
+
+    def __init__(self):
+        self.scores: Dict[str, int] = {}
+        self._paliers: Dict[int, set] = {}
+        self._ordre: List[int] = []   # scores distincts croissants
+
+    def ajouter(self, identifiant: str, delta: int):
+        if not delta:
+            return
+        ancien = self.scores.get(identifiant)
+        if ancien is not None:
+            palier = self._paliers[ancien]
+            palier.discard(identifiant)
+            if not palier:
+                del self._paliers[ancien]
+                del self._ordre[bisect.bisect_left(self._ordre, ancien)]
+        nouveau = (ancien or 0) + delta
+        if nouveau == 0:
+            self.scores.pop(identifiant, None)
+            return
+        self.scores[identifiant] = nouveau
+        palier = self._paliers.get(nouveau)
+        if palier is None:
+            self._paliers[nouveau] = palier = set()
+            bisect.insort(self._ordre, nouveau)
+        palier.add(identifiant)
+
+    def top(self, k: int = 10) -> List[Tuple[str, int]]:
+        resultat = []
+        for score in reversed(self._ordre):
+            for identifiant in sorted(self._paliers[score]):
+                resultat.append((identifiant, score))
+                if len(resultat) == k:
+                    return resultat
+        return resultat
+
+    def rang(self, identifiant: str) -> Optional[int]:
+        score = self.scores.get(identifiant)
+        if score is None:
+            return None
+        i = bisect.bisect_right(self._ordre, score)
+        return 1 + sum(len(self._paliers[s]) for s in self._ordre[i:])
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+
+class GamificationLedger:
+    """Registre de points événementiel et projections incrémentales"""
+
+    def __init__(self, chemin=LEDGER_PATH_DEFAUT, fenetres: Optional[Dict[str, int]] = None,
+                 regles: Iterable[RegleBadge] = REGLES_BADGES, clock: Callable[[], datetime] = datetime.now):
+        self.chemin = str(chemin)
+        self.clock = clock
+        if self.chemin != ":memory:":
+            Path(self.chemin).parent.mkdir(parents=True, exist_ok=True)
+        self.fenetres = dict(FENETRES_CLASSEMENT if fenetres is None else fenetres)
+        self.regles = tuple(regles) + (DEFI_HEBDO,)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.chemin, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS points_ledger (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                horodatage TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                team TEXT NOT NULL,
+                site TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                points INTEGER NOT NULL,
+                details TEXT NOT NULL DEFAULT '{}'
+            );
+            CREATE TRIGGER IF NOT EXISTS points_ledger_no_update BEFORE UPDATE ON points_ledger
+            BEGIN SELECT RAISE(ABORT, 'points_ledger est append-only'); END;
+            CREATE TRIGGER IF NOT EXISTS points_ledger_no_delete BEFORE DELETE ON points_ledger
+            BEGIN SELECT RAISE(ABORT, 'points_ledger est append-only'); END;
+        ''')
+        self._conn.commit()
+        self._reinitialiser_projections()
+        self._rejouer()
+
+    # ------------------------------------------------------------------
+    # Projections
+    # ------------------------------------------------------------------
+
+    def _reinitialiser_projections(self):
+        self.totaux = {portee: ClassementIncremental() for portee in PORTEES}
+        self.classements = {(nom, portee): ClassementIncremental() for nom in self.fenetres for portee in PORTEES}
+        self._jours: "OrderedDict[date, Dict[str, Counter]]" = OrderedDict()
+        self._jour_courant: Optional[date] = None
+        self._fenetres_regles: Dict[Tuple[str, str], deque] = {}
+        self._compteurs_regles: Counter = Counter()
+        self.badges: Dict[str, Dict[str, datetime]] = {}
+        self.equipe: Dict[str, str] = {}
+        self.site: Dict[str, str] = {}
+        self.nombre_evenements = 0
+        self.dernier_seq = 0
+
+    def _rejouer(self):
+        curseur = self._conn.execute(
+            "SELECT seq, horodatage, user_id, team, site, kind, points, details FROM points_ledger ORDER BY seq")
+        for ligne in curseur:
+            self._appliquer(EvenementPoints(ligne[0], datetime.fromisoformat(ligne[1]), ligne[2], ligne[3],
+                                            ligne[4], ligne[5], ligne[6], json.loads(ligne[7])))
+
+    def _avancer_jour(self, jour: date):
+        """Retire des fenêtres les jours qui en sortent"""
+        precedent, self._jour_courant = self._jour_courant, jour
+        for nom, duree in self.fenetres.items():
+            debut_ancien = precedent - timedelta(days=duree - 1)
+            debut = jour - timedelta(days=duree - 1)
+            for j, agregats in self._jours.items():
+                if j >= debut:
+                    break
+                if j >= debut_ancien:
+                    for portee in PORTEES:
+                        classement = self.classements[(nom, portee)]
+                        for identifiant, points in agregats[portee].items():
+                            classement.ajouter(identifiant, -points)
+        limite = jour - timedelta(days=max(self.fenetres.values(), default=1) - 1)
+        while self._jours and next(iter(self._jours)) < limite:
+            self._jours.popitem(last=False)
+
+    def _appliquer(self, e: EvenementPoints) -> List[str]:
+        self.nombre_evenements += 1
+        self.dernier_seq = e.seq
+        self.equipe[e.user_id] = e.team
+        self.site[e.user_id] = e.site
+        cles = {"user": e.user_id, "team": e.team, "site": e.site}
+        for portee, identifiant in cles.items():
+            self.totaux[portee].ajouter(identifiant, e.points)
+
+        jour = e.horodatage.date()
+        if self._jour_courant is None:
+            self._jour_courant = jour
+        elif jour > self._jour_courant:
+            self._avancer_jour(jour)
+        agregats = self._jours.get(jour)
+        if agregats is None and jour > self._jour_courant - timedelta(days=max(self.fenetres.values(), default=1)):
+            agregats = self._jours[jour] = {portee: Counter() for portee in PORTEES}
+            if jour < self._jour_courant:
+                # Jour antidaté: rétablir l'ordre chronologique des agrégats
+                self._jours = OrderedDict(sorted(self._jours.items()))
+        if agregats is not None:
+            for portee, identifiant in cles.items():
+                agregats[portee][identifiant] += e.points
+            for nom, duree in self.fenetres.items():
+                if jour > self._jour_courant - timedelta(days=duree):
+                    for portee, identifiant in cles.items():
+                        self.classements[(nom, portee)].ajouter(identifiant, e.points)
+        return self._evaluer_badges(e)
+
+    def _synchroniser(self, maintenant: Optional[datetime]) -> datetime:
+        """Fait glisser les fenêtres jusqu'à `maintenant` (horloge par défaut) avant une lecture"""
+        maintenant = maintenant or self.clock()
+        with self._lock:
+            if self._jour_courant is not None and maintenant.date() > self._jour_courant:
+                self._avancer_jour(maintenant.date())
+        return maintenant
+
+    def _evaluer_badges(self, e: EvenementPoints) -> List[str]:
+        nouveaux = []
+        obtenus = self.badges.setdefault(e.user_id, {})
+        for regle in self.regles:
+            if regle.kind != e.kind or (regle.condition is not None and not regle.condition(e)):
+                continue
+            cle = (e.user_id, regle.badge_id)
+            if regle.window is None:
+                self._compteurs_regles[cle] += 1
+                atteint = self._compteurs_regles[cle] >= regle.count
+            else:
+                # Les `count` derniers horodatages suffisent pour décider du prédicat
+                fenetre = self._fenetres_regles.get(cle)
+                if fenetre is None:
+                    fenetre = self._fenetres_regles[cle] = deque(maxlen=regle.count)
+                fenetre.append(e.horodatage)
+                atteint = len(fenetre) == regle.count and max(fenetre) - min(fenetre) <= regle.window
+            if atteint and regle.badge_id in BADGES and regle.badge_id not in obtenus:
+                obtenus[regle.badge_id] = e.horodatage
+                nouveaux.append(regle.badge_id)
+        return nouveaux
+
+    # ------------------------------------------------------------------
+    # Écriture
+    # ------------------------------------------------------------------
+
+    def _preparer(self, user_id: str, kind: str, team: Optional[str], site: Optional[str],
+                  horodatage: Optional[datetime], points: Optional[int], details: Optional[Dict]) -> Tuple:
+        if points is None:
+            if kind not in POINTS_EVENEMENTS:
+                raise ValueError(f"Type d'événement inconnu: {kind}")
+            points = POINTS_EVENEMENTS[kind]
+        return ((horodatage or datetime.now()).isoformat(), user_id,
+                team or self.equipe.get(user_id, "sans_equipe"), site or self.site.get(user_id, "site_principal"),
+                kind, int(points), json.dumps(details or {}, ensure_ascii=False))
+
+    def record(self, user_id: str, kind: str, team: Optional[str] = None, site: Optional[str] = None,
+               horodatage: Optional[datetime] = None, points: Optional[int] = None,
+               details: Optional[Dict] = None) -> Dict[str, Any]:
+        """Ajoute un événement au registre et met à jour les projections"""
+        with self._lock:
+            ligne = self._preparer(user_id, kind, team, site, horodatage, points, details)
+            seq = self._conn.execute(
+                "INSERT INTO points_ledger (horodatage, user_id, team, site, kind, points, details) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", ligne).lastrowid
+            self._conn.commit()
+            evenement = EvenementPoints(seq, datetime.fromisoformat(ligne[0]), *ligne[1:6], json.loads(ligne[6]))
+            nouveaux = self._appliquer(evenement)
+            total = self.totaux["user"].scores.get(user_id, 0)
+            return {"seq": seq, "points": evenement.points, "total": total,
+                    "level": niveau_pour_points(total)[0], "new_badges": nouveaux}
+
+    def record_many(self, evenements: Iterable[Dict[str, Any]]) -> int:
+        """Import en lot (une transaction); retourne le nombre d'événements ajoutés"""
+        with self._lock:
+            lignes = [self._preparer(e["user_id"], e["kind"], e.get("team"), e.get("site"), e.get("horodatage"),
+                                     e.get("points"), e.get("details")) for e in evenements]
+            if not lignes:
+                return 0
+            # seq attribué par AUTOINCREMENT (sûr face à un autre écrivain sur la même base)
+            seqs = [self._conn.execute(
+                "INSERT INTO points_ledger (horodatage, user_id, team, site, kind, points, details) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", ligne).lastrowid for ligne in lignes]
+            self._conn.commit()
+            for seq, ligne in zip(seqs, lignes):
+                self._appliquer(EvenementPoints(seq, datetime.fromisoformat(ligne[0]), *ligne[1:6],
+                                                json.loads(ligne[6])))
+            return len(lignes)
+
+    # ------------------------------------------------------------------
+    # Lecture (projections en mémoire)
+    # ------------------------------------------------------------------
+
+    def total(self, identifiant: str, portee: str = "user") -> int:
+        with self._lock:
+            return self.totaux[portee].scores.get(identifiant, 0)
+
+    def leaderboard(self, portee: str = "user", fenetre: Optional[str] = None, k: int = 10,
+                    maintenant: Optional[datetime] = None) -> List[Dict]:
+        # Verrou du registre: record() modifie les paliers lus par top()
+        with self._lock:
+            if fenetre is not None:
+                self._synchroniser(maintenant)
+            classement = self.totaux[portee] if fenetre is None else self.classements[(fenetre, portee)]
+            top = classement.top(k)
+        return [{"rank": i, "id": identifiant, "points": points} for i, (identifiant, points) in enumerate(top, 1)]
+
+    def points_du_jour(self, user_id: str, jour: Optional[date] = None,
+                       maintenant: Optional[datetime] = None) -> int:
+        with self._lock:
+            maintenant = self._synchroniser(maintenant)
+            agregats = self._jours.get(jour or maintenant.date())
+            return agregats["user"].get(user_id, 0) if agregats else 0
+
+    def progression_defi(self, user_id: str, maintenant: Optional[datetime] = None) -> Tuple[int, int]:
+        """Observations des 7 derniers jours vers l'objectif du défi hebdomadaire"""
+        reference = maintenant or self.clock()
+        with self._lock:
+            fenetre = list(self._fenetres_regles.get((user_id, DEFI_HEBDO.badge_id), ()))
+        return sum(1 for h in fenetre if reference - h <= DEFI_HEBDO.window), DEFI_HEBDO.count
+
+    def user_profile(self, user_id: str, maintenant: Optional[datetime] = None) -> Dict[str, Any]:
+        # Profil cohérent: toutes les projections lues sous le même verrou (réentrant)
+        with self._lock:
+            maintenant = self._synchroniser(maintenant)
+            total = self.total(user_id)
+            niveau, info = niveau_pour_points(total)
+            suivant = LEVELS.get(niveau + 1)
+            badges = sorted(self.badges.get(user_id, {}).items(), key=lambda b: b[1], reverse=True)
+            fait, objectif = self.progression_defi(user_id, maintenant)
+            return {
+                "user_id": user_id,
+                "team": self.equipe.get(user_id),
+                "site": self.site.get(user_id),
+                "total_points": total,
+                "points_today": self.points_du_jour(user_id, maintenant=maintenant),
+                "level": niveau,
+                "level_info": info,
+                "next_level_threshold": suivant["threshold"] if suivant else None,
+                "rank": self.totaux["user"].rang(user_id),
+                "badges": [dict(BADGES[b], id=b, obtenu_le=h.isoformat()) for b, h in badges],
+                "challenge": {"done": min(fait, objectif), "target": objectif}
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_ledger: Optional[GamificationLedger] = None
+_ledger_lock = threading.Lock()
+
+
+def get_gamification_ledger(chemin=None) -> GamificationLedger:
+    """Registre partagé par le processus (rejoué une fois au démarrage)"""
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = GamificationLedger(chemin or LEDGER_PATH_DEFAUT)
+        return _ledger
@@ -4,5 +4,11 @@ Utilitaires communs pour les agents
 """
 
 from .llm_factory import get_llm, LLMType
+from .llm_generation import PromptCache, StreamingGenerator, StubChatModel, get_prompt_cache
+from .observability import (LatencyHistogram, MetricsRegistry, Tracer, export_json, export_prometheus,
+                            get_metrics, get_tracer, traced_node)
+from .job_scheduler import CronTrigger, JobScheduler, JobType
 
-__all__ = ["get_llm", "LLMType"]
\ No newline at end of file
+__all__ = ["get_llm", "LLMType", "PromptCache", "StreamingGenerator", "StubChatModel", "get_prompt_cache",
+           "LatencyHistogram", "MetricsRegistry", "Tracer", "export_json", "export_prometheus",
+           "get_metrics", "get_tracer", "traced_node", "CronTrigger", "JobScheduler", "JobType"]
\ No newline at end of file
@@ -0,0 +1,541 @@
+"""Ordonnanceur de tâches local: file SQLite durable, déclencheurs cron avec rattrapage, pools par type"""
+
+import asyncio
+import inspect
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Set
+
+from .observability import get_metrics
+
+logger = logging.getLogger(__name__)
+
+JOBS_DB_DEFAUT = Path(__file__).parent.parent.parent / "data" / "jobs.db"
+
+# Politiques de rattrapage des déclenchements manqués (arrêt, redémarrage, boucle en retard)
+#   skip   : seules les occurrences encore dans la marge de tolérance sont lancées
+#   latest : une seule exécution pour la dernière occurrence manquée
+#   all    : toutes les occurrences manquées (au plus max_catchup)
+CATCHUP_POLICIES = ("skip", "latest", "all")
+STATUTS_ACTIFS = ("queued", "running")
+STATUTS = STATUTS_ACTIFS + ("succeeded", "failed", "timeout", "skipped")
+
+CRON_ALIAS = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+}
+_CHAMPS_CRON = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+def _iso(moment: datetime) -> str:
+    # Format fixe: l'ordre lexicographique SQLite suit l'ordre chronologique
+    return moment.isoformat(sep=" ", timespec="microseconds")
+
+
+def _champ_cron(texte: str, bas: int, haut: int) -> FrozenSet[int]:
+    valeurs = set()
+    for partie in texte.split(","):
+        plage, barre, pas = partie.partition("/")
+        pas = int(pas) if barre else 1
+        if plage == "*":
+            debut, fin = bas, haut
+        elif "-" in plage:
+            debut, fin = (int(v) for v in plage.split("-", 1))
+        else:
+            debut = int(plage)
+            fin = haut if barre else debut
+        if pas < 1 or not bas <= debut <= fin <= haut:
+            raise ValueError(f"champ cron invalide: {partie!r} (bornes {bas}-{haut})")
+        valeurs.update(range(debut, fin + 1, pas))
+    return frozenset(valeurs)
+
+
+class CronTrigger:
+    """
+    Expression cron à 5 champs (minute heure jour mois jour_semaine), heure locale
+
+    Supporte *, listes, plages, pas (*/15, 1-5/2) et les alias @hourly/@daily/
+    @weekly/@monthly. Jour de semaine: 0 ou 7 = dimanche. Comme cron, si jour
+    du mois et jour de semaine sont tous deux restreints, l'un OU l'autre suffit.
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression.strip()
+        champs = CRON_ALIAS.get(self.expression, self.expression).split()
+        if len(champs) != 5:
+            raise ValueError(f"expression cron à 5 champs attendue: {expression!r}")
+        self.minutes, self.heures, self.jours, self.mois, jours_semaine = (
+            _champ_cron(texte, bas, haut) for texte, (bas, haut) in zip(champs, _CHAMPS_CRON))
+        self.jours_semaine = frozenset(j % 7 for j in jours_semaine)
+        self._minutes_triees = sorted(self.minutes)
+        self._jour_restreint = champs[2] != "*"
+        self._semaine_restreinte = champs[4] != "*"
+
+    def _jour_ok(self, moment: datetime) -> bool:
+        jour = moment.day in self.jours
+        semaine = (moment.weekday() + 1) % 7 in self.jours_semaine
+        if self._jour_restreint and self._semaine_restreinte:
+            return jour or semaine
+        return jour and semaine
+
+    def next_after(self, moment: datetime) -> datetime:
+        """Première occurrence strictement postérieure à moment"""
+        t = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limite = t + timedelta(days=366 * 5)
+        while t <= limite:
+            if t.month not in self.mois:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._jour_ok(t):
+                t = (t + timedelta(days=1)).replace(hour=0, minute=0)
+            elif t.hour not in self.heures:
+                t = (t + timedelta(hours=1)).replace(minute=0)
+            elif t.minute not in self.minutes:
+                suivante = next((m for m in self._minutes_triees if m > t.minute), None)
+                t = t.replace(minute=suivante) if suivante is not None else (t + timedelta(hours=1)).replace(minute=0)
+            else:
+                return t
+        raise ValueError(f"aucune occurrence pour {self.expression!r}")
+
+    def __repr__(self) -> str:
+        return f"CronTrigger({self.expression!r})"
+
+
+@dataclass
+class JobType:
+    """Type de tâche: handler et politique d'exécution (pool, délai, reprises)"""
+    name: str
+    handler: Callable[..., Any]
+    concurrency: int = 1
+    timeout: Optional[float] = None       # secondes; None = illimité
+    max_attempts: int = 3
+    backoff_base: float = 30.0
+    backoff_max: float = 3600.0
+    jitter: float = 0.5                   # fraction aléatoire du délai de reprise
+
+    def backoff(self, tentative: int, rng: random.Random) -> float:
+        """Délai exponentiel plafonné; la part aléatoire désynchronise les reprises"""
+        delai = min(self.backoff_max, self.backoff_base * 2 ** (tentative - 1))
+        return delai * (1 - self.jitter) + rng.uniform(0, delai * self.jitter)
+
+
+@dataclass
+class Schedule:
+    name: str
+    job_type: str
+    trigger: CronTrigger
+    catchup: str = "latest"
+    payload: Optional[Dict[str, Any]] = None
+    grace: timedelta = timedelta(minutes=5)
+    max_catchup: int = 10
+
+
+class JobScheduler:
+    """
+    File de tâches durable et exécuteur asyncio
+
+    Chaque exécution est une ligne de job_runs: queued → running → succeeded /
+    failed / timeout. Les échecs repassent en queued avec available_at décalé
+    (backoff) tant qu'il reste des tentatives. Un index unique partiel sur
+    dedup_key interdit deux exécutions actives d'une même planification: le
+    déclenchement en chevauchement est consigné en skipped. Au démarrage, les
+    exécutions restées running (processus interrompu) sont remises en file.
+    """
+
+    def __init__(self, chemin=JOBS_DB_DEFAUT, clock: Callable[[], datetime] = datetime.now,
+                 poll_interval: float = 60.0, seed: Optional[int] = None):
+        self.chemin = str(chemin)
+        if self.chemin != ":memory:":
+            Path(self.chemin).parent.mkdir(parents=True, exist_ok=True)
+        self.clock = clock
+        self.poll_interval = poll_interval
+        self.types: Dict[str, JobType] = {}
+        self.schedules: Dict[str, Schedule] = {}
+        self._actifs: Counter = Counter()
+        self._taches: Dict[int, asyncio.Task] = {}
+        self._fils_orphelins: Set[asyncio.Future] = set()   # handlers synchrones au délai dépassé
+        self._rng = random.Random(seed)
+        self._lock = threading.RLock()
+        self._reveil: Optional[asyncio.Event] = None
+        self._boucle: Optional[asyncio.AbstractEventLoop] = None
+        self._arret = False
+        self._conn = sqlite3.connect(self.chemin, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS job_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_type TEXT NOT NULL,
+                schedule TEXT,
+                dedup_key TEXT,
+                payload TEXT NOT NULL DEFAULT '{}',
+                status TEXT NOT NULL,
+                attempt INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL DEFAULT 1,
+                scheduled_for TEXT,
+                enqueued_at TEXT NOT NULL,
+                available_at TEXT NOT NULL,
+                started_at TEXT,
+                finished_at TEXT,
+                duration_s REAL,
+                error TEXT
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS job_runs_dedup ON job_runs(dedup_key)
+                WHERE status IN ('queued', 'running');
+            CREATE INDEX IF NOT EXISTS job_runs_file ON job_runs(status, job_type, available_at);
+            CREATE INDEX IF NOT EXISTS job_runs_historique ON job_runs(job_type, id);
+            CREATE TABLE IF NOT EXISTS job_schedules (
+                name TEXT PRIMARY KEY,
+                job_type TEXT NOT NULL,
+                cron TEXT NOT NULL,
+                last_fire TEXT NOT NULL,
+                next_fire TEXT
+            );
+        ''')
+        self._conn.commit()
+
+    # ------------------------------------------------------------------
+    # Déclaration
+    # ------------------------------------------------------------------
+
+    def register(self, name: str, handler: Callable[..., Any], **options) -> JobType:
+        """Déclare un type de tâche; options: concurrency, timeout, max_attempts, backoff_*, jitter"""
+        job_type = JobType(name, handler, **options)
+        if job_type.concurrency < 1 or job_type.max_attempts < 1:
+            raise ValueError("concurrency et max_attempts doivent être >= 1")
+        self.types[name] = job_type
+        return job_type
+
+    def schedule(self, name: str, job_type: str, cron: str, catchup: str = "latest",
+                 payload: Optional[Dict[str, Any]] = None, grace: timedelta = timedelta(minutes=5),
+                 max_catchup: int = 10) -> Schedule:
+        """
+        Planification cron persistante
+
+        Le dernier déclenchement est conservé en base: après un redémarrage,
+        les occurrences manquées depuis sont traitées selon catchup.
+        """
+        if catchup not in CATCHUP_POLICIES:
+            raise ValueError(f"catchup doit être parmi {CATCHUP_POLICIES}")
+        if job_type not in self.types:
+            # Sans handler, les exécutions resteraient en file et bloqueraient la dedup_key
+            raise ValueError(f"type de job non enregistré: {job_type!r}")
+        planification = Schedule(name, job_type, CronTrigger(cron), catchup, payload, grace, max_catchup)
+        maintenant = self.clock()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO job_schedules (name, job_type, cron, last_fire, next_fire) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET job_type = excluded.job_type, cron = excluded.cron",
+                (name, job_type, planification.trigger.expression, _iso(maintenant),
+                 _iso(planification.trigger.next_after(maintenant))))
+            self._conn.commit()
+        self.schedules[name] = planification
+        return planification
+
+    # ------------------------------------------------------------------
+    # File
+    # ------------------------------------------------------------------
+
+    def enqueue(self, job_type: str, payload: Optional[Dict[str, Any]] = None, dedup_key: Optional[str] = None,
+                scheduled_for: Optional[datetime] = None, delay: float = 0.0,
+                schedule: Optional[str] = None) -> Optional[int]:
+        """Ajoute une exécution; None si une exécution active porte déjà dedup_key"""
+        maintenant = self.clock()
+        type_declare = self.types.get(job_type)
+        max_attempts = type_declare.max_attempts if type_declare else 1
+        valeurs = (job_type, schedule, dedup_key, json.dumps(payload or {}, ensure_ascii=False),
+                   max_attempts, _iso(scheduled_for) if scheduled_for else None, _iso(maintenant))
+        with self._lock:
+            try:
+                curseur = self._conn.execute(
+                    "INSERT INTO job_runs (job_type, schedule, dedup_key, payload, status, max_attempts, "
+                    "scheduled_for, enqueued_at, available_at) VALUES (?, ?, ?, ?, 'queued', ?, ?, ?, ?)",
+                    valeurs + (_iso(maintenant + timedelta(seconds=delay)),))
+                self._conn.commit()
+            except sqlite3.IntegrityError:
+                actif = self._conn.execute(
+                    "SELECT id, status FROM job_runs WHERE dedup_key = ? AND status IN ('queued', 'running')",
+                    (dedup_key,)).fetchone()
+                self._conn.execute(
+                    "INSERT INTO job_runs (job_type, schedule, dedup_key, payload, status, max_attempts, "
+                    "scheduled_for, enqueued_at, available_at, finished_at, error) "
+                    "VALUES (?, ?, ?, ?, 'skipped', ?, ?, ?, ?, ?, ?)",
+                    valeurs + (_iso(maintenant), _iso(maintenant),
+                               f"chevauchement avec l'exécution #{actif['id']} ({actif['status']})"))
+                self._conn.commit()
+                get_metrics().incr("job_runs_total", job=job_type, status="skipped")
+                logger.warning(f"⏭️ {job_type}: exécution #{actif['id']} encore {actif['status']}, "
+                               f"déclenchement ignoré ({dedup_key})")
+                return None
+        self._signaler()
+        return curseur.lastrowid
+
+    def fire_due(self, now: Optional[datetime] = None) -> List[int]:
+        """Met en file les occurrences cron échues depuis le dernier déclenchement"""
+        now = now or self.clock()
+        lancees = []
+        for planification in self.schedules.values():
+            with self._lock:
+                ligne = self._conn.execute("SELECT last_fire FROM job_schedules WHERE name = ?",
+                                           (planification.name,)).fetchone()
+            occurrences = deque(maxlen=planification.max_catchup)
+            prochaine = planification.trigger.next_after(datetime.fromisoformat(ligne["last_fire"]))
+            while prochaine <= now:
+                occurrences.append(prochaine)
+                prochaine = planification.trigger.next_after(prochaine)
+            if not occurrences:
+                continue
+            if planification.catchup == "all":
+                retenues = list(occurrences)
+            elif planification.catchup == "latest":
+                retenues = [occurrences[-1]]
+            else:
+                retenues = [o for o in occurrences if now - o <= planification.grace][-1:]
+            if len(retenues) < len(occurrences) or now - occurrences[-1] > planification.grace:
+                logger.info(f"⏰ {planification.name}: {len(occurrences)} occurrence(s) manquée(s), "
+                            f"{len(retenues)} rattrapée(s) (politique {planification.catchup})")
+            for occurrence in retenues:
+                # En rattrapage "all", chaque occurrence est distincte; sinon une seule active à la fois
+                cle = f"{planification.name}@{_iso(occurrence)}" if planification.catchup == "all" \
+                    else planification.name
+                run_id = self.enqueue(planification.job_type, planification.payload, dedup_key=cle,
+                                      scheduled_for=occurrence, schedule=planification.name)
+                if run_id is not None:
+                    lancees.append(run_id)
+            with self._lock:
+                self._conn.execute("UPDATE job_schedules SET last_fire = ?, next_fire = ? WHERE name = ?",
+                                   (_iso(occurrences[-1]), _iso(prochaine), planification.name))
+                self._conn.commit()
+        return lancees
+
+    def recover(self) -> int:
+        """Remet en file les exécutions interrompues (running sans processus) au démarrage"""
+        maintenant = _iso(self.clock())
+        with self._lock:
+            self._conn.execute(
+                "UPDATE job_runs SET status = 'failed', finished_at = ?, error = 'interrompue (redémarrage)' "
+                "WHERE status = 'running' AND attempt >= max_attempts", (maintenant,))
+            reprises = self._conn.execute(
+                "UPDATE job_runs SET status = 'queued', available_at = ?, error = 'interrompue (redémarrage)' "
+                "WHERE status = 'running'", (maintenant,)).rowcount
+            self._conn.commit()
+        if reprises:
+            logger.warning(f"♻️ {reprises} exécution(s) interrompue(s) remise(s) en file")
+        return reprises
+
+    # ------------------------------------------------------------------
+    # Exécution
+    # ------------------------------------------------------------------
+
+    def _signaler(self):
+        if self._reveil is not None and self._boucle is not None:
+            self._boucle.call_soon_threadsafe(self._reveil.set)
+
+    def _dispatch(self) -> int:
+        """Démarre les exécutions disponibles dans la limite de chaque pool"""
+        maintenant = _iso(self.clock())
+        demarrees = 0
+        for job_type in self.types.values():
+            libres = job_type.concurrency - self._actifs[job_type.name]
+            if libres <= 0:
+                continue
+            with self._lock:
+                lignes = self._conn.execute(
+                    "SELECT id, payload, attempt, max_attempts FROM job_runs WHERE status = 'queued' "
+                    "AND job_type = ? AND available_at <= ? ORDER BY available_at, id LIMIT ?",
+                    (job_type.name, maintenant, libres)).fetchall()
+                for ligne in lignes:
+                    self._conn.execute(
+                        "UPDATE job_runs SET status = 'running', attempt = attempt + 1, started_at = ?, "
+                        "finished_at = NULL WHERE id = ?", (maintenant, ligne["id"]))
+                self._conn.commit()
+            for ligne in lignes:
+                self._actifs[job_type.name] += 1
+                self._taches[ligne["id"]] = asyncio.get_running_loop().create_task(
+                    self._executer(ligne["id"], job_type, json.loads(ligne["payload"]),
+                                   ligne["attempt"] + 1, ligne["max_attempts"]))
+                demarrees += 1
+        return demarrees
+
+    async def _executer(self, run_id: int, job_type: JobType, payload: Dict[str, Any],
+                        tentative: int, max_attempts: int):
+        debut = time.perf_counter_ns()
+        statut, erreur = "succeeded", None
+        fil = None
+        try:
+            if inspect.iscoroutinefunction(job_type.handler):
+                appel = job_type.handler(**payload)
+            else:
+                # Un handler synchrone bloquant tourne hors de la boucle; au délai
+                # dépassé son résultat est ignoré mais le thread ne peut être interrompu:
+                # il garde sa place dans le pool jusqu'à son retour effectif
+                fil = asyncio.ensure_future(asyncio.to_thread(job_type.handler, **payload))
+                appel = asyncio.shield(fil)
+            await asyncio.wait_for(appel, job_type.timeout)
+        except asyncio.TimeoutError:
+            statut, erreur = "timeout", f"délai dépassé ({job_type.timeout}s)"
+        except asyncio.CancelledError:
+            # Arrêt du service: la tentative n'est pas imputée à la tâche
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE job_runs SET status = 'queued', attempt = attempt - 1, error = 'annulée (arrêt)' "
+                    "WHERE id = ?", (run_id,))
+                self._conn.commit()
+            raise
+        except Exception as e:
+            statut, erreur = "failed", f"{type(e).__name__}: {e}"
+        finally:
+            self._taches.pop(run_id, None)
+            if fil is not None and not fil.done():
+                self._fils_orphelins.add(fil)
+                fil.add_done_callback(lambda f: self._liberer_fil(job_type.name, f))
+            else:
+                self._actifs[job_type.name] -= 1
+
+        duree_ns = time.perf_counter_ns() - debut
+        maintenant = self.clock()
+        with self._lock:
+            if statut != "succeeded" and tentative < max_attempts:
+                delai = job_type.backoff(tentative, self._rng)
+                self._conn.execute(
+                    "UPDATE job_runs SET status = 'queued', available_at = ?, duration_s = ?, error = ? "
+                    "WHERE id = ?", (_iso(maintenant + timedelta(seconds=delai)), duree_ns / 1e9, erreur, run_id))
+                logger.warning(f"🔁 {job_type.name} #{run_id} tentative {tentative}/{max_attempts}: {erreur} "
+                               f"- reprise dans {delai:.1f}s")
+            else:
+                self._conn.execute(
+                    "UPDATE job_runs SET status = ?, finished_at = ?, duration_s = ?, error = ? WHERE id = ?",
+                    (statut, _iso(maintenant), duree_ns / 1e9, erreur, run_id))
+                if statut == "succeeded":
+                    logger.info(f"✅ {job_type.name} #{run_id} terminée en {duree_ns / 1e9:.2f}s")
+                else:
+                    logger.error(f"❌ {job_type.name} #{run_id} abandonnée après {tentative} tentative(s): {erreur}")
+            self._conn.commit()
+        metriques = get_metrics()
+        metriques.observe("job_run", duree_ns, job=job_type.name, status=statut)
+        metriques.incr("job_runs_total", job=job_type.name, status=statut)
+        if self._reveil is not None:
+            self._reveil.set()
+
+    def _liberer_fil(self, nom: str, fil: asyncio.Future):
+        """Retour d'un thread abandonné au délai: sa place de pool redevient libre"""
+        self._fils_orphelins.discard(fil)
+        self._actifs[nom] -= 1
+        if not fil.cancelled() and fil.exception() is not None:
+            logger.warning(f"⚠️ {nom}: thread abandonné terminé en erreur: {fil.exception()!r}")
+        if self._reveil is not None:
+            self._reveil.set()
+
+    def _prochain_reveil(self) -> float:
+        """Secondes jusqu'au prochain déclenchement cron ou à la prochaine reprise"""
+        # Seules les échéances futures comptent: une exécution disponible mais
+        # bloquée par son pool est relancée au réveil signalé par la fin d'une autre
+        maintenant = self.clock()
+        with self._lock:
+            echeances = [self._conn.execute(
+                "SELECT MIN(available_at) FROM job_runs WHERE status = 'queued' AND available_at > ?",
+                (_iso(maintenant),)).fetchone()[0]]
+        echeances += [_iso(p.trigger.next_after(maintenant)) for p in self.schedules.values()]
+        attente = self.poll_interval
+        for echeance in filter(None, echeances):
+            attente = min(attente, (datetime.fromisoformat(echeance) - maintenant).total_seconds())
+        return max(0.0, attente)
+
+    async def run_pending(self, now: Optional[datetime] = None) -> int:
+        """Déclenche les occurrences échues et exécute tout ce qui est disponible jusqu'à inactivité"""
+        self.fire_due(now)
+        demarrees = 0
+        while True:
+            demarrees += self._dispatch()
+            if not self._taches and not self._fils_orphelins:
+                return demarrees
+            await asyncio.wait([*self._taches.values(), *self._fils_orphelins], return_when=asyncio.FIRST_COMPLETED)
+
+    async def run(self):
+        """Boucle de service: rattrapage au démarrage puis réveil à la prochaine échéance"""
+        self._boucle = asyncio.get_running_loop()
+        self._reveil = asyncio.Event()
+        self._arret = False
+        self.recover()
+        try:
+            while not self._arret:
+                self._reveil.clear()
+                self.fire_due()
+                self._dispatch()
+                try:
+                    await asyncio.wait_for(self._reveil.wait(), timeout=self._prochain_reveil())
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for tache in list(self._taches.values()):
+                tache.cancel()
+            if self._taches:
+                await asyncio.gather(*self._taches.values(), return_exceptions=True)
+            self._reveil = self._boucle = None
+
+    def stop(self):
+        """Demande l'arrêt de run(); les exécutions en cours sont annulées et remises en file"""
+        self._arret = True
+        self._signaler()
+
+    # ------------------------------------------------------------------
+    # Historique
+    # ------------------------------------------------------------------
+
+    def history(self, job_type: Optional[str] = None, status: Optional[str] = None,
+                schedule: Optional[str] = None, since: Optional[datetime] = None,
+                limit: int = 50) -> List[Dict[str, Any]]:
+        """Exécutions les plus récentes d'abord, filtrables par type, statut, planification et date"""
+        filtres, parametres = [], []
+        for colonne, valeur in (("job_type", job_type), ("status", status), ("schedule", schedule)):
+            if valeur is not None:
+                filtres.append(f"{colonne} = ?")
+                parametres.append(valeur)
+        if since is not None:
+            filtres.append("enqueued_at >= ?")
+            parametres.append(_iso(since))
+        clause = f"WHERE {' AND '.join(filtres)}" if filtres else ""
+        with self._lock:
+            lignes = self._conn.execute(f"SELECT * FROM job_runs {clause} ORDER BY id DESC LIMIT ?",
+                                        parametres + [limit]).fetchall()
+        return [dict(ligne, payload=json.loads(ligne["payload"])) for ligne in lignes]
+
+    def stats(self, since: Optional[datetime] = None) -> Dict[str, Dict[str, Any]]:
+        """Agrégats par type: décompte par statut, durée moyenne et dernier succès"""
+        clause, parametres = ("WHERE enqueued_at >= ?", [_iso(since)]) if since else ("", [])
+        resultat: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for ligne in self._conn.execute(
+                    f"SELECT job_type, status, COUNT(*), AVG(duration_s), MAX(finished_at) FROM job_runs {clause} "
+                    f"GROUP BY job_type, status", parametres):
+                entree = resultat.setdefault(ligne[0], {"counts": dict.fromkeys(STATUTS, 0),
+                                                        "avg_duration_s": None, "last_success": None})
+                entree["counts"][ligne[1]] = ligne[2]
+                if ligne[1] == "succeeded":
+                    entree["avg_duration_s"] = ligne[3]
+                    entree["last_success"] = ligne[4]
+        return resultat
+
+    def purge(self, older_than: timedelta) -> int:
+        """Supprime l'historique terminé plus ancien que older_than"""
+        limite = _iso(self.clock() - older_than)
+        with self._lock:
+            supprimees = self._conn.execute(
+                "DELETE FROM job_runs WHERE status NOT IN ('queued', 'running') AND finished_at < ?",
+                (limite,)).rowcount
+            self._conn.commit()
+        return supprimees
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
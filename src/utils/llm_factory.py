@@ -6,11 +6,13 @@ from langchain_anthropic import ChatAnthropic
 from langchain_openai import ChatOpenAI
 from langchain.schema.language_model import BaseLanguageModel
 from ..core.config import config
+from .llm_generation import StubChatModel
 
 class LLMType(Enum):
     """Types de LLM supportés"""
     CLAUDE = "claude"
     OPENAI = "openai"
+    STUB = "stub"
     AUTO = "auto"
 
 def get_llm(
@@ -35,7 +37,9 @@ def get_llm(
     
     # Détermination automatique du LLM
     if llm_type == LLMType.AUTO:
-        if config.has_claude_api:
+        if config.use_stub_llm:
+            llm_type = LLMType.STUB
+        elif config.has_claude_api:
             llm_type = LLMType.CLAUDE
         elif config.has_openai_api:
             llm_type = LLMType.OPENAI
@@ -66,6 +70,10 @@ def get_llm(
             max_tokens=max_tokens
         )
     
+    # Modèle local déterministe (aucun appel réseau)
+    elif llm_type == LLMType.STUB:
+        return StubChatModel(temperature=temperature)
+    
     else:
         raise ValueError(f"Type LLM non supporté: {llm_type}")
 
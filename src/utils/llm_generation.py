@@ -0,0 +1,288 @@
+"""Couche de génération LLM: streaming, cache persistant et modèle local déterministe"""
+
+import hashlib
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from .observability import get_metrics
+
+# Même emplacement que config.data_path (sans dépendre de la configuration)
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent.parent / "data" / "llm_cache.db"
+STUB_MODEL_NAME = "safegraph-stub"
+
+TokenCallback = Callable[[str], None]
+_ESPACES = re.compile(r"\s+")
+
+
+def _role_content(message: Any) -> Tuple[str, str]:
+    """Rôle et texte d'un message (BaseMessage langchain, tuple (rôle, texte) ou chaîne)"""
+    if isinstance(message, str):
+        return "human", message
+    if isinstance(message, (tuple, list)):
+        return str(message[0]), str(message[1])
+    return getattr(message, "type", "human"), _text(getattr(message, "content", ""))
+
+
+def _text(content: Any) -> str:
+    """Texte d'un contenu de message ou de fragment (chaîne ou liste de blocs)"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(b.get("text", "") if isinstance(b, dict) else str(b) for b in content)
+    return str(content or "")
+
+
+def normalize_prompt(messages: Sequence[Any]) -> str:
+    """Forme canonique d'un prompt: rôles explicites, espaces fusionnés"""
+    return "\n".join(f"{role}: {_ESPACES.sub(' ', texte).strip()}"
+                     for role, texte in map(_role_content, messages))
+
+
+def cache_key(prompt: str, model: str, temperature: float) -> str:
+    return hashlib.sha256(f"{model}\x1f{float(temperature)!r}\x1f{prompt}".encode("utf-8")).hexdigest()
+
+
+class PromptCache:
+    """
+    Cache persistant prompt -> réponse (SQLite)
+
+    Clé: prompt normalisé + modèle + température. Les réponses déjà payées
+    sont servies localement d'une exécution à l'autre.
+    """
+
+    def __init__(self, db_path=DEFAULT_CACHE_PATH, memory_size: int = 256):
+        self.db_path = str(db_path)
+        if self.db_path != ":memory:":
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.memory_size = memory_size
+        self._memoire: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS prompt_cache (
+                cle TEXT PRIMARY KEY,
+                modele TEXT NOT NULL,
+                temperature REAL NOT NULL,
+                prompt TEXT NOT NULL,
+                reponse TEXT NOT NULL,
+                cree_le TEXT NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )""")
+        self._conn.commit()
+        self.stats = {"hits": 0, "misses": 0, "writes": 0}
+
+    def get(self, prompt: str, model: str, temperature: float) -> Optional[str]:
+        cle = cache_key(prompt, model, temperature)
+        with self._lock:
+            reponse = self._memoire.get(cle)
+            if reponse is None:
+                row = self._conn.execute("SELECT reponse FROM prompt_cache WHERE cle = ?", (cle,)).fetchone()
+                reponse = row[0] if row else None
+                if reponse is not None:
+                    self._retenir(cle, reponse)
+            else:
+                self._memoire.move_to_end(cle)
+            if reponse is None:
+                self.stats["misses"] += 1
+                get_metrics().incr("cache_misses_total", cache="prompt")
+                return None
+            self.stats["hits"] += 1
+            get_metrics().incr("cache_hits_total", cache="prompt")
+            self._conn.execute("UPDATE prompt_cache SET hits = hits + 1 WHERE cle = ?", (cle,))
+            self._conn.commit()
+            return reponse
+
+    def put(self, prompt: str, model: str, temperature: float, response: str):
+        cle = cache_key(prompt, model, temperature)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO prompt_cache (cle, modele, temperature, prompt, reponse, cree_le) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (cle, model, float(temperature), prompt, response, datetime.now().isoformat()))
+            self._conn.commit()
+            self._retenir(cle, response)
+            self.stats["writes"] += 1
+
+    def _retenir(self, cle: str, reponse: str):
+        self._memoire[cle] = reponse
+        self._memoire.move_to_end(cle)
+        while len(self._memoire) > self.memory_size:
+            self._memoire.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM prompt_cache").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM prompt_cache")
+            self._conn.commit()
+            self._memoire.clear()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class _Chunk:
+    """Fragment de réponse (interface compatible AIMessageChunk.content)"""
+    __slots__ = ("content",)
+
+    def __init__(self, content: str):
+        self.content = content
+
+
+class StubChatModel:
+    """
+    Modèle local déterministe pour tests et benchmarks hors ligne
+
+    Même prompt -> même réponse, streamée mot à mot. Expose stream()/invoke()
+    comme un modèle de chat langchain.
+    """
+
+    TITRES = ["Formation sécurité ciblée", "Audit terrain hebdomadaire", "Briefing sécurité quotidien",
+              "Révision des procédures critiques", "Coaching superviseurs", "Suivi indicateurs proactifs",
+              "Inspection des équipements", "Programme de reconnaissance SST"]
+    PRIORITES = ["High", "Medium", "Low"]
+
+    def __init__(self, model: str = STUB_MODEL_NAME, temperature: float = 0.0, token_delay: float = 0.0):
+        self.model = model
+        self.temperature = temperature
+        self.token_delay = token_delay
+        self.calls = 0
+
+    def _completion(self, messages: Sequence[Any]) -> str:
+        prompt = normalize_prompt(messages)
+        rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+        titres = rng.sample(self.TITRES, rng.randint(3, 5))
+        lignes = []
+        for i, titre in enumerate(titres, 1):
+            lignes.append(f"{i}. {titre}\n   Priorité: {rng.choice(self.PRIORITES)}"
+                          f"\n   Échéance: {rng.choice([7, 14, 21, 30])} jours"
+                          f"\n   Métrique: score sécurité > {rng.choice([3.5, 4.0, 4.5])}"
+                          f"\n   Effort: {rng.randint(1, 5)} jours")
+        return "\n".join(lignes)
+
+    def stream(self, messages: Sequence[Any]) -> Iterator[_Chunk]:
+        self.calls += 1
+        for token in re.findall(r"\S+\s*|\s+", self._completion(messages)):
+            if self.token_delay:
+                time.sleep(self.token_delay)
+            yield _Chunk(token)
+
+    def invoke(self, messages: Sequence[Any]) -> _Chunk:
+        return _Chunk("".join(chunk.content for chunk in self.stream(messages)))
+
+
+class StreamingGenerator:
+    """Génération streamée avec cache persistant et déduplication des prompts en lot"""
+
+    def __init__(self, llm: Any, cache: Optional[PromptCache] = None,
+                 model: Optional[str] = None, temperature: Optional[float] = None):
+        self.llm = llm
+        self.cache = cache
+        self.model = model or getattr(llm, "model", None) or getattr(llm, "model_name", None) or type(llm).__name__
+        self.temperature = float(temperature if temperature is not None else getattr(llm, "temperature", 0.0) or 0.0)
+        self.stats = {"llm_calls": 0, "cache_hits": 0, "deduplicated": 0, "prefix_groups": 0}
+
+    def stream(self, messages: Sequence[Any], prompt: Optional[str] = None) -> Iterator[str]:
+        """Fragments de la réponse au fil de l'eau; une réponse complète est mise en cache"""
+        prompt = prompt if prompt is not None else normalize_prompt(messages)
+        if self.cache is not None:
+            cached = self.cache.get(prompt, self.model, self.temperature)
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                yield cached
+                return
+
+        self.stats["llm_calls"] += 1
+        fragments = []
+        if hasattr(self.llm, "stream"):
+            for chunk in self.llm.stream(list(messages)):
+                texte = _text(getattr(chunk, "content", chunk))
+                if texte:
+                    fragments.append(texte)
+                    yield texte
+        else:
+            texte = _text(self.llm.invoke(list(messages)).content)
+            fragments.append(texte)
+            yield texte
+
+        # Fragments streamés ~ jetons de complétion; prompt estimé en mots
+        metrics = get_metrics()
+        metrics.incr("llm_tokens_total", len(fragments), model=self.model, kind="completion")
+        metrics.incr("llm_tokens_total", len(prompt.split()), model=self.model, kind="prompt")
+
+        # Réponse interrompue (exception ou consommateur arrêté): rien n'est mis en cache
+        if self.cache is not None:
+            self.cache.put(prompt, self.model, self.temperature, "".join(fragments))
+
+    def generate(self, messages: Sequence[Any], on_token: Optional[TokenCallback] = None) -> str:
+        fragments = []
+        for fragment in self.stream(messages):
+            fragments.append(fragment)
+            if on_token:
+                on_token(fragment)
+        return "".join(fragments)
+
+    def generate_batch(self, requests: Mapping[str, Sequence[Any]],
+                       on_token: Optional[Callable[[str, str], None]] = None) -> Dict[str, str]:
+        """
+        Génération d'un lot {identifiant: messages}
+
+        Les prompts identiques ne sont générés qu'une fois. Les requêtes sont
+        regroupées par préfixe commun (tous les messages sauf le dernier),
+        normalisé une seule fois par groupe, et émises consécutivement pour
+        maximiser la réutilisation du préfixe côté fournisseur.
+        """
+        prefixes: Dict[str, str] = {}
+        groupes: "OrderedDict[str, OrderedDict[str, List[str]]]" = OrderedDict()
+        messages_par_prompt: Dict[str, Sequence[Any]] = {}
+
+        for identifiant, messages in requests.items():
+            prefixe_brut = json.dumps([_role_content(m) for m in messages[:-1]], ensure_ascii=False)
+            prefixe = prefixes.get(prefixe_brut)
+            if prefixe is None:
+                prefixe = prefixes[prefixe_brut] = normalize_prompt(messages[:-1])
+            prompt = "\n".join(filter(None, [prefixe, normalize_prompt(messages[-1:])]))
+            identifiants = groupes.setdefault(prefixe, OrderedDict()).setdefault(prompt, [])
+            if identifiants:
+                self.stats["deduplicated"] += 1
+            identifiants.append(identifiant)
+            messages_par_prompt[prompt] = messages
+
+        self.stats["prefix_groups"] += len(groupes)
+        reponses: Dict[str, str] = {}
+        for prompts in groupes.values():
+            for prompt, identifiants in prompts.items():
+                fragments = []
+                for fragment in self.stream(messages_par_prompt[prompt], prompt=prompt):
+                    fragments.append(fragment)
+                    if on_token:
+                        for identifiant in identifiants:
+                            on_token(identifiant, fragment)
+                for identifiant in identifiants:
+                    reponses[identifiant] = "".join(fragments)
+        return {identifiant: reponses[identifiant] for identifiant in requests}
+
+
+_prompt_cache: Optional[PromptCache] = None
+_prompt_cache_lock = threading.Lock()
+
+
+def get_prompt_cache(db_path=None) -> PromptCache:
+    """Cache de prompts partagé par le processus"""
+    global _prompt_cache
+    with _prompt_cache_lock:
+        if _prompt_cache is None:
+            _prompt_cache = PromptCache(db_path or DEFAULT_CACHE_PATH)
+        return _prompt_cache
@@ -0,0 +1,374 @@
+"""Observabilité en processus: histogrammes de latence HDR, compteurs et spans de trace imbriqués"""
+
+import gc
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+# Précision HDR: 2^(PRECISION_BITS-1) sous-intervalles par puissance de 2 (erreur relative < 1/64)
+PRECISION_BITS = 7
+MAX_VALUE_NS = 1 << 40          # ~18 minutes; au-delà les valeurs sont plafonnées
+SPAN_HISTORY = 2048
+PERCENTILES = (0.5, 0.9, 0.99)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Mapping[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class LatencyHistogram:
+    """
+    Histogramme log-linéaire à mémoire fixe (style HDR)
+
+    Linéaire jusqu'à 2^PRECISION_BITS ns puis 2^(PRECISION_BITS-1) cases par
+    puissance de 2: ~2 300 cases couvrent 1 ns à 18 min avec < 1,6 % d'erreur.
+    """
+    __slots__ = ("counts", "count", "total", "min", "max", "_lock")
+
+    _DEMI = 1 << (PRECISION_BITS - 1)
+    TAILLE = (MAX_VALUE_NS.bit_length() - PRECISION_BITS + 2) * _DEMI
+
+    def __init__(self):
+        self.counts = [0] * self.TAILLE
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def index(cls, valeur: int) -> int:
+        if valeur >= MAX_VALUE_NS:
+            valeur = MAX_VALUE_NS - 1
+        decalage = valeur.bit_length() - PRECISION_BITS
+        if decalage <= 0:
+            return valeur
+        return (decalage << (PRECISION_BITS - 1)) + (valeur >> decalage)
+
+    @classmethod
+    def borne_superieure(cls, index: int) -> int:
+        """Plus grande valeur équivalente à la case (convention HDR pour les percentiles)"""
+        if index < 2 * cls._DEMI:
+            return index
+        decalage = index // cls._DEMI - 1
+        mantisse = index - decalage * cls._DEMI
+        return ((mantisse + 1) << decalage) - 1
+
+    def record(self, valeur_ns: int):
+        valeur_ns = max(0, int(valeur_ns))
+        i = self.index(valeur_ns)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.total += valeur_ns
+            if self.min is None or valeur_ns < self.min:
+                self.min = valeur_ns
+            if valeur_ns > self.max:
+                self.max = valeur_ns
+
+    def percentile(self, q: float) -> int:
+        if not self.count:
+            return 0
+        rang = max(1, int(q * self.count + 0.5))
+        cumul = 0
+        for i, n in enumerate(self.counts):
+            cumul += n
+            if cumul >= rang:
+                return min(self.borne_superieure(i), self.max)
+        return self.max
+
+    def merge(self, autre: "LatencyHistogram"):
+        with self._lock:
+            self.counts = [a + b for a, b in zip(self.counts, autre.counts)]
+            self.count += autre.count
+            self.total += autre.total
+            if autre.min is not None and (self.min is None or autre.min < self.min):
+                self.min = autre.min
+            self.max = max(self.max, autre.max)
+
+    def summary(self) -> Dict[str, float]:
+        """Résumé en millisecondes"""
+        resume = {"count": self.count,
+                  "mean_ms": self.total / self.count / 1e6 if self.count else 0.0,
+                  "min_ms": (self.min or 0) / 1e6,
+                  "max_ms": self.max / 1e6}
+        for q in PERCENTILES:
+            resume[f"p{int(q * 100)}_ms"] = self.percentile(q) / 1e6
+        return resume
+
+
+class Span:
+    """Intervalle de trace; parent implicite via contextvars (suit les tâches asyncio)"""
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "parent_id", "attributes",
+                 "start_ns", "end_ns", "status", "_jeton")
+
+    def __init__(self, tracer: "Tracer", name: str, parent: Optional[Tuple[str, int]], attributes: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id, self.parent_id = parent if parent else (tracer.new_trace_id(), None)
+        self.span_id = next(tracer._ids)
+        self.attributes = attributes
+        self.start_ns = self.end_ns = 0
+        self.status = "ok"
+        self._jeton = None
+
+    @property
+    def context(self) -> Tuple[str, int]:
+        return self.trace_id, self.span_id
+
+    @property
+    def duration_ns(self) -> int:
+        return self.end_ns - self.start_ns
+
+    def __enter__(self) -> "Span":
+        self._jeton = _span_courant.set(self)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.perf_counter_ns()
+        _span_courant.reset(self._jeton)
+        if exc_type is not None:
+            self.status = "error"
+        self.tracer._terminer(self)
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "trace_id": self.trace_id, "span_id": self.span_id,
+                "parent_id": self.parent_id, "duration_ms": self.duration_ns / 1e6,
+                "status": self.status, "attributes": self.attributes}
+
+
+_span_courant: ContextVar[Optional[Span]] = ContextVar("safegraph_span", default=None)
+
+
+class MetricsRegistry:
+    """Histogrammes et compteurs étiquetés, bornés en mémoire"""
+
+    def __init__(self):
+        self.histograms: Dict[Tuple[str, Labels], LatencyHistogram] = {}
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, **labels) -> LatencyHistogram:
+        cle = (name, _labels(labels))
+        histogramme = self.histograms.get(cle)
+        if histogramme is None:
+            with self._lock:
+                histogramme = self.histograms.setdefault(cle, LatencyHistogram())
+        return histogramme
+
+    def observe(self, name: str, duree_ns: int, **labels):
+        self.histogram(name, **labels).record(duree_ns)
+
+    def incr(self, name: str, value: float = 1, **labels):
+        cle = (name, _labels(labels))
+        with self._lock:
+            self.counters[cle] = self.counters.get(cle, 0) + value
+
+    def counter(self, name: str, **labels) -> float:
+        return self.counters.get((name, _labels(labels)), 0)
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+
+class Tracer:
+    """Spans imbriqués; latence de chaque span versée dans l'histogramme `span_latency`"""
+
+    def __init__(self, registry: MetricsRegistry, history: int = SPAN_HISTORY):
+        self.registry = registry
+        self.finished: deque = deque(maxlen=history)
+        self._ids = itertools.count(1)
+        self._prefixe = os.urandom(4).hex()
+        self._traces = itertools.count(1)
+        self._histogrammes: Dict[str, LatencyHistogram] = {}
+
+    def new_trace_id(self) -> str:
+        return f"{self._prefixe}-{next(self._traces):x}"
+
+    def span(self, name: str, parent: Optional[Tuple[str, int]] = None, **attributes) -> Span:
+        """Ouvre un span enfant du span courant (ou de `parent`, ex. contexte porté par l'état)"""
+        if parent is None:
+            courant = _span_courant.get()
+            parent = courant.context if courant is not None else None
+        return Span(self, name, parent, attributes)
+
+    def _terminer(self, span: Span):
+        histogramme = self._histogrammes.get(span.name)
+        if histogramme is None:
+            histogramme = self._histogrammes[span.name] = self.registry.histogram("span_latency", span=span.name)
+        histogramme.record(span.end_ns - span.start_ns)
+        self.finished.append(span)
+
+    def current(self) -> Optional[Span]:
+        return _span_courant.get()
+
+    def trace(self, trace_id: str) -> List[Dict[str, Any]]:
+        return [s.to_dict() for s in self.finished if s.trace_id == trace_id]
+
+
+_registry = MetricsRegistry()
+_tracer = Tracer(_registry)
+
+
+def get_metrics() -> MetricsRegistry:
+    return _registry
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+# ----------------------------------------------------------------------
+# Propagation à travers l'état LangGraph
+# ----------------------------------------------------------------------
+
+def new_trace_context() -> Dict[str, Any]:
+    """Contexte racine stocké dans l'état (`trace_context`) au démarrage d'une session"""
+    return {"trace_id": _tracer.new_trace_id(), "span_id": None}
+
+
+def _contexte_etat(state: Any) -> Optional[Tuple[str, Optional[int]]]:
+    contexte = state.get("trace_context") if isinstance(state, Mapping) else None
+    if contexte and contexte.get("trace_id"):
+        return contexte["trace_id"], contexte.get("span_id")
+    return None
+
+
+def traced_node(name: str) -> Callable:
+    """
+    Décorateur de nœud LangGraph: span rattaché au contexte de l'état,
+    latence dans `node_latency{node=...}`, erreurs comptées
+    """
+    def decorateur(fonction: Callable) -> Callable:
+        histogramme = _registry.histogram("node_latency", node=name)
+
+        @wraps(fonction)
+        def noeud(state, *args, **kwargs):
+            courant = _span_courant.get()
+            parent = courant.context if courant is not None else _contexte_etat(state)
+            with _tracer.span(name, parent=parent, node=name) as span:
+                try:
+                    return fonction(state, *args, **kwargs)
+                except Exception:
+                    _registry.incr("node_errors_total", node=name)
+                    raise
+                finally:
+                    histogramme.record(time.perf_counter_ns() - span.start_ns)
+
+        return noeud
+    return decorateur
+
+
+# ----------------------------------------------------------------------
+# Export
+# ----------------------------------------------------------------------
+
+def _nom_metrique(nom: str) -> str:
+    return "safegraph_" + "".join(c if c.isalnum() or c == "_" else "_" for c in nom)
+
+
+def _echapper_label(valeur: str) -> str:
+    """Échappement du format texte Prometheus: \\, \" et saut de ligne"""
+    return str(valeur).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    paires = [f'{k}="{_echapper_label(v)}"' for k, v in labels]
+    return "{" + ",".join(paires) + "}" if paires else ""
+
+
+def export_json(path=None, registry: Optional[MetricsRegistry] = None, tracer: Optional[Tracer] = None,
+                spans: int = 100) -> Dict[str, Any]:
+    """Instantané JSON (histogrammes résumés, compteurs, derniers spans); écrit dans `path` si fourni"""
+    registry = registry or _registry
+    tracer = tracer or _tracer
+    donnees = {
+        "histograms": [dict(name=nom, labels=dict(labels), **h.summary())
+                       for (nom, labels), h in sorted(registry.histograms.items())],
+        "counters": [{"name": nom, "labels": dict(labels), "value": valeur}
+                     for (nom, labels), valeur in sorted(registry.counters.items())],
+        "spans": [s.to_dict() for s in list(tracer.finished)[-spans:]] if spans else [],
+    }
+    if path is not None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(json.dumps(donnees, ensure_ascii=False, indent=2), encoding="utf-8")
+    return donnees
+
+
+def export_prometheus(registry: Optional[MetricsRegistry] = None) -> str:
+    """Format texte Prometheus: compteurs `_total`, latences en `summary` (secondes)"""
+    registry = registry or _registry
+    lignes = []
+    vus = set()
+    for (nom, labels), valeur in sorted(registry.counters.items()):
+        metrique = _nom_metrique(nom if nom.endswith("_total") else nom + "_total")
+        if metrique not in vus:
+            vus.add(metrique)
+            lignes.append(f"# TYPE {metrique} counter")
+        lignes.append(f"{metrique}{_format_labels(labels)} {valeur:g}")
+    for (nom, labels), h in sorted(registry.histograms.items()):
+        metrique = _nom_metrique(nom + "_seconds")
+        if metrique not in vus:
+            vus.add(metrique)
+            lignes.append(f"# TYPE {metrique} summary")
+        for q in PERCENTILES:
+            lignes.append(f"{metrique}{_format_labels(labels + (('quantile', str(q)),))} {h.percentile(q) / 1e9:.9f}")
+        lignes.append(f"{metrique}_sum{_format_labels(labels)} {h.total / 1e9:.9f}")
+        lignes.append(f"{metrique}_count{_format_labels(labels)} {h.count}")
+    return "\n".join(lignes) + "\n"
+
+
+def time_callable(fonction: Callable[[], Any], repeats: int = 5, warmup: int = 1) -> List[float]:
+    """Durées (s) de `repeats` appels après échauffement, GC désactivé pendant la mesure"""
+    for _ in range(warmup):
+        fonction()
+    durees = []
+    gc_actif = gc.isenabled()
+    try:
+        for _ in range(repeats):
+            gc.collect()
+            gc.disable()
+            debut = time.perf_counter()
+            fonction()
+            durees.append(time.perf_counter() - debut)
+            if gc_actif:
+                gc.enable()
+    finally:
+        if gc_actif:
+            gc.enable()
+    return durees
+
+
+def benchmark_span_overhead(iterations: int = 100_000) -> Dict[str, float]:
+    """Surcoût par span imbriqué (ouverture, fermeture, histogramme) vs boucle vide, en µs"""
+    tracer = Tracer(MetricsRegistry(), history=1024)
+    debut = time.perf_counter_ns()
+    for _ in range(iterations):
+        pass
+    vide = time.perf_counter_ns() - debut
+    with tracer.span("bench_root"):
+        debut = time.perf_counter_ns()
+        for _ in range(iterations):
+            with tracer.span("bench"):
+                pass
+        instrumente = time.perf_counter_ns() - debut
+    histogramme = LatencyHistogram()
+    debut = time.perf_counter_ns()
+    for i in range(iterations):
+        histogramme.record(i)
+    enregistrement = time.perf_counter_ns() - debut
+    return {"span_us": (instrumente - vide) / iterations / 1e3,
+            "histogram_record_us": (enregistrement - vide) / iterations / 1e3}
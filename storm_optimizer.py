@@ -10,7 +10,7 @@ import json
 import time
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 from dataclasses import dataclass
 import yaml
 import logging
@@ -42,6 +42,25 @@ class ExtractionResult:
     validated_citations: List[str]
     performance_impact_prediction: float
 
+class SourceRateLimiter:
+    """Limiteur de débit par source (intervalle minimal entre deux requêtes)"""
+    
+    def __init__(self, requests_per_second: float = 0):
+        self.min_interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_slot: Dict[str, float] = {}
+    
+    async def acquire(self, source: str):
+        """Attend le prochain créneau disponible pour la source"""
+        if not self.min_interval:
+            return
+        
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slot.get(source, now))
+        self._next_slot[source] = slot + self.min_interval
+        
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
 class StormOptimizer:
     """Optimiseur STORM v2.0 avec Claude 4 Sonnet"""
     
@@ -106,28 +125,115 @@ class StormOptimizer:
                 'concurrent_searches': 8,
                 'quality_threshold': 0.85,
                 'max_sources_per_topic': 75,
-                'performance_target': 0.55
+                'performance_target': 0.55,
+                'pipeline_queue_size': 16,
+                'rate_limit_per_source': 0,
+                'search_endpoint': ''
             }
         }
     
     async def optimize_search_pipeline(self, topics: List[str], 
-                                     target_agents: List[str] = None) -> Dict:
-        """Pipeline de recherche optimisé STORM v2.0"""
+                                     target_agents: List[str] = None,
+                                     on_knowledge: Optional[Callable[[SearchResult, ExtractionResult], Any]] = None) -> Dict:
+        """
+        Pipeline de recherche optimisé STORM v2.0
+        
+        Les 4 phases (recherche, extraction, structuration, intégration) tournent
+        en parallèle comme étages producteur/consommateur reliés par des files
+        bornées: chaque résultat est intégré dès son arrivée. `on_knowledge`
+        (sync ou async) reçoit chaque paire recherche/extraction structurée.
+        """
         
         start_time = time.time()
         logger.info(f"🚀 Démarrage optimisation STORM v2.0 - {len(topics)} topics")
         
-        # Phase 1: Recherche parallèle optimisée
-        search_results = await self._parallel_optimized_search(topics)
-        logger.info(f"✅ Phase 1: {len(search_results)} résultats trouvés")
+        optimization = self.config.get('optimization', {})
+        concurrency = max(1, int(optimization.get('concurrent_searches', 8)))
+        queue_size = max(1, int(optimization.get('pipeline_queue_size', concurrency * 2)))
+        rate_limiter = SourceRateLimiter(float(optimization.get('rate_limit_per_source', 0)))
+        search_endpoint = optimization.get('search_endpoint') or None
+        
+        # Files bornées entre étages (backpressure)
+        search_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        extraction_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        graph_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        integration_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
         
-        # Phase 2: Extraction sémantique Claude 4
-        extracted_results = await self._claude_semantic_extraction(search_results)
-        logger.info(f"✅ Phase 2: Extraction sémantique complétée")
+        search_results: List[SearchResult] = []
+        extracted_results: List[ExtractionResult] = []
+        structured_knowledge = self._new_knowledge_structure()
+        pipeline_stats = {
+            'concurrency': concurrency,
+            'queue_size': queue_size,
+            'errors': 0,
+            'items_integrated': 0,
+            'first_result_seconds': None
+        }
+        
+        async def run_stage(name: str, queue: asyncio.Queue, handler):
+            while True:
+                item = await queue.get()
+                try:
+                    await handler(item)
+                except Exception as e:
+                    pipeline_stats['errors'] += 1
+                    logger.warning(f"⚠️ Étage {name}: {e}")
+                finally:
+                    queue.task_done()
         
-        # Phase 3: Structuration knowledge graph
-        structured_knowledge = await self._structure_knowledge_graph(extracted_results)
-        logger.info(f"✅ Phase 3: Knowledge graph structuré")
+        async def search_stage(job: Tuple[int, str, str, str]):
+            index, topic, source_type, source = job
+            await rate_limiter.acquire(source)
+            result = await self._search_source(session, index, topic, source_type, source)
+            search_results.append(result)
+            await extraction_queue.put((index, result))
+        
+        async def extraction_stage(item: Tuple[int, SearchResult]):
+            index, result = item
+            extraction = await self._extract_result(result, index)
+            extracted_results.append(extraction)
+            await graph_queue.put((result, extraction))
+        
+        async def graph_stage(item: Tuple[SearchResult, ExtractionResult]):
+            self._structure_extraction(structured_knowledge, item[1])
+            await integration_queue.put(item)
+        
+        async def integration_stage(item: Tuple[SearchResult, ExtractionResult]):
+            if on_knowledge is not None:
+                outcome = on_knowledge(*item)
+                if asyncio.iscoroutine(outcome):
+                    await outcome
+            pipeline_stats['items_integrated'] += 1
+            if pipeline_stats['first_result_seconds'] is None:
+                pipeline_stats['first_result_seconds'] = time.time() - start_time
+        
+        session = aiohttp.ClientSession() if search_endpoint else None
+        workers = (
+            [asyncio.create_task(run_stage('recherche', search_queue, search_stage)) for _ in range(concurrency)]
+            + [asyncio.create_task(run_stage('extraction', extraction_queue, extraction_stage)) for _ in range(concurrency)]
+            # Un seul consommateur pour les étages qui modifient l'état partagé
+            + [asyncio.create_task(run_stage('structuration', graph_queue, graph_stage)),
+               asyncio.create_task(run_stage('intégration', integration_queue, integration_stage))]
+        )
+        
+        try:
+            # Phase 1: alimentation de la recherche (bloque si la file est pleine)
+            for job in self._iter_search_jobs(topics):
+                await search_queue.put(job)
+            
+            # Vidage ordonné des étages
+            for queue in (search_queue, extraction_queue, graph_queue, integration_queue):
+                await queue.join()
+        finally:
+            # Annulation des workers (aussi en cas d'annulation du pipeline)
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            if session is not None:
+                await session.close()
+        
+        logger.info(f"✅ Phases 1-3: {len(search_results)} résultats, "
+                    f"{structured_knowledge['extracted_insights']} insights structurés")
         
         # Phase 4: Intégration Safety Agentique
         integration_results = await self._integrate_safety_agentique(
@@ -149,69 +255,80 @@ class StormOptimizer:
             'duration_seconds': duration,
             'roi_projected': self.performance_metrics['roi_projected'],
             'quality_score': self._calculate_quality_score(extracted_results),
+            'pipeline': pipeline_stats,
             'optimization_version': '2.0'
         }
         
         logger.info(f"🎉 Optimisation terminée: +{optimization_results['performance_gain']:.1%} gain")
         return optimization_results
     
-    async def _parallel_optimized_search(self, topics: List[str]) -> List[SearchResult]:
-        """Recherche parallèle optimisée 8 threads"""
-        
-        # Simulation recherche optimisée
-        results = []
+    def _iter_search_jobs(self, topics: List[str]) -> Iterator[Tuple[int, str, str, str]]:
+        """Jobs de recherche: topics × types de sources × top 3 sources"""
+        index = 0
         for topic in topics:
-            # Pour chaque topic, sources multiples
             for source_type in ['academic', 'institutional', 'sectorial']:
                 sources = self.config['sources'][source_type]
                 for source in sources[:3]:  # Top 3 sources par type
-                    result = SearchResult(
-                        topic=topic,
-                        source=f"{source_type}_{source}",
-                        title=f"Optimized research on {topic}",
-                        abstract=f"Advanced findings on {topic} safety aspects",
-                        authors=[f"Expert_{source}"],
-                        publication_date="2024-2025",
-                        relevance_score=0.85 + (len(results) % 10) * 0.01,
-                        citations_count=50 + len(results) * 5,
-                        methodology_rigor=0.90,
-                        practical_applicability=0.88
-                    )
-                    results.append(result)
-        
-        return results
+                    yield index, topic, source_type, source
+                    index += 1
     
-    async def _claude_semantic_extraction(self, search_results: List[SearchResult]) -> List[ExtractionResult]:
-        """Extraction sémantique Claude 4 optimisée"""
+    async def _search_source(self, session: Optional[aiohttp.ClientSession], index: int,
+                             topic: str, source_type: str, source: str) -> SearchResult:
+        """Recherche d'un topic sur une source (endpoint configuré ou simulation)"""
         
-        extracted_results = []
-        for result in search_results:
-            # Simulation extraction Claude 4
-            extraction = ExtractionResult(
-                insights=[
-                    f"Key insight from {result.topic}",
-                    f"Practical application for Safety Agentique",
-                    f"Performance enhancement opportunity"
-                ],
-                quantifiable_data={'efficacite': 0.85, 'roi': 480.0},
-                safety_agentique_applicability={'agents': 'A1-A3,AN1-AN5,R1-R3'},
-                validated_citations=[result.source],
-                performance_impact_prediction=0.30 + (len(extracted_results) % 5) * 0.05
-            )
-            extracted_results.append(extraction)
+        data = {}
+        if session is not None:
+            params = {'topic': topic, 'source_type': source_type, 'source': source}
+            async with session.get(self.config['optimization']['search_endpoint'], params=params) as response:
+                response.raise_for_status()
+                data = await response.json()
+        
+        return SearchResult(
+            topic=topic,
+            source=f"{source_type}_{source}",
+            title=data.get('title', f"Optimized research on {topic}"),
+            abstract=data.get('abstract', f"Advanced findings on {topic} safety aspects"),
+            authors=data.get('authors', [f"Expert_{source}"]),
+            publication_date=data.get('publication_date', "2024-2025"),
+            relevance_score=data.get('relevance_score', 0.85 + (index % 10) * 0.01),
+            citations_count=data.get('citations_count', 50 + index * 5),
+            methodology_rigor=data.get('methodology_rigor', 0.90),
+            practical_applicability=data.get('practical_applicability', 0.88)
+        )
+    
+    async def _extract_result(self, result: SearchResult, index: int) -> ExtractionResult:
+        """Extraction sémantique Claude 4 d'un résultat"""
         
-        return extracted_results
+        # Simulation extraction Claude 4
+        return ExtractionResult(
+            insights=[
+                f"Key insight from {result.topic}",
+                f"Practical application for Safety Agentique",
+                f"Performance enhancement opportunity"
+            ],
+            quantifiable_data={'efficacite': 0.85, 'roi': 480.0},
+            safety_agentique_applicability={'agents': 'A1-A3,AN1-AN5,R1-R3'},
+            validated_citations=[result.source],
+            performance_impact_prediction=0.30 + (index % 5) * 0.05
+        )
     
-    async def _structure_knowledge_graph(self, extracted_results: List[ExtractionResult]) -> Dict:
-        """Structure knowledge graph NetworkX"""
+    def _new_knowledge_structure(self) -> Dict:
+        """Structure knowledge graph vide, enrichie au fil de l'eau"""
         return {
             'graph_version': '2.0',
-            'nodes': len(extracted_results),
-            'extracted_insights': sum(len(r.insights) for r in extracted_results),
-            'total_citations': sum(len(r.validated_citations) for r in extracted_results),
-            'performance_predictions': [r.performance_impact_prediction for r in extracted_results]
+            'nodes': 0,
+            'extracted_insights': 0,
+            'total_citations': 0,
+            'performance_predictions': []
         }
     
+    def _structure_extraction(self, knowledge: Dict, extraction: ExtractionResult):
+        """Ajout incrémental d'une extraction au knowledge graph"""
+        knowledge['nodes'] += 1
+        knowledge['extracted_insights'] += len(extraction.insights)
+        knowledge['total_citations'] += len(extraction.validated_citations)
+        knowledge['performance_predictions'].append(extraction.performance_impact_prediction)
+    
     async def _integrate_safety_agentique(self, knowledge: Dict, target_agents: List[str] = None) -> Dict:
         """Intégration Safety Agentique optimisée"""
         enhanced_agents = target_agents or [
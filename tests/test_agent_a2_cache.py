@@ -0,0 +1,151 @@
+# Test Cache Agent A2 Configurable - LRU, TTL et coalescence
+# ==========================================================
+
+import asyncio
+import sys
+import os
+
+# Ajout des chemins pour imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src', 'agents', 'collecte'))
+
+from agent_a2_configurable import (
+    AgentA2Configurable,
+    CacheObservationsA2,
+    ConfigurationA2,
+    ModeCollecteDonnees
+)
+
+INCIDENT_TEST = {
+    "ID": 123456,
+    "SECTEUR_SCIAN": "CONSTRUCTION",
+    "GENRE": "CHUTE DE HAUTEUR"
+}
+
+CONTEXT_TEST = {"nom_entreprise": "Construction ABC Inc."}
+
+
+def _agent_compteur(**config_kwargs):
+    """Agent A2 dont la collecte est remplacée par un compteur d'appels"""
+    agent = AgentA2Configurable(ConfigurationA2(
+        mode_collecte=ModeCollecteDonnees.SYNTHETIQUE_UNIQUEMENT,
+        **config_kwargs
+    ))
+    appels = {"nb": 0}
+
+    async def collecte_lente(incident_data, context):
+        appels["nb"] += 1
+        await asyncio.sleep(0.05)
+        return {"data_source": "synthetic", "appel": appels["nb"]}
+
+    agent._process_synthetic_data_only = collecte_lente
+    return agent, appels
+
+
+def test_premier_resultat_mis_en_cache():
+    """Le cache vide ne doit pas être traité comme désactivé"""
+    agent, appels = _agent_compteur()
+
+    async def scenario():
+        await agent.process(INCIDENT_TEST, CONTEXT_TEST)
+        await agent.process(INCIDENT_TEST, CONTEXT_TEST)
+
+    asyncio.run(scenario())
+
+    stats = agent.get_statistics()["cache"]
+    assert appels["nb"] == 1
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+
+
+def test_coalescence_appels_concurrents():
+    """Les appels concurrents d'une même clé partagent une seule collecte"""
+    agent, appels = _agent_compteur()
+
+    async def scenario():
+        return await asyncio.gather(*[
+            agent.process(INCIDENT_TEST, CONTEXT_TEST) for _ in range(20)
+        ])
+
+    resultats = asyncio.run(scenario())
+
+    stats = agent.get_statistics()["cache"]
+    assert appels["nb"] == 1
+    assert stats["coalesced"] == 19
+    assert all(r["appel"] == 1 for r in resultats)
+
+
+def test_eviction_lru_et_expiration_ttl():
+    """Éviction de l'entrée la moins récente et expiration TTL"""
+    cache = CacheObservationsA2(max_entries=2, ttl_seconds=60)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    cache.get("a")
+    cache.set("c", {"v": 3})
+
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+    assert cache.evictions == 1
+
+    cache_court = CacheObservationsA2(max_entries=2, ttl_seconds=0.01)
+    cache_court.set("a", {"v": 1})
+    asyncio.run(asyncio.sleep(0.02))
+    assert cache_court.get("a") is None
+    assert cache_court.expirations == 1
+
+
+def test_erreur_non_mise_en_cache():
+    """Une collecte en erreur est propagée aux appelants et n'est pas conservée"""
+    cache = CacheObservationsA2()
+
+    async def collecte_en_erreur():
+        await asyncio.sleep(0.01)
+        raise ValueError("source indisponible")
+
+    async def scenario():
+        return await asyncio.gather(
+            cache.get_or_load("k", collecte_en_erreur),
+            cache.get_or_load("k", collecte_en_erreur),
+            return_exceptions=True
+        )
+
+    resultats = asyncio.run(scenario())
+    assert all(isinstance(r, ValueError) for r in resultats)
+    assert len(cache) == 0
+
+
+def test_annulation_du_meneur_sans_annuler_les_autres():
+    """Un appelant coalescé reprend la collecte quand le meneur est annulé"""
+    cache = CacheObservationsA2()
+    appels = {"nb": 0}
+
+    async def collecte():
+        appels["nb"] += 1
+        await asyncio.sleep(0.05)
+        return {"appel": appels["nb"]}
+
+    async def scenario():
+        meneur = asyncio.ensure_future(cache.get_or_load("k", collecte))
+        await asyncio.sleep(0.01)
+        suiveurs = [asyncio.ensure_future(cache.get_or_load("k", collecte)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        meneur.cancel()
+        resultats = await asyncio.gather(*suiveurs)
+        return meneur, resultats
+
+    meneur, resultats = asyncio.run(scenario())
+    assert meneur.cancelled()
+    assert appels["nb"] == 2
+    assert [r for r, _ in resultats] == [{"appel": 2}] * 3
+    assert sorted(statut for _, statut in resultats) == ["coalesced", "coalesced", "miss"]
+    assert cache.get("k") == {"appel": 2}
+
+
+if __name__ == "__main__":
+    print("🧪 TEST CACHE AGENT A2 CONFIGURABLE")
+    print("=" * 40)
+    test_premier_resultat_mis_en_cache()
+    test_coalescence_appels_concurrents()
+    test_eviction_lru_et_expiration_ttl()
+    test_erreur_non_mise_en_cache()
+    test_annulation_du_meneur_sans_annuler_les_autres()
+    print("✅ Cache LRU + TTL et coalescence validés")
@@ -0,0 +1,122 @@
+# Test AN1 Batch - Analyse écarts multi-entreprises vectorisée
+# ============================================================
+
+import asyncio
+import os
+import random
+import sys
+import time
+
+import numpy as np
+import pytest
+
+# Ajout des chemins pour imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from agents.analyse.an1_analyste_ecarts import AN1AnalysteEcarts
+from agents.analyse.an1_batch import AN1BatchEngine, masked_row_mean
+
+VARIABLES = ["usage_epi", "respect_procedures", "formation_securite", "supervision_directe",
+             "communication_risques", "politique_securite", "leadership_sst", "maintenance_equipements",
+             "competences_techniques", "comprehension_risques", "procedures_urgence", "controle_epi",
+             "perception_risque", "violations_regles"]
+CONTEXT = {"secteur": "CONSTRUCTION"}
+
+
+def _entreprise(rng: random.Random):
+    """A1/A2 aléatoires: variables partielles, scores entiers ou réels, A1 parfois nul"""
+    vars_a1, vars_a2 = {}, {}
+    for variable in VARIABLES:
+        if rng.random() < 0.8:
+            vars_a1[variable] = {"score": rng.choice([0, rng.randint(1, 10), round(rng.uniform(0, 10), 1)]),
+                                 "source": "questionnaire"}
+        if rng.random() < 0.8:
+            vars_a2[variable] = {"score": round(rng.uniform(0, 10), 2), "source": "observation"}
+    return (
+        {"variables_culture_sst": vars_a1, "scores_autoeval": {"score_global": rng.randint(40, 95)}},
+        {"variables_culture_terrain": vars_a2, "observations": {"score_comportement": rng.randint(30, 90)}},
+    )
+
+
+def _sans_horodatage(resultat):
+    info = {k: v for k, v in resultat["agent_info"].items() if k not in ("timestamp", "performance_time", "mode")}
+    return {**resultat, "agent_info": info}
+
+
+def _egal(a, b):
+    """Égalité stricte, NaN == NaN"""
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_egal(a[k], b[k]) for k in a)
+    if isinstance(a, list):
+        return len(a) == len(b) and all(_egal(x, y) for x, y in zip(a, b))
+    if isinstance(a, float) and isinstance(b, float) and np.isnan(a) and np.isnan(b):
+        return True
+    return a == b
+
+
+@pytest.fixture(scope="module")
+def agent():
+    return AN1AnalysteEcarts()
+
+
+def test_identique_chemin_scalaire(agent):
+    """Chaque entreprise: même résultat que process(), au bit près"""
+    rng = random.Random(42)
+    entreprises = {f"site_{i:03d}": _entreprise(rng) for i in range(150)}
+    entreprises["sans_variables"] = ({"variables_culture_sst": {}, "scores_autoeval": {}},
+                                     {"variables_culture_terrain": {}, "observations": {}})
+    entreprises["invalide"] = ({"variables_culture_sst": {}}, {"observations": {}})
+
+    batch = asyncio.run(agent.process_batch(entreprises, CONTEXT))
+    assert list(batch) == list(entreprises)
+    assert batch["invalide"] == {"error": "Champ manquant A1: scores_autoeval", "agent_id": "AN1"}
+
+    for enterprise_id, (data_a1, data_a2) in entreprises.items():
+        if enterprise_id == "invalide":
+            continue
+        scalaire = asyncio.run(agent.process(data_a1, data_a2, CONTEXT))
+        assert _egal(_sans_horodatage(batch[enterprise_id]), _sans_horodatage(scalaire)), enterprise_id
+
+
+def test_matrices_et_niveaux():
+    engine = AN1BatchEngine()
+    m = engine.compute_gap_matrices({
+        "a": ({"variables_culture_sst": {"usage_epi": {"score": 8}, "formation_securite": {"score": 0}}},
+              {"variables_culture_terrain": {"usage_epi": {"score": 4}, "formation_securite": {"score": 2}}}),
+        "b": ({"variables_culture_sst": {"usage_epi": {"score": 10}}},
+              {"variables_culture_terrain": {"usage_epi": {"score": 9.5}, "autre": {"score": 1}}}),
+    })
+    assert m.variables == ["formation_securite", "usage_epi"]
+    assert m.present.tolist() == [[True, True], [False, True]]
+    assert m.pourcentage.tolist() == [[20.0, 50.0], [0.0, 5.0]]
+    assert m.niveau.tolist()[0] == [1, 3] and m.niveau[1, 1] == 0
+    assert m.severe.sum() == 1
+
+
+def test_moyenne_masquee():
+    valeurs = np.array([[1.0, 2.0, 4.0], [3.0, 5.0, 7.0]])
+    masque = np.array([[True, False, True], [False, False, False]])
+    moyennes, effectifs = masked_row_mean(valeurs, masque)
+    assert moyennes[0] == 2.5 and np.isnan(moyennes[1])
+    assert effectifs.tolist() == [2, 0]
+
+
+def test_benchmark_sectoriel_plus_rapide(agent):
+    """Centaines de sites: une passe batch plutôt qu'une invocation d'agent par site"""
+    rng = random.Random(7)
+    entreprises = {f"site_{i}": _entreprise(rng) for i in range(300)}
+
+    debut = time.perf_counter()
+    for data_a1, data_a2 in entreprises.values():
+        asyncio.run(agent.process(data_a1, data_a2, CONTEXT))
+    scalaire = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    AN1BatchEngine(agent).analyze(entreprises, CONTEXT)
+    batch = time.perf_counter() - debut
+
+    assert batch < scalaire
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
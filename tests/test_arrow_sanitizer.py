@@ -0,0 +1,103 @@
+# Test Sanitizer Arrow - Plans de conversion en cache et pagination
+# =================================================================
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Ajout des chemins pour imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+pa = pytest.importorskip("pyarrow")
+
+from optimization.arrow_sanitizer import ArrowSanitizer, downsample, page_widget_key, paginate
+
+
+def _incidents(n: int = 6) -> pd.DataFrame:
+    return pd.DataFrame({
+        'Temps Résolution (h)': ([12, 'En cours', 8.5, 'N/A', 4, 'Pending'] * n)[:n],
+        'Taux Conformité': (['96%', '80%', None, '70%', '88%', '91%'] * n)[:n],
+        'Statut': (['Ouvert', 'Fermé'] * n)[:n],
+        'Gravité': np.arange(n) % 5
+    })
+
+
+def test_conversion_compatible_arrow():
+    """Colonnes mixtes converties, pourcentages conservés en texte"""
+    sanitizer = ArrowSanitizer()
+    frame = _incidents()
+    with pytest.raises((pa.ArrowInvalid, pa.ArrowTypeError)):
+        pa.Table.from_pandas(frame)
+
+    resultat = sanitizer.sanitize(frame)
+    pa.Table.from_pandas(resultat)
+
+    assert resultat['Temps Résolution (h)'].tolist()[:3] == [12.0, pytest.approx(np.nan, nan_ok=True), 8.5]
+    assert resultat['Taux Conformité'].iloc[0] == '96%'
+    # L'original n'est pas modifié
+    assert frame['Temps Résolution (h)'].iloc[1] == 'En cours'
+
+
+def test_plan_en_cache_et_sans_copie():
+    """Un plan par forme; un DataFrame déjà compatible est renvoyé tel quel"""
+    sanitizer = ArrowSanitizer()
+    for n in (6, 60, 600):
+        sanitizer.sanitize(_incidents(n))
+    assert sanitizer.stats['plans_inferred'] == 1
+    assert sanitizer.stats['plan_hits'] == 2
+
+    propre = pd.DataFrame({'a': np.arange(5), 'b': list('abcde'), 'c': np.linspace(0, 1, 5)})
+    assert sanitizer.sanitize(propre) is propre
+
+    # Colonnes non converties partagées avec l'original
+    frame = _incidents(600)
+    resultat = sanitizer.sanitize(frame)
+    assert np.shares_memory(resultat['Gravité'].to_numpy(), frame['Gravité'].to_numpy())
+
+
+def test_plan_revalide_si_contenu_change():
+    """Même forme mais contenu contraire au plan: ré-inférence"""
+    sanitizer = ArrowSanitizer()
+    numerique = pd.DataFrame({'valeur': pd.Series(['1', '2', '3'], dtype=object)})
+    texte = pd.DataFrame({'valeur': pd.Series(['a', 'b', 'c'], dtype=object)})
+
+    assert sanitizer.sanitize(numerique)['valeur'].tolist() == [1, 2, 3]
+    assert sanitizer.sanitize(texte)['valeur'].tolist() == ['a', 'b', 'c']
+    assert sanitizer.stats['plan_invalidations'] == 1
+
+
+def test_sous_echantillonnage_et_pagination():
+    """Seules les lignes affichées sont converties"""
+    frame = _incidents(100_000)
+
+    echantillon = downsample(frame, 1_000)
+    assert len(echantillon) == 1_000
+    assert echantillon.index[0] == 0 and echantillon.index[-1] == len(frame) - 1
+
+    page, info = paginate(frame, 99, 30_000)
+    assert info == {'page': 3, 'n_pages': 4, 'page_size': 30_000}
+    assert len(page) == 10_000
+
+    sanitizer = ArrowSanitizer()
+    resultat, info = sanitizer.prepare(frame, max_rows=5_000)
+    assert info['mode'] == 'downsampled' and info['shown_rows'] == len(resultat) == 5_000
+    pa.Table.from_pandas(resultat)
+
+    resultat, info = sanitizer.prepare(frame, page=1, page_size=250)
+    assert info['mode'] == 'page' and resultat.index[0] == 250
+
+
+
+def test_cle_de_page_stable_entre_reexecutions():
+    """Chaque ré-exécution Streamlit recrée le DataFrame: la clé ne doit pas en dépendre"""
+    cle = page_widget_key(_incidents(500))
+    assert page_widget_key(_incidents(500)) == cle
+    assert page_widget_key(_incidents(501)) != cle
+    assert page_widget_key(_incidents(500).rename(columns=str.upper)) != cle
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,95 @@
+# Test Suite de Benchmarks - Baseline versionnée, seuil de régression et courbes de complexité
+# ============================================================================================
+
+import json
+import os
+import sys
+
+import pytest
+
+# Ajout des chemins pour imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'optimization'))
+
+from benchmark_suite import (BASELINE_PATH_DEFAUT, CASES, SCHEMA_VERSION, BenchmarkCase, Measurement, compare,
+                             complexity_exponent, load_baseline, main, measure, run_suite, save_baseline, scaling)
+
+CHEMINS_PRINCIPAUX = {"cnesst_ingestion", "pipeline_a1_a2_an1_r1", "an1_batch", "r1_portfolio",
+                      "normative_search", "clustering", "prediction", "xai_tree_shap", "llm_recommendation"}
+
+
+def _cas_synthetique(exposant):
+    """Travail en n^exposant opérations élémentaires"""
+    def setup(size, rng):
+        return lambda: sum(range(int(size ** exposant) * 50))
+    return BenchmarkCase(f"synthetique_{exposant}", "", setup, 200, (100, 200, 400, 800))
+
+
+def test_cas_couvrent_les_chemins_principaux_et_baseline_versionnee():
+    assert CHEMINS_PRINCIPAUX <= set(CASES)
+    baseline = load_baseline(BASELINE_PATH_DEFAUT)
+    assert baseline["schema_version"] == SCHEMA_VERSION
+    for nom in CHEMINS_PRINCIPAUX:
+        assert baseline["results"][nom]["size"] == CASES[nom].size
+
+
+def test_seuil_de_regression():
+    baseline = {"results": {"a": {"size": 10, "median_s": 1.0}, "b": {"size": 10, "median_s": 1.0},
+                            "c": {"size": 99, "median_s": 1.0}}}
+    mesures = [Measurement("a", 10, median_s=1.2), Measurement("b", 10, median_s=1.4),
+               Measurement("c", 10, median_s=9.0), Measurement("d", 10, median_s=9.0),
+               Measurement("e", 10, skipped="dépendance manquante")]
+    assert [r.name for r in compare(mesures, baseline, threshold=0.25)] == ["b"]
+    assert compare(mesures, baseline, threshold=0.5) == []
+    assert [r.name for r in compare(mesures, baseline, threshold=0.1)] == ["a", "b"]
+
+
+def test_enregistrement_puis_controle(tmp_path):
+    chemin = tmp_path / "baseline.json"
+    rapport = run_suite(["normative_search", "llm_recommendation"], "record", baseline_path=chemin, repeats=3)
+    assert rapport["passed"]
+    enregistre = json.loads(chemin.read_text(encoding="utf-8"))
+    assert enregistre["schema_version"] == SCHEMA_VERSION and set(enregistre["results"]) == {
+        "normative_search", "llm_recommendation"}
+    assert main(["--check", "--only", "normative_search", "--threshold", "5", "--baseline", str(chemin)]) == 0
+
+    # Baseline artificiellement 10x plus rapide: régression détectée, code de sortie 1
+    save_baseline([Measurement("normative_search", CASES["normative_search"].size,
+                               median_s=enregistre["results"]["normative_search"]["median_s"] / 10)], chemin)
+    rapport_json = tmp_path / "rapport.json"
+    assert main(["--only", "normative_search", "--baseline", str(chemin), "--json", str(rapport_json)]) == 1
+    rapport = json.loads(rapport_json.read_text(encoding="utf-8"))
+    assert rapport["regressions"][0]["name"] == "normative_search" and rapport["regressions"][0]["ratio"] > 5
+    assert "llm_recommendation" in load_baseline(chemin)["results"]   # cas non mesurés conservés
+
+    chemin.write_text(json.dumps({"schema_version": SCHEMA_VERSION + 1, "results": {}}), encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_baseline(chemin)
+
+
+def test_donnees_deterministes():
+    cas = CASES["an1_batch"]
+    import numpy as np
+    premier = cas.setup(50, np.random.default_rng(1))()
+    second = cas.setup(50, np.random.default_rng(1))()
+    cle = lambda r: {e: v["summary"] for e, v in r.items()}   # sans horodatages
+    assert json.dumps(cle(premier), sort_keys=True, default=str) == json.dumps(cle(second), sort_keys=True, default=str)
+    assert measure(cas, 50, repeats=2).throughput > 0
+
+
+def test_mode_scaling_exposant():
+    assert complexity_exponent([1, 2, 4, 8], [3, 6, 12, 24]) == pytest.approx(1.0)
+    assert complexity_exponent([1, 2, 4, 8], [1, 4, 16, 64]) == pytest.approx(2.0)
+    lineaire = scaling(_cas_synthetique(1))
+    quadratique = scaling(_cas_synthetique(2))
+    assert 0.7 < lineaire["exponent"] < 1.3 and 1.7 < quadratique["exponent"] < 2.3
+    assert [p["size"] for p in lineaire["points"]] == [100, 200, 400, 800]
+
+
+@pytest.mark.skipif(not os.getenv("SAFEGRAPH_BENCH"), reason="suite complète: SAFEGRAPH_BENCH=1")
+def test_suite_complete_contre_baseline():
+    rapport = run_suite(mode="check")
+    assert rapport["passed"], rapport["regressions"]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,185 @@
+# Test Registre Gamification - Projections incrémentales, fenêtres glissantes et badges
+# ======================================================================================
+
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+
+# Ajout des chemins pour imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ui.gamification_ledger import GamificationLedger, niveau_pour_points
+
+DEBUT = datetime(2025, 3, 3, 8, 0)
+
+
+class Horloge:
+    def __init__(self, moment):
+        self.moment = moment
+
+    def __call__(self):
+        return self.moment
+
+
+def _flux(n, seed=0, jours=45, utilisateurs=60):
+    rng = random.Random(seed)
+    evenements = []
+    for i in range(n):
+        u = rng.randrange(utilisateurs)
+        evenements.append({
+            "user_id": f"u{u}", "team": f"equipe_{u % 7}", "site": f"site_{u % 3}",
+            "kind": rng.choice(["observation", "observation", "signalement", "mentorat"]),
+            "horodatage": DEBUT + timedelta(days=jours * i / n, minutes=rng.randrange(60)),
+        })
+    return evenements
+
+
+def _attendu(evenements, portee, duree=None):
+    points = {"observation": 10, "signalement": 15, "mentorat": 25}
+    cle = {"user": "user_id", "team": "team", "site": "site"}[portee]
+    dernier = max(e["horodatage"] for e in evenements).date()
+    totaux = Counter()
+    for e in evenements:
+        if duree is None or e["horodatage"].date() > dernier - timedelta(days=duree):
+            totaux[e[cle]] += points[e["kind"]]
+    return sorted(totaux.items(), key=lambda t: (-t[1], t[0]))
+
+
+def test_niveaux_bissection():
+    assert [niveau_pour_points(p)[0] for p in (0, 49, 50, 149, 150, 499, 500, 10_000)] == [1, 1, 2, 2, 3, 4, 5, 5]
+
+
+def test_classements_fenetres_glissantes_vs_force_brute():
+    evenements = _flux(5000)
+    ledger = GamificationLedger(":memory:", clock=Horloge(max(e["horodatage"] for e in evenements)))
+    # Ordre d'arrivée légèrement perturbé: quelques événements antidatés
+    evenements[100], evenements[400] = evenements[400], evenements[100]
+    ledger.record_many(evenements)
+    for portee in ("user", "team", "site"):
+        for fenetre, duree in ((None, None), ("7j", 7), ("30j", 30)):
+            attendu = _attendu(evenements, portee, duree)
+            obtenu = [(r["id"], r["points"]) for r in ledger.leaderboard(portee, fenetre, k=len(attendu))]
+            assert obtenu == attendu, (portee, fenetre)
+    premier = ledger.leaderboard("user", k=1)[0]
+    assert ledger.user_profile(premier["id"])["rank"] == 1
+
+
+def test_badges_predicats_de_fenetre():
+    ledger = GamificationLedger(":memory:", clock=Horloge(DEBUT + timedelta(days=13, hours=1)))
+    premier = ledger.record("ana", "observation", team="A", site="S", horodatage=DEBUT)
+    assert premier["new_badges"] == ["premier_pas"]
+    # Une observation par jour pendant 10 jours: jamais 10 dans une même semaine
+    for j in range(1, 10):
+        assert "oeil_lynx" not in ledger.record("ana", "observation", horodatage=DEBUT + timedelta(days=j))["new_badges"]
+    # Rafale au jour 12: le prédicat est atteint quand les 10 dernières tiennent en 7 jours (jours 6 à 12)
+    obtenus = [ledger.record("ana", "observation", horodatage=DEBUT + timedelta(days=12, hours=h))["new_badges"]
+               for h in range(9)]
+    assert obtenus.index(["oeil_lynx"]) == 5 and sum(obtenus, []) == ["oeil_lynx"]
+
+    lent = ledger.record("ana", "signalement", horodatage=DEBUT + timedelta(days=13), details={"delai_secondes": 300})
+    rapide = ledger.record("ana", "signalement", horodatage=DEBUT + timedelta(days=13), details={"delai_secondes": 45})
+    assert lent["new_badges"] == [] and rapide["new_badges"] == ["flash_reporter"]
+
+    profil = ledger.user_profile("ana")
+    assert profil["total_points"] == 19 * 10 + 2 * 15 and profil["level"] == 3
+    assert [b["id"] for b in profil["badges"]] == ["flash_reporter", "oeil_lynx", "premier_pas"]
+    assert profil["points_today"] == 30
+    assert profil["challenge"] == {"done": 10, "target": 10}
+
+
+def test_rejeu_et_append_only(tmp_path):
+    chemin = tmp_path / "ledger.db"
+    horloge = Horloge(DEBUT + timedelta(days=45))
+    ledger = GamificationLedger(chemin, clock=horloge)
+    evenements = _flux(800, seed=3)
+    ledger.record_many(evenements)
+    avant = (ledger.leaderboard("team", "7j"), ledger.user_profile("u5"), ledger.dernier_seq)
+    with pytest.raises(sqlite3.DatabaseError):
+        ledger._conn.execute("UPDATE points_ledger SET points = 1000")
+    with pytest.raises(sqlite3.DatabaseError):
+        ledger._conn.execute("DELETE FROM points_ledger")
+    ledger.close()
+
+    rouvert = GamificationLedger(chemin, clock=horloge)
+    assert (rouvert.leaderboard("team", "7j"), rouvert.user_profile("u5"), rouvert.dernier_seq) == avant
+    assert rouvert.nombre_evenements == 800
+    rouvert.close()
+
+
+def test_lectures_apres_une_periode_sans_evenement():
+    """Les fenêtres glissent à la lecture même si aucun événement n'arrive"""
+    horloge = Horloge(DEBUT)
+    ledger = GamificationLedger(":memory:", clock=horloge)
+    ledger.record_many([{"user_id": "alice", "kind": "observation", "team": "A", "site": "S",
+                         "horodatage": DEBUT + timedelta(minutes=i)} for i in range(8)])
+    profil = ledger.user_profile("alice")
+    assert profil["points_today"] == 80 and profil["challenge"]["done"] == 8
+    assert ledger.leaderboard("user", "7j") == [{"rank": 1, "id": "alice", "points": 80}]
+
+    horloge.moment = DEBUT + timedelta(days=20)
+    profil = ledger.user_profile("alice")
+    assert profil["points_today"] == 0 and profil["challenge"]["done"] == 0
+    assert profil["total_points"] == 80
+    assert ledger.leaderboard("user", "7j") == [] and ledger.leaderboard("user", "30j")[0]["points"] == 80
+    assert ledger.points_du_jour("alice", maintenant=DEBUT + timedelta(days=40)) == 0
+    assert ledger.leaderboard("user", "30j") == [] and ledger.leaderboard("user")[0]["points"] == 80
+
+    # Un nouvel événement repart des fenêtres déjà avancées; seq suit l'AUTOINCREMENT
+    horloge.moment = DEBUT + timedelta(days=41)
+    assert ledger.record("alice", "signalement", horodatage=horloge.moment)["seq"] == 9
+    assert ledger.leaderboard("user", "7j") == [{"rank": 1, "id": "alice", "points": 15}]
+    assert ledger.user_profile("alice")["points_today"] == 15
+
+
+def test_lectures_concurrentes_aux_ecritures():
+    """Registre partagé: les lectures ne voient jamais un palier en cours de suppression"""
+    ledger = GamificationLedger(":memory:", clock=Horloge(DEBUT + timedelta(days=45)))
+    evenements = _flux(4000, seed=5)
+    erreurs = []
+
+    def ecrire():
+        for e in evenements:
+            ledger.record(e["user_id"], e["kind"], team=e["team"], site=e["site"], horodatage=e["horodatage"])
+
+    def lire():
+        try:
+            for i in range(2000):
+                classement = ledger.leaderboard("user", k=20)
+                assert [l["points"] for l in classement] == sorted((l["points"] for l in classement), reverse=True)
+                ledger.user_profile(f"u{i % 60}")
+        except Exception as e:   # KeyError sur un palier supprimé, classement déchiré
+            erreurs.append(e)
+
+    fils = [threading.Thread(target=ecrire)] + [threading.Thread(target=lire) for _ in range(3)]
+    for fil in fils:
+        fil.start()
+    for fil in fils:
+        fil.join()
+    assert erreurs == []
+    assert [(l["id"], l["points"]) for l in ledger.leaderboard("user", k=60)] == _attendu(evenements, "user")
+
+
+def test_debit_et_lectures_sous_la_milliseconde():
+    ledger = GamificationLedger(":memory:", clock=Horloge(DEBUT + timedelta(days=90)))
+    evenements = _flux(100_000, seed=1, jours=90, utilisateurs=2000)
+    debut = time.perf_counter()
+    ledger.record_many(evenements)
+    debit = len(evenements) / (time.perf_counter() - debut)
+    assert debit > 10_000
+
+    debut = time.perf_counter()
+    for _ in range(1000):
+        ledger.leaderboard("user", "7j", k=10)
+    assert (time.perf_counter() - debut) / 1000 < 1e-3
+    assert len(ledger.leaderboard("user", "7j", k=10)) == 10
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
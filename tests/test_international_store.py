@@ -0,0 +1,201 @@
+# Test Magasin International - Pool WAL, FTS5 et requête inter-juridictions
+# =========================================================================
+
+import os
+import sqlite3
+import sys
+import threading
+
+import pytest
+
+# Ajout des chemins pour imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from enrichments.international_store import InternationalIncidentStore, fts_query, prefix_range
+
+DESCRIPTIONS = ["Chute d'échafaudage", "Worker fell from scaffold", "Électrocution ligne", "Back strain lifting patient"]
+SECTEURS = ["236118", "238110", "622110", "484121"]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    chemin = tmp_path / "safetygraph_international.db"
+    conn = sqlite3.connect(chemin)
+    conn.executescript("""
+        CREATE TABLE osha_incidents (id INTEGER PRIMARY KEY, sector_code TEXT, incident_date TEXT,
+                                     description TEXT, created_at TEXT);
+        CREATE TABLE bls_statistics (id INTEGER PRIMARY KEY, naics_code TEXT, year INTEGER, incidence_rate REAL);
+        CREATE TABLE niosh_publications (id INTEGER PRIMARY KEY, title TEXT, abstract TEXT);
+        CREATE TABLE sector_mappings (id INTEGER PRIMARY KEY, scian_code TEXT, naics_code TEXT, jurisdiction TEXT);
+    """)
+    conn.executemany(
+        "INSERT INTO osha_incidents (sector_code, incident_date, description, created_at) VALUES (?, ?, ?, ?)",
+        [(SECTEURS[i % 4], f"{2019 + (i // 4) % 4}-03-01", DESCRIPTIONS[i % 4], f"{2019 + (i // 4) % 4}-03-02")
+         for i in range(400)])
+    conn.executemany("INSERT INTO bls_statistics (naics_code, year, incidence_rate) VALUES (?, ?, ?)",
+                     [(code, year, taux) for code, taux in [("236118", 3.1), ("238110", 4.0), ("622110", 5.5)]
+                      for year in range(2019, 2023)])
+    conn.executemany("INSERT INTO niosh_publications (title, abstract) VALUES (?, ?)", [
+        ("Preventing falls from scaffolds", "Scaffold fall protection in construction"),
+        ("Safe patient handling", "Hôpitaux: prévention des lésions lombaires"),
+        ("Noise exposure", "Hearing loss in mining"),
+    ])
+    conn.executemany("INSERT INTO sector_mappings (scian_code, naics_code, jurisdiction) VALUES (?, ?, 'US')",
+                     [(code, code) for code in SECTEURS])
+    conn.commit()
+    conn.close()
+    return chemin
+
+
+@pytest.fixture
+def store(db_path):
+    magasin = InternationalIncidentStore(db_path)
+    yield magasin
+    magasin.close()
+
+
+def test_preparation_wal_index_fts(store, db_path):
+    """WAL activé, index composites et tables FTS5 créés une fois"""
+    assert store.is_available
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    noms = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+    conn.close()
+    assert {"idx_osha_incidents_sector_year", "idx_bls_statistics_sector_year",
+            "osha_incidents_fts", "niosh_publications_fts"} <= noms
+
+    # Ré-ouverture idempotente
+    InternationalIncidentStore(db_path).close()
+
+
+def test_statistiques_une_requete(store):
+    stats = store.get_database_stats()
+    assert stats["osha_incidents"] == 400
+    assert stats["sectors_covered"] == 4
+    assert stats["last_update"] == "2022-03-02"
+
+
+def test_recherche_plein_texte(store):
+    """Accents ignorés, préfixes de mots, filtres secteur (préfixe SCIAN) et année"""
+    resultats = store.search_incidents("echafaud", sector_code="23", year_from=2020, year_to=2021)
+    assert len(resultats) == 50
+    assert all(r["description"] == "Chute d'échafaudage" for r in resultats)
+    assert all("2020" <= r["incident_date"][:4] <= "2021" for r in resultats)
+    assert store.search_incidents("echafaud", sector_code="62") == []
+
+    titres = [p["title"] for p in store.search_publications("hopitaux")]
+    assert titres == ["Safe patient handling"]
+    assert store.stats["fts_queries"] == 3
+    assert store.search_incidents("  ' ") == []
+
+
+def test_inter_juridictions_une_instruction(store):
+    """Jointure SCIAN -> OSHA/BLS identique à une fusion Python"""
+    lignes = store.cross_jurisdiction("23", year_from=2020, year_to=2021)
+    assert [(l["sector_code"], l["year"]) for l in lignes] == [
+        ("236118", 2020), ("236118", 2021), ("238110", 2020), ("238110", 2021)]
+    assert all(l["osha_incidents"] == 25 for l in lignes)
+    assert [l["bls_value"] for l in lignes] == [3.1, 3.1, 4.0, 4.0]
+
+    # Secteur sans statistiques BLS: incidents conservés, valeur BLS absente
+    camionnage = store.cross_jurisdiction("484")
+    assert len(camionnage) == 4 and all(l["bls_value"] is None for l in camionnage)
+
+    plan = " ".join(store.explain("cross_jurisdiction", scian_lo="23", scian_hi="24"))
+    assert "idx_sector_mappings_scian" in plan
+
+
+def test_codes_secteur_entiers(tmp_path):
+    """Colonnes SCIAN/NAICS d'affinité INTEGER: le préfixe '23' couvre 236118 et 238110"""
+    chemin = tmp_path / "codes_entiers.db"
+    conn = sqlite3.connect(chemin)
+    conn.executescript("""
+        CREATE TABLE osha_incidents (id INTEGER PRIMARY KEY, naics_code INTEGER, incident_date TEXT,
+                                     description TEXT);
+        CREATE TABLE bls_statistics (id INTEGER PRIMARY KEY, naics_code INTEGER, year INTEGER, incidence_rate REAL);
+        CREATE TABLE niosh_publications (id INTEGER PRIMARY KEY, title TEXT);
+        CREATE TABLE sector_mappings (id INTEGER PRIMARY KEY, scian_code INTEGER, naics_code INTEGER);
+    """)
+    conn.executemany("INSERT INTO osha_incidents (naics_code, incident_date, description) VALUES (?, ?, ?)",
+                     [(int(code), "2020-03-01", "Worker fell from scaffold") for code in SECTEURS])
+    conn.executemany("INSERT INTO bls_statistics (naics_code, year, incidence_rate) VALUES (?, 2020, 3.0)",
+                     [(int(code),) for code in SECTEURS])
+    conn.executemany("INSERT INTO sector_mappings (scian_code, naics_code) VALUES (?, ?)",
+                     [(int(code), int(code)) for code in SECTEURS] + [(500000 + i, 500000 + i) for i in range(500)])
+    conn.commit()
+    conn.close()
+
+    magasin = InternationalIncidentStore(chemin)
+    try:
+        lignes = magasin.cross_jurisdiction("23")
+        assert [(l["sector_code"], l["osha_incidents"]) for l in lignes] == [(236118, 1), (238110, 1)]
+        trouves = magasin.search_incidents("scaffold", sector_code="236")
+        assert [l["naics_code"] for l in trouves] == [236118]
+        assert "idx_sector_mappings_scian" in " ".join(
+            magasin.explain("cross_jurisdiction", scian_lo="23", scian_hi="24"))
+    finally:
+        magasin.close()
+
+
+def test_pool_connexions_partagees(store):
+    """Les lectures concurrentes réutilisent au plus `pool_size` connexions"""
+    erreurs = []
+
+    def lire():
+        try:
+            for _ in range(20):
+                store.cross_jurisdiction("23")
+        except Exception as e:
+            erreurs.append(e)
+
+    threads = [threading.Thread(target=lire) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not erreurs
+    assert store.stats["connections_opened"] <= store.pool_size
+    assert store.stats["queries"] == 160
+
+    with store.connection() as conn:
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM osha_incidents")
+
+
+def test_echec_ouverture_rend_la_place(db_path, monkeypatch):
+    """Une ouverture en échec ne consomme pas définitivement une place du pool"""
+    magasin = InternationalIncidentStore(db_path, pool_size=1)
+    ouvrir = magasin._open
+
+    def ouverture_en_echec():
+        raise sqlite3.OperationalError("unable to open database file")
+
+    monkeypatch.setattr(magasin, "_open", ouverture_en_echec)
+    with pytest.raises(sqlite3.OperationalError):
+        with magasin.connection():
+            pass
+    assert magasin._opened == 0
+
+    monkeypatch.setattr(magasin, "_open", ouvrir)
+    with magasin.connection() as conn:
+        assert conn.execute("SELECT 1").fetchone()[0] == 1
+    assert magasin.stats["connections_opened"] == 1
+    magasin.close()
+
+
+def test_utilitaires():
+    assert fts_query("chute d'échafaudage") == '"chute"* "d"* "échafaudage"*'
+    assert fts_query("  ") is None
+    assert prefix_range("23") == ("23", "24")
+
+
+def test_base_absente(tmp_path):
+    magasin = InternationalIncidentStore(tmp_path / "absente.db")
+    assert not magasin.is_available
+    assert magasin.get_database_stats() == {}
+    assert magasin.cross_jurisdiction("23") == []
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,260 @@
+# Test Ordonnanceur de Tâches - Cron, rattrapage, pools, délais, reprises et historique
+# =====================================================================================
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+# Ajout des chemins pour imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.job_scheduler import CronTrigger, JobScheduler
+
+
+class Horloge:
+    def __init__(self, moment):
+        self.moment = moment
+
+    def __call__(self):
+        return self.moment
+
+
+def _ordonnanceur(tmp_path, moment, **kwargs):
+    horloge = Horloge(moment)
+    return JobScheduler(tmp_path / "jobs.db", clock=horloge, seed=7, **kwargs), horloge
+
+
+def test_cron_next_after():
+    """Occurrences cron: pas, plages, jour de semaine et règle jour OU semaine"""
+    base = datetime(2025, 3, 3, 1, 59, 30)          # lundi
+    assert CronTrigger("0 2 * * *").next_after(base) == datetime(2025, 3, 3, 2, 0)
+    assert CronTrigger("0 2 * * *").next_after(datetime(2025, 3, 3, 2, 0)) == datetime(2025, 3, 4, 2, 0)
+    assert CronTrigger("*/15 9-17 * * 1-5").next_after(datetime(2025, 3, 7, 17, 50)) == datetime(2025, 3, 10, 9, 0)
+    assert CronTrigger("30 6 * * 0").next_after(base) == datetime(2025, 3, 9, 6, 30)
+    assert CronTrigger("30 6 * * 7").next_after(base) == datetime(2025, 3, 9, 6, 30)
+    assert CronTrigger("0 0 1 * 3").next_after(base) == datetime(2025, 3, 5, 0, 0)
+    assert CronTrigger("@monthly").next_after(base) == datetime(2025, 4, 1, 0, 0)
+    assert CronTrigger("0 12 29 2 *").next_after(base) == datetime(2028, 2, 29, 12, 0)
+    for invalide in ("0 2 * *", "60 * * * *", "0 2 * * 8", "*/0 * * * *"):
+        with pytest.raises(ValueError):
+            CronTrigger(invalide)
+
+
+def test_rattrapage_apres_redemarrage(tmp_path):
+    """Le dernier déclenchement persiste: les occurrences manquées suivent la politique"""
+    debut = datetime(2025, 3, 3, 12, 0)
+    sched, horloge = _ordonnanceur(tmp_path, debut)
+    for politique in ("skip", "latest", "all"):
+        sched.register(politique, lambda: None)
+        sched.schedule(politique, politique, "0 * * * *", catchup=politique, max_catchup=4)
+    sched.close()
+
+    # Arrêt de 5h30: six occurrences horaires manquées
+    horloge = Horloge(debut + timedelta(hours=5, minutes=30))
+    sched = JobScheduler(tmp_path / "jobs.db", clock=horloge)
+    for politique in ("skip", "latest", "all"):
+        sched.register(politique, lambda: None)
+        sched.schedule(politique, politique, "0 * * * *", catchup=politique, max_catchup=4)
+    sched.fire_due()
+    planifiees = {p: [r["scheduled_for"] for r in sched.history(job_type=p)] for p in ("skip", "latest", "all")}
+    assert planifiees["skip"] == []
+    assert planifiees["latest"] == ["2025-03-03 17:00:00.000000"]
+    assert sorted(planifiees["all"]) == [f"2025-03-03 {h}:00:00.000000" for h in (14, 15, 16, 17)]
+
+    # Rien de nouveau avant l'occurrence suivante; à l'heure, "latest" encore en file est dédoublonné
+    assert sched.fire_due() == []
+    horloge.moment = datetime(2025, 3, 3, 18, 0, 20)
+    assert len(sched.fire_due()) == 2
+    assert sched.history(job_type="skip")[0]["scheduled_for"] == "2025-03-03 18:00:00.000000"
+    assert sched.history(job_type="latest")[0]["status"] == "skipped"
+
+
+def test_dedoublonnage_des_chevauchements(tmp_path):
+    """Un déclenchement alors que le précédent est actif est consigné en skipped"""
+    sched, horloge = _ordonnanceur(tmp_path, datetime(2025, 3, 3, 1, 0))
+    sched.register("enrichissement", lambda: None)
+    sched.schedule("quotidien", "enrichissement", "*/10 * * * *", catchup="latest")
+    horloge.moment = datetime(2025, 3, 3, 1, 10, 5)
+    assert len(sched.fire_due()) == 1
+    horloge.moment = datetime(2025, 3, 3, 1, 20, 5)
+    assert sched.fire_due() == []
+    ignoree = sched.history(status="skipped")
+    assert len(ignoree) == 1 and "chevauchement" in ignoree[0]["error"]
+    assert sched.enqueue("enrichissement", dedup_key="quotidien") is None
+
+    asyncio.run(sched.run_pending())
+    assert sched.stats()["enrichissement"]["counts"]["succeeded"] == 1
+    assert sched.enqueue("enrichissement", dedup_key="quotidien") is not None
+
+
+def test_planification_type_non_enregistre(tmp_path):
+    """Planifier un type sans handler échoue au lieu de remplir la file"""
+    sched, _ = _ordonnanceur(tmp_path, datetime(2025, 3, 3, 1, 0))
+    with pytest.raises(ValueError, match="non enregistré"):
+        sched.schedule("quotidien", "enrichissement", "*/10 * * * *")
+    assert sched.schedules == {} and sched.fire_due() == []
+
+
+def test_pools_par_type_et_independance(tmp_path):
+    """La limite de concurrence est respectée par type; un type lent ne bloque pas les autres"""
+    sched, _ = _ordonnanceur(tmp_path, datetime(2025, 3, 3, 2, 0))
+    actifs = {"lent": 0, "max": 0}
+    fin_rapide = []
+
+    async def lent():
+        actifs["lent"] += 1
+        actifs["max"] = max(actifs["max"], actifs["lent"])
+        await asyncio.sleep(0.2)
+        actifs["lent"] -= 1
+
+    async def rapide():
+        fin_rapide.append(time.perf_counter())
+
+    sched.register("lent", lent, concurrency=2)
+    sched.register("rapide", rapide, concurrency=1)
+    for _ in range(5):
+        sched.enqueue("lent")
+    for _ in range(3):
+        sched.enqueue("rapide")
+
+    debut = time.perf_counter()
+    asyncio.run(sched.run_pending())
+    duree = time.perf_counter() - debut
+    assert actifs["max"] == 2
+    assert 0.55 < duree < 1.0                        # 5 exécutions de 0,2s par 2
+    assert len(fin_rapide) == 3 and max(fin_rapide) - debut < 0.1
+    assert sched.stats()["lent"]["counts"]["succeeded"] == 5
+
+
+def test_delai_reprises_avec_backoff(tmp_path):
+    """Un délai dépassé ou une exception est repris avec backoff jusqu'à max_attempts"""
+    sched, horloge = _ordonnanceur(tmp_path, datetime(2025, 3, 3, 6, 0))
+    appels = []
+
+    async def instable():
+        appels.append(len(appels))
+        if len(appels) == 1:
+            await asyncio.sleep(1)
+        if len(appels) == 2:
+            raise RuntimeError("perplexity indisponible")
+
+    async def toujours_lent():
+        await asyncio.sleep(1)
+
+    sched.register("instable", instable, timeout=0.05, max_attempts=3, backoff_base=10, backoff_max=60)
+    sched.register("bloque", toujours_lent, timeout=0.05, max_attempts=2, backoff_base=10)
+    run_id = sched.enqueue("instable")
+    bloque_id = sched.enqueue("bloque")
+
+    asyncio.run(sched.run_pending())
+    run = sched.history(job_type="instable")[0]
+    assert run["status"] == "queued" and run["attempt"] == 1 and "délai dépassé" in run["error"]
+    attente = (datetime.fromisoformat(run["available_at"]) - horloge.moment).total_seconds()
+    assert 5 <= attente <= 10                         # 10s avec 50 % de gigue
+
+    # Avant l'échéance rien ne repart
+    assert asyncio.run(sched.run_pending()) == 0
+    horloge.moment += timedelta(seconds=10)
+    asyncio.run(sched.run_pending())
+    run = sched.history(job_type="instable")[0]
+    assert run["attempt"] == 2 and "RuntimeError" in run["error"]
+    attente = (datetime.fromisoformat(run["available_at"]) - horloge.moment).total_seconds()
+    assert 10 <= attente <= 20
+
+    horloge.moment += timedelta(seconds=20)
+    asyncio.run(sched.run_pending())
+    run = sched.history(job_type="instable")[0]
+    assert run["id"] == run_id and run["status"] == "succeeded" and run["attempt"] == 3
+    bloque = sched.history(job_type="bloque")[0]
+    assert bloque["id"] == bloque_id and bloque["status"] == "timeout" and bloque["attempt"] == 2
+
+
+def test_handler_synchrone_au_delai_garde_sa_place(tmp_path):
+    """Un thread abandonné au délai occupe son pool jusqu'à son retour: concurrence jamais dépassée"""
+    sched, _ = _ordonnanceur(tmp_path, datetime(2025, 3, 3, 7, 0))
+    verrou = threading.Lock()
+    actifs = {"n": 0, "max": 0}
+    debuts = []
+
+    def bloquant():
+        with verrou:
+            actifs["n"] += 1
+            actifs["max"] = max(actifs["max"], actifs["n"])
+            debuts.append(time.perf_counter())
+        time.sleep(0.2)
+        with verrou:
+            actifs["n"] -= 1
+
+    sched.register("export", bloquant, concurrency=1, timeout=0.05, max_attempts=1)
+    for _ in range(3):
+        sched.enqueue("export")
+
+    asyncio.run(sched.run_pending())
+    assert actifs["max"] == 1 and len(debuts) == 3
+    assert all(b - a >= 0.19 for a, b in zip(debuts, debuts[1:]))
+    assert [r["status"] for r in sched.history(job_type="export")] == ["timeout"] * 3
+    assert sched._actifs["export"] == 0 and not sched._fils_orphelins
+
+
+def test_recuperation_et_historique(tmp_path):
+    """Les exécutions running d'un processus interrompu sont remises en file; historique filtrable"""
+    sched, horloge = _ordonnanceur(tmp_path, datetime(2025, 3, 3, 18, 0))
+    sched.register("rapport", lambda: None, max_attempts=2)
+    premier = sched.enqueue("rapport", payload={})
+    epuise = sched.enqueue("rapport")
+    sched._conn.execute("UPDATE job_runs SET status = 'running', attempt = 1 WHERE id = ?", (premier,))
+    sched._conn.execute("UPDATE job_runs SET status = 'running', attempt = 2 WHERE id = ?", (epuise,))
+    sched._conn.commit()
+    sched.close()
+
+    sched = JobScheduler(tmp_path / "jobs.db", clock=horloge)
+    recus = []
+    sched.register("rapport", lambda jour=None: recus.append(jour), max_attempts=2)
+    assert sched.recover() == 1
+    assert sched.history(status="failed")[0]["id"] == epuise
+    sched.enqueue("rapport", payload={"jour": "2025-03-03"})
+    asyncio.run(sched.run_pending())
+    assert set(recus) == {None, "2025-03-03"}
+
+    assert [r["status"] for r in sched.history(job_type="rapport")] == ["succeeded", "failed", "succeeded"]
+    assert sched.history(job_type="rapport", limit=1)[0]["payload"] == {"jour": "2025-03-03"}
+    assert sched.history(since=horloge.moment + timedelta(seconds=1)) == []
+    stats = sched.stats()["rapport"]
+    assert stats["counts"]["succeeded"] == 2 and stats["counts"]["failed"] == 1
+    horloge.moment += timedelta(days=31)
+    assert sched.purge(timedelta(days=30)) == 3
+    assert sched.history() == []
+
+
+def test_boucle_service_et_arret(tmp_path):
+    """run() exécute les tâches mises en file pendant le service et s'arrête proprement"""
+    sched = JobScheduler(tmp_path / "jobs.db", poll_interval=5)
+    termines = []
+
+    async def tache(n):
+        await asyncio.sleep(0.01)
+        termines.append(n)
+
+    sched.register("tache", tache, concurrency=3)
+
+    async def scenario():
+        service = asyncio.create_task(sched.run())
+        await asyncio.sleep(0.02)
+        for n in range(6):
+            sched.enqueue("tache", payload={"n": n})
+        while len(termines) < 6:
+            await asyncio.sleep(0.01)
+        sched.stop()
+        await asyncio.wait_for(service, 1)
+
+    asyncio.run(asyncio.wait_for(scenario(), 3))
+    assert sorted(termines) == list(range(6))
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
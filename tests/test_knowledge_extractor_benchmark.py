@@ -0,0 +1,151 @@
+# Benchmark Knowledge Extractor - Débit sur corpus STORM
+# ======================================================
+
+import glob
+import json
+import os
+import re
+import sys
+import time
+
+import pytest
+
+# Ajout des chemins pour imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'storm_research'))
+
+import knowledge_extractor
+from knowledge_extractor import KnowledgeExtractor
+
+CORPUS_GLOB = os.path.join(os.path.dirname(__file__), '..', 'data', 'storm_knowledge',
+                           'safety_agentique_corpus_*.json')
+PREFIXES = ["Research shows that", "Studies indicate", "Evidence suggests", "Findings reveal"]
+
+
+def charger_documents(repetitions: int = 200):
+    """Documents de recherche construits depuis le corpus STORM, répétés pour atteindre plusieurs Mo"""
+    documents = []
+    for path in sorted(glob.glob(CORPUS_GLOB)):
+        with open(path, encoding='utf-8-sig') as f:
+            corpus = json.load(f)
+
+        for research in corpus.get('research_results', []):
+            phrases = [
+                f"{PREFIXES[i % len(PREFIXES)]} {finding.rstrip('.')}."
+                for i, finding in enumerate(research.get('key_findings', []))
+            ]
+            phrases += [f"{r.get('recommendation', '')}: {r.get('expected_impact', '')}."
+                        for r in research.get('recommendations', [])]
+            phrases += [c.get('citation', '') for c in research.get('citations', [])]
+
+            documents.append({
+                'topic': research.get('topic', 'unknown'),
+                'raw_content': " ".join(phrases * repetitions),
+                'sources': [{'title': s.get('title', ''), 'url': s.get('url', '')}
+                            for s in research.get('sources_found', [])]
+            })
+    return documents
+
+
+def extraire_reference(extractor: KnowledgeExtractor, content: str):
+    """Extraction historique: un re.findall par pattern"""
+    insights = []
+    for pattern in extractor.extraction_patterns["insights"]:
+        insights.extend(re.findall(pattern, content, re.IGNORECASE))
+    return {insight.strip() for insight in insights if len(insight.strip()) > 10}
+
+
+def extraire_reference_metriques(extractor: KnowledgeExtractor, content: str):
+    """Extraction historique des métriques: content.lower() recalculé à chaque correspondance"""
+    metrics = {}
+    for pattern in extractor.extraction_patterns["metrics"]:
+        for match in re.findall(pattern, content, re.IGNORECASE):
+            if "improvement" in content.lower():
+                metrics["improvement_rate"] = match
+            elif "reduction" in content.lower():
+                metrics["reduction_rate"] = match
+            elif "roi" in content.lower():
+                metrics["roi"] = match
+    return metrics
+
+
+def test_extraction_identique_a_la_reference():
+    """Les patterns précompilés trouvent exactement les insights et métriques de l'extraction par pattern"""
+    extractor = KnowledgeExtractor()
+    for document in charger_documents(repetitions=1):
+        content = document['raw_content']
+        attendus = extraire_reference(extractor, content)
+        assert set(extractor._extract_insights(content, limit=None)) == attendus
+        obtenus = extractor.extract_from_research(document).insights
+        assert len(obtenus) == min(5, len(attendus)) and set(obtenus) <= attendus
+        assert extractor._extract_metrics(content) == extraire_reference_metriques(extractor, content)
+
+
+def test_chevauchements_et_ordre_des_patterns():
+    """Correspondances chevauchantes conservées; métrique = dernière du dernier pattern qui correspond"""
+    extractor = KnowledgeExtractor()
+    cas = [
+        "ROI of 300% was seen. Then 20% improvement",
+        "Research shows that studies indicate nested claims are common.",
+        "12% reduction first, then 8% improvement and 30% increase, ROI of 4.5",
+        "A 15% Improvement. Another 25% improvement. Then 5% REDUCTION.",
+        "Evidence suggests workers listen. Findings reveal Managers Matter A Lot.",
+    ]
+    for content in cas:
+        assert set(extractor._extract_insights(content, limit=None)) == extraire_reference(extractor, content)
+        assert extractor._extract_metrics(content) == extraire_reference_metriques(extractor, content)
+
+    assert extractor._extract_metrics(cas[0]) == {"improvement_rate": "300%"}
+    assert "nested claims are common" in extractor._extract_insights(cas[1])
+
+
+def test_batch_pool_identique_au_serie(monkeypatch):
+    """Le pool de processus produit les mêmes résultats, dans l'ordre d'entrée"""
+    extractor = KnowledgeExtractor()
+    documents = charger_documents(repetitions=5) * 2
+
+    with monkeypatch.context() as m:
+        # Sans max_workers explicite, aucun pool n'est créé
+        m.setattr(knowledge_extractor, "ProcessPoolExecutor", None)
+        serie = extractor.batch_extract_knowledge(documents)
+    pool = extractor.batch_extract_knowledge(documents, max_workers=2)
+
+    assert [k.topic for k in pool] == [d['topic'] for d in documents]
+    assert [(k.insights, k.metrics) for k in pool] == [(k.insights, k.metrics) for k in serie]
+
+
+@pytest.mark.skipif(not os.getenv("SAFEGRAPH_BENCH"), reason="benchmark de débit: SAFEGRAPH_BENCH=1")
+def test_benchmark_debit():
+    """Débit (Mo/s) série vs pool sur corpus de plusieurs Mo"""
+    extractor = KnowledgeExtractor()
+    documents = charger_documents()
+    taille_mo = sum(len(d['raw_content']) for d in documents) / 1e6
+
+    debut = time.perf_counter()
+    for document in documents:
+        extraire_reference(extractor, document['raw_content'])
+        extraire_reference_metriques(extractor, document['raw_content'])
+    duree_reference = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    serie = extractor.batch_extract_knowledge(documents, max_workers=1)
+    duree_serie = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    premier = None
+    recus = 0
+    for _ in extractor.iter_extract_knowledge(documents, max_workers=os.cpu_count(), chunk_size=1):
+        recus += 1
+        if premier is None:
+            premier = time.perf_counter() - debut
+    duree_pool = time.perf_counter() - debut
+
+    assert len(serie) == recus == len(documents)
+    print(f"\n   📦 Corpus: {len(documents)} documents, {taille_mo:.1f} Mo")
+    print(f"   ⏱️ Référence (findall/pattern): {taille_mo / duree_reference:.1f} Mo/s")
+    print(f"   ⏱️ Patterns précompilés (série): {taille_mo / duree_serie:.1f} Mo/s")
+    print(f"   ⏱️ Pool de processus: {taille_mo / duree_pool:.1f} Mo/s "
+          f"(premier résultat après {premier:.3f}s)")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,93 @@
+# Test Knowledge Graph STORM - Stockage compact, export incrémental, persistance
+# =============================================================================
+
+import os
+import sys
+import tempfile
+
+# Ajout des chemins pour imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'storm_research'))
+
+from knowledge_graph import SafetyKnowledgeGraph
+
+
+def _graphe_test() -> SafetyKnowledgeGraph:
+    graphe = SafetyKnowledgeGraph()
+    graphe.add_semantic_knowledge({
+        'topic': 'leadership',
+        'insights': ['Engagement visible de la direction', 'Tournées terrain hebdomadaires'],
+        'agent_mappings': {'A1': 'collecte'}
+    })
+    return graphe
+
+
+def test_extraction_sans_insights_ne_lie_aucun_concept():
+    """Une extraction vide ne relie pas les concepts existants au nouvel agent"""
+    graphe = _graphe_test()
+    graphe.add_semantic_knowledge({'topic': 'vide', 'insights': [], 'agent_mappings': {'AN1': 'analyse'}})
+
+    assert graphe.get_agent_enhancements('AN1') == []
+    assert graphe.number_of_edges() == 2
+
+
+def test_deduplication_concepts_par_contenu():
+    """Un même insight (casse/espaces près) n'est stocké qu'une fois"""
+    graphe = _graphe_test()
+    concepts = graphe.add_semantic_knowledge({
+        'topic': 'communication',
+        'insights': ['engagement  visible de la direction'],
+        'agent_mappings': {'R1': 'recommandation'}
+    })
+
+    assert len(graphe.nodes['concepts']) == 2
+    assert graphe.get_agent_enhancements('R1') == ['Engagement visible de la direction']
+    assert concepts == [0]
+
+
+def test_export_incremental_agents_modifies_seulement():
+    """L'export incrémental ne sérialise que les sous-graphes modifiés"""
+    graphe = _graphe_test()
+    graphe.add_semantic_knowledge({'topic': 'x', 'insights': ['i1'], 'agent_mappings': {'A2': 'collecte'}})
+    complet = graphe.export_knowledge_structure()
+    assert set(complet['agent_enhancements']) == {'agent_A1', 'agent_A2'}
+
+    graphe.add_semantic_knowledge({'topic': 'y', 'insights': ['i2'], 'agent_mappings': {'A2': 'collecte'}})
+    delta = graphe.export_knowledge_structure(incremental=True)
+    assert list(delta['agent_enhancements']) == ['agent_A2']
+    assert delta['agent_enhancements']['agent_A2'] == ['i1', 'i2']
+    assert delta['new_nodes'] == 1
+
+
+def test_persistance_incrementale_et_rechargement():
+    """Seuls les ajouts sont réécrits et le graphe rechargé est identique"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'kg.db')
+        graphe = _graphe_test()
+        assert graphe.save(db_path) == {'nodes_written': 3, 'edges_written': 2}
+
+        graphe.add_semantic_knowledge({'topic': 'z', 'insights': ['i3'], 'agent_mappings': {'A1': 'collecte'}})
+        assert graphe.save() == {'nodes_written': 1, 'edges_written': 1}
+
+        recharge = SafetyKnowledgeGraph.load(db_path)
+        assert recharge.get_agent_enhancements('A1') == graphe.get_agent_enhancements('A1')
+        assert recharge.number_of_edges() == 3
+
+
+def test_compaction_csr_conserve_ordre():
+    """Les requêtes sont identiques avant et après compaction CSR"""
+    graphe = SafetyKnowledgeGraph()
+    for i in range(50):
+        graphe.add_semantic_knowledge({
+            'topic': f't{i % 5}', 'insights': [f'insight {i}'], 'agent_mappings': {f'A{i % 3}': 'f'}
+        })
+    avant = {a: graphe.get_agent_enhancements(a) for a in ('A0', 'A1', 'A2')}
+    graphe.compact()
+    graphe._enhancements_cache.clear()
+
+    assert {a: graphe.get_agent_enhancements(a) for a in ('A0', 'A1', 'A2')} == avant
+    assert graphe.calculate_enhancement_impact()['agent_A0'] == 0.8
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
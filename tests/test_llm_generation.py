@@ -0,0 +1,90 @@
+# Test Génération LLM - Streaming, cache de prompts persistant et modèle local
+# ============================================================================
+
+import os
+import sys
+
+import pytest
+
+# Ajout des chemins pour imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.llm_generation import PromptCache, StreamingGenerator, StubChatModel, normalize_prompt
+
+SYSTEME = ("system", "Tu es un expert en sécurité au travail spécialisé dans le secteur Construction.")
+
+
+def _messages(ecarts):
+    return [SYSTEME, ("human", f"Classification de risque : At-Risk\n   Écarts identifiés : {ecarts}")]
+
+
+def test_modele_local_deterministe():
+    modele = StubChatModel()
+    messages = _messages("q1: -0.5")
+    fragments = [c.content for c in modele.stream(messages)]
+    assert len(fragments) > 10
+    assert "".join(fragments) == modele.invoke(messages).content == StubChatModel().invoke(messages).content
+    assert modele.invoke(_messages("q2: -0.8")).content != modele.invoke(messages).content
+
+
+def test_normalisation_prompt():
+    assert normalize_prompt([("system", "  Expert\n\n  SST "), "Écarts :  q1"]) == "system: Expert SST\nhuman: Écarts : q1"
+
+
+def test_streaming_puis_cache_persistant(tmp_path):
+    """Premier appel streamé depuis le modèle, suivants servis par le cache, y compris après redémarrage"""
+    chemin = tmp_path / "llm_cache.db"
+    modele = StubChatModel()
+    recus = []
+    generateur = StreamingGenerator(modele, cache=PromptCache(chemin), temperature=0.3)
+    reponse = generateur.generate(_messages("q1: -0.5"), on_token=recus.append)
+    assert len(recus) > 10 and "".join(recus) == reponse
+
+    # Espaces différents: même prompt normalisé
+    assert generateur.generate([SYSTEME, ("human", "Classification de risque : At-Risk Écarts identifiés : q1: -0.5")]) == reponse
+    assert modele.calls == 1 and generateur.stats["cache_hits"] == 1
+
+    # Température ou modèle différents: nouvelle entrée
+    StreamingGenerator(modele, cache=generateur.cache, temperature=0.7).generate(_messages("q1: -0.5"))
+    assert modele.calls == 2
+    generateur.cache.close()
+
+    cache = PromptCache(chemin)
+    assert len(cache) == 2
+    redemarre = StreamingGenerator(StubChatModel(), cache=cache, temperature=0.3)
+    assert redemarre.generate(_messages("q1: -0.5")) == reponse
+    assert redemarre.llm.calls == 0
+
+
+def test_stream_interrompu_non_mis_en_cache(tmp_path):
+    generateur = StreamingGenerator(StubChatModel(), cache=PromptCache(tmp_path / "c.db"))
+    flux = generateur.stream(_messages("q1: -0.5"))
+    next(flux)
+    flux.close()
+    assert len(generateur.cache) == 0
+
+
+def test_lot_deduplication_et_prefixes(tmp_path):
+    """Profils identiques générés une fois; requêtes groupées par préfixe commun"""
+    autre_secteur = ("system", "Tu es un expert en sécurité au travail spécialisé dans le secteur Santé.")
+    lot = {
+        "A": _messages("q1: -0.5"),
+        "B": [autre_secteur, ("human", "Écarts identifiés : q1: -0.5")],
+        "C": _messages("q1:   -0.5"),
+        "D": _messages("q3: -0.9"),
+    }
+    modele = StubChatModel()
+    generateur = StreamingGenerator(modele, cache=PromptCache(tmp_path / "c.db"))
+    flux = {}
+    reponses = generateur.generate_batch(lot, on_token=lambda i, t: flux.setdefault(i, []).append(t))
+
+    assert list(reponses) == ["A", "B", "C", "D"]
+    assert reponses["A"] == reponses["C"] != reponses["D"]
+    assert all("".join(flux[i]) == reponses[i] for i in lot)
+    assert modele.calls == 3
+    assert generateur.stats["deduplicated"] == 1 and generateur.stats["prefix_groups"] == 2
+    assert reponses == {i: StubChatModel().invoke(m).content for i, m in lot.items()}
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,127 @@
+# Test Télémétrie Mines Souterraines - Tampons circulaires, fenêtres et alarmes
+# ============================================================================
+
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+# Ajout des chemins pour imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from modules.mines_telemetry import (MineSensorSimulator, MineTelemetry, SampleRing, WindowedAggregates,
+                                     get_mine_telemetry, replay_file, write_replay)
+
+CAPTEURS = {"ch4": 8, "co": 8, "o2": 8, "debit_air": 4, "position": 20}
+
+
+def test_tampon_circulaire_memoire_fixe():
+    ring = SampleRing(capacity=10)
+    for debut in range(0, 25, 7):
+        n = np.arange(debut, min(debut + 7, 25))
+        ring.extend(n.astype(float), n % 3, n * 0.5)
+    t, s, v = ring.latest()
+    assert len(ring) == 10 and ring.written == 25
+    assert list(t) == list(range(15, 25)) and list(v) == [x * 0.5 for x in range(15, 25)]
+
+    ring.extend(np.arange(100, 130, dtype=float), np.zeros(30, dtype=int), np.zeros(30))
+    assert list(ring.latest(3)[0]) == [127.0, 128.0, 129.0]
+
+
+def test_fenetres_identiques_au_calcul_brut():
+    """Agrégats incrémentaux = réduction directe des échantillons de la fenêtre"""
+    rng = np.random.default_rng(3)
+    agg = WindowedAggregates(n_sensors=5, horizon=30, resolution=1.0)
+    toutes = []
+    for lot in range(40):
+        t = np.sort(rng.uniform(lot * 2.5, (lot + 1) * 2.5, 200))
+        s = rng.integers(0, 5, 200)
+        v = rng.normal(10, 3, 200)
+        agg.add(t, s, v)
+        toutes.append((t, s, v))
+    t, s, v = (np.concatenate(x) for x in zip(*toutes))
+    head = np.floor(t.max())
+    for secondes in (10, 30):
+        dedans = np.floor(t) > head - secondes
+        fenetre = agg.window(secondes)
+        for capteur in range(5):
+            m = dedans & (s == capteur)
+            assert fenetre["count"][capteur] == m.sum()
+            assert fenetre["mean"][capteur] == pytest.approx(v[m].mean())
+            assert fenetre["min"][capteur] == v[m].min() and fenetre["max"][capteur] == v[m].max()
+
+
+def test_alarmes_incrementales_entre_lots():
+    site = MineTelemetry("alarmes", sensors={"ch4": 2, "o2": 1}, windows={"1min": 60})
+    site.ingest("ch4", [1, 2, 3], [0, 0, 1], [0.4, 1.2, 0.3])
+    site.ingest("ch4", [4, 5, 6, 40], [0, 1, 0, 0], [1.7, 0.2, 1.1, 0.2])
+    ch4 = site.channels["ch4"]
+    assert ch4.alarms_raised == 1
+    assert [(e["sensor"], e["level"]) for e in ch4.events] == [(0, 1), (0, 2)]
+    assert ch4.cleared == 1 and ch4.clear_seconds == pytest.approx(38.0)
+    assert site.snapshot()["active_alarms"] == 0
+
+    # O2 bas: alarme sous le seuil, encore active
+    site.ingest("o2", [41, 42], [0, 0], [20.9, 17.5])
+    snap = site.snapshot()
+    assert snap["critical_alarms"] == 1
+    assert snap["emergency_response_time"] == pytest.approx(38.0 / 60, abs=0.05)
+    # Capteur hors parc ignoré
+    site.ingest("o2", [43], [5], [20.0])
+    assert site.channels["o2"].rejected == 1
+
+
+def test_debit_soutenu():
+    """≥100K échantillons/s en ingestion continue"""
+    simulateur = MineSensorSimulator(CAPTEURS, rate_hz=50, seed=1, incident_rate=0.01)
+    lots = list(simulateur.stream(120, batch_seconds=5))
+    n = sum(len(t) for lot in lots for t, _, _ in lot.values())
+    site = MineTelemetry("debit", sensors=CAPTEURS)
+    debut = time.perf_counter()
+    for lot in lots:
+        site.ingest_batches(lot)
+    assert n / (time.perf_counter() - debut) > 100_000
+    snap = site.snapshot()
+    assert snap["samples"] == n and snap["gas_detection_coverage"] == 100.0
+    assert snap["workers_tracked"] == 20
+
+
+def test_rejeu_fichier(tmp_path):
+    chemin = tmp_path / "rejeu.csv"
+    write_replay(chemin, MineSensorSimulator(CAPTEURS, seed=2, incident_rate=0.05).stream(60, batch_seconds=5))
+    direct = MineTelemetry("direct", sensors=CAPTEURS)
+    for lot in MineSensorSimulator(CAPTEURS, seed=2, incident_rate=0.05).stream(60, batch_seconds=5):
+        direct.ingest_batches(lot)
+    rejoue = MineTelemetry("rejeu", sensors=CAPTEURS)
+    for lot in replay_file(chemin, chunksize=4000):
+        rejoue.ingest_batches(lot)
+
+    a, b = direct.snapshot(), rejoue.snapshot()
+    assert a["samples"] == b["samples"] and a["active_alarms"] == b["active_alarms"]
+    for canal in CAPTEURS:
+        assert a["channels"][canal]["windows"]["1min"]["mean"] == pytest.approx(b["channels"][canal]["windows"]["1min"]["mean"])
+        assert a["channels"][canal]["alarms_raised"] == b["channels"][canal]["alarms_raised"]
+
+
+def test_client_thunder_lit_la_telemetrie():
+    pytest.importorskip("streamlit")
+    from modules.mines_souterraines import ThunderClientMines
+
+    client = ThunderClientMines()
+    sans_capteurs = client.get_mines_data("mine_sans_capteurs")
+    assert "telemetry" not in sans_capteurs
+    assert sans_capteurs["safety_metrics"]["emergency_response_time"] == "non mesuré"
+
+    site = get_mine_telemetry("mine_test_thunder", sensors=CAPTEURS)
+    for lot in MineSensorSimulator(CAPTEURS, seed=4).stream(60, batch_seconds=10):
+        site.ingest_batches(lot)
+    data = client.get_mines_data("mine_test_thunder")
+    assert data["telemetry"]["samples"] == site.samples
+    assert data["safety_metrics"]["gas_detection_coverage"] == 100.0
+    assert client.get_sector_benchmarks()["telemetry_sites"] >= 1
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
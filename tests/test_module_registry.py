@@ -0,0 +1,138 @@
+# Test Registre de Modules Paresseux - Chargement à la demande et budget de démarrage
+# ==================================================================================
+
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+# Ajout des chemins pour imports
+RACINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(RACINE, 'src'))
+
+from optimization.module_registry import APP_MODULES, LazyModuleRegistry
+
+# Budget d'import à froid (secondes) du démarrage de l'interface
+BUDGET_DEMARRAGE_SECONDES = 5.0
+
+
+@pytest.fixture
+def registre(tmp_path):
+    """Registre sur un dossier de modules factices"""
+    (tmp_path / 'module_lent.py').write_text(textwrap.dedent("""
+        import time
+        time.sleep(0.05)
+        IMPORTS = globals().get('IMPORTS', 0) + 1
+        def afficher():
+            return 'ok'
+    """), encoding='utf-8')
+    (tmp_path / 'module_incomplet.py').write_text("VALEUR = 1\n", encoding='utf-8')
+
+    registry = LazyModuleRegistry(str(tmp_path))
+    registry.register('lent', 'module_lent', ('afficher',), ('onglet_a',))
+    registry.register('incomplet', 'module_incomplet', ('afficher',), ('onglet_b',))
+    registry.register('absent', 'module_inexistant_xyz', (), ('onglet_b',))
+    yield registry
+    for name in ('module_lent', 'module_incomplet'):
+        sys.modules.pop(name, None)
+
+
+def test_declaration_sans_import(registre):
+    """Déclarer et vérifier la disponibilité n'exécute aucun module"""
+    assert registre.is_available('lent')
+    assert not registre.is_available('absent')
+    assert 'module_lent' not in sys.modules
+    assert registre.startup_report()['loaded'] == 0
+
+
+def test_disponibilite_sans_importer_les_parents(tmp_path):
+    """Un sous-module est trouvé sans exécuter les __init__ de ses paquets"""
+    paquet = tmp_path / 'paquet_xyz' / 'sous'
+    paquet.mkdir(parents=True)
+    for dossier in (paquet.parent, paquet):
+        (dossier / '__init__.py').write_text("raise RuntimeError('__init__ exécuté')\n", encoding='utf-8')
+    (paquet / 'feuille.py').write_text("VALEUR = 1\n", encoding='utf-8')
+
+    registry = LazyModuleRegistry(str(tmp_path))
+    registry.register('feuille', 'paquet_xyz.sous.feuille')
+    registry.register('manquante', 'paquet_xyz.sous.absente')
+    try:
+        assert registry.is_available('feuille')
+        assert not registry.is_available('manquante')
+        assert 'paquet_xyz' not in sys.modules and 'paquet_xyz.sous' not in sys.modules
+    finally:
+        sys.path.remove(str(tmp_path))
+
+
+def test_chargement_memoise(registre):
+    """Premier usage importe et chronomètre; les suivants réutilisent le module"""
+    module = registre.load('lent')
+    assert registre.get('lent', 'afficher')() == 'ok'
+    assert registre.load('lent') is module
+    assert module.IMPORTS == 1
+
+    # Ré-déclaration identique (ré-exécution Streamlit): état conservé
+    registre.register('lent', 'module_lent', ('afficher',), ('onglet_a',))
+    assert registre.is_loaded('lent')
+
+    rapport = registre.startup_report()
+    lent = next(m for m in rapport['modules'] if m['name'] == 'lent')
+    assert lent['import_seconds'] >= 0.05
+    assert lent['requests'] == 3
+
+
+def test_modules_indisponibles(registre):
+    """Module ou attribut absent: None, statut indisponible, pas de nouvelle tentative"""
+    chargés = registre.load_for('onglet_b')
+    assert chargés == {'incomplet': None, 'absent': None}
+    assert registre.get('incomplet', 'VALEUR', default='defaut') == 'defaut'
+    assert not registre.is_available('incomplet')
+
+    rapport = registre.startup_report()
+    assert rapport['unavailable'] == 2
+    assert 'afficher' in next(m for m in rapport['modules'] if m['name'] == 'incomplet')['error']
+
+
+def test_budget(registre):
+    """Les dépassements de budget total et par module sont signalés"""
+    registre.load('lent')
+    assert registre.check_budget(total_seconds=10.0, per_module_seconds={'lent': 10.0}) == []
+    violations = registre.check_budget(total_seconds=0.01, per_module_seconds={'lent': 0.01})
+    assert len(violations) == 2
+    assert violations[1].startswith('lent:')
+
+
+def test_budget_demarrage_application():
+    """Import à froid des modules de l'application dans un processus neuf"""
+    script = textwrap.dedent(f"""
+        import json, sys
+        sys.path.insert(0, {os.path.join(RACINE, 'src')!r})
+        from optimization.module_registry import get_app_registry
+        registry = get_app_registry({RACINE!r})
+        for name in ('oracle_hse', 'xai', 'extensions'):
+            registry.load(name)
+        report = registry.startup_report()
+        report['violations'] = registry.check_budget(total_seconds={BUDGET_DEMARRAGE_SECONDES})
+        print(json.dumps(report))
+    """)
+    sortie = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                            cwd=RACINE, timeout=120)
+    rapport = json.loads(sortie.stdout.strip().splitlines()[-1])
+
+    statuts = {m['name']: m['status'] for m in rapport['modules']}
+    # Les extensions multi-sources ne sont pas livrées dans ce dépôt
+    extensions_livrees = os.path.exists(os.path.join(RACINE, 'integration', 'app_behaviorx_extensions.py'))
+
+    assert rapport['declared'] == len(APP_MODULES)
+    assert statuts['oracle_hse'] == 'loaded'
+    assert statuts['xai'] == 'loaded'
+    assert statuts['extensions'] == ('loaded' if extensions_livrees else 'unavailable')
+    assert rapport['loaded'] == 2 + extensions_livrees
+    assert rapport['violations'] == [], rapport['violations']
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,151 @@
+# Test Moteur Culture SST - Journal événementiel, compteurs incrémentaux et rejeu
+# ===============================================================================
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+# Ajout des chemins pour imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+pytest.importorskip("streamlit")
+
+from safetygraph_integration import (ACTIONS_RAPIDES, DIMENSIONS_CULTURE_SST, CatalogueActions,
+                                     CompteursActions, JournalActionsCulture, MoteurCultureSST,
+                                     ProfilUtilisateur)
+
+DEBUT = datetime(2025, 7, 1, 8, 0)
+SEQUENCE = [
+    (ProfilUtilisateur.TRAVAILLEUR, "signaler_incident", "usine_nord"),
+    (ProfilUtilisateur.TRAVAILLEUR, "check_securite", "usine_sud"),
+    (ProfilUtilisateur.COSS, "dashboard_analytique", "usine_nord"),
+    (ProfilUtilisateur.DIRECTEUR_HSE, "vue_executive", "siege"),
+]
+
+
+def _jouer(moteur, n):
+    for i in range(n):
+        profil, action_id, site = SEQUENCE[i % len(SEQUENCE)]
+        moteur.enregistrer_action(profil, action_id, DEBUT + timedelta(hours=6 * i), site=site)
+
+
+def _scores(moteur):
+    return ({k: round(d.score_actuel, 9) for k, d in moteur.scores_culture.items()},
+            {k: round(c.score_conformite, 9) for k, c in moteur.conformite_iso.items()})
+
+
+def test_catalogue_indexe():
+    catalogue = CatalogueActions(ACTIONS_RAPIDES)
+    assert catalogue.trouver(ProfilUtilisateur.COSS, "analyse_risques").nom == "🔍 Analyse Risques"
+    assert catalogue.trouver(ProfilUtilisateur.TRAVAILLEUR, "analyse_risques") is None
+    assert catalogue.par_id("vue_executive").clause_iso_45001 == "5.1_leadership_engagement"
+    assert [a.id for a in catalogue.par_categorie("engagement_proactif")] == ["signaler_incident"]
+    assert len(catalogue) == sum(len(actions) for actions in ACTIONS_RAPIDES.values())
+
+
+def test_compteurs_fenetres_glissantes():
+    """Totaux par action/site et fenêtres exactes, même avec des actions antidatées"""
+    compteurs = CompteursActions({"7j": timedelta(days=7)})
+    compteurs.ajouter(DEBUT, "check_securite", "nord", "travailleur_terrain")
+    compteurs.ajouter(DEBUT + timedelta(days=5), "check_securite", "sud", "travailleur_terrain")
+    compteurs.ajouter(DEBUT + timedelta(days=1), "check_securite", "nord", "travailleur_terrain")  # antidatée
+    assert compteurs.frequence("check_securite", fenetre="7j") == 3
+
+    compteurs.ajouter(DEBUT + timedelta(days=9), "signaler_incident", "nord", "travailleur_terrain")
+    assert compteurs.frequence("check_securite") == 3
+    assert compteurs.frequence("check_securite", site="nord") == 2
+    assert compteurs.frequence("check_securite", fenetre="7j") == 1
+    assert compteurs.frequence("check_securite", site="nord", fenetre="7j") == 0
+
+    # Trop ancienne pour la fenêtre: comptée au total seulement
+    compteurs.ajouter(DEBUT, "check_securite", "nord", "travailleur_terrain")
+    assert compteurs.frequence("check_securite", fenetre="7j") == 1
+    assert compteurs.frequence("check_securite") == 4
+
+    copie = CompteursActions.depuis_etat(compteurs.etat())
+    assert copie.etat() == compteurs.etat()
+    assert copie.par_site == compteurs.par_site
+
+
+def test_frequence_equivalente_ancien_calcul():
+    """Même conformité ISO qu'un recalcul sur l'historique complet"""
+    moteur = MoteurCultureSST()
+    _jouer(moteur, 40)
+    for action_id in ("signaler_incident", "check_securite"):
+        attendu = min(1.0, sum(1 for e in moteur.historique_actions if e["action"].id == action_id) / 10)
+        assert moteur._calculer_frequence_action(action_id) == attendu
+    assert moteur.nombre_actions == 40
+    # Les modèles de référence partagés ne sont pas modifiés
+    assert all(d.score_actuel == 0.0 for d in DIMENSIONS_CULTURE_SST.values())
+
+
+def test_instantane_et_rejeu(tmp_path):
+    """Redémarrage = dernier instantané + rejeu des actions postérieures"""
+    chemin = str(tmp_path / "culture.db")
+    moteur = MoteurCultureSST(journal=chemin, intervalle_instantane=25)
+    _jouer(moteur, 60)
+    reference = _scores(moteur)
+    assert moteur._sequence_instantane == 50
+
+    journal = JournalActionsCulture(chemin)
+    seq, etat = journal.dernier_instantane()
+    assert seq == 50 and etat["nombre_actions"] == 50
+    assert len(list(journal.evenements_depuis(seq))) == 10
+
+    redemarre = MoteurCultureSST(journal=journal)
+    assert _scores(redemarre) == reference
+    assert redemarre.nombre_actions == 60
+    assert redemarre.compteurs.etat() == moteur.compteurs.etat()
+    assert [e["action"].id for e in redemarre.historique_actions] == [e["action"].id for e in moteur.historique_actions]
+
+    # Moteur sans journal (tout en mémoire): même état
+    complet = MoteurCultureSST()
+    _jouer(complet, 60)
+    assert _scores(complet) == reference
+
+    # Réinitialisation locale: le journal partagé et les instantanés sont conservés
+    redemarre.reinitialiser()
+    assert redemarre.nombre_actions == 0
+    _jouer(redemarre, 3)
+    assert redemarre.nombre_actions == 3
+    redemarre.sauver_instantane()
+    assert journal.dernier_instantane()[0] == 50
+    assert MoteurCultureSST(journal=chemin).nombre_actions == 63
+
+
+def test_journal_partage_entre_moteurs(tmp_path):
+    """Sessions sur un même journal: chaque instantané couvre tout le préfixe du journal"""
+    chemin = str(tmp_path / "culture.db")
+    moteur_a = MoteurCultureSST(journal=chemin, intervalle_instantane=3)
+    moteur_b = MoteurCultureSST(journal=chemin, intervalle_instantane=3)
+    _jouer(moteur_b, 2)
+    _jouer(moteur_a, 3)
+
+    assert moteur_a.nombre_actions == 5 and moteur_a.derniere_sequence == 5
+    seq, etat = moteur_a.journal.dernier_instantane()
+    assert seq == 3 and etat["nombre_actions"] == 3
+    assert moteur_b.synchroniser() == 3 and moteur_b.nombre_actions == 5
+    assert _scores(moteur_b) == _scores(moteur_a)
+
+    redemarre = MoteurCultureSST(journal=chemin)
+    assert redemarre.nombre_actions == 5
+    assert redemarre.compteurs.etat() == moteur_a.compteurs.etat()
+
+
+def test_donnees_demo_hors_journal(tmp_path):
+    from safetygraph_integration import charger_donnees_demo
+
+    moteur = MoteurCultureSST(journal=str(tmp_path / "culture.db"))
+    with pytest.raises(ValueError):
+        charger_donnees_demo(moteur)
+    assert moteur.journal.derniere_sequence() == 0
+
+    demo = MoteurCultureSST()
+    charger_donnees_demo(demo)
+    assert demo.nombre_actions > 0
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,145 @@
+# Test Pipeline Multimodal V4 - Échantillonnage de scènes, dHash et cache par contenu
+# ==================================================================================
+
+import asyncio
+import base64
+import io
+import os
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+
+# Ajout des chemins pour imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from modules.agentique_v4.agents.multimodal import frame_pipeline
+from modules.agentique_v4.agents.multimodal.frame_pipeline import (FramePipeline, PipelineConfig, StubFrameAnalyzer,
+                                                                   dhash, hamming_distances)
+from modules.agentique_v4.agents.multimodal_agent import MultimodalAgent
+
+
+def _scene(seed, shape=(180, 320, 3)):
+    rng = np.random.default_rng(seed)
+    # Blocs de couleur: structure stable pour le dHash, distincte d'une scène à l'autre
+    blocs = rng.integers(0, 255, (6, 8, 3), dtype=np.uint8)
+    return np.kron(blocs, np.ones((shape[0] // 6, shape[1] // 8, 1), dtype=np.uint8))
+
+
+def _video(scenes, images_par_scene=30, seed=0):
+    """Scènes successives avec bruit capteur (quasi-doublons à l'intérieur d'une scène)"""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for scene in scenes:
+        for _ in range(images_par_scene):
+            bruit = rng.integers(-3, 4, scene.shape)
+            frames.append(np.clip(scene.astype(np.int16) + bruit, 0, 255).astype(np.uint8))
+    return frames
+
+
+def _gif(frames, duree_ms=100):
+    buffer = io.BytesIO()
+    images = [Image.fromarray(f) for f in frames]
+    images[0].save(buffer, format="GIF", save_all=True, append_images=images[1:], duration=duree_ms, loop=0)
+    return buffer.getvalue()
+
+
+def test_dhash_quasi_doublons():
+    a, b = _scene(1), _scene(2)
+    bruitee = np.clip(a.astype(np.int16) + 2, 0, 255).astype(np.uint8)
+    empreintes = np.array([dhash(a), dhash(b)], dtype=np.uint64)
+    distances = hamming_distances(empreintes, dhash(bruitee))
+    assert distances[0] <= 2 < distances[1]
+
+
+def test_seules_les_images_distinctes_atteignent_l_analyseur():
+    """Scènes A, B, A: la reprise de A est échantillonnée puis écartée comme doublon"""
+    analyseur = StubFrameAnalyzer()
+    pipeline = FramePipeline(analyseur, PipelineConfig(max_interval=60, batch_size=2, max_side=128))
+    frames = _video([_scene(1), _scene(2), _scene(1), _scene(3)])
+    resultat = pipeline.process_video(frames)
+    rapport = resultat.report
+
+    assert rapport.frames_decoded == 120
+    assert rapport.frames_sampled == 4 and rapport.frames_unique == 3
+    assert rapport.dedup_ratio == pytest.approx(0.25)
+    assert rapport.reduction_ratio == pytest.approx(1 - 3 / 120)
+    assert analyseur.frames_seen == 3 and analyseur.calls == rapport.batches == 2
+    assert [f["index"] for f in resultat.frames] == [0, 30, 90]
+    assert rapport.frames_per_second > 0
+
+
+def test_echantillonnage_intervalle_maximal():
+    """Scène fixe: une image au moins toutes les max_interval secondes, puis dédupliquée"""
+    pipeline = FramePipeline(config=PipelineConfig(max_interval=1.0, default_fps=10))
+    rapport = pipeline.process_video(_video([_scene(4)], images_par_scene=50)).report
+    assert rapport.frames_sampled == 5 and rapport.frames_unique == 1
+
+
+def test_cache_par_contenu_et_gif():
+    analyseur = StubFrameAnalyzer()
+    pipeline = FramePipeline(analyseur, PipelineConfig(max_interval=60))
+    gif = _gif(_video([_scene(5), _scene(6)], images_par_scene=10))
+    premier = pipeline.process_video(gif)
+    assert premier.report.frames_decoded == 20 and premier.report.frames_unique == 2
+    assert premier.frames[1]["timestamp"] == pytest.approx(1.0)
+
+    second = pipeline.process_video(gif)
+    assert second.report.cached and second.frames == premier.frames
+    second.frames[0]["risks"].append({"type": "altere"})
+    second.frames.clear()
+    assert pipeline.process_video(gif).frames == premier.frames
+    assert analyseur.frames_seen == 2 and pipeline.stats["cache_hits"] == 2
+
+
+def test_agent_multimodal_image_et_video(tmp_path):
+    agent = MultimodalAgent(config=PipelineConfig(max_interval=60))
+    danger = np.zeros((180, 320, 3), dtype=np.uint8)
+    danger[..., 0] = 160  # zone rouge sombre
+    buffer = io.BytesIO()
+    Image.fromarray(danger).save(buffer, format="PNG")
+
+    image = asyncio.run(agent.analyze_image(base64.b64encode(buffer.getvalue()).decode()))
+    # Sans analyseur branché: heuristique locale, résultat marqué dégradé
+    assert image["status"] == "degraded" and image["analyzer"] == "stub"
+    assert [r["type"] for r in image["risks_detected"]] == ["eclairage_insuffisant", "zone_danger_signalee"]
+    assert image["safety_score"] == 55.0
+
+    chemin = tmp_path / "incident.gif"
+    chemin.write_bytes(_gif(_video([_scene(7), danger], images_par_scene=8)))
+    video = asyncio.run(agent.analyze_video(str(chemin)))
+    assert video["frames_analyzed"] == 2
+    assert [m["frame_index"] for m in video["critical_moments"]] == [8]
+    assert video["processing"]["frames_decoded"] == 16
+
+    assert asyncio.run(agent.analyze_video(str(tmp_path / "absente.mp4")))["status"] == "error"
+
+    branche = MultimodalAgent(analyzer=StubFrameAnalyzer(), config=PipelineConfig(max_interval=60))
+    resultat = asyncio.run(branche.analyze_video(str(chemin)))
+    assert resultat["status"] == "success" and resultat["analyzer"] == StubFrameAnalyzer.name
+
+
+def test_chemins_absents_et_empreinte_par_blocs(tmp_path, monkeypatch):
+    """Un chemin absent lève FileNotFoundError; l'empreinte d'un fichier égale celle de ses octets"""
+    pipeline = FramePipeline(config=PipelineConfig(max_interval=60))
+    for absent in (str(tmp_path / "absente.gif"), "chantier.mp4", "videos/inspection"):
+        with pytest.raises(FileNotFoundError):
+            pipeline.process_video(absent)
+
+    gif = _gif(_video([_scene(8)], images_par_scene=4))
+    chemin = tmp_path / "inspection.gif"
+    chemin.write_bytes(gif)
+    monkeypatch.setattr(frame_pipeline, "HASH_CHUNK", 7)
+    assert pipeline._content_hash("video", str(chemin)) == pipeline._content_hash("video", gif)
+    assert pipeline._content_hash("video", chemin) == pipeline._content_hash("video", base64.b64encode(gif).decode())
+
+    monkeypatch.setattr(frame_pipeline, "CV2_AVAILABLE", False)
+    mp4 = tmp_path / "inspection.mp4"
+    mp4.write_bytes(b"\x00\x00\x00\x18ftypmp42")
+    with pytest.raises(ImportError, match="opencv-python-headless"):
+        pipeline.process_video(mp4)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,140 @@
+# Test Observabilité - Histogrammes HDR, compteurs, spans imbriqués et export
+# ===========================================================================
+
+import asyncio
+import json
+import os
+import random
+import sys
+from datetime import datetime
+
+import pytest
+
+# Ajout des chemins pour imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from agents.base_agent import PERFORMANCE_HISTORY, AgentConfig, BaseAgent, SafetyAgenticState
+from utils.llm_generation import PromptCache, StreamingGenerator, StubChatModel
+from utils.observability import (LatencyHistogram, MetricsRegistry, Tracer, benchmark_span_overhead, export_json,
+                                 export_prometheus, get_metrics, get_tracer, new_trace_context, traced_node)
+
+
+def test_histogramme_precision_et_memoire_fixe():
+    rng = random.Random(0)
+    valeurs = [int(rng.lognormvariate(12, 2)) for _ in range(50_000)]
+    histogramme = LatencyHistogram()
+    for v in valeurs:
+        histogramme.record(v)
+    valeurs.sort()
+    for q in (0.5, 0.9, 0.99):
+        exact = valeurs[int(q * len(valeurs)) - 1]
+        assert exact <= histogramme.percentile(q) <= exact * 1.02
+    assert histogramme.percentile(1.0) == histogramme.max == valeurs[-1]
+    histogramme.record(10 ** 15)   # plafonné, aucune case ajoutée
+    assert len(histogramme.counts) == LatencyHistogram.TAILLE < 2500
+    assert histogramme.summary()["count"] == 50_001
+
+
+def test_spans_imbriques_et_taches_asyncio():
+    tracer = Tracer(MetricsRegistry())
+
+    async def etape(nom):
+        with tracer.span(nom):
+            await asyncio.sleep(0)
+            with tracer.span(f"{nom}.llm"):
+                await asyncio.sleep(0)
+
+    async def workflow():
+        with tracer.span("workflow") as racine:
+            await asyncio.gather(*(asyncio.ensure_future(etape(f"agent_{i}")) for i in range(3)))
+        return racine
+
+    racine = asyncio.run(workflow())
+    spans = {s["name"]: s for s in tracer.trace(racine.trace_id)}
+    assert len(spans) == 7
+    for i in range(3):
+        assert spans[f"agent_{i}"]["parent_id"] == racine.span_id
+        assert spans[f"agent_{i}.llm"]["parent_id"] == spans[f"agent_{i}"]["span_id"]
+    assert tracer.registry.histogram("span_latency", span="workflow").count == 1
+    assert tracer.current() is None
+
+
+def test_noeuds_langgraph_correles_par_l_etat():
+    etat = {"user_input": "Analyser", "trace_context": new_trace_context()}
+    appels = []
+
+    @traced_node("test_router")
+    def router(state):
+        appels.append(get_tracer().current().trace_id)
+        return {"intent": "analysis"}
+
+    @traced_node("test_analyste")
+    def analyste(state):
+        raise ValueError("données manquantes")
+
+    router(etat)
+    with pytest.raises(ValueError):
+        analyste(etat)
+    trace = get_tracer().trace(etat["trace_context"]["trace_id"])
+    assert [s["name"] for s in trace] == ["test_router", "test_analyste"] and appels == [trace[0]["trace_id"]]
+    assert trace[1]["status"] == "error"
+    assert get_metrics().histogram("node_latency", node="test_router").count == 1
+    assert get_metrics().counter("node_errors_total", node="test_analyste") == 1
+
+
+def test_base_agent_trace_et_metriques_bornees():
+    class AgentTest(BaseAgent):
+        async def process(self, state):
+            with self.span("scoring"):
+                pass
+            await self.log_performance(datetime.now(), {"confidence_score": 0.8})
+            return state
+
+    agent = AgentTest(AgentConfig("T99", "Agent test", "Agent de test"))
+    for _ in range(PERFORMANCE_HISTORY + 20):
+        asyncio.run(agent.process(SafetyAgenticState()))
+    assert len(agent.performance_metrics) == PERFORMANCE_HISTORY
+    resume = agent.get_performance_summary()
+    assert resume["latency"]["count"] == PERFORMANCE_HISTORY + 20 and resume["calls"]["success"] == PERFORMANCE_HISTORY + 20
+    dernier = [s for s in get_tracer().finished if s.name.startswith("T99.")][-2:]
+    assert [s.name for s in dernier] == ["T99.scoring", "T99.process"]
+    assert dernier[0].parent_id == dernier[1].span_id
+
+
+def test_compteurs_cache_jetons_et_exports(tmp_path):
+    metrics = get_metrics()
+    avant = metrics.counter("cache_hits_total", cache="prompt")
+    generateur = StreamingGenerator(StubChatModel(), cache=PromptCache(tmp_path / "cache.db"))
+    messages = [("system", "Expert SST"), ("human", "Écarts : q1")]
+    generateur.generate(messages)
+    generateur.generate(messages)
+    assert metrics.counter("cache_hits_total", cache="prompt") == avant + 1
+    assert metrics.counter("llm_tokens_total", model=generateur.model, kind="completion") > 10
+
+    metrics.observe("export_test", 1_500_000, agent="A2")
+    donnees = export_json(tmp_path / "metrics.json")
+    assert json.loads((tmp_path / "metrics.json").read_text(encoding="utf-8")) == donnees
+    texte = export_prometheus()
+    assert '# TYPE safegraph_cache_hits_total counter' in texte
+    assert 'safegraph_export_test_seconds{agent="A2",quantile="0.99"} 0.001500000' in texte
+    assert 'safegraph_export_test_seconds_count{agent="A2"} 1' in texte
+    for ligne in texte.splitlines():
+        assert ligne.startswith("#") or float(ligne.rsplit(" ", 1)[1]) >= 0
+
+
+def test_export_prometheus_echappe_les_labels():
+    registry = MetricsRegistry()
+    registry.incr("jobs_total", job='rapport "hebdo"', site="C:\\chantier\nnord")
+    texte = export_prometheus(registry)
+    assert 'safegraph_jobs_total{job="rapport \\"hebdo\\"",site="C:\\\\chantier\\nnord"} 1' in texte
+    assert len(texte.splitlines()) == 2
+
+
+@pytest.mark.skipif(not os.getenv("SAFEGRAPH_BENCH"), reason="mesure de surcoût: SAFEGRAPH_BENCH=1")
+def test_surcout_instrumentation():
+    mesures = min((benchmark_span_overhead(20_000) for _ in range(3)), key=lambda m: m["span_us"])
+    assert mesures["span_us"] < 5 and mesures["histogram_record_us"] < 2
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,167 @@
+# Test Service d'Exécution Orchestrateur - Pipeline A1→A2→AN1→R1 en arrière-plan
+# ================================================================================
+
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+# Ajout des chemins pour imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from agents.execution_service import OrchestratorExecutionService, PIPELINE_STAGES, UnknownJobError
+
+ENTREES = {
+    "evaluation_data": {"responses": {"safety_awareness": 8, "risk_perception": 7, "epi_usage": 9,
+                                      "procedure_compliance": 6, "team_communication": 8}},
+    "observation_data": {"location": "Chantier", "observation_type": "terrain_inspection",
+                         "environmental_conditions": {"lighting": "adequate", "noise_level": "high"}},
+    "incident_cnesst": {"NATURE_LESION": "BLES. TRAUMA. MUSCLES,TENDONS,ETC.", "GENRE": "EFFORT EXCESSIF",
+                        "SECTEUR_SCIAN": "236", "IND_LESION_TMS": "OUI"},
+    "context": {"secteur": "CONSTRUCTION", "taille_entreprise": "MOYENNE"}
+}
+
+
+class _A1Lent:
+    """Enveloppe d'agent ajoutant une latence (travail hors thread appelant)"""
+
+    def __init__(self, agent, delai):
+        self.agent, self.delai = agent, delai
+
+    async def process(self, *args):
+        await asyncio.sleep(self.delai)
+        return await self.agent.process(*args)
+
+
+@pytest.fixture
+def service():
+    svc = OrchestratorExecutionService(max_workers=2)
+    yield svc
+    svc.shutdown()
+
+
+def test_pipeline_reel_et_evenements(service):
+    """Événements started/finished par étape, résultats réels des quatre agents"""
+    job_id = service.submit(ENTREES)
+    job = service.wait(job_id, timeout=30)
+
+    assert job.status == "finished", job.error
+    etapes = [(e.stage, e.status) for e in job.events]
+    attendu = [("job", "started")]
+    for stage, _ in PIPELINE_STAGES:
+        attendu += [(stage, "started"), (stage, "finished")]
+    assert etapes == attendu + [("job", "finished")]
+    assert [e.sequence for e in job.events] == list(range(len(job.events)))
+
+    fins = {e.stage: e for e in job.events if e.status == "finished"}
+    assert all(fins[stage].duration is not None for stage, _ in PIPELINE_STAGES)
+    assert fins["AN1"].partial_result["zones_aveugles"] == job.result["AN1"]["summary"]["variables_critiques"]
+    assert fins["R1"].progress == 1.0
+
+    # Variables A1/A2 alignées sur les clés R1 (ex. 'Usage EPI' -> 'usage_epi')
+    assert "usage_epi" in job.result["AN1"]["ecarts_analysis"]["ecarts_variables"]
+    assert "business_impact" in job.result["R1"]
+
+
+def test_job_termine_jamais_reexecute(service):
+    """Une ré-exécution Streamlit réutilise le job et ses résultats"""
+    job_id = service.submit(ENTREES)
+    premier = service.wait(job_id, timeout=30)
+    nb_evenements = len(premier.events)
+
+    assert service.submit(dict(ENTREES)) == job_id
+    assert service.get_job(job_id).result is premier.result
+    assert len(service.get_job(job_id).events) == nb_evenements
+    assert service.stats == {"submitted": 2, "executed": 1, "reused": 1}
+
+    service.submit(ENTREES, force=True)
+    assert service.wait(job_id, timeout=30).result is not premier.result
+    assert service.stats["executed"] == 2
+
+
+def test_plusieurs_observateurs():
+    """Soumission non bloquante; chaque observateur reçoit tous les événements, dans l'ordre"""
+    svc = OrchestratorExecutionService(agent_factory=lambda: _agents_lents(0.2))
+    try:
+        debut = time.perf_counter()
+        job_id = svc.submit(ENTREES)
+        assert time.perf_counter() - debut < 0.1
+
+        observateurs = [svc.watch(job_id), svc.watch(job_id)]
+        recus = {w: [] for w in observateurs}
+        while not svc.get_job(job_id).done:
+            for w in observateurs:
+                recus[w] += svc.poll(w, timeout=0.02)
+        for w in observateurs:
+            recus[w] += svc.poll(w)
+
+        sequences = list(range(len(svc.get_job(job_id).events)))
+        assert all([e.sequence for e in recus[w]] == sequences for w in observateurs)
+
+        # Observateur arrivé après la fin: historique complet rejoué
+        assert [e.sequence for e in svc.poll(svc.watch(job_id))] == sequences
+    finally:
+        svc.shutdown()
+
+
+def test_file_bornee_observateur_lent():
+    """Un observateur qui ne lit pas garde les derniers événements sans bloquer le pipeline"""
+    svc = OrchestratorExecutionService(queue_size=3)
+    try:
+        job_id = svc.submit(ENTREES)
+        lent = svc.watch(job_id)
+        job = svc.wait(job_id, timeout=30)
+        assert job.status == "finished"
+
+        restants = svc.poll(lent)
+        assert [e.sequence for e in restants] == [e.sequence for e in job.events[-3:]]
+        assert svc._watchers[lent].dropped == len(job.events) - 3
+    finally:
+        svc.shutdown()
+
+
+def test_echec_etape():
+    """Une étape en échec publie un événement failed et marque le job"""
+    class AN1EnErreur:
+        async def process(self, *args):
+            return {"error": "données incohérentes", "agent_id": "AN1"}
+
+    svc = OrchestratorExecutionService(agent_factory=lambda: {**OrchestratorExecutionService._default_agents(),
+                                                              "AN1": AN1EnErreur()})
+    try:
+        job = svc.wait(svc.submit(ENTREES), timeout=30)
+        assert job.status == "failed"
+        assert "données incohérentes" in job.error
+        assert ("AN1", "failed") in [(e.stage, e.status) for e in job.events]
+        assert "R1" not in {e.stage for e in job.events}
+    finally:
+        svc.shutdown()
+
+
+def test_job_evince_inconnu():
+    """Un job évincé du magasin borné est signalé comme inconnu ou expiré"""
+    svc = OrchestratorExecutionService(max_retained_jobs=1)
+    try:
+        ancien = svc.submit(ENTREES)
+        assert svc.wait(ancien, timeout=30).status == "finished"
+        recent = svc.submit({**ENTREES, "context": {"secteur": "TRANSPORT"}})
+        assert svc.wait(recent, timeout=30).done
+
+        with pytest.raises(UnknownJobError, match="inconnu ou expiré"):
+            svc.watch(ancien)
+        assert svc.wait(ancien, timeout=1) is None
+        assert svc.get_job(ancien) is None
+    finally:
+        svc.shutdown()
+
+
+def _agents_lents(delai):
+    agents = OrchestratorExecutionService._default_agents()
+    agents["A1"] = _A1Lent(agents["A1"], delai)
+    return agents
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,134 @@
+# Test Agent R1 - Planification de portefeuille sous contrainte budgétaire
+# ========================================================================
+
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+# Ajout des chemins pour imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from agents.recommendation.r1_generateur_recommandations import R1GenerateurRecommandations
+from agents.recommendation.r1_portfolio_planner import (MILP_AVAILABLE, R1PortfolioPlanner, borne_relaxation,
+                                                        solve_knapsack_dp, solve_knapsack_milp)
+
+VARIABLES = ["usage_epi", "supervision_directe", "formation_securite",
+             "communication_risques", "leadership_sst", "respect_procedures", "variable_inconnue"]
+NIVEAUX = ["critique", "eleve", "MOYENNE", "URGENTE"]
+
+
+def _portefeuille(n_entreprises, seed=0):
+    rng = np.random.default_rng(seed)
+    resultats, contextes = {}, {}
+    for e in range(n_entreprises):
+        zones = [{"variable": v, "pourcentage_ecart": float(rng.uniform(10, 90)),
+                  "niveau_critique": NIVEAUX[int(rng.integers(len(NIVEAUX)))]}
+                 for v in rng.choice(VARIABLES, size=int(rng.integers(1, 5)), replace=False)]
+        resultats[f"ENT_{e:04d}"] = {"ecarts_analysis": {"zones_aveugles": zones}, "summary": {}}
+        contextes[f"ENT_{e:04d}"] = {"secteur": ["CONSTRUCTION", "SOINS_SANTE", "GENERAL"][e % 3],
+                                     "taille_entreprise": ["PME", "MOYENNE", "GRANDE"][e % 3]}
+    return resultats, contextes
+
+
+@pytest.fixture(scope="module")
+def planner():
+    return R1PortfolioPlanner(R1GenerateurRecommandations())
+
+
+def test_candidats_formule_budget_r1(planner):
+    """Coût = budget unitaire x secteur x taille + 30% indirects; gain selon gabarit de priorité"""
+    resultats = {"A": {"zones_aveugles": [{"variable": "supervision_directe", "pourcentage_ecart": 50,
+                                           "niveau_critique": "critique"},
+                                          {"variable": "variable_inconnue", "pourcentage_ecart": 70}]}}
+    c = planner.build_candidates(resultats, {"secteur": "CONSTRUCTION", "taille_entreprise": "GRANDE"})
+    assert len(c) == 1
+    assert c.couts[0] == pytest.approx(800 * 1.3 * 1.4 * 1.3)
+    assert c.gains[0] == pytest.approx(50 * 0.8)
+    assert c.priorites[0] == "CRITIQUE"
+    assert c.durees[0] == pytest.approx(4 * 1.2)
+
+
+def test_optimal_petite_instance(planner):
+    """Même valeur qu'une énumération exhaustive, budget et horizon respectés"""
+    resultats, contextes = _portefeuille(5, seed=3)
+    c = planner.build_candidates(resultats, contextes)
+    budget, horizon = float(c.couts.sum() * 0.4), 15.0
+    plan = planner.plan(resultats, budget, horizon, contextes, solver="dp")
+
+    eligibles = [k for k in range(len(c)) if c.durees[k] <= horizon]
+    meilleur = max(sum(c.gains[k] for k in s) for r in range(len(eligibles) + 1)
+                   for s in itertools.combinations(eligibles, r)
+                   if sum(c.couts[k] for k in s) <= budget)
+    resume = plan["resume"]
+    assert resume["budget_utilise"] <= budget
+    assert resume["reduction_ecart_totale"] == pytest.approx(meilleur, rel=1e-3)
+    assert all(r["duree_semaines"] <= horizon for e in plan["plan_par_entreprise"].values()
+               for r in e["recommandations"])
+    assert resume["borne_superieure"] >= resume["reduction_ecart_totale"] - 1e-9
+
+
+@pytest.mark.skipif(not MILP_AVAILABLE, reason="scipy non installé")
+def test_dp_et_milp_concordent():
+    rng = np.random.default_rng(7)
+    couts = rng.uniform(100, 2000, 60).round(2)
+    gains = rng.uniform(1, 60, 60)
+    budget = float(couts.sum() / 3)
+    milp = solve_knapsack_milp(couts, gains, budget)
+    dp = solve_knapsack_dp(couts, gains, budget)
+    assert couts[milp].sum() <= budget and couts[dp].sum() <= budget
+    assert gains[dp].sum() == pytest.approx(gains[milp].sum(), rel=1e-3)
+    assert gains[milp].sum() <= borne_relaxation(couts, gains, budget) + 1e-9
+
+
+def test_cache_et_cas_triviaux(planner):
+    resultats, contextes = _portefeuille(20, seed=1)
+    budget = 50_000.0
+    premier = planner.plan(resultats, budget, contexts=contextes)
+    hits = planner.stats["cache_hits"]
+    second = planner.plan(resultats, budget, contexts=contextes)
+    assert planner.stats["cache_hits"] == hits + 1
+    assert second == premier and second is not premier
+
+    # Le plan renvoyé est une copie JSON-sérialisable: le modifier n'altère pas le cache
+    json.dumps(second)
+    second["selection"][:] = [False] * len(second["selection"])
+    second["plan_par_entreprise"].clear()
+    assert planner.plan(resultats, budget, contexts=contextes) == premier
+
+    tout = planner.plan(resultats, 1e9, contexts=contextes)
+    assert tout["resume"]["solveur"] == "trivial"
+    assert tout["resume"]["actions_selectionnees"] == tout["resume"]["candidats_eligibles"]
+    assert planner.plan(resultats, 0.0, contexts=contextes)["resume"]["solveur"] == "aucun"
+
+
+def test_agent_process_portfolio_mille_sites():
+    """1 000 entreprises planifiées en quelques secondes via l'agent R1"""
+    resultats, contextes = _portefeuille(1000, seed=11)
+    debut = time.perf_counter()
+    plan = asyncio.run(R1GenerateurRecommandations().process_portfolio(resultats, 2_000_000, 26, contextes))
+    assert time.perf_counter() - debut < 10
+    resume = plan["resume"]
+    assert resume["budget_utilise"] <= 2_000_000
+    assert resume["ecart_optimalite"] < 0.01
+    assert len(plan["plan_par_entreprise"]) > 0
+
+
+def test_agent_reutilise_le_planificateur():
+    """Le cache d'empreintes est atteint via l'API de l'agent"""
+    agent = R1GenerateurRecommandations()
+    resultats, contextes = _portefeuille(30, seed=5)
+    premier = asyncio.run(agent.process_portfolio(resultats, 80_000, 26, contextes))
+    second = asyncio.run(agent.process_portfolio(resultats, 80_000, 26, contextes))
+    assert second == premier
+    assert agent._portfolio_planner.stats["cache_hits"] == 1
+    assert agent._portfolio_planner.stats["plans"] == 1
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,178 @@
+# Test Cache Recherches STORM - Persistance, TTL et déduplication
+# ===============================================================
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Ajout des chemins pour imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'storm_research'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from mcp_perplexity import PROMPT_VERSION, PerplexityMCPConnector, batch_research, refresh_stale_topics
+import research_cache
+from research_cache import DEFAULT_DB_PATH, ResearchCache
+from storm_launcher import STORMLauncher
+
+
+def _compter_appels_api(monkeypatch):
+    """Remplace l'appel API par un compteur (latence simulée)"""
+    appels = []
+
+    async def recherche_api(self, topic, context):
+        appels.append(topic)
+        await asyncio.sleep(0.01)
+        return {"topic": topic, "context": context}
+
+    monkeypatch.setattr(PerplexityMCPConnector, "_search_topic_api", recherche_api)
+    return appels
+
+
+def test_batch_research_deduplique_et_persiste(monkeypatch):
+    """Les doublons ne sont recherchés qu'une fois et le cache survit au redémarrage"""
+    appels = _compter_appels_api(monkeypatch)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "research.db")
+        topics = ["just_culture", "near_miss", "just_culture", "near_miss", "safety_kpi"]
+
+        resultats = asyncio.run(batch_research(topics, cache=ResearchCache(db_path)))
+        assert [r["topic"] for r in resultats] == topics
+        assert sorted(appels) == ["just_culture", "near_miss", "safety_kpi"]
+
+        # Nouveau processus simulé: nouvelle instance sur le même fichier
+        cache = ResearchCache(db_path)
+        asyncio.run(batch_research(topics, cache=cache))
+        assert len(appels) == 3
+        assert cache.get_stats()["hits"] == 3
+
+
+def test_batch_research_concurrence_bornee(monkeypatch):
+    """batch_research ne dépasse pas max_concurrency requêtes simultanées"""
+    etat = {"en_cours": 0, "max": 0}
+
+    async def recherche_api(self, topic, context):
+        etat["en_cours"] += 1
+        etat["max"] = max(etat["max"], etat["en_cours"])
+        await asyncio.sleep(0.01)
+        etat["en_cours"] -= 1
+        return {"topic": topic}
+
+    monkeypatch.setattr(PerplexityMCPConnector, "_search_topic_api", recherche_api)
+
+    asyncio.run(batch_research([f"topic_{i}" for i in range(20)], max_concurrency=3))
+    assert etat["max"] == 3
+
+
+def test_annulation_du_meneur_ne_propage_pas(tmp_path):
+    """Un appelant dédupliqué reprend la recherche si le meneur est annulé"""
+    cache = ResearchCache(str(tmp_path / "research.db"))
+    appels = []
+
+    async def chercher():
+        appels.append(len(appels))
+        await asyncio.sleep(0.05)
+        return {"topic": "near_miss", "appel": len(appels)}
+
+    async def scenario():
+        meneur = asyncio.ensure_future(cache.get_or_research("near_miss", "safety", "v1", chercher))
+        await asyncio.sleep(0)
+        suiveur = asyncio.ensure_future(cache.get_or_research("near_miss", "safety", "v1", chercher))
+        await asyncio.sleep(0.01)
+        meneur.cancel()
+        resultat = await suiveur
+        assert meneur.cancelled()
+        return resultat
+
+    resultat = asyncio.run(scenario())
+    assert resultat == {"topic": "near_miss", "appel": 2}
+    assert len(appels) == 2 and cache.stats["deduplicated"] == 1
+    assert cache.get("near_miss", "safety", "v1") == resultat
+
+
+def test_refresh_uniquement_topics_expires(monkeypatch):
+    """Seuls les topics absents ou expirés sont re-recherchés"""
+    appels = _compter_appels_api(monkeypatch)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResearchCache(os.path.join(tmp, "research.db"), ttl_hours=1)
+        cache.set("leadership", "safety", PROMPT_VERSION, {"topic": "leadership"})
+
+        rafraichis = asyncio.run(refresh_stale_topics(["leadership", "training"], cache))
+        assert list(rafraichis) == ["training"]
+        assert appels == ["training"]
+
+        # Changement de version du prompt: tout est périmé
+        assert cache.stale_topics(["leadership", "training"], "safety", "v2") == ["leadership", "training"]
+
+
+def test_storm_launcher_cache_disque():
+    """STORMLauncher consulte le cache disque avant de rechercher"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "storm.db")
+
+        premier = STORMLauncher(persistent_cache=ResearchCache(db_path))
+        rafraichis = asyncio.run(premier.refresh_stale_topics(max_concurrency=10))
+        assert len(rafraichis) == 100
+
+        second = STORMLauncher(persistent_cache=ResearchCache(db_path))
+        assert asyncio.run(second.refresh_stale_topics()) == {}
+        resultat = asyncio.run(second.execute_research("gamification_safety", "innovation"))
+        assert resultat["session_id"] == premier.session_id
+
+
+def test_storm_launcher_ouvre_le_cache_a_la_demande(monkeypatch, tmp_path):
+    """Instancier STORMLauncher n'ouvre aucune base; le cache par défaut est créé au premier usage"""
+    import storm_launcher
+    ouverts = []
+
+    def cache_par_defaut():
+        ouverts.append(ResearchCache(os.path.join(tmp_path, "defaut.db")))
+        return ouverts[-1]
+
+    monkeypatch.setattr(storm_launcher, "ResearchCache", cache_par_defaut)
+    launcher = STORMLauncher()
+    assert ouverts == []
+    assert launcher.persistent_cache is launcher.persistent_cache is ouverts[0]
+
+
+def test_chemin_par_defaut_ancre_au_paquet():
+    """Le cache par défaut ne dépend pas du répertoire courant"""
+    assert Path(DEFAULT_DB_PATH).is_absolute()
+    assert Path(DEFAULT_DB_PATH).resolve().parent == Path(__file__).resolve().parent.parent / "data"
+
+
+def test_rotation_hebdomadaire_servie_par_le_cache(monkeypatch, tmp_path):
+    """Le deuxième passage d'un topic (7 jours plus tard) vient du cache"""
+    appels = _compter_appels_api(monkeypatch)
+    (tmp_path / "logs").mkdir()
+    (tmp_path / "data" / "storm_knowledge").mkdir(parents=True)
+    monkeypatch.chdir(tmp_path)
+    from continuous_deployment import StormContinuousDeployment
+
+    horloge = {"t": time.time()}
+    monkeypatch.setattr(research_cache.time, "time", lambda: horloge["t"])
+    deploiement = StormContinuousDeployment()
+    topics = deploiement.topic_rotation["lundi"]
+
+    asyncio.run(deploiement.storm_enrichment(topics))
+    assert appels == topics
+
+    horloge["t"] += 7 * 24 * 3600          # lundi suivant
+    asyncio.run(deploiement.storm_enrichment(topics))
+    assert appels == topics
+    rapport = sorted((tmp_path / "data" / "storm_knowledge").glob("*.json"))[-1]
+    assert json.loads(rapport.read_text(encoding="utf-8"))["topics_from_cache"] == topics
+
+    horloge["t"] += 7 * 24 * 3600          # 14 jours: au-delà du TTL, rafraîchi
+    asyncio.run(deploiement.storm_enrichment(topics))
+    assert appels == topics * 2
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,109 @@
+# Test Taxonomie SCIAN - Index partagé UI / enrichissements / ingestion
+# =====================================================================
+
+import os
+import sys
+
+import pytest
+
+# Ajout des chemins pour imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from enrichments.scian_taxonomy import (SCIANTaxonomy, build_taxonomy, get_scian_taxonomy,
+                                        scian_prefixes)
+
+
+@pytest.fixture(scope="module")
+def taxonomy():
+    return build_taxonomy()
+
+
+def test_correspondance_code_libelle(taxonomy):
+    """Code <-> libellé, libellés UI et variantes accents/casse"""
+    assert taxonomy.label_for("622") == "Hôpitaux"
+    assert taxonomy.code_for("Hôpitaux") == "622"
+    assert taxonomy.code_for("hopitaux") == "622"
+    assert taxonomy.code_for("  HÔPITAUX ") == "622"
+    assert taxonomy.code_for("Secteur inconnu", default="236") == "236"
+
+    for label in taxonomy.ui_labels():
+        assert taxonomy.code_for(label) is not None, label
+    assert taxonomy.resolve_code(236118.0) == "236118"
+    assert taxonomy.resolve_code(None, default="999") == "999"
+
+
+def test_hierarchie(taxonomy):
+    """Descendants par préfixe, enfants directs et ancêtres"""
+    construction = [entry.code for entry in taxonomy.descendants("23")]
+    assert construction[0] == "23"
+    assert {"236", "237", "238", "238110"} <= set(construction)
+    assert all(code.startswith("23") for code in construction)
+
+    assert "238" in [entry.code for entry in taxonomy.children("23")]
+    assert [entry.code for entry in taxonomy.ancestors("238110")][-1] == "23"
+    assert scian_prefixes("238110") == ["23811", "2381", "238", "23"]
+    assert taxonomy.longest_prefix_match("236118", ["23", "236", "622"]) == "236"
+
+
+def test_recherche_libelles(taxonomy):
+    """Recherche par préfixes de mots, insensible aux accents"""
+    codes = [entry.code for entry in taxonomy.search("hopit")]
+    assert "622" in codes
+    assert taxonomy.search("") == []
+
+
+def test_immuable(taxonomy):
+    """Les vues exposées ne peuvent pas être modifiées par les consommateurs"""
+    with pytest.raises(TypeError):
+        taxonomy.labels()["622"] = "Autre"
+    industries = taxonomy.industries()
+    with pytest.raises(TypeError):
+        industries["Construction"] = {}
+    premiere = next(iter(industries))
+    with pytest.raises(TypeError):
+        industries[premiere]["Nouveau"] = "999"
+
+
+def test_snapshot_aller_retour(taxonomy, tmp_path):
+    """Instantané compressé rechargé à l'identique au démarrage suivant"""
+    chemin = taxonomy.save_snapshot(tmp_path / "scian.snapshot")
+    recharge = SCIANTaxonomy.load_snapshot(chemin)
+    assert dict(recharge.labels()) == dict(taxonomy.labels())
+    assert recharge.ui_labels() == taxonomy.ui_labels()
+
+    assert get_scian_taxonomy(snapshot_path=chemin).labels() == taxonomy.labels()
+
+
+def test_memoisation_par_snapshot(taxonomy, tmp_path):
+    """Chaque snapshot a son instance; un même chemin résolu la réutilise"""
+    a = taxonomy.save_snapshot(tmp_path / "a.snapshot")
+    b = taxonomy.save_snapshot(tmp_path / "b.snapshot")
+    premiere = get_scian_taxonomy(snapshot_path=a)
+    assert get_scian_taxonomy(snapshot_path=tmp_path / "sous" / ".." / "a.snapshot") is premiere
+    assert get_scian_taxonomy(snapshot_path=b) is not premiere
+    assert get_scian_taxonomy() is get_scian_taxonomy()
+
+
+def test_consommateurs_alignes(taxonomy):
+    """Enrichissements et ingestion CNESST lisent la même taxonomie"""
+    from enrichments.behaviorx_enrichments import CNESSTContextEnhancer
+    enhancer = CNESSTContextEnhancer()
+    assert enhancer.sector_mappings == taxonomy.labels()
+    assert enhancer.get_sector_benchmarks("238990")["note"] == "Données secteur parent 23"
+
+    from integration_cnesst_abc import IntegrationCNESSTBehaviorX
+    extraire = IntegrationCNESSTBehaviorX._extraire_scian_principal
+    integration = IntegrationCNESSTBehaviorX.__new__(IntegrationCNESSTBehaviorX)
+    integration.mapping_scian_behaviorx = IntegrationCNESSTBehaviorX._initialiser_mapping_scian(integration)
+
+    assert extraire(integration, "236118") == "236"
+    assert extraire(integration, "236118 - Construction résidentielle") == "236"
+    assert extraire(integration, 622110.0) == "622"
+    assert extraire(integration, "Hôpitaux") == "622"
+    assert extraire(integration, "325") == "311-339"
+    assert extraire(integration, "541") == "999"
+    assert extraire(integration, "") == "999"
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
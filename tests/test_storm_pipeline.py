@@ -0,0 +1,130 @@
+# Test Pipeline STORM Optimizer - Concurrence bornée et serveur mock local
+# =======================================================================
+
+import asyncio
+import os
+import sys
+import time
+
+from aiohttp import web
+
+# Ajout des chemins pour imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from storm_optimizer import StormOptimizer
+
+LATENCE_MOCK = 0.02
+TOPICS_TEST = [
+    'transformational_safety_leadership',
+    'management_commitment_measurement',
+    'supervisor_safety_engagement',
+    'safety_communication_effectiveness'
+]
+
+
+async def _demarrer_serveur_mock(etat: dict):
+    """Serveur de recherche local avec latence fixe"""
+
+    async def recherche(request):
+        etat['en_cours'] += 1
+        etat['max_en_cours'] = max(etat['max_en_cours'], etat['en_cours'])
+        try:
+            await asyncio.sleep(LATENCE_MOCK)
+            return web.json_response({
+                'title': f"Mock research on {request.query['topic']}",
+                'relevance_score': 0.9
+            })
+        finally:
+            etat['en_cours'] -= 1
+            etat['terminees'] += 1
+
+    app = web.Application()
+    app.router.add_get('/search', recherche)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/search"
+
+
+async def _executer_pipeline(concurrence: int, **options):
+    etat = {'en_cours': 0, 'max_en_cours': 0, 'terminees': 0}
+    runner, endpoint = await _demarrer_serveur_mock(etat)
+    recus = []
+
+    def integrer(recherche, extraction):
+        # Recherches terminées côté serveur au moment où ce résultat est intégré
+        recus.append((recherche, etat['terminees']))
+
+    try:
+        optimizer = StormOptimizer(config_path="config_inexistante.yml")
+        optimizer.config['optimization'].update({
+            'concurrent_searches': concurrence,
+            'search_endpoint': endpoint,
+            **options
+        })
+        debut = time.perf_counter()
+        resultats = await optimizer.optimize_search_pipeline(
+            TOPICS_TEST, on_knowledge=integrer
+        )
+        duree = time.perf_counter() - debut
+    finally:
+        await runner.cleanup()
+
+    return resultats, duree, etat, recus
+
+
+def test_pipeline_concurrence_bornee():
+    """Le pipeline respecte concurrent_searches et chevauche recherche et intégration"""
+    res_seq, duree_seq, etat_seq, _ = asyncio.run(_executer_pipeline(1))
+    res_par, duree_par, etat_par, recus = asyncio.run(_executer_pipeline(8))
+
+    nb_jobs = len(TOPICS_TEST) * 9
+    assert res_par['sources_consulted'] == nb_jobs
+    assert len(recus) == nb_jobs
+    assert recus[0][0].title.startswith("Mock research")
+    assert etat_seq['max_en_cours'] == 1
+    assert 1 < etat_par['max_en_cours'] <= 8
+    assert res_par['pipeline']['errors'] == 0
+    # Étages chevauchés: le premier résultat est intégré avant la fin des recherches
+    assert recus[0][1] < nb_jobs
+
+    print(f"   ⏱️ Séquentiel: {duree_seq:.2f}s - Pipeline x8: {duree_par:.2f}s "
+          f"(x{duree_seq / duree_par:.1f})")
+
+
+def test_pipeline_limite_par_source():
+    """La limite de débit par source espace les requêtes d'une même source"""
+    resultats, duree, _, _ = asyncio.run(_executer_pipeline(8, rate_limit_per_source=50))
+
+    # 4 requêtes par source à 50 req/s: au moins 3 intervalles de 20 ms
+    assert duree >= 0.06
+    assert resultats['sources_consulted'] == len(TOPICS_TEST) * 9
+
+
+def test_pipeline_annulation():
+    """L'annulation du pipeline arrête proprement tous les étages"""
+
+    async def scenario():
+        optimizer = StormOptimizer(config_path="config_inexistante.yml")
+        optimizer.config['optimization']['rate_limit_per_source'] = 1
+        tache = asyncio.create_task(optimizer.optimize_search_pipeline(TOPICS_TEST))
+        await asyncio.sleep(0.05)
+        tache.cancel()
+        try:
+            await tache
+        except asyncio.CancelledError:
+            return True
+        return False
+
+    assert asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    print("🧪 BENCHMARK PIPELINE STORM OPTIMIZER")
+    print("=" * 40)
+    test_pipeline_concurrence_bornee()
+    test_pipeline_limite_par_source()
+    test_pipeline_annulation()
+    print("✅ Pipeline borné, limité par source et annulable")
@@ -0,0 +1,119 @@
+# Test État Unifié Persistant - Partage structurel, deltas binaires et instantanés
+# ================================================================================
+
+import os
+import random
+import sys
+
+import pytest
+
+# Ajout des chemins pour imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from architecture.persistent_state import PMap, PVector, freeze, thaw
+from architecture.safetygraph_unified_state import SafetyGraphUnifiedState, UnifiedStateStore, create_behaviorx_state
+from optimization.benchmark_suite import benchmark_unified_state
+
+
+def test_pmap_versions_et_collisions():
+    rng = random.Random(0)
+    pmap, reference, versions = PMap(), {}, []
+    for i in range(5000):
+        cle = rng.randrange(1500)
+        if rng.random() < 0.3:
+            pmap, _ = pmap.delete(cle), reference.pop(cle, None)
+        else:
+            pmap = pmap.set(cle, i)
+            reference[cle] = i
+        if i % 500 == 0:
+            versions.append((pmap, dict(reference)))
+    assert dict(pmap.items()) == reference and len(pmap) == len(reference)
+    # Les versions antérieures restent intactes
+    assert all(dict(v.items()) == attendu for v, attendu in versions)
+
+    class CleCollision:
+        def __init__(self, n):
+            self.n = n
+
+        def __hash__(self):
+            return 42
+
+        def __eq__(self, autre):
+            return isinstance(autre, CleCollision) and autre.n == self.n
+
+    cles = [CleCollision(n) for n in range(4)]
+    collisions = PMap({c: c.n for c in cles}).delete(cles[1])
+    assert len(collisions) == 3 and cles[1] not in collisions and collisions[cles[3]] == 3
+
+
+def test_pvector_ajout_et_partage():
+    vecteur, versions = PVector(), []
+    for i in range(3000):
+        vecteur = vecteur.append(i)
+        if i in (31, 32, 1023, 1024, 2999):
+            versions.append((vecteur, i + 1))
+    assert [list(v) == list(range(n)) for v, n in versions] == [True] * 5
+    modifie = vecteur.set(1057, "x").extend(["a", "b"])
+    assert modifie[1057] == "x" and vecteur[1057] == 1057 and modifie[-1] == "b" and len(vecteur) == 3000
+    assert thaw(freeze({"a": [1, {"b": [2]}]})) == {"a": [1, {"b": [2]}]}
+
+
+def test_reducteurs_instantanes_et_deltas():
+    store = UnifiedStateStore(create_behaviorx_state("Analyser culture construction"))
+    store.apply("A1", {"active_agents": ["A1"], "culture_scores": {"A1": 7.5}, "intent": "analyse"})
+    avant = store.snapshot()
+    store.apply("A2", {"active_agents": ["A2"], "culture_scores": {"A2": 6.0}})
+    store.apply("R1", {"culture_scores": {"A1": 8.0}, "action_plans": [{"action": "formation"}]})
+
+    assert list(store["active_agents"]) == ["A1", "A2", "A1", "A2"]
+    assert dict(store["culture_scores"].items()) == {"A1": 8.0, "A2": 6.0}
+    assert dict(avant["culture_scores"].items()) == {"A1": 7.5}
+    # Partage structurel: un champ non touché est le même objet d'une version à l'autre
+    assert store.snapshot(1)["workflow_path"] is store.snapshot(3)["workflow_path"]
+
+    etat = store.to_unified_state()
+    assert isinstance(etat, SafetyGraphUnifiedState) and etat.action_plans == [{"action": "formation"}]
+    assert store.to_unified_state(0).intent == "behaviorx_analysis"
+    with pytest.raises(KeyError):
+        store.apply("X", {"champ_inconnu": 1})
+
+
+def test_serialisation_binaire_delta_seulement():
+    initial = SafetyGraphUnifiedState()
+    source, client = UnifiedStateStore(initial), UnifiedStateStore(initial)
+    for i in range(50):
+        source.apply(f"agent_{i % 5}", {"predictions_ml": {f"agent_{i % 5}": {"tour": i, "score": i / 3}},
+                                        "anomalies_detected": [{"tour": i}] if i % 7 == 0 else []})
+    complet = source.encode()
+    assert client.apply_bytes(complet) == 50
+    assert client.state == source.state
+
+    source.apply("agent_9", {"kpi_realtime": {"taux": 0.5}, "priorities": ["ventilation"]})
+    increment = source.encode(depuis=client.step)
+    assert len(increment) < 100 < len(complet)
+    assert client.apply_bytes(increment) == 51 and client.apply_bytes(increment) == 51   # idempotent
+    assert client.state == source.state
+    assert UnifiedStateStore.decode(increment)[0].agent == "agent_9"
+
+
+def test_memoire_par_etape_constante_100_agents():
+    petit = benchmark_unified_state(n_agents=100, rounds=4, timings=False)
+    grand = benchmark_unified_state(n_agents=100, rounds=16, timings=False)
+    persistant, naif = grand["persistent"], grand["naive"]
+    # Mémoire retenue par étape indépendante de la longueur du workflow
+    assert persistant["bytes_per_step"] < 1.5 * petit["persistent"]["bytes_per_step"]
+    assert naif["bytes_per_step"] > 2 * petit["naive"]["bytes_per_step"]
+    assert persistant["bytes_per_step"] < naif["bytes_per_step"] / 3
+
+
+@pytest.mark.skipif(not os.getenv("SAFEGRAPH_BENCH"), reason="mesure de coût par étape: SAFEGRAPH_BENCH=1")
+def test_cout_par_etape_constant_100_agents():
+    grand = benchmark_unified_state(n_agents=100, rounds=16)
+    persistant, naif = grand["persistent"], grand["naive"]
+    # Coût par étape plat, là où la copie naïve croît avec l'historique
+    assert persistant["last_decile_us"] < 2 * persistant["first_decile_us"]
+    assert persistant["last_decile_us"] < naif["last_decile_us"]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,212 @@
+# Test Service Temps Réel V4 - Files bornées, contre-pression et micro-lots
+# =========================================================================
+
+import asyncio
+import os
+import random
+import sys
+import time
+
+import pytest
+
+# Ajout des chemins pour imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from modules.agentique_v4.api.realtime_service import EventQueue, RealtimeAnalysisService
+from modules.agentique_v4.api.realtime_load import generate_events
+
+
+class SocketMemoire:
+    """Transport en mémoire exposant receive_json/send_json comme un WebSocket"""
+
+    def __init__(self):
+        self.entrant = asyncio.Queue()
+        self.sortant = asyncio.Queue()
+
+    async def receive_json(self):
+        message = await self.entrant.get()
+        if message is None:
+            raise ConnectionError("déconnexion")
+        return message
+
+    async def send_json(self, message):
+        await self.sortant.put(message)
+
+    async def attendre_flush(self):
+        mises_a_jour = []
+        while True:
+            message = await self.sortant.get()
+            if message["type"] == "flushed":
+                return mises_a_jour
+            mises_a_jour.append(message)
+
+
+def _capteur(channel, sensor, value, t=None):
+    return {"type": "sensor", "channel": channel, "sensor": sensor, "value": value,
+            "timestamp": time.time() if t is None else t}
+
+
+def test_politiques_contre_pression():
+    async def scenario():
+        drop = EventQueue(maxsize=3, policy="drop")
+        resultats = [await drop.put({"type": "observation"}) for _ in range(5)]
+        assert resultats == [True, True, True, False, False] and drop.dropped == 2
+        assert await drop.put({"type": "flush"})  # contrôle jamais rejeté
+
+        coalesce = EventQueue(maxsize=3, policy="coalesce")
+        for valeur in (0.1, 0.2, 0.9):
+            await coalesce.put(_capteur("ch4", 1, valeur))
+        await coalesce.put(_capteur("ch4", 2, 0.3))
+        assert len(coalesce) == 2 and coalesce.coalesced == 2
+        lot = await coalesce.get_batch(window=0)
+        assert [e["value"] for e in lot] == [0.9, 0.3]
+
+        block = EventQueue(maxsize=2, policy="block")
+        await block.put({"type": "observation", "n": 1})
+        await block.put({"type": "observation", "n": 2})
+        producteur = asyncio.ensure_future(block.put({"type": "observation", "n": 3}))
+        await asyncio.sleep(0.01)
+        assert not producteur.done()  # producteur ralenti
+        assert len(await block.get_batch(max_batch=1, window=0)) == 1
+        assert await producteur and len(block) == 2 and block.dropped == 0
+
+    asyncio.run(scenario())
+
+
+def test_resultats_incrementaux_scoring_et_alarmes():
+    async def scenario():
+        service = RealtimeAnalysisService(batch_window=0)
+        socket = SocketMemoire()
+        tache = asyncio.ensure_future(service.handle(socket, "mine_nord"))
+        await socket.entrant.put({"events": [
+            {"type": "observation", "antecedent": 8, "comportement": 2, "consequence": 4},
+            _capteur("ch4", 3, 1.7),
+            {"type": "observation", "antecedent": "n/a"},
+            {"type": "flush"},
+        ]})
+        mises_a_jour = await socket.attendre_flush()
+        await socket.entrant.put(None)
+        await tache
+        return service, mises_a_jour
+
+    service, mises_a_jour = asyncio.run(scenario())
+    derniere = mises_a_jour[-1]
+    # Pondération A2: 8*0.25 + 2*0.5 + 4*0.25 = 4.0 -> ÉLEVÉE
+    assert derniere["observations"]["mean_score"] == pytest.approx(4.0)
+    assert derniere["observations"]["criticite"] == {"ÉLEVÉE": 1}
+    assert derniere["sensors"]["active_alarms"]["ch4"] == 1
+    assert [a["level"] for m in mises_a_jour for a in m["anomalies"]] == [2]
+    assert service.sites["mine_nord"].rejected == 1
+    assert service.active_connections == 0
+
+
+def test_horodatages_et_valeurs_clients_valides():
+    """Une mesure hors horloge serveur ou non finie ne touche pas la télémétrie partagée"""
+    service = RealtimeAnalysisService()
+    analyse = service.site("mine_sud")
+    maintenant = time.time()
+    analyse.process([_capteur("ch4", 1, 0.2, maintenant)])
+    tete = analyse.telemetry.channels["ch4"].aggregates.head
+
+    resultat = analyse.process([
+        _capteur("ch4", 1, 0.3, 1e15),
+        _capteur("ch4", 1, 0.3, maintenant - 3600),
+        _capteur("ch4", 1, 0.3, float("nan")),
+        _capteur("ch4", 1, float("inf")),
+        _capteur("ch4", 1, "n/a"),
+        {"type": "sensor", "channel": "ch4", "sensor": 1},
+    ])
+    assert resultat["sensors"]["batch"] == 0 and analyse.rejected == 6
+    assert analyse.telemetry.channels["ch4"].aggregates.head == tete
+
+    # Sans horodatage client: heure de réception serveur; les mesures réelles restent agrégées
+    sans_horodatage = {"type": "sensor", "channel": "ch4", "sensor": 2, "value": 0.4}
+    analyse.process([sans_horodatage, _capteur("ch4", 1, 0.5)], [maintenant, maintenant])
+    canal = analyse.telemetry.channels["ch4"]
+    assert canal.aggregates.dropped == 0 and canal.last_seen[2] == maintenant
+    assert analyse.telemetry.samples == 3
+
+
+def test_milliers_de_connexions_une_boucle():
+    """2 000 connexions simultanées dans une boucle asyncio, percentiles de latence"""
+    async def scenario():
+        service = RealtimeAnalysisService(queue_size=64, policy="coalesce")
+        rng = random.Random(0)
+        sockets = [SocketMemoire() for _ in range(2000)]
+        taches = [asyncio.ensure_future(service.handle(s, f"site_{i % 25}")) for i, s in enumerate(sockets)]
+        await asyncio.sleep(0)
+        assert service.active_connections == 2000
+
+        for _ in range(3):
+            for socket in sockets:
+                events = generate_events(rng, 10)
+                socket.entrant.put_nowait({"events": events})
+        for socket in sockets:
+            socket.entrant.put_nowait({"type": "flush"})
+        await asyncio.gather(*(s.attendre_flush() for s in sockets))
+        for socket in sockets:
+            socket.entrant.put_nowait(None)
+        await asyncio.gather(*taches)
+        return service
+
+    service = asyncio.run(scenario())
+    assert service.peak_connections == 2000 and service.active_connections == 0
+    stats = service.stats
+    assert stats["events_received"] == 2000 * 31
+    assert stats["events_processed"] + stats["events_dropped"] + stats["events_coalesced"] == stats["events_received"]
+    latence = service.latency_percentiles()
+    assert latence["samples"] > 0 and latence["p50_ms"] <= latence["p95_ms"] <= latence["p99_ms"] <= latence["max_ms"]
+
+
+def test_taille_de_file_et_latence_serveur():
+    """Taille de file < 1 refusée; latence mesurée depuis l'entrée en file, sent_at client ignoré"""
+    with pytest.raises(ValueError):
+        EventQueue(maxsize=0)
+
+    async def scenario():
+        service = RealtimeAnalysisService(batch_window=0)
+        with pytest.raises(ValueError):
+            await service.handle(SocketMemoire(), "mine_nord", queue_size=0)
+
+        socket = SocketMemoire()
+        tache = asyncio.ensure_future(service.handle(socket, "mine_nord", queue_size=1))
+        await socket.entrant.put({"events": [
+            {"type": "observation", "antecedent": 5, "comportement": 5, "consequence": 5, "sent_at": -1e9},
+            {"type": "flush"},
+        ]})
+        await socket.attendre_flush()
+        await socket.entrant.put(None)
+        await tache
+        return service
+
+    service = asyncio.run(scenario())
+    latence = service.latency_percentiles()
+    assert latence["samples"] == 2 and 0 <= latence["max_ms"] < 1000
+
+
+def test_charge_client_test_fastapi():
+    fastapi = pytest.importorskip("fastapi")
+    pytest.importorskip("httpx")
+    from modules.agentique_v4.api.realtime_load import WS_PATH, run_websocket_load
+    from modules.agentique_v4.api.realtime_service import get_realtime_service
+    from modules.agentique_v4.api.v4_endpoints import router
+
+    app = fastapi.FastAPI()
+    app.include_router(router)
+    rapport = run_websocket_load(app, connections=1000, bursts=2, events_per_burst=10)
+    assert rapport["peak_connections"] >= 1000
+    assert rapport["latency"]["samples"] > 0
+    assert get_realtime_service().active_connections == 0
+
+    from fastapi.testclient import TestClient
+    from starlette.websockets import WebSocketDisconnect
+    with TestClient(app) as client:
+        for query in ("queue_size=0", "queue_size=-5", "policy=inconnue"):
+            with pytest.raises(WebSocketDisconnect) as fermeture:
+                with client.websocket_connect(f"{WS_PATH}?{query}") as session:
+                    session.receive_json()
+            assert fermeture.value.code == 1008
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
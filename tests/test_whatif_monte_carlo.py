@@ -0,0 +1,78 @@
+# Test Simulateur What-If - Monte-Carlo vectorisé et mémoïsation
+# ==============================================================
+
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+# Ajout des chemins pour imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from predictions_multi_horizons import WhatIfSimulator, _simulate_distribution_cached
+
+
+def test_tables_quantiles_toutes_combinaisons():
+    """Une ligne par (combinaison, secteur), quantiles ordonnés"""
+    resultat = WhatIfSimulator.simulate_distribution(max_combination_size=4, n_samples=2000, seed=1)
+
+    assert resultat['combinations'] == 15
+    assert len(resultat['summary']) == 15 * len(WhatIfSimulator.SECTOR_PROFILES)
+    roi = resultat['roi'].to_numpy()
+    payback = resultat['payback_months'].to_numpy()
+    assert (roi[:, 0] <= roi[:, 1]).all() and (roi[:, 1] <= roi[:, 2]).all()
+    assert (payback[:, 0] <= payback[:, 1]).all() and (payback[:, 1] <= payback[:, 2]).all()
+
+
+def test_rendements_decroissants():
+    """La réduction combinée est inférieure à la somme et supérieure au maximum"""
+    resultat = WhatIfSimulator.simulate_distribution(
+        ['formation_intensive', 'equipement_upgrade'], sectors=['236'],
+        max_combination_size=2, n_samples=20000, seed=3
+    )
+    reduction = resultat['summary'].set_index('combination')['risk_reduction_p50']
+
+    combinee = reduction['equipement_upgrade + formation_intensive']
+    assert reduction['equipement_upgrade'] < combinee < reduction['equipement_upgrade'] + reduction['formation_intensive']
+    attendu = 100 * (1 - (1 - 0.25) * (1 - WhatIfSimulator.OVERLAP_FACTOR * 0.15))
+    assert combinee == pytest.approx(attendu, abs=1.0)
+
+
+def test_mediane_proche_du_scenario_deterministe():
+    """Le ROI médian d'une intervention seule reste cohérent avec simulate_scenario"""
+    profil = {'X': {'current_incidents': 40, 'cost_per_incident': 45000}}
+    resultat = WhatIfSimulator.simulate_distribution(['technologie_iot'], sector_profiles=profil,
+                                                     n_samples=50000, seed=7)
+    # Valeur déterministe sans troncature entière des incidents évités
+    attendu = (40 * 0.30 * 45000 - 120000) / 120000 * 100
+    assert resultat['summary']['roi_p50'].iloc[0] == pytest.approx(attendu, rel=0.1)
+
+
+def test_memoisation_et_reproductibilite():
+    """Paramètres identiques: résultat servi depuis le cache; graine fixe: résultats identiques"""
+    _simulate_distribution_cached.cache_clear()
+    premier = WhatIfSimulator.simulate_distribution(max_combination_size=2, n_samples=1000, seed=11)
+    second = WhatIfSimulator.simulate_distribution(max_combination_size=2, n_samples=1000, seed=11)
+
+    assert second is premier
+    assert _simulate_distribution_cached.cache_info().hits == 1
+
+    _simulate_distribution_cached.cache_clear()
+    recalcule = WhatIfSimulator.simulate_distribution(max_combination_size=2, n_samples=1000, seed=11)
+    np.testing.assert_array_equal(recalcule['roi'].to_numpy(), premier['roi'].to_numpy())
+
+
+def test_performance_diffusion():
+    """15 combinaisons × 4 secteurs × 10 000 tirages en un appel"""
+    _simulate_distribution_cached.cache_clear()
+    debut = time.perf_counter()
+    WhatIfSimulator.simulate_distribution(max_combination_size=4, n_samples=10000)
+    duree = time.perf_counter() - debut
+    print(f"\n   ⏱️ 600 000 scénarios simulés en {duree:.3f}s")
+    assert duree < 5.0
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,116 @@
+# Test XAI Données CNESST - Cache sectoriel typé et agrégats en une passe
+# ======================================================================
+
+import os
+import sqlite3
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Ajout des chemins pour imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from xai_real_cnesst_data import CNESSTDataConnector, RealCNESSTSHAPCalculator, RealCounterfactualAnalyzer
+
+
+def _creer_base(db_path: str, n: int = 3000):
+    """Base incidents synthétique (secteurs 236 et 311, valeurs manquantes incluses)"""
+    rng = np.random.default_rng(42)
+    dates = pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 700, n), unit='D')
+    df = pd.DataFrame({
+        'incident_id': np.arange(n),
+        'date_occurred': dates.strftime('%Y-%m-%d'),
+        'sector_scian': rng.choice(['2361', '2362', '3111'], n),
+        'severity_level': rng.integers(1, 6, n),
+        'injury_type': rng.choice(['chute', 'coupure', 'TMS'], n),
+        'location_region': rng.choice(['Montréal', 'Québec', 'Abitibi', None], n),
+        'age_group': rng.choice(['15-24', '25-34', '35-44', '45-54', None], n),
+        'gender': rng.choice(['H', 'F'], n),
+        'cost_estimate': np.where(rng.random(n) < 0.05, np.nan, rng.gamma(2.0, 8000.0, n)),
+        'days_lost': rng.integers(0, 90, n)
+    })
+    with sqlite3.connect(db_path) as conn:
+        df.to_sql('incidents', conn, index=False)
+
+
+def _reference_shap(incidents: pd.DataFrame) -> dict:
+    """Calcul historique: un groupby / filtre par facteur"""
+    incidents = incidents.astype({'age_group': object, 'gender': object})
+    age = incidents.groupby('age_group')['severity_level'].mean()
+    gender = incidents.groupby('gender')['severity_level'].mean()
+    monthly = incidents.groupby(pd.to_datetime(incidents['date_occurred']).dt.month)['severity_level'].mean()
+    high_cost = incidents[incidents['cost_estimate'] > incidents['cost_estimate'].quantile(0.75)]
+    young = incidents[incidents['age_group'].astype(str).str.contains('15-24|25-34', na=False)]
+    return {
+        'baseline': (incidents['severity_level'] >= 3).sum() / len(incidents),
+        'age_group': (age.max() - age.min()) / 10.0,
+        'seasonal_factor': monthly.std() / 5.0,
+        'gender': (gender.max() - gender.min()) / 8.0,
+        'equipment_condition': min(len(high_cost) / len(incidents) * 0.08, 0.08),
+        'training_level': -len(young) / len(incidents) * 0.06
+    }
+
+
+@pytest.fixture
+def connecteur():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'cnesst.db')
+        _creer_base(db_path)
+        connector = CNESSTDataConnector(db_path)
+        yield connector
+        connector.connection.close()
+
+
+def test_shap_identique_au_calcul_historique(connecteur):
+    """Les contributions agrégées en une passe égalent le calcul par groupby"""
+    calculateur = RealCNESSTSHAPCalculator(connecteur)
+    baseline = calculateur.calculate_baseline_risk('236')
+    resultat = calculateur.calculate_real_shap_values('236')
+
+    frame = pd.read_sql_query("SELECT * FROM incidents WHERE sector_scian LIKE '236%'", connecteur.connection)
+    attendu = _reference_shap(frame)
+
+    assert baseline == pytest.approx(attendu['baseline'])
+    for facteur in ('age_group', 'seasonal_factor', 'gender', 'equipment_condition', 'training_level'):
+        assert resultat['shap_values'][facteur] == pytest.approx(attendu[facteur]), facteur
+    assert resultat['sample_size'] == len(frame)
+
+
+def test_une_requete_par_secteur(connecteur):
+    """Baseline, SHAP et contrefactuels réutilisent le même DataFrame en cache"""
+    calculateur = RealCNESSTSHAPCalculator(connecteur)
+    analyseur = RealCounterfactualAnalyzer(connecteur)
+
+    for _ in range(3):
+        calculateur.calculate_baseline_risk('236')
+        calculateur.calculate_real_shap_values('236')
+        scenarios = analyseur.generate_real_scenarios('236')
+
+    # Une requête secteur + une requête statistiques régionales
+    assert connecteur.cache_stats['queries'] == 2
+    assert len(scenarios) == 3
+    assert scenarios[0]['data_basis'].startswith(f"Analysé sur {calculateur.calculate_real_shap_values('236')['sample_size']}")
+
+    frame = connecteur.get_incidents_by_sector('236')
+    assert str(frame['age_group'].dtype) == 'category'
+    assert frame['severity_level'].dtype == np.int8
+
+
+def test_expiration_ttl_et_invalidation(connecteur):
+    """Une entrée expirée ou invalidée est rechargée"""
+    connecteur.get_sector_profile('311')
+    connecteur.invalidate_cache('311')
+    connecteur.get_sector_profile('311')
+    assert connecteur.cache_stats['queries'] == 2
+
+    connecteur.cache_ttl_seconds = 0
+    connecteur.get_sector_profile('311')
+    assert connecteur.cache_stats['expirations'] == 1
+    assert connecteur.cache_stats['queries'] == 3
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
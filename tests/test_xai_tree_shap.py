@@ -0,0 +1,192 @@
+# Test XAI Oracle HSE - TreeSHAP exact, explications pré-calculées, audit par lots
+# ===============================================================================
+
+import itertools
+import json
+import math
+import os
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Ajout des chemins pour imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'analytics'))
+
+pytest.importorskip("sklearn")
+
+from sklearn.ensemble import RandomForestRegressor
+
+from predictive_models import SafetyGraphPredictiveEngine
+from tree_shap import TreeEnsembleExplainer
+from xai_oracle_hse import XAIExplanationEngine
+
+
+def _esperance_conditionnelle(arbre, x, S, noeud=0):
+    """E[f(x) | x_S] par pondération des couvertures (définition TreeSHAP)"""
+    t = arbre.tree_
+    gauche, droite = t.children_left[noeud], t.children_right[noeud]
+    if gauche == -1:
+        return t.value[noeud, 0, 0]
+    if t.feature[noeud] in S:
+        suivant = gauche if x[t.feature[noeud]] <= t.threshold[noeud] else droite
+        return _esperance_conditionnelle(arbre, x, S, suivant)
+    w = t.weighted_n_node_samples
+    return (w[gauche] * _esperance_conditionnelle(arbre, x, S, gauche) +
+            w[droite] * _esperance_conditionnelle(arbre, x, S, droite)) / w[noeud]
+
+
+def _shapley_force_brute(modele, x, n_features):
+    phi = np.zeros(n_features)
+    for arbre in modele.estimators_:
+        for i in range(n_features):
+            autres = [j for j in range(n_features) if j != i]
+            for k in range(n_features):
+                for S in itertools.combinations(autres, k):
+                    poids = math.factorial(k) * math.factorial(n_features - k - 1) / math.factorial(n_features)
+                    phi[i] += poids * (_esperance_conditionnelle(arbre, x, set(S) | {i}) -
+                                       _esperance_conditionnelle(arbre, x, set(S)))
+    return phi / len(modele.estimators_)
+
+
+def test_tree_shap_exact_contre_force_brute():
+    """Valeurs identiques à l'énumération des coalitions, précision locale respectée"""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 4))
+    X[:, 3] = np.round(X[:, 3])
+    y = 2 * X[:, 0] + X[:, 1] * X[:, 2] + (X[:, 3] > 0)
+    modele = RandomForestRegressor(n_estimators=4, max_depth=5, random_state=0).fit(X, y)
+
+    explainer = TreeEnsembleExplainer(modele)
+    phi = explainer.shap_values(X[:3], batch_size=2)
+
+    for ligne in range(3):
+        np.testing.assert_allclose(phi[ligne], _shapley_force_brute(modele, X[ligne], 4), atol=1e-12)
+    np.testing.assert_allclose(explainer.expected_value + explainer.shap_values(X).sum(axis=1),
+                               modele.predict(X), atol=1e-10)
+
+
+def _donnees_culture():
+    rng = np.random.default_rng(1)
+    secteurs = ['236', '311', '212', '622', '484']
+    dates = pd.date_range('2023-01-01', periods=12, freq='MS').strftime('%Y-%m-%d')
+    culture = pd.DataFrame([
+        {'secteur_scian': s, 'date_evaluation': d,
+         'dimension_leadership': rng.uniform(2, 5), 'dimension_communication': rng.uniform(2, 5),
+         'dimension_formation': rng.uniform(2, 5)}
+        for s in secteurs for d in dates
+    ])
+    culture['score_culture'] = (culture[['dimension_leadership', 'dimension_communication',
+                                         'dimension_formation']].mean(axis=1) + rng.normal(0, 0.1, len(culture)))
+    cnesst = pd.DataFrame({
+        'secteur_activite': np.repeat(secteurs, 40),
+        'date_accident': pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 365, 200), unit='D'),
+        'age': rng.integers(18, 65, 200),
+        'gravite': rng.choice(['Décès', 'Invalidité permanente', 'Mineure'], 200)
+    })
+    return culture, cnesst
+
+
+def test_explications_precalculees_et_servies(tmp_path, monkeypatch):
+    """L'entraînement remplit le magasin; le moteur XAI le sert sans recalcul"""
+    monkeypatch.chdir(tmp_path)
+    moteur = SafetyGraphPredictiveEngine(db_path=str(tmp_path / 'predictions.db'))
+    performance = moteur.train_culture_prediction_model(*_donnees_culture())
+    assert performance['explanations_precomputed'] == 60
+
+    store = moteur.explanations['culture_prediction_rf']
+    modele = moteur.models['culture_prediction_rf']
+    np.testing.assert_allclose(store['predictions'], modele.predict(store['model_inputs']), atol=1e-10)
+
+    xai = XAIExplanationEngine(predictive_engine=moteur)
+    explication = xai.generate_shap_explanation('236:2023-03-01', 'random_forest')
+    assert explication['final_prediction'] == pytest.approx(
+        explication['base_value'] + sum(explication['shap_values'].values()))
+    assert explication['explanation_quality'] == pytest.approx(1.0)
+
+    importance = xai.generate_feature_importance_global('random_forest')['feature_importance']
+    assert sum(importance.values()) == pytest.approx(1.0)
+
+    lime = xai.generate_lime_explanation('236:2023-03-01')
+    assert set(lime['lime_coefficients']) == set(explication['shap_values'])
+    assert xai.generate_lime_explanation('236:2023-03-01') is lime
+
+    # Modèle rechargé depuis le disque: explication relue depuis la base
+    recharge = SafetyGraphPredictiveEngine(db_path=str(tmp_path / 'predictions.db'))
+    recharge.models['culture_prediction_rf'] = modele
+    relue = XAIExplanationEngine(predictive_engine=recharge).generate_shap_explanation(
+        '236:2023-03-01', 'random_forest')
+    assert relue['shap_values'] == pytest.approx(explication['shap_values'])
+    absente = XAIExplanationEngine(predictive_engine=recharge).generate_shap_explanation(
+        '999:2023-03-01', 'random_forest')
+    assert absente['status'] == 'unavailable' and 'shap_values' not in absente
+
+    # LIME après redémarrage: ajusté sur l'entrée relue depuis la base, pas simulé
+    xai_recharge = XAIExplanationEngine(predictive_engine=recharge)
+    lime_relu = xai_recharge.generate_lime_explanation('236:2023-03-01')
+    assert 'simulated' not in lime_relu
+    assert lime_relu['lime_coefficients'] == pytest.approx(lime['lime_coefficients'])
+    inconnue = xai_recharge.generate_lime_explanation('999:2023-03-01')
+    assert inconnue['status'] == 'unavailable' and 'lime_coefficients' not in inconnue
+
+    # Lignes antérieures à l'enregistrement des entrées: explication indisponible
+    conn = sqlite3.connect(tmp_path / 'predictions.db')
+    with conn:
+        conn.execute('UPDATE explanations SET model_inputs = NULL')
+    conn.close()
+    assert xai_recharge.generate_lime_explanation('311:2023-03-01')['status'] == 'unavailable'
+
+
+
+def test_qualite_explication_residu_relatif():
+    """La qualité mesure l'écart relatif base + Σφ vs prédiction du modèle"""
+    class MoteurFactice:
+        def get_model_performance(self, model_name):
+            return {'cv_mean': 0.9}
+
+    xai = XAIExplanationEngine(predictive_engine=MoteurFactice())
+    stocke = {'base_value': 2.0, 'predicted_value': 4.0, 'features': {'a': 1.0, 'b': 0.0},
+              'shap_values': {'a': 1.5, 'b': 0.3}}
+    explication = xai._stored_shap_explanation('p1', 'random_forest', 'culture_prediction_rf', stocke)
+    assert explication['explanation_quality'] == pytest.approx(1 - 0.2 / 4.0)
+    stocke['shap_values']['b'] = 0.5
+    assert xai._stored_shap_explanation('p1', 'random_forest', 'culture_prediction_rf',
+                                        stocke)['explanation_quality'] == pytest.approx(1.0)
+
+def test_migration_colonne_entrees_modele(tmp_path):
+    """Une base créée avant l'ajout de model_inputs est migrée à l'ouverture"""
+    chemin = tmp_path / 'ancienne.db'
+    conn = sqlite3.connect(chemin)
+    conn.execute('''CREATE TABLE explanations (model_name TEXT NOT NULL, prediction_id TEXT NOT NULL,
+                    base_value REAL, predicted_value REAL, shap_values TEXT, features TEXT,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, PRIMARY KEY (model_name, prediction_id))''')
+    conn.execute("INSERT INTO explanations (model_name, prediction_id) VALUES ('culture_prediction_rf', 'p1')")
+    conn.commit()
+    conn.close()
+
+    moteur = SafetyGraphPredictiveEngine(db_path=str(chemin))
+    assert moteur.get_model_input('culture_prediction_rf', 'p1') is None
+    conn = sqlite3.connect(chemin)
+    assert 'model_inputs' in {row[1] for row in conn.execute('PRAGMA table_info(explanations)')}
+    conn.close()
+
+def test_audit_trail_append_only_par_lots(tmp_path):
+    """Le trail d'audit est écrit par lots complets, puis au flush"""
+    chemin = tmp_path / 'audit.jsonl'
+    xai = XAIExplanationEngine(audit_log_path=str(chemin), audit_batch_size=4)
+
+    for _ in range(6):
+        xai.generate_shap_explanation('PRED_1', 'lstm_deep')
+    assert len(chemin.read_text(encoding='utf-8').splitlines()) == 4
+    assert len(xai.audit_trail) == 4
+
+    assert xai.flush_audit_trail() == 2
+    lignes = [json.loads(l) for l in chemin.read_text(encoding='utf-8').splitlines()]
+    assert [l['explanation_id'] for l in lignes] == [f"shap_{i}" for i in range(6)]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -14,9 +14,15 @@ import plotly.express as px
 from plotly.subplots import make_subplots
 from typing import Dict, List, Tuple, Optional, Any
 from datetime import datetime, timedelta
+from pathlib import Path
+import json
+import sys
+import zlib
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.append(str(Path(__file__).parent / "src" / "analytics"))
+
 # ================================================================
 # CONFIGURATION XAI ORACLE HSE
 # ================================================================
@@ -94,6 +100,19 @@ class XAIOracleConfig:
         }
     }
 
+    # Modèles du moteur prédictif expliqués par TreeSHAP
+    ENGINE_MODELS = {
+        'random_forest': 'culture_prediction_rf'
+    }
+    
+    # Paramètres LIME (perturbations dans l'espace normalisé du modèle)
+    LIME_SAMPLES = 1000
+    LIME_KERNEL_WIDTH = 0.75
+    
+    # Trail d'audit: écriture append-only par lots
+    AUDIT_BATCH_SIZE = 50
+    AUDIT_LOG_PATH = "logs/xai_audit_trail.jsonl"
+
 # ================================================================
 # GÉNÉRATEUR D'EXPLICATIONS XAI
 # ================================================================
@@ -101,14 +120,46 @@ class XAIOracleConfig:
 class XAIExplanationEngine:
     """Moteur de génération d'explications XAI"""
     
-    def __init__(self):
+    def __init__(self, predictive_engine=None, audit_log_path: Optional[str] = None,
+                 audit_batch_size: int = XAIOracleConfig.AUDIT_BATCH_SIZE):
+        self.predictive_engine = predictive_engine
         self.explanation_cache = {}
         self.audit_trail = []
+        self.audit_log_path = Path(audit_log_path) if audit_log_path else None
+        self.audit_batch_size = audit_batch_size
+        self._audit_buffer = []
+        self._audit_count = 0
+    
+    def _engine_model(self, model_type: str) -> Optional[str]:
+        """Nom du modèle entraîné correspondant, s'il est disponible"""
+        model_name = XAIOracleConfig.ENGINE_MODELS.get(model_type)
+        if self.predictive_engine is None or model_name not in self.predictive_engine.models:
+            return None
+        return model_name
+    
+    def _model_confidence(self, model_name: str) -> float:
+        """Confiance issue de la validation croisée du dernier entraînement"""
+        performance = self.predictive_engine.get_model_performance(model_name)
+        return float(np.clip(performance.get('cv_mean', 0.90), 0.0, 1.0))
     
     def generate_shap_explanation(self, prediction_id: str, model_type: str) -> Dict:
         """Génère explication SHAP pour une prédiction"""
         
-        # Simulation valeurs SHAP réalistes
+        model_name = self._engine_model(model_type)
+        if model_name is not None:
+            stored = self.predictive_engine.get_explanation(model_name, prediction_id)
+            if stored is None:
+                # Modèle entraîné mais prédiction non expliquée: pas de valeurs fabriquées
+                return {
+                    'prediction_id': prediction_id,
+                    'model_type': model_type,
+                    'status': 'unavailable',
+                    'reason': "Explication SHAP non pré-calculée pour cette prédiction",
+                    'timestamp': datetime.now()
+                }
+            return self._stored_shap_explanation(prediction_id, model_type, model_name, stored)
+        
+        # Simulation valeurs SHAP réalistes (démonstration: aucun modèle entraîné)
         base_value = 0.23  # Risque de base
         
         if model_type == 'random_forest':
@@ -152,16 +203,60 @@ class XAIExplanationEngine:
             'final_prediction': final_prediction,
             'confidence': np.random.uniform(0.85, 0.98),
             'explanation_quality': np.random.uniform(0.90, 0.97),
+            'simulated': True,
+            'timestamp': datetime.now()
+        }
+        
+        self._log_explanation('shap', explanation)
+        return explanation
+    
+    def _stored_shap_explanation(self, prediction_id: str, model_type: str,
+                                 model_name: str, stored: Dict) -> Dict:
+        """Explication SHAP pré-calculée après entraînement (TreeSHAP exact)"""
+        shap_values = stored['shap_values']
+        predicted = stored['predicted_value']
+        reconstructed = stored['base_value'] + sum(shap_values.values())
+        # Résidu d'additivité relatif à la prédiction du modèle (base + Σφ = f(x))
+        residual = abs(reconstructed - predicted) / max(abs(predicted), 1e-12)
+        
+        explanation = {
+            'prediction_id': prediction_id,
+            'model_type': model_type,
+            'base_value': stored['base_value'],
+            'shap_values': shap_values,
+            'feature_values': stored['features'],
+            'final_prediction': predicted,
+            'confidence': self._model_confidence(model_name),
+            'explanation_quality': float(max(0.0, 1.0 - residual)),
             'timestamp': datetime.now()
         }
         
         self._log_explanation('shap', explanation)
         return explanation
     
-    def generate_lime_explanation(self, prediction_id: str) -> Dict:
+    def generate_lime_explanation(self, prediction_id: str, model_type: str = 'random_forest') -> Dict:
         """Génère explication LIME locale"""
         
-        # Coefficients LIME simulés
+        model_name = self._engine_model(model_type)
+        if model_name is not None:
+            entree = self.predictive_engine.get_model_input(model_name, prediction_id)
+            if entree is None:
+                # Modèle entraîné mais entrée inconnue: pas de coefficients fabriqués
+                return {
+                    'prediction_id': prediction_id,
+                    'model_type': model_type,
+                    'status': 'unavailable',
+                    'reason': "Entrée du modèle non enregistrée pour cette prédiction",
+                    'timestamp': datetime.now()
+                }
+            cache_key = ('lime', model_name, prediction_id, entree['computed_at'])
+            if cache_key not in self.explanation_cache:
+                self.explanation_cache[cache_key] = self._fit_lime(prediction_id, model_name, entree)
+            explanation = self.explanation_cache[cache_key]
+            self._log_explanation('lime', explanation)
+            return explanation
+        
+        # Coefficients LIME simulés (démonstration: aucun modèle entraîné)
         lime_coefficients = {
             'fatigue_indicator': 0.234,
             'safety_training': -0.167,
@@ -181,12 +276,58 @@ class XAIExplanationEngine:
             'feature_coverage': 0.92,
             'stability_score': np.random.uniform(0.85, 0.93),
             'interpretability_score': 0.89,
+            'simulated': True,
             'timestamp': datetime.now()
         }
         
         self._log_explanation('lime', explanation)
         return explanation
     
+    def _fit_lime(self, prediction_id: str, model_name: str, entree: Dict) -> Dict:
+        """
+        Surrogate linéaire local pondéré autour de la prédiction
+        
+        Les perturbations sont prédites en un seul appel au modèle; la
+        stabilité compare les coefficients ajustés sur deux moitiés du tirage.
+        """
+        model = self.predictive_engine.models[model_name]
+        x = np.asarray(entree['model_input'], dtype=np.float64)
+        rng = np.random.default_rng(zlib.crc32(prediction_id.encode('utf-8')))
+        
+        perturbations = x + rng.normal(size=(XAIOracleConfig.LIME_SAMPLES, len(x)))
+        perturbations[0] = x
+        predictions = model.predict(perturbations)
+        
+        distances = np.linalg.norm(perturbations - x, axis=1) / np.sqrt(len(x))
+        weights = np.exp(-distances ** 2 / XAIOracleConfig.LIME_KERNEL_WIDTH ** 2)
+        
+        def weighted_fit(rows: slice):
+            design = np.column_stack([np.ones(len(perturbations[rows])), perturbations[rows] - x])
+            sqrt_w = np.sqrt(weights[rows])[:, None]
+            coefs, *_ = np.linalg.lstsq(design * sqrt_w, predictions[rows] * sqrt_w[:, 0], rcond=None)
+            return coefs, design @ coefs
+        
+        coefs, fitted = weighted_fit(slice(None))
+        residual = np.average((predictions - fitted) ** 2, weights=weights)
+        variance = np.average((predictions - np.average(predictions, weights=weights)) ** 2, weights=weights)
+        
+        half = XAIOracleConfig.LIME_SAMPLES // 2
+        first, _ = weighted_fit(slice(0, half))
+        second, _ = weighted_fit(slice(half, None))
+        norms = np.linalg.norm(first[1:]) * np.linalg.norm(second[1:])
+        stability = float(np.dot(first[1:], second[1:]) / norms) if norms > 0 else 1.0
+        
+        return {
+            'prediction_id': prediction_id,
+            'lime_coefficients': dict(zip(entree['feature_names'], coefs[1:].tolist())),
+            'local_fidelity': float(1.0 - residual / variance) if variance > 0 else 1.0,
+            'feature_coverage': float(np.mean(np.abs(coefs[1:]) > 1e-12)),
+            'stability_score': max(0.0, stability),
+            'interpretability_score': 0.89,
+            'confidence': self._model_confidence(model_name),
+            'timestamp': datetime.now()
+        }
+    
     def generate_counterfactual_scenarios(self, current_prediction: Dict) -> List[Dict]:
         """Génère scénarios contrefactuels"""
         
@@ -247,6 +388,18 @@ class XAIExplanationEngine:
     def generate_feature_importance_global(self, model_type: str) -> Dict:
         """Importance globale des features"""
         
+        model_name = self._engine_model(model_type)
+        shap_importance = self.predictive_engine.get_global_importance(model_name) if model_name else {}
+        if shap_importance:
+            store = self.predictive_engine.explanations.get(model_name, {})
+            return {
+                'model_type': model_type,
+                'feature_importance': shap_importance,
+                'stability_score': store.get('stability_score', 1.0),
+                'coverage': 1.0,
+                'last_updated': store.get('computed_at', datetime.now())
+            }
+        
         if model_type == 'neural_ensemble':
             importance = {
                 'Fatigue & Stress Combinés': 0.187,
@@ -287,30 +440,60 @@ class XAIExplanationEngine:
         }
     
     def _log_explanation(self, method: str, explanation: Dict):
-        """Log des explications pour audit trail"""
+        """Log des explications pour audit trail (écrit par lots)"""
         
         log_entry = {
             'timestamp': datetime.now(),
             'method': method,
-            'explanation_id': f"{method}_{len(self.audit_trail)}",
+            'explanation_id': f"{method}_{self._audit_count}",
             'quality_score': explanation.get('confidence', 0.90),
             'user_context': 'HSE_Manager'  # Simulé
         }
         
-        self.audit_trail.append(log_entry)
+        self._audit_count += 1
+        self._audit_buffer.append(log_entry)
+        if len(self._audit_buffer) >= self.audit_batch_size:
+            self.flush_audit_trail()
+    
+    def flush_audit_trail(self) -> int:
+        """Ajoute le lot en attente au trail d'audit (fichier JSONL append-only)"""
+        
+        batch, self._audit_buffer = self._audit_buffer, []
+        if not batch:
+            return 0
+        
+        if self.audit_log_path is not None:
+            self.audit_log_path.parent.mkdir(parents=True, exist_ok=True)
+            lines = "".join(json.dumps(entry, ensure_ascii=False, default=str) + "\n" for entry in batch)
+            with open(self.audit_log_path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+        
+        self.audit_trail.extend(batch)
+        return len(batch)
 
 # ================================================================
 # INTERFACE XAI STREAMLIT
 # ================================================================
 
+def _load_predictive_engine():
+    """Moteur prédictif SafetyGraph (None si dépendances ML absentes)"""
+    try:
+        from predictive_models import SafetyGraphPredictiveEngine, ML_AVAILABLE
+        return SafetyGraphPredictiveEngine() if ML_AVAILABLE else None
+    except Exception:
+        return None
+
 def display_xai_oracle_interface():
     """Interface principale XAI Oracle HSE"""
     
     st.markdown("### 🔍 XAI Oracle HSE - Explicabilité IA Transparente")
     
-    # Initialisation moteur XAI
+    # Initialisation moteur XAI (adossé aux modèles entraînés si disponibles)
     if 'xai_engine' not in st.session_state:
-        st.session_state.xai_engine = XAIExplanationEngine()
+        st.session_state.xai_engine = XAIExplanationEngine(
+            predictive_engine=_load_predictive_engine(),
+            audit_log_path=XAIOracleConfig.AUDIT_LOG_PATH
+        )
     
     xai_engine = st.session_state.xai_engine
     
@@ -344,13 +527,20 @@ def display_prediction_explanation(xai_engine):
     with col1:
         st.markdown("##### ⚙️ Configuration")
         
-        prediction_id = st.text_input("ID Prédiction", value="PRED_2025_0803_001")
         model_type = st.selectbox(
             "Modèle IA",
             ['random_forest', 'lstm_deep', 'neural_ensemble', 'xgboost'],
             format_func=lambda x: x.replace('_', ' ').title()
         )
         
+        # Prédictions expliquées au dernier entraînement
+        model_name = xai_engine._engine_model(model_type)
+        explained_ids = xai_engine.predictive_engine.list_explained_predictions(model_name) if model_name else []
+        if explained_ids:
+            prediction_id = st.selectbox("ID Prédiction", explained_ids)
+        else:
+            prediction_id = st.text_input("ID Prédiction", value="PRED_2025_0803_001")
+        
         explanation_method = st.selectbox(
             "Méthode Explicabilité",
             ['shap_values', 'lime_local', 'feature_importance'],
@@ -362,7 +552,7 @@ def display_prediction_explanation(xai_engine):
                 explanation = xai_engine.generate_shap_explanation(prediction_id, model_type)
                 st.session_state.current_explanation = explanation
             elif explanation_method == 'lime_local':
-                explanation = xai_engine.generate_lime_explanation(prediction_id)
+                explanation = xai_engine.generate_lime_explanation(prediction_id, model_type)
                 st.session_state.current_explanation = explanation
     
     with col2:
@@ -371,8 +561,13 @@ def display_prediction_explanation(xai_engine):
             
             st.markdown("##### 📊 Résultats Explicabilité")
             
-            if 'shap_values' in explanation:
+            if explanation.get('status') == 'unavailable':
+                st.warning(f"⚠️ Explication indisponible: {explanation['reason']}")
+            
+            elif 'shap_values' in explanation:
                 # Affichage SHAP
+                if explanation.get('simulated'):
+                    st.caption("ℹ️ Valeurs SHAP de démonstration (aucun modèle entraîné)")
                 st.markdown(f"**Prédiction:** {explanation['final_prediction']:.1%}")
                 st.markdown(f"**Confiance:** {explanation['confidence']:.1%}")
                 st.markdown(f"**Qualité Explication:** {explanation['explanation_quality']:.1%}")
@@ -401,6 +596,8 @@ def display_prediction_explanation(xai_engine):
                 
             elif 'lime_coefficients' in explanation:
                 # Affichage LIME
+                if explanation.get('simulated'):
+                    st.caption("ℹ️ Coefficients de démonstration (aucun modèle entraîné)")
                 st.markdown(f"**Fidélité Locale:** {explanation['local_fidelity']:.1%}")
                 st.markdown(f"**Couverture Features:** {explanation['feature_coverage']:.1%}")
                 st.markdown(f"**Score Stabilité:** {explanation['stability_score']:.1%}")
@@ -505,6 +702,8 @@ def display_audit_trail(xai_engine):
     
     st.markdown("#### 📋 Trail d'Audit - Traçabilité XAI")
     
+    xai_engine.flush_audit_trail()
+    
     if xai_engine.audit_trail:
         audit_df = pd.DataFrame(xai_engine.audit_trail)
         
@@ -15,24 +15,99 @@ import plotly.express as px
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 import logging
+import threading
+import time
 from pathlib import Path
 
 # ================================================================
 # CONNECTEUR DONNÉES RÉELLES CNESST
 # ================================================================
 
+SECTOR_CACHE_TTL_SECONDS = 600.0
+REGIONAL_STATS_CACHE_KEY = "__regional_statistics__"
+CATEGORICAL_COLUMNS = ['sector_scian', 'injury_type', 'location_region', 'age_group', 'gender']
+YOUNG_WORKER_PATTERN = '15-24|25-34'
+
+def _type_sector_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Typage compact: colonnes catégorielles, gravité int8, mois pré-calculé"""
+    for column in CATEGORICAL_COLUMNS:
+        df[column] = df[column].astype('category')
+    
+    severity = pd.to_numeric(df['severity_level'], errors='coerce')
+    if severity.notna().all() and severity.between(-128, 127).all() and (severity % 1 == 0).all():
+        severity = severity.astype('int8')
+    df['severity_level'] = severity
+    
+    df['date_occurred'] = pd.to_datetime(df['date_occurred'], errors='coerce')
+    df['month'] = df['date_occurred'].dt.month.fillna(0).astype('int8')  # 0 = date inconnue
+    return df
+
+def _severity_means_by(codes: np.ndarray, severity: np.ndarray,
+                       valid: np.ndarray, n_groups: int) -> np.ndarray:
+    """Gravité moyenne des groupes observés (bincount sur codes entiers)"""
+    mask = valid & (codes >= 0)
+    counts = np.bincount(codes[mask], minlength=n_groups)
+    sums = np.bincount(codes[mask], weights=severity[mask], minlength=n_groups)
+    observed = counts > 0
+    return sums[observed] / counts[observed]
+
+def _compute_sector_profile(incidents: pd.DataFrame) -> Dict:
+    """Tous les agrégats utilisés par SHAP et contrefactuels, en une passe vectorisée"""
+    n = len(incidents)
+    if n == 0:
+        return {'sample_size': 0}
+    
+    severity = incidents['severity_level'].to_numpy(dtype=np.float64)
+    valid = ~np.isnan(severity)
+    
+    def severity_range(column: str) -> Optional[float]:
+        codes = incidents[column].cat.codes.to_numpy()
+        means = _severity_means_by(codes, severity, valid, len(incidents[column].cat.categories))
+        return float(means.max() - means.min()) if len(means) > 1 else None
+    
+    monthly_means = _severity_means_by(incidents['month'].to_numpy().astype(np.intp) - 1,
+                                       severity, valid, 12)
+    
+    age = incidents['age_group']
+    young_categories = age.cat.categories.astype(str).str.contains(YOUNG_WORKER_PATTERN, na=False)
+    young_count = int(np.isin(age.cat.codes.to_numpy(), np.flatnonzero(young_categories)).sum())
+    
+    costs = incidents['cost_estimate'].to_numpy(dtype=np.float64)
+    has_costs = not np.isnan(costs).all()
+    q75, q80 = np.nanquantile(costs, [0.75, 0.8]) if has_costs else (np.nan, np.nan)
+    high_cost_q80 = costs[costs > q80]
+    
+    return {
+        'sample_size': n,
+        'baseline_risk': float((severity >= 3).sum()) / n,
+        'has_region': bool(incidents['location_region'].notna().any()),
+        'age_severity_range': severity_range('age_group'),
+        'gender_severity_range': severity_range('gender'),
+        'monthly_severity_std': float(np.std(monthly_means, ddof=1)) if len(monthly_means) > 6 else None,
+        'high_cost_q75_proportion': float((costs > q75).sum()) / n,
+        'high_cost_q80_count': int(len(high_cost_q80)),
+        'high_cost_q80_mean': float(high_cost_q80.mean()) if len(high_cost_q80) > 0 else None,
+        'young_count': young_count,
+        'young_proportion': young_count / n
+    }
+
 class CNESSTDataConnector:
     """Connecteur pour accéder aux vraies données CNESST"""
     
-    def __init__(self, db_path: str = "data/safetyagentic_behaviorx.db"):
+    def __init__(self, db_path: str = "data/safetyagentic_behaviorx.db",
+                 cache_ttl_seconds: float = SECTOR_CACHE_TTL_SECONDS):
         self.db_path = db_path
         self.connection = None
+        self.cache_ttl_seconds = cache_ttl_seconds
+        # Cache par secteur SCIAN: {'frame', 'profile', 'loaded_at'}
         self.cached_data = {}
+        self.cache_stats = {'queries': 0, 'hits': 0, 'expirations': 0}
+        self._cache_lock = threading.RLock()
         
     def connect(self) -> bool:
         """Établit connexion à la base de données"""
         try:
-            self.connection = sqlite3.connect(self.db_path)
+            self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
             logging.info("✅ Connexion CNESST établie")
             return True
         except Exception as e:
@@ -40,10 +115,63 @@ class CNESSTDataConnector:
             return False
     
     def get_incidents_by_sector(self, scian_code: str = "236") -> pd.DataFrame:
-        """Récupère incidents par secteur SCIAN"""
+        """
+        Récupère incidents par secteur SCIAN
+        
+        Le DataFrame typé (catégories, int8) est partagé via le cache:
+        les appelants ne doivent pas le modifier en place.
+        """
+        return self._get_sector_entry(scian_code)['frame']
+    
+    def get_sector_profile(self, scian_code: str = "236") -> Dict:
+        """Agrégats du secteur calculés en une passe et mis en cache avec le DataFrame"""
+        with self._cache_lock:
+            entry = self._get_sector_entry(scian_code)
+            if entry['profile'] is None:
+                entry['profile'] = _compute_sector_profile(entry['frame'])
+            return entry['profile']
+    
+    def invalidate_cache(self, scian_code: Optional[str] = None):
+        """Vide le cache d'un secteur (ou de tous les secteurs)"""
+        with self._cache_lock:
+            if scian_code is None:
+                self.cached_data.clear()
+            else:
+                self.cached_data.pop(scian_code, None)
+    
+    def _get_cached(self, key: str) -> Optional[Dict]:
+        """Entrée de cache encore fraîche, sinon None"""
+        entry = self.cached_data.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry['loaded_at'] > self.cache_ttl_seconds:
+            del self.cached_data[key]
+            self.cache_stats['expirations'] += 1
+            return None
+        self.cache_stats['hits'] += 1
+        return entry
+    
+    def _get_sector_entry(self, scian_code: str) -> Dict:
+        """Entrée de cache du secteur, chargée par une seule requête si absente ou expirée"""
+        with self._cache_lock:
+            entry = self._get_cached(scian_code)
+            if entry is not None:
+                return entry
+            
+            frame = self._query_incidents_by_sector(scian_code)
+            if frame is None:
+                # Un échec de requête n'est pas mis en cache
+                return {'frame': pd.DataFrame(), 'profile': None, 'loaded_at': time.monotonic()}
+            
+            entry = {'frame': frame, 'profile': None, 'loaded_at': time.monotonic()}
+            self.cached_data[scian_code] = entry
+            return entry
+    
+    def _query_incidents_by_sector(self, scian_code: str) -> Optional[pd.DataFrame]:
+        """Requête SQL du secteur et typage compact des colonnes (None si échec)"""
         if not self.connection:
             if not self.connect():
-                return pd.DataFrame()
+                return None
         
         query = """
         SELECT 
@@ -64,15 +192,28 @@ class CNESSTDataConnector:
         """
         
         try:
+            self.cache_stats['queries'] += 1
             df = pd.read_sql_query(query, self.connection, params=[f"{scian_code}%"])
             logging.info(f"✅ {len(df)} incidents secteur {scian_code} récupérés")
-            return df
+            return _type_sector_frame(df)
         except Exception as e:
             logging.error(f"❌ Erreur requête secteur {scian_code}: {e}")
-            return pd.DataFrame()
+            return None
     
     def get_regional_statistics(self) -> Dict:
-        """Statistiques par région Québec"""
+        """Statistiques par région Québec (mises en cache avec le même TTL)"""
+        with self._cache_lock:
+            entry = self._get_cached(REGIONAL_STATS_CACHE_KEY)
+            if entry is not None:
+                return entry['stats']
+            
+            stats = self._query_regional_statistics()
+            if stats:
+                self.cached_data[REGIONAL_STATS_CACHE_KEY] = {'stats': stats, 'loaded_at': time.monotonic()}
+            return stats
+    
+    def _query_regional_statistics(self) -> Dict:
+        """Requête SQL des statistiques régionales"""
         if not self.connection:
             if not self.connect():
                 return {}
@@ -91,6 +232,7 @@ class CNESSTDataConnector:
         """
         
         try:
+            self.cache_stats['queries'] += 1
             df = pd.read_sql_query(query, self.connection)
             return df.to_dict('records')
         except Exception as e:
@@ -138,14 +280,13 @@ class RealCNESSTSHAPCalculator:
         
     def calculate_baseline_risk(self, sector: str = "236") -> float:
         """Calcule risque de base pour le secteur"""
-        incidents = self.connector.get_incidents_by_sector(sector)
+        profile = self.connector.get_sector_profile(sector)
         
-        if incidents.empty:
+        if profile['sample_size'] == 0:
             return 0.23  # Fallback
         
         # Risque = incidents graves / total incidents
-        severe_incidents = incidents[incidents['severity_level'] >= 3]
-        baseline = len(severe_incidents) / len(incidents) if len(incidents) > 0 else 0.23
+        baseline = profile['baseline_risk']
         
         self.baseline_risk = baseline
         logging.info(f"📊 Risque baseline secteur {sector}: {baseline:.3f}")
@@ -155,36 +296,33 @@ class RealCNESSTSHAPCalculator:
                                  prediction_context: Dict = None) -> Dict:
         """Calcule SHAP values basées sur vraies corrélations CNESST"""
         
-        incidents = self.connector.get_incidents_by_sector(sector)
+        # Profil agrégé du secteur (même DataFrame en cache que le baseline)
+        profile = self.connector.get_sector_profile(sector)
         
-        if incidents.empty:
+        if profile['sample_size'] == 0:
             # Fallback vers simulation si pas de données
             return self._fallback_shap_values()
         
+        if self.baseline_risk is None:
+            self.baseline_risk = profile['baseline_risk']
+        
         shap_values = {}
         
         # 1. Impact âge (basé sur données réelles)
-        age_impact = self._analyze_age_correlation(incidents)
-        shap_values['age_group'] = age_impact
+        shap_values['age_group'] = self._analyze_age_correlation(profile)
         
         # 2. Impact région géographique
-        region_impact = self._analyze_region_correlation(incidents)
-        shap_values['location_region'] = region_impact
+        shap_values['location_region'] = self._analyze_region_correlation(profile)
         
         # 3. Impact temporel (saisonnalité)
-        temporal_impact = self._analyze_temporal_patterns(incidents)
-        shap_values['seasonal_factor'] = temporal_impact
+        shap_values['seasonal_factor'] = self._analyze_temporal_patterns(profile)
         
         # 4. Impact genre
-        gender_impact = self._analyze_gender_correlation(incidents)
-        shap_values['gender'] = gender_impact
+        shap_values['gender'] = self._analyze_gender_correlation(profile)
         
         # 5. Facteurs prédictifs calculés
-        equipment_impact = self._estimate_equipment_impact(incidents)
-        shap_values['equipment_condition'] = equipment_impact
-        
-        formation_impact = self._estimate_training_impact(incidents)
-        shap_values['training_level'] = formation_impact
+        shap_values['equipment_condition'] = self._estimate_equipment_impact(profile)
+        shap_values['training_level'] = self._estimate_training_impact(profile)
         
         # Normaliser valeurs SHAP (somme = prédiction - baseline)
         total_impact = sum(shap_values.values())
@@ -199,29 +337,20 @@ class RealCNESSTSHAPCalculator:
             'baseline_risk': self.baseline_risk,
             'current_prediction': current_prediction,
             'confidence': 0.92,  # Basé sur données réelles
-            'sample_size': len(incidents)
+            'sample_size': profile['sample_size']
         }
     
-    def _analyze_age_correlation(self, incidents: pd.DataFrame) -> float:
+    def _analyze_age_correlation(self, profile: Dict) -> float:
         """Analyse corrélation âge-gravité"""
-        if 'age_group' not in incidents.columns or incidents['age_group'].isna().all():
-            return 0.015  # Impact neutre
-        
-        # Calculer gravité moyenne par groupe d'âge
-        age_severity = incidents.groupby('age_group')['severity_level'].mean()
-        
         # Impact relatif groupe le plus à risque vs plus sûr
-        if len(age_severity) > 1:
-            max_severity = age_severity.max()
-            min_severity = age_severity.min()
-            impact = (max_severity - min_severity) / 10.0  # Normaliser
-            return float(impact)
+        if profile['age_severity_range'] is not None:
+            return float(profile['age_severity_range'] / 10.0)  # Normaliser
         
-        return 0.015
+        return 0.015  # Impact neutre
     
-    def _analyze_region_correlation(self, incidents: pd.DataFrame) -> float:
+    def _analyze_region_correlation(self, profile: Dict) -> float:
         """Analyse impact région géographique"""
-        if 'location_region' not in incidents.columns or incidents['location_region'].isna().all():
+        if not profile['has_region']:
             return -0.008  # Impact légèrement protecteur (régions sûres)
         
         regional_stats = self.connector.get_regional_statistics()
@@ -238,62 +367,35 @@ class RealCNESSTSHAPCalculator:
         
         return -0.008
     
-    def _analyze_temporal_patterns(self, incidents: pd.DataFrame) -> float:
+    def _analyze_temporal_patterns(self, profile: Dict) -> float:
         """Analyse patterns saisonniers"""
-        if 'date_occurred' not in incidents.columns:
-            return 0.012
-        
-        incidents['month'] = pd.to_datetime(incidents['date_occurred']).dt.month
-        monthly_severity = incidents.groupby('month')['severity_level'].mean()
-        
-        if len(monthly_severity) > 6:  # Assez de données
-            # Identifier mois les plus/moins dangereux
-            seasonal_variance = monthly_severity.std()
-            impact = float(seasonal_variance / 5.0)  # Normaliser
-            return impact
+        # Écart-type des gravités mensuelles, si plus de 6 mois observés
+        if profile['monthly_severity_std'] is not None:
+            return float(profile['monthly_severity_std'] / 5.0)  # Normaliser
         
         return 0.012
     
-    def _analyze_gender_correlation(self, incidents: pd.DataFrame) -> float:
+    def _analyze_gender_correlation(self, profile: Dict) -> float:
         """Analyse impact genre"""
-        if 'gender' not in incidents.columns or incidents['gender'].isna().all():
-            return -0.005
-        
-        gender_severity = incidents.groupby('gender')['severity_level'].mean()
-        
-        if len(gender_severity) > 1:
-            impact = float((gender_severity.max() - gender_severity.min()) / 8.0)
-            return impact
+        if profile['gender_severity_range'] is not None:
+            return float(profile['gender_severity_range'] / 8.0)
         
         return -0.005
     
-    def _estimate_equipment_impact(self, incidents: pd.DataFrame) -> float:
+    def _estimate_equipment_impact(self, profile: Dict) -> float:
         """Estime impact équipement basé sur patterns"""
         # Analyse indirecte via coûts incidents (équipement défaillant = coûts élevés)
-        if 'cost_estimate' not in incidents.columns:
-            return 0.045
-        
-        high_cost_incidents = incidents[incidents['cost_estimate'] > incidents['cost_estimate'].quantile(0.75)]
-        proportion_high_cost = len(high_cost_incidents) / len(incidents)
-        
         # Plus de coûts élevés = plus d'impact équipement
-        impact = float(proportion_high_cost * 0.08)
+        impact = float(profile['high_cost_q75_proportion'] * 0.08)
         return min(impact, 0.08)
     
-    def _estimate_training_impact(self, incidents: pd.DataFrame) -> float:
+    def _estimate_training_impact(self, profile: Dict) -> float:
         """Estime impact formation (inversement corrélé)"""
         # Estimation basée sur profil démographique
         # Jeunes travailleurs = potentiellement moins formés
-        if 'age_group' in incidents.columns:
-            young_worker_incidents = incidents[
-                incidents['age_group'].astype(str).str.contains('15-24|25-34', na=False)
-            ]
-            
-            if len(young_worker_incidents) > 0:
-                young_proportion = len(young_worker_incidents) / len(incidents)
-                # Plus de jeunes incidents = impact formation négatif (manque formation)
-                impact = -float(young_proportion * 0.06)
-                return impact
+        if profile['young_count'] > 0:
+            # Plus de jeunes incidents = impact formation négatif (manque formation)
+            return -float(profile['young_proportion'] * 0.06)
         
         return -0.025  # Impact protecteur par défaut
     
@@ -327,39 +429,34 @@ class RealCounterfactualAnalyzer:
     def generate_real_scenarios(self, sector: str = "236") -> List[Dict]:
         """Génère scénarios basés sur analyses réelles sectorielles"""
         
-        incidents = self.connector.get_incidents_by_sector(sector)
+        # Profil partagé avec le calculateur SHAP (une requête par secteur)
+        profile = self.connector.get_sector_profile(sector)
         regional_stats = self.connector.get_regional_statistics()
         
         scenarios = []
         
         # Scénario 1: Formation renforcée (basé sur profil âge réel)
-        formation_scenario = self._calculate_formation_scenario(incidents)
+        formation_scenario = self._calculate_formation_scenario(profile)
         scenarios.append(formation_scenario)
         
         # Scénario 2: Amélioration équipement (basé sur coûts incidents)
-        equipment_scenario = self._calculate_equipment_scenario(incidents)
+        equipment_scenario = self._calculate_equipment_scenario(profile)
         scenarios.append(equipment_scenario)
         
         # Scénario 3: Mesures régionales (basé sur stats géographiques)
-        regional_scenario = self._calculate_regional_scenario(incidents, regional_stats)
+        regional_scenario = self._calculate_regional_scenario(profile, regional_stats)
         scenarios.append(regional_scenario)
         
         return scenarios
     
-    def _calculate_formation_scenario(self, incidents: pd.DataFrame) -> Dict:
+    def _calculate_formation_scenario(self, profile: Dict) -> Dict:
         """Scénario formation basé sur démographie réelle"""
         
-        if incidents.empty:
+        if profile['sample_size'] == 0:
             return self._fallback_formation_scenario()
         
-        # Analyser profil âge incidents
-        young_incidents = 0
-        if 'age_group' in incidents.columns:
-            young_incidents = len(incidents[
-                incidents['age_group'].astype(str).str.contains('15-24|25-34', na=False)
-            ])
-        
-        young_proportion = young_incidents / len(incidents) if len(incidents) > 0 else 0.3
+        # Profil âge incidents
+        young_proportion = profile['young_proportion']
         
         # Impact formation proportionnel aux jeunes travailleurs
         risk_reduction = min(young_proportion * 45, 35)  # Max 35% réduction
@@ -377,21 +474,19 @@ class RealCounterfactualAnalyzer:
             'cost_estimate': investment,
             'implementation_time': '3-4 semaines',
             'roi_months': max(6, int(investment / 2000)),
-            'data_basis': f"Analysé sur {len(incidents)} incidents réels"
+            'data_basis': f"Analysé sur {profile['sample_size']} incidents réels"
         }
     
-    def _calculate_equipment_scenario(self, incidents: pd.DataFrame) -> Dict:
+    def _calculate_equipment_scenario(self, profile: Dict) -> Dict:
         """Scénario équipement basé sur coûts incidents"""
         
-        if incidents.empty or 'cost_estimate' not in incidents.columns:
+        if profile['sample_size'] == 0:
             return self._fallback_equipment_scenario()
         
-        # Analyser incidents à coûts élevés (probable défaillance équipement)
-        high_cost_threshold = incidents['cost_estimate'].quantile(0.8)
-        high_cost_incidents = incidents[incidents['cost_estimate'] > high_cost_threshold]
-        
-        high_cost_proportion = len(high_cost_incidents) / len(incidents) if len(incidents) > 0 else 0.25
-        avg_high_cost = high_cost_incidents['cost_estimate'].mean() if len(high_cost_incidents) > 0 else 50000
+        # Incidents au-delà du 80e centile des coûts (probable défaillance équipement)
+        high_cost_count = profile['high_cost_q80_count']
+        high_cost_proportion = high_cost_count / profile['sample_size']
+        avg_high_cost = profile['high_cost_q80_mean'] if high_cost_count > 0 else 50000
         
         # Impact basé sur proportion incidents coûteux
         risk_reduction = min(high_cost_proportion * 60, 40)  # Max 40%
@@ -409,10 +504,10 @@ class RealCounterfactualAnalyzer:
             'cost_estimate': investment,
             'implementation_time': '6-8 semaines',
             'roi_months': max(8, int(investment / 3000)),
-            'data_basis': f"{len(high_cost_incidents)} incidents coûteux analysés"
+            'data_basis': f"{high_cost_count} incidents coûteux analysés"
         }
     
-    def _calculate_regional_scenario(self, incidents: pd.DataFrame, 
+    def _calculate_regional_scenario(self, profile: Dict, 
                                    regional_stats: List[Dict]) -> Dict:
         """Scénario basé sur disparités régionales"""
         